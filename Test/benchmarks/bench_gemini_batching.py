@@ -0,0 +1,135 @@
+"""
+Gemini batching benchmark: API requests and rate budget used during a burst.
+
+Sends a burst of image_generator receipts / UPI screenshots through
+gemini_client.AsyncGeminiClient and a GeminiProcessor whose model is the local
+stand-in (fake_gemini, with simulated latency) and whose rate limiter holds
+--rpm requests per minute. For each batch size, reports API requests, images
+per request, images refused by the limiter (they would go to OCR), images
+answered by Gemini and their field accuracy, handler latency, and the requests
+per minute batching saves.
+
+Usage:
+  python Test/benchmarks/bench_gemini_batching.py
+  python Test/benchmarks/bench_gemini_batching.py --images 60 --burst-seconds 20 --batch-sizes 1,4,8 --rpm 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_gemini_encoder import score_analysis
+from bench_ocr_engines import write_json
+from fake_gemini import FakeGeminiModel
+from gemini_client import AsyncGeminiClient
+from image_encoder import encoded_images
+from image_generator import build_cases, parse_numbers, parse_resolutions
+from metrics import percentile
+from rate_limiter import RateLimiter
+
+REPORT_PATH = os.path.join(BENCH_DIR, "reports", "gemini_batching_report.json")
+
+
+async def run_burst(client, cases, arrivals):
+    """Submit every case at its arrival offset; returns (result, seconds) per case."""
+    start = time.perf_counter()
+
+    async def submit(case, at):
+        await asyncio.sleep(max(0.0, at - (time.perf_counter() - start)))
+        sent = time.perf_counter()
+        result = await client.analyze(case["image"])
+        return result, time.perf_counter() - sent
+
+    outcomes = await asyncio.gather(*(submit(case, at) for case, at in zip(cases, arrivals)))
+    await client.close()
+    return outcomes, time.perf_counter() - start
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--seed", type=int, default=45)
+    arg_parser.add_argument("--images", type=int, default=40)
+    arg_parser.add_argument("--burst-seconds", type=float, default=10.0, help="arrivals spread over this many seconds")
+    arg_parser.add_argument("--batch-sizes", type=parse_numbers, default=[1, 2, 4, 8])
+    arg_parser.add_argument("--window", type=float, default=0.5, help="batch collection window (seconds)")
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--rpm", type=int, default=10)
+    arg_parser.add_argument("--latency", type=float, default=1.0, help="simulated seconds per request")
+    arg_parser.add_argument("--latency-per-image", type=float, default=0.2)
+    arg_parser.add_argument("--resolutions", type=parse_resolutions, default=[(720, 1280)])
+    arg_parser.add_argument("--report", default=REPORT_PATH)
+    args = arg_parser.parse_args(argv)
+
+    from gemini_processor import GeminiProcessor
+
+    per_kind = -(-args.images // 2)
+    cases = build_cases(args.seed, per_kind, args.resolutions, [0, 6])[:args.images]
+    rng = random.Random(args.seed)
+    rng.shuffle(cases)
+    arrivals = sorted(rng.uniform(0, args.burst_seconds) for _ in cases)
+
+    print("=" * 100)
+    print(f"Gemini batching: {len(cases)} images over {args.burst_seconds:.0f}s, limiter {args.rpm} rpm,"
+          f" stand-in latency {args.latency}s + {args.latency_per_image}s/image")
+    print("=" * 100)
+    print(f"{'batch':>5} {'requests':>8} {'img/req':>7} {'limited':>7} {'gemini':>7} {'accuracy':>8}"
+          f" {'p50 s':>6} {'p95 s':>6} {'req/min':>7} {'saved/min':>9}")
+
+    report = {"images": len(cases), "args": {k: v for k, v in vars(args).items() if k != "resolutions"}, "runs": {}}
+    for batch_size in args.batch_sizes:
+        fake = FakeGeminiModel(latency=args.latency, latency_per_image=args.latency_per_image)
+        for case in cases:
+            fake.register(case, encoded_images.encode(case["image"])["data"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            gemini = GeminiProcessor.__new__(GeminiProcessor)
+            gemini.model = object()
+            gemini._init_error = None
+            gemini.rate_limiter = RateLimiter(rpm=args.rpm, rpd=0, db_path=os.path.join(tmp, "limits.db"))
+            gemini.breaker = None
+            gemini._stats_lock = threading.Lock()
+            gemini.parse_counts = {"schema": 0, "fallback": 0, "failed": 0}
+            gemini._generate_content = fake.generate_content
+            client = AsyncGeminiClient(gemini, concurrency=args.concurrency, max_queue=len(cases), timeout=120,
+                                       batch_size=batch_size, batch_window=args.window)
+            outcomes, elapsed = asyncio.run(run_burst(client, cases, arrivals))
+
+        answered = [(case, result) for case, (result, _) in zip(cases, outcomes) if not result.get("error")]
+        limited = sum(result.get("code") in ("rate_limited", "quota_cooldown") for result, _ in outcomes)
+        checks = [ok for case, result in answered for ok in score_analysis(case, result).values()]
+        latencies = [seconds for _, seconds in outcomes]
+        minutes = max(elapsed, args.burst_seconds) / 60
+        run = {
+            "requests": fake.requests,
+            "images_per_request": len(fake.uploads) / fake.requests if fake.requests else 0.0,
+            "limited": limited,
+            "answered": len(answered),
+            "field_accuracy": sum(checks) / len(checks) if checks else 0.0,
+            "p50_s": percentile(latencies, 0.5),
+            "p95_s": percentile(latencies, 0.95),
+            "requests_per_minute": fake.requests / minutes,
+            # Each answered image would have been its own request without batching.
+            "saved_per_minute": (len(answered) - fake.requests) / minutes,
+            "client": client.stats(),
+        }
+        report["runs"][str(batch_size)] = run
+        print(f"{batch_size:5} {run['requests']:8} {run['images_per_request']:7.1f} {limited:7}"
+              f" {len(answered) / len(cases):7.0%} {run['field_accuracy']:8.0%} {run['p50_s']:6.1f}"
+              f" {run['p95_s']:6.1f} {run['requests_per_minute']:7.1f} {run['saved_per_minute']:9.1f}")
+
+    write_json(args.report, json.loads(json.dumps(report, default=str)))
+    print(f"report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Gemini upload encoding benchmark: payload size against field accuracy.
+
+For image_generator receipts and UPI screenshots, encodes every image with each
+image_encoder setting, sends it to the local Gemini stand-in (fake_gemini) and
+reports encode time, upload bytes, approximate image tokens, upload time at
+--uplink-kbps, and field accuracy of the normalized GeminiProcessor output
+(receipt total/subtotal/items, UPI amount/to/from/transaction id). With
+--reader <engine> the stand-in reads uploads with an installed OCR engine;
+otherwise it only checks that text stayed large enough to read.
+
+Usage:
+  python Test/benchmarks/bench_gemini_encoder.py
+  python Test/benchmarks/bench_gemini_encoder.py --count 3 --resolutions 3000x4000 --reader tesseract
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_ocr_engines import load_engines, write_json
+from fake_gemini import FakeGeminiModel
+from image_encoder import encode_image
+from image_generator import NOISE_LEVELS, RESOLUTIONS, build_cases, parse_numbers, parse_resolutions
+from metrics import percentile
+from nlp_processor import ExpenseParser
+
+REPORT_PATH = os.path.join(BENCH_DIR, "reports", "gemini_encoder_report.json")
+
+SETTINGS = [
+    ("original", None),
+    ("jpeg 1536 q80 (default)", dict()),
+    ("webp 1536 q80", dict(image_format="webp")),
+    ("jpeg 1536 q80 colour", dict(grayscale=False)),
+    ("jpeg 1024 q70", dict(max_side=1024, quality=70)),
+    ("jpeg 768 q60", dict(max_side=768, quality=60)),
+    ("jpeg 512 q60", dict(max_side=512, quality=60)),
+]
+
+
+def _close(value, expected):
+    try:
+        return value is not None and abs(float(value) - float(expected)) < 0.01
+    except (TypeError, ValueError):
+        return False
+
+
+def score_analysis(case, data):
+    """Field name -> bool for one normalized Gemini answer."""
+    if case["kind"] == "receipt":
+        found = " ".join(str(item.get("name") or "") for item in data.get("items") or []).lower()
+        return {
+            "total": _close(data.get("final_amount"), case["total"]),
+            "subtotal": _close(data.get("subtotal"), case["subtotal"]),
+            "items": all(item["name"].lower() in found for item in case["items"]),
+        }
+    return {
+        "amount": _close(data.get("amount"), case["amount"]),
+        "to": bool(data.get("upi_to")) and case["to"].lower() in data["upi_to"].lower(),
+        "from": bool(data.get("upi_from")) and case["from"].lower() in data["upi_from"].lower(),
+        "upi_transaction_id": data.get("upi_transaction_id") == case["upi_transaction_id"],
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--seed", type=int, default=43)
+    arg_parser.add_argument("--count", type=int, default=2, help="images per kind x resolution x noise")
+    arg_parser.add_argument("--resolutions", type=parse_resolutions, default=RESOLUTIONS)
+    arg_parser.add_argument("--noise", type=parse_numbers, default=NOISE_LEVELS)
+    arg_parser.add_argument("--uplink-kbps", type=float, default=2000, help="upload bandwidth for the upload-time column")
+    arg_parser.add_argument("--reader", help="OCR engine the stand-in reads uploads with (tesseract, easyocr, ...)")
+    arg_parser.add_argument("--report", default=REPORT_PATH)
+    args = arg_parser.parse_args(argv)
+
+    from gemini_processor import GeminiReceipt
+    from main import _extract_upi_details
+
+    parser = ExpenseParser()
+    reader = None
+    if args.reader:
+        engines, missing = load_engines([args.reader])
+        if args.reader in engines:
+            reader = engines[args.reader].extract_text_from_image
+        else:
+            print(f"[SKIP] reader {args.reader}: {missing.get(args.reader)}; using the text-size check")
+
+    fake = FakeGeminiModel(reader, parser, _extract_upi_details)
+    cases = build_cases(args.seed, args.count, args.resolutions, args.noise)
+
+    print("=" * 96)
+    print(f"Gemini upload encoding: {len(cases)} synthetic images, stand-in reads by {args.reader if reader else 'text size'}")
+    print("=" * 96)
+    print(f"{'setting':24} {'encode ms':>9} {'KiB':>7} {'ratio':>6} {'tokens':>7} {'upload ms':>9}  accuracy")
+
+    report = {"cases": len(cases), "reader": args.reader if reader else None, "settings": {}}
+    original_bytes = sum(len(case["image"]) for case in cases)
+    for name, options in SETTINGS:
+        encode_seconds, sizes, tokens, fields = [], [], [], {}
+        for case in cases:
+            start = time.perf_counter()
+            if options is None:
+                blob = {"mime_type": "image/jpeg", "data": case["image"]}
+            else:
+                encoded = encode_image(case["image"], **options)
+                blob = {"mime_type": encoded["mime_type"], "data": encoded["data"]}
+            encode_seconds.append(time.perf_counter() - start)
+
+            fake.expect(case)
+            response = fake.generate_content(["prompt", blob])
+            data = GeminiReceipt(json.loads(response.text)).as_dict()
+            sizes.append(fake.uploads[-1]["bytes"])
+            tokens.append(fake.uploads[-1]["tokens"])
+            for field, ok in score_analysis(case, data).items():
+                fields.setdefault(field, []).append(ok)
+
+        accuracy = {field: sum(values) / len(values) for field, values in fields.items()}
+        summary = {
+            "encode_p50_ms": percentile(encode_seconds, 0.5) * 1000,
+            "encode_p95_ms": percentile(encode_seconds, 0.95) * 1000,
+            "mean_bytes": sum(sizes) / len(sizes),
+            "byte_ratio": sum(sizes) / original_bytes,
+            "mean_tokens": sum(tokens) / len(tokens),
+            "mean_upload_ms": sum(sizes) / len(sizes) * 8 / args.uplink_kbps,
+            "accuracy": accuracy,
+        }
+        report["settings"][name] = summary
+        print(f"{name:24} {summary['encode_p50_ms']:9.1f} {summary['mean_bytes'] / 1024:7.0f}"
+              f" {summary['byte_ratio']:6.0%} {summary['mean_tokens']:7.0f} {summary['mean_upload_ms']:9.0f}  "
+              + " ".join(f"{field} {value:.0%}" for field, value in accuracy.items()))
+
+    write_json(args.report, report)
+    print(f"report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
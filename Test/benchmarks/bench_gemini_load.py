@@ -0,0 +1,250 @@
+"""
+Gemini load generator: main.handle_screenshot under concurrent traffic, offline.
+
+A real GeminiProcessor (model candidates, rate limiter, circuit breaker) runs
+against fake_gemini.FakeGenai, behind main's AsyncGeminiClient, and screenshots
+(image_generator receipts / UPI screens) arrive as a Poisson stream of
+--rate per second. Each scenario changes what the stand-in does:
+  healthy        answers with --latency
+  quota          --rate-429 of requests answer 429 (shared cooldown, OCR fallback)
+  quota_exhausted  after --quota-after requests every model answers 429
+                 (shared cooldown: later images skip the API)
+  missing_model  the first candidate model answers 404 (blocked, next model used)
+  outage         --rate-503 of requests fail (circuit breaker opens)
+  slow           heavy-tailed latency (queue wait and client timeouts)
+Reports handler latency, updates per second, the share answered by Gemini,
+why the rest fell back to OCR, API requests / injected errors, rate-limiter
+refusals, the breaker state and gemini_calls accounting (tokens, request bytes).
+
+Usage:
+  python Test/benchmarks/bench_gemini_load.py
+  python Test/benchmarks/bench_gemini_load.py --images 60 --rate 4 --scenarios healthy,quota --rpm 30
+"""
+import argparse
+import asyncio
+import contextvars
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_ocr_engines import _Bot, _Context, _Photo, _Update, write_json
+from fake_gemini import FakeGeminiModel, FakeGenai, install, parse_latency
+from image_encoder import encoded_images
+from image_generator import build_cases, parse_resolutions
+from metrics import percentile
+
+REPORT_PATH = os.path.join(BENCH_DIR, "reports", "gemini_load_report.json")
+
+SCENARIOS = {
+    "healthy": {},
+    "quota": {"rate_429": None},
+    "quota_exhausted": {"quota_after": None},
+    "missing_model": {"missing_models": ["gemini-2.5-flash"]},
+    "outage": {"rate_503": None},
+    "slow": {"latency": "lognormal:6,0.8"},
+}
+
+_update_index = contextvars.ContextVar("update_index", default=None)
+
+
+def scenario_options(name, args):
+    """FakeGeminiModel keyword arguments for a scenario."""
+    options = {"latency": args.latency, "rate_429": 0.0, "rate_503": 0.0, "quota_after": -1, "missing_models": ()}
+    options.update(SCENARIOS[name])
+    if options["quota_after"] is None:
+        options["quota_after"] = args.quota_after
+    if options["rate_429"] is None:
+        options["rate_429"] = args.rate_429
+    if options["rate_503"] is None:
+        options["rate_503"] = args.rate_503
+    return options
+
+
+async def run_scenario(bot_main, name, cases, arrivals, args, tmp):
+    """One traffic run through main.handle_screenshot; returns the scenario's report dict."""
+    import gemini_processor
+    from gemini_calls import GeminiCallLog
+    from gemini_client import AsyncGeminiClient
+    from gemini_processor import GeminiProcessor
+    from rate_limiter import RateLimiter
+    from result_cache import ResultCache
+
+    options = scenario_options(name, args)
+    fake = FakeGeminiModel(
+        latency=parse_latency(options["latency"], args.seed),
+        rate_429=options["rate_429"],
+        rate_503=options["rate_503"],
+        quota_after=options["quota_after"] if options["quota_after"] >= 0 else None,
+        missing_models=options["missing_models"],
+        seed=args.seed,
+    )
+    for case in cases:
+        fake.register(case, encoded_images.encode(case["image"])["data"])
+
+    db_path = os.path.join(tmp, f"{name}_expenses.db")
+    bot_main.db.db_path = db_path
+    bot_main.db.init_db()
+    bot_main.result_cache = ResultCache(db_path=os.path.join(tmp, f"{name}_cache.db"))
+    bot_main.ocr_orchestrator.cache = bot_main.result_cache
+
+    calls = {}
+    analyze = bot_main._analyze_with_gemini
+
+    async def recorded(*call_args, **call_kwargs):
+        result = await analyze(*call_args, **call_kwargs)
+        code = "ok" if result and not result.get("error") else (result or {}).get("code", "unknown_error")
+        calls.setdefault(_update_index.get(), []).append(code)
+        return result
+
+    images = {_Photo(index).file_id: case["image"] for index, case in enumerate(cases)}
+    context = _Context(_Bot(images))
+    updates = [_Update(index) for index in range(len(cases))]
+
+    async def run_all(client):
+        start = time.perf_counter()
+
+        async def submit(index, at):
+            await asyncio.sleep(max(0.0, at - (time.perf_counter() - start)))
+            _update_index.set(index)
+            sent = time.perf_counter()
+            await bot_main.handle_screenshot(updates[index], context)
+            return time.perf_counter() - sent
+
+        seconds = await asyncio.gather(*(submit(index, at) for index, at in enumerate(arrivals)))
+        elapsed = time.perf_counter() - start
+        await client.close()
+        return seconds, elapsed
+
+    call_log = GeminiCallLog(path=os.path.join(tmp, f"{name}_calls.jsonl"), flush_seconds=3600)
+    shared_log, gemini_processor.gemini_calls = gemini_processor.gemini_calls, call_log
+    with install(FakeGenai(fake)):
+        gemini = GeminiProcessor(
+            rate_limiter=RateLimiter(rpm=args.rpm, rpd=args.rpd, db_path=os.path.join(tmp, f"{name}_limits.db")),
+            model_cache_path=os.path.join(tmp, f"{name}_models.json"),
+        )
+        gemini.hedge = args.hedge
+        client = AsyncGeminiClient(gemini, concurrency=args.concurrency, max_queue=args.max_queue,
+                                   timeout=args.timeout, batch_size=args.batch_size)
+        bot_main.gemini, bot_main.gemini_client = gemini, client
+        bot_main._analyze_with_gemini = recorded
+        try:
+            seconds, elapsed = await run_all(client)
+        finally:
+            bot_main._analyze_with_gemini = analyze
+            gemini_processor.gemini_calls = shared_log
+            if gemini._refresh_thread:
+                gemini._refresh_thread.join(5)
+
+    answered = sum("ok" in codes for codes in calls.values())
+    fallback = {}
+    for index in range(len(cases)):
+        codes = calls.get(index) or ["not_called"]
+        if "ok" not in codes:
+            fallback[codes[0]] = fallback.get(codes[0], 0) + 1
+    conn = sqlite3.connect(db_path)
+    saved = conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+    conn.close()
+    limiter = gemini.rate_limiter.stats()
+    return {
+        "options": {key: value for key, value in options.items() if key != "missing_models"},
+        "p50_s": percentile(seconds, 0.5),
+        "p95_s": percentile(seconds, 0.95),
+        "max_s": max(seconds),
+        "elapsed_s": elapsed,
+        "updates_per_second": len(cases) / elapsed,
+        "gemini_answered": answered,
+        "fallback": fallback,
+        "gemini_calls": sum(len(codes) for codes in calls.values()),
+        "api_requests": dict(fake.by_model),
+        "injected_errors": dict(fake.errors),
+        "limited": dict(limiter["limited"]),
+        "cooldown_seconds": limiter.get("cooldown_seconds", 0.0),
+        "breaker": gemini.breaker.stats(),
+        "client": client.stats(),
+        "processor": {key: value for key, value in gemini.stats().items() if key != "latency"},
+        "accounting": call_log.summary(),
+        "expenses_saved": saved,
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--seed", type=int, default=48)
+    arg_parser.add_argument("--images", type=int, default=40)
+    arg_parser.add_argument("--rate", type=float, default=4.0, help="screenshots per second (Poisson arrivals)")
+    arg_parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    arg_parser.add_argument("--latency", default="lognormal:0.8,0.4", help="stand-in latency (see fake_gemini.parse_latency)")
+    arg_parser.add_argument("--rate-429", type=float, default=0.15)
+    arg_parser.add_argument("--rate-503", type=float, default=0.8)
+    arg_parser.add_argument("--quota-after", type=int, default=10)
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--max-queue", type=int, default=32)
+    arg_parser.add_argument("--timeout", type=float, default=10.0, help="client deadline per request (seconds)")
+    arg_parser.add_argument("--batch-size", type=int, default=1)
+    arg_parser.add_argument("--hedge", action="store_true")
+    arg_parser.add_argument("--rpm", type=int, default=60)
+    arg_parser.add_argument("--rpd", type=int, default=0)
+    arg_parser.add_argument("--resolutions", type=parse_resolutions, default=[(720, 1280)])
+    arg_parser.add_argument("--report", default=REPORT_PATH)
+    args = arg_parser.parse_args(argv)
+
+    import logging
+    import main as bot_main
+
+    logging.disable(logging.ERROR)
+    per_kind = -(-args.images // 2)
+    cases = build_cases(args.seed, per_kind, args.resolutions, [0])[:args.images]
+    rng = random.Random(args.seed)
+    rng.shuffle(cases)
+    arrivals, at = [], 0.0
+    for _ in cases:
+        at += rng.expovariate(args.rate)
+        arrivals.append(at)
+
+    print("=" * 114)
+    print(f"Gemini load: {len(cases)} screenshots at {args.rate}/s through main.handle_screenshot,"
+          f" concurrency {args.concurrency}, limiter {args.rpm} rpm")
+    print("=" * 114)
+    print(f"{'scenario':16} {'p50 s':>6} {'p95 s':>6} {'upd/s':>6} {'gemini':>7} {'requests':>8} {'errors':>14}"
+          f" {'limited':>8} {'breaker':>9}  fallback reasons")
+
+    report = {"images": len(cases), "args": {k: v for k, v in vars(args).items() if k != "resolutions"},
+              "scenarios": {}}
+    async def run_scenarios(tmp):
+        # Same start-up as the bot: unusable OCR engines are found once and skipped.
+        bot_main.ocr_service.start_warmup(bot_main.ocr_orchestrator.engines)
+        await bot_main.ocr_service.wait_ready(bot_main.ocr_orchestrator.engines, 600)
+        for name in [item.strip() for item in args.scenarios.split(",") if item.strip()]:
+            run = await run_scenario(bot_main, name, cases, arrivals, args, tmp)
+            report["scenarios"][name] = run
+            errors = ",".join(f"{code}:{count}" for code, count in sorted(run["injected_errors"].items())) or "-"
+            limited = sum(run["limited"].values())
+            reasons = ", ".join(f"{code} {count}" for code, count in sorted(run["fallback"].items())) or "-"
+            print(f"{name:16} {run['p50_s']:6.2f} {run['p95_s']:6.2f} {run['updates_per_second']:6.2f}"
+                  f" {run['gemini_answered'] / len(cases):7.0%} {sum(run['api_requests'].values()):8}"
+                  f" {errors:>14} {limited:8} {run['breaker']['state']:>9}  {reasons}")
+
+    original = (bot_main.db.db_path, bot_main.result_cache, bot_main.gemini, bot_main.gemini_client)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(run_scenarios(tmp))
+    finally:
+        bot_main.db.db_path, bot_main.result_cache, bot_main.gemini, bot_main.gemini_client = original
+        bot_main.ocr_orchestrator.cache = bot_main.result_cache
+        bot_main.ocr_service.shutdown()
+        logging.disable(logging.NOTSET)
+
+    write_json(args.report, report)
+    print(f"report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
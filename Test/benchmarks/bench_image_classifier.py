@@ -0,0 +1,117 @@
+"""
+Receipt-vs-UPI routing benchmark.
+
+Classifies image_generator cases (receipt photos and UPI screenshots at several
+resolutions and noise levels) with image_classifier and reports the misroute
+rate (image sent down the wrong path), how many images were left unsure, and
+the classifier latency. With --engine, unsure images get the thumbnail OCR pass
+as in the bot.
+
+Usage:
+  python Test/benchmarks/bench_image_classifier.py
+  python Test/benchmarks/bench_image_classifier.py --count 5 --engine easyocr
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_ocr_engines import write_json
+from image_classifier import route_image
+from image_generator import NOISE_LEVELS, RESOLUTIONS, build_cases, parse_numbers, parse_resolutions
+from metrics import percentile
+
+REPORT_PATH = os.path.join(BENCH_DIR, "reports", "image_classifier_report.json")
+
+
+def thumbnail_reader(name):
+    """async bytes -> text for the requested OCR engine, or None if it cannot run here."""
+    if not name:
+        return None
+    from ocr_config import get_ocr_processor
+
+    try:
+        processor = get_ocr_processor(name)
+    except Exception:
+        return None
+    if processor is None or not processor.is_ready():
+        return None
+
+    async def read_text(image):
+        return processor.extract_text_from_image(image)
+
+    return read_text
+
+
+def route_cases(cases, read_text=None):
+    rows = []
+    for case in cases:
+        start = time.perf_counter()
+        route = asyncio.run(route_image(case["image"], "", read_text))
+        rows.append({
+            "kind": case["kind"],
+            "resolution": case["resolution"],
+            "noise": case["noise"],
+            "routed": route["kind"],
+            "confident": route["confident"],
+            "score": route["score"],
+            "seconds": time.perf_counter() - start,
+        })
+    return rows
+
+
+def summarize(rows):
+    latencies = [row["seconds"] for row in rows]
+    return {
+        "cases": len(rows),
+        "misroute_rate": sum(row["routed"] != row["kind"] for row in rows) / len(rows) if rows else 0.0,
+        "unsure_rate": sum(not row["confident"] for row in rows) / len(rows) if rows else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--seed", type=int, default=39)
+    arg_parser.add_argument("--count", type=int, default=3, help="cases per kind x resolution x noise")
+    arg_parser.add_argument("--resolutions", type=parse_resolutions, default=RESOLUTIONS)
+    arg_parser.add_argument("--noise", type=parse_numbers, default=NOISE_LEVELS)
+    arg_parser.add_argument("--engine", default="", help="OCR engine for the thumbnail pass (e.g. easyocr)")
+    arg_parser.add_argument("--report", default=REPORT_PATH)
+    args = arg_parser.parse_args(argv)
+
+    cases = build_cases(args.seed, args.count, args.resolutions, args.noise)
+    read_text = thumbnail_reader(args.engine)
+    if args.engine and read_text is None:
+        print(f"[SKIP] thumbnail OCR: {args.engine} not available")
+    rows = route_cases(cases, read_text)
+
+    print("=" * 72)
+    print(f"Image routing benchmark: {len(cases)} synthetic images")
+    print("=" * 72)
+    print(f"{'kind':8} {'resolution':>10} {'noise':5} {'misroute':>9} {'unsure':>7} {'p50 ms':>7} {'p95 ms':>7}")
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["kind"], row["resolution"], row["noise"]), []).append(row)
+    for (kind, resolution, noise), group in sorted(groups.items()):
+        summary = summarize(group)
+        print(f"{kind:8} {resolution:>10} n{noise:<4} {summary['misroute_rate']:9.0%} {summary['unsure_rate']:7.0%}"
+              f" {summary['p50_ms']:7.1f} {summary['p95_ms']:7.1f}")
+
+    overall = summarize(rows)
+    print("-" * 72)
+    print(f"overall misroute {overall['misroute_rate']:.1%}, unsure {overall['unsure_rate']:.1%},"
+          f" p50 {overall['p50_ms']:.1f} ms, p95 {overall['p95_ms']:.1f} ms")
+    write_json(args.report, {"overall": overall, "thumbnail_ocr": bool(read_text), "rows": rows})
+    print(f"report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
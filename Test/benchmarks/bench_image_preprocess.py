@@ -0,0 +1,129 @@
+"""
+OCR preprocessing benchmark: latency / accuracy trade-off per setting.
+
+Renders synthetic receipt photos (image_generator receipts on a noisy,
+slightly rotated 3000x4000 phone-camera canvas), runs each preprocessing
+setting from image_preprocess.preprocess_image, and reports preprocessing time,
+output pixels and, when an OCR engine is installed, OCR time and accuracy
+(character similarity to the rendered text, and whether the bill total was
+read correctly).
+
+Usage:
+  python Test/benchmarks/bench_image_preprocess.py
+  python Test/benchmarks/bench_image_preprocess.py --images 5 --engine tesseract
+"""
+import argparse
+import difflib
+import io
+import os
+import random
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np
+from PIL import Image
+
+from image_generator import receipt_truth, render_receipt, to_jpeg
+from image_preprocess import preprocess_image
+
+SETTINGS = [
+    ("raw", None),
+    ("gray", dict(target_text_height=0, max_side=0, binarize=False, crop=False, deskew=False)),
+    ("downscale 48px", dict(target_text_height=48, binarize=False, crop=False, deskew=False)),
+    ("downscale 32px", dict(target_text_height=32, binarize=False, crop=False, deskew=False)),
+    ("downscale 20px", dict(target_text_height=20, binarize=False, crop=False, deskew=False)),
+    ("32px + binarize", dict(target_text_height=32, binarize=True, crop=False, deskew=False)),
+    ("32px + bin + crop", dict(target_text_height=32, binarize=True, crop=True, deskew=False)),
+    ("full (default)", dict()),
+]
+
+
+def ocr_engine(name):
+    """Return an image -> text function for the requested engine, or None if unavailable."""
+    if name == "tesseract":
+        try:
+            import pytesseract
+            pytesseract.get_tesseract_version()
+        except Exception:
+            return None
+        return lambda image: pytesseract.image_to_string(image)
+    if name == "easyocr":
+        try:
+            import easyocr
+        except ImportError:
+            return None
+        reader = easyocr.Reader(["en"], gpu=False)
+        return lambda image: "\n".join(item[1] for item in reader.readtext(np.asarray(image)))
+    return None
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+def _total(text):
+    """Amount on the last total line (after any Subtotal)."""
+    matches = re.findall(r"(?:total|net amount)\W*(?:rs\.?|inr|₹)?\s*([\d,]+\.\d{2})", text or "", re.IGNORECASE)
+    return matches[-1].replace(",", "") if matches else None
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--images", type=int, default=4)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=34)
+    arg_parser.add_argument("--engine", choices=["tesseract", "easyocr"], default="tesseract")
+    args = arg_parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    texts = [receipt_truth(rng)["text"] for _ in range(args.images)]
+    images = [to_jpeg(render_receipt(rng, text, (3000, 4000), 6)) for text in texts]
+    ocr = ocr_engine(args.engine)
+
+    print("=" * 78)
+    print(f"OCR preprocessing ({args.images} synthetic receipts, engine: {args.engine if ocr else 'not installed'})")
+    print("=" * 78)
+    print(f"{'setting':20} {'prep ms':>8} {'Mpixels':>8} {'ocr ms':>8} {'similarity':>10} {'totals':>7}")
+
+    for name, options in SETTINGS:
+        prep_times, pixels, ocr_times, similarity, totals = [], [], [], [], 0
+        for text, image_bytes in zip(texts, images):
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                if options is None:
+                    prepared = Image.open(io.BytesIO(image_bytes))
+                    prepared.load()
+                else:
+                    prepared = preprocess_image(image_bytes, **options)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            prep_times.append(best)
+            pixels.append(prepared.width * prepared.height)
+
+            if ocr:
+                start = time.perf_counter()
+                read = ocr(prepared)
+                ocr_times.append(time.perf_counter() - start)
+                similarity.append(difflib.SequenceMatcher(None, _normalize(text), _normalize(read)).ratio())
+                totals += _total(read) == _total(text)
+
+        line = f"{name:20} {np.mean(prep_times) * 1000:8.1f} {np.mean(pixels) / 1e6:8.2f}"
+        if ocr:
+            line += f" {np.mean(ocr_times) * 1000:8.0f} {np.mean(similarity):10.3f} {totals:4}/{len(texts)}"
+        else:
+            line += f" {'n/a':>8} {'n/a':>10} {'n/a':>7}"
+        print(line)
+
+    if not ocr:
+        print(f"[INFO] {args.engine} not available: only preprocessing latency and pixel counts measured")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
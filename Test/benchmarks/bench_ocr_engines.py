@@ -0,0 +1,315 @@
+"""
+OCR engine benchmark on synthetic receipts and UPI screenshots.
+
+For every engine in ocr_config.OCR_METHODS that can run here, extracts text
+from image_generator cases (several resolutions and noise levels) and reports
+latency (p50/p95), peak Python memory, process RSS and field-level accuracy:
+  receipt  total, subtotal, item recall    (ExpenseParser.analyze_receipt)
+  upi      amount, to, from, transaction id (main._extract_upi_details)
+With --handler it also drives main.handle_screenshot end to end (Gemini off,
+temporary database and result cache) and scores the saved expense rows.
+
+Usage:
+  python Test/benchmarks/bench_ocr_engines.py
+  python Test/benchmarks/bench_ocr_engines.py --count 3 --resolutions 1080x2400 --noise 0,10 --handler
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(os.path.dirname(BENCH_DIR))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from image_generator import NOISE_LEVELS, RESOLUTIONS, build_cases, parse_numbers, parse_resolutions
+from metrics import percentile
+from nlp_processor import ExpenseParser
+
+REPORT_PATH = os.path.join(BENCH_DIR, "reports", "ocr_engines_report.json")
+
+
+def _close(value, expected):
+    try:
+        return value is not None and abs(float(value) - float(expected)) < 0.01
+    except (TypeError, ValueError):
+        return False
+
+
+def _same_text(value, expected):
+    return bool(value) and expected.lower() in str(value).lower()
+
+
+def score_text(case, text, parser, upi_details):
+    """Field name -> bool for one OCR reading."""
+    if case["kind"] == "receipt":
+        analysis = parser.analyze_receipt(text or "")
+        found = " ".join(str(item.get("name") or item.get("description") or "") for item in analysis.get("items") or [])
+        found = (found + " " + (text or "")).lower()
+        recall = sum(item["name"].lower() in found for item in case["items"]) / len(case["items"])
+        totals = parser.extract_bill_totals(text or "")
+        return {
+            "total": _close(analysis.get("final_amount"), case["total"])
+            or _close(totals.get("grand_total"), case["total"]),
+            "subtotal": _close(analysis.get("subtotal"), case["subtotal"]),
+            "items": recall >= 0.999,
+        }
+    details = upi_details(text or "", "")
+    return {
+        "amount": _close(details.get("amount"), case["amount"]),
+        "to": _same_text(details.get("to"), case["to"]),
+        "from": _same_text(details.get("from"), case["from"]),
+        "upi_transaction_id": details.get("upi_transaction_id") == case["upi_transaction_id"],
+    }
+
+
+def load_engines(names):
+    """name -> processor for engines that can run here, name -> reason otherwise."""
+    from ocr_config import get_ocr_processor
+
+    ready, missing = {}, {}
+    for name in names:
+        try:
+            processor = get_ocr_processor(name)
+        except Exception as e:
+            missing[name] = str(e)
+            continue
+        if processor is None or not processor.is_ready():
+            missing[name] = "not installed / not initialized"
+        else:
+            ready[name] = processor
+    return ready, missing
+
+
+def summarize(rows):
+    """Aggregate per-case rows into latency, memory and accuracy per field."""
+    latencies = [row["seconds"] for row in rows]
+    fields = {}
+    for row in rows:
+        for field, ok in row["fields"].items():
+            fields.setdefault(field, []).append(ok)
+    return {
+        "cases": len(rows),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "peak_kib": max((row.get("peak_bytes", 0) for row in rows), default=0) / 1024,
+        "accuracy": {field: sum(values) / len(values) for field, values in fields.items()},
+    }
+
+
+def bench_engine(processor, cases, parser, upi_details):
+    rows = []
+    for case in cases:
+        tracemalloc.start()
+        start = time.perf_counter()
+        text = processor.extract_text_from_image(case["image"])
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append({"kind": case["kind"], "resolution": case["resolution"], "noise": case["noise"],
+                     "seconds": seconds, "peak_bytes": peak,
+                     "fields": score_text(case, text, parser, upi_details)})
+    return rows
+
+
+class _Photo:
+    def __init__(self, index):
+        self.file_id = f"bench-{index}"
+        self.file_unique_id = f"bench-unique-{index}"
+
+
+class _File:
+    def __init__(self, data):
+        self.data = data
+
+    async def download_as_bytearray(self):
+        return bytearray(self.data)
+
+
+class _Bot:
+    def __init__(self, images):
+        self.images = images
+
+    async def get_file(self, file_id):
+        return _File(self.images[file_id])
+
+
+class _Message:
+    def __init__(self, index):
+        self.photo = [_Photo(index)]
+        self.caption = ""
+        self.message_id = index
+        self.media_group_id = None
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class _User:
+    id = 424242
+    username = "bench"
+    first_name = "Bench"
+
+
+class _Chat:
+    id = 424242
+
+
+class _Update:
+    def __init__(self, index):
+        self.message = _Message(index)
+        self.effective_user = _User()
+        self.effective_chat = _Chat()
+
+
+class _Context:
+    def __init__(self, bot):
+        self.bot = bot
+
+
+def bench_handler(cases):
+    """Drive main.handle_screenshot per case and score the rows it saved."""
+    import main as bot_main
+    from result_cache import ResultCache
+
+    handle, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    handle, cache_path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    bot_main.db.db_path = db_path
+    bot_main.db.init_db()
+    bot_main.result_cache = ResultCache(db_path=cache_path)
+    bot_main.ocr_orchestrator.cache = bot_main.result_cache
+    bot_main.gemini = None
+
+    images = {_Photo(index).file_id: case["image"] for index, case in enumerate(cases)}
+    context = _Context(_Bot(images))
+    rows = []
+
+    async def run_all():
+        # Same start-up as the bot: models load first, unusable engines are skipped.
+        bot_main.ocr_service.start_warmup(bot_main.ocr_orchestrator.engines)
+        for engine in bot_main.ocr_orchestrator.engines:
+            await bot_main.ocr_service.wait_ready([engine], 600)
+        for index, case in enumerate(cases):
+            conn = sqlite3.connect(db_path)
+            before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM expenses").fetchone()[0]
+            conn.close()
+
+            start = time.perf_counter()
+            await bot_main.handle_screenshot(_Update(index), context)
+            seconds = time.perf_counter() - start
+
+            conn = sqlite3.connect(db_path)
+            saved = conn.execute(
+                "SELECT amount, description, transaction_id, upi_to, upi_from FROM expenses WHERE id > ?",
+                (before,),
+            ).fetchall()
+            conn.close()
+
+            if case["kind"] == "receipt":
+                fields = {
+                    "total": any(_close(amount, case["total"]) for amount, description, *_ in saved
+                                 if description.startswith("Bill ")),
+                    "items": all(any(item["name"].lower() in (description or "").lower() for _, description, *_ in saved)
+                                 for item in case["items"]),
+                }
+            else:
+                upi = [row for row in saved if row[2] or row[3]] or saved
+                first = upi[0] if upi else (None, None, None, None, None)
+                fields = {
+                    "amount": _close(first[0], case["amount"]),
+                    "to": _same_text(first[3], case["to"]),
+                    "from": _same_text(first[4], case["from"]),
+                    "upi_transaction_id": first[2] == case["upi_transaction_id"],
+                }
+            rows.append({"kind": case["kind"], "resolution": case["resolution"], "noise": case["noise"],
+                         "seconds": seconds, "fields": fields})
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        bot_main.ocr_service.shutdown()
+        os.remove(db_path)
+        os.remove(cache_path)
+    return rows
+
+
+def print_table(name, rows):
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["kind"], row["resolution"], row["noise"]), []).append(row)
+    for (kind, resolution, noise), group in sorted(groups.items()):
+        summary = summarize(group)
+        accuracy = "  ".join(f"{field} {value:4.0%}" for field, value in summary["accuracy"].items())
+        print(f"{name:12} {kind:8} {resolution:>10} n{noise:<3} {summary['p50_ms']:8.0f} {summary['p95_ms']:8.0f}"
+              f" {summary['peak_kib']:9.0f}  {accuracy}")
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+
+def main(argv=None):
+    from ocr_config import OCR_METHODS
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--seed", type=int, default=37)
+    arg_parser.add_argument("--count", type=int, default=2, help="cases per kind x resolution x noise")
+    arg_parser.add_argument("--resolutions", type=parse_resolutions, default=RESOLUTIONS)
+    arg_parser.add_argument("--noise", type=parse_numbers, default=NOISE_LEVELS)
+    arg_parser.add_argument("--engines", default=",".join(OCR_METHODS))
+    arg_parser.add_argument("--handler", action="store_true", help="also run main.handle_screenshot end to end")
+    arg_parser.add_argument("--report", default=REPORT_PATH)
+    args = arg_parser.parse_args(argv)
+
+    from main import _extract_upi_details
+
+    cases = build_cases(args.seed, args.count, args.resolutions, args.noise)
+    parser = ExpenseParser()
+    engines, missing = load_engines([name.strip() for name in args.engines.split(",") if name.strip()])
+
+    print("=" * 96)
+    print(f"OCR engine benchmark: {len(cases)} synthetic images")
+    print("=" * 96)
+    print(f"{'engine':12} {'kind':8} {'resolution':>10} {'noise':5} {'p50 ms':>7} {'p95 ms':>8} {'peak KiB':>9}  accuracy")
+
+    # Ground truth text through the parsers: the accuracy ceiling for any engine.
+    report = {"cases": len(cases), "engines": {}, "missing": missing}
+    ceiling = [{"kind": c["kind"], "resolution": c["resolution"], "noise": c["noise"], "seconds": 0.0,
+                "fields": score_text(c, c["text"], parser, _extract_upi_details)} for c in cases]
+    print_table("ground-truth", ceiling)
+    report["ground_truth"] = summarize(ceiling)
+
+    for name, processor in engines.items():
+        rows = bench_engine(processor, cases, parser, _extract_upi_details)
+        print_table(name, rows)
+        report["engines"][name] = {"overall": summarize(rows), "rows": rows}
+
+    if args.handler:
+        rows = bench_handler(cases)
+        print_table("screenshot", rows)
+        report["handle_screenshot"] = {"overall": summarize(rows), "rows": rows}
+
+    report["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for name, reason in missing.items():
+        print(f"[SKIP] {name}: {reason}")
+    print(f"max RSS: {report['max_rss_kib'] / 1024:.0f} MiB")
+    write_json(args.report, report)
+    print(f"report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
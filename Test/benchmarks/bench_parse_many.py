@@ -0,0 +1,93 @@
+"""
+Benchmark: ExpenseParser.parse_many vs a parse_expense loop on bulk input.
+
+Usage:
+  python Test/benchmarks/bench_parse_many.py
+  python Test/benchmarks/bench_parse_many.py --lines 100000 --min-speedup 5 --repeat 3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from nlp_processor import ExpenseParser
+
+DESCRIPTIONS = [
+    "coffee", "tea", "biriyani", "petrol", "uber ride", "movie tickets", "apple",
+    "groceries", "electricity bill", "lunch with team", "metro card", "medicine",
+    "book", "pizza", "auto", "dinner", "chicken", "vegetables", "internet", "gym",
+]
+TEMPLATES = [
+    "{desc} {amt}",
+    "Spent {amt} for {desc}",
+    "{amt} on {desc}",
+    "{desc} - {amt}",
+    "Paid {amt} for {desc}",
+    "{desc} {amt}.50",
+    "Rs {amt} {desc}",
+    "₹{amt} {desc}",
+    "{desc} total {amt}",
+]
+
+
+def build_lines(count, seed=26):
+    """Generate a reproducible bulk-import corpus."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        lines.append(template.format(desc=rng.choice(DESCRIPTIONS), amt=rng.randint(5, 5000)))
+    return lines
+
+
+def best_of(repeat, func):
+    """Return (best wall time, last result) over several runs."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(count, min_speedup, repeat=3):
+    parser = ExpenseParser()
+    lines = build_lines(count)
+
+    loop_seconds, looped = best_of(repeat, lambda: [parser.parse_expense(line) for line in lines])
+    batch_seconds, batch = best_of(repeat, lambda: parser.parse_many(lines))
+
+    batched = list(zip(batch["amounts"], batch["categories"], batch["descriptions"]))
+    mismatches = sum(1 for a, b in zip(looped, batched) if a != b)
+    speedup = loop_seconds / batch_seconds if batch_seconds else float("inf")
+
+    print("=" * 60)
+    print(f"parse_many benchmark ({count} lines, best of {repeat})")
+    print("=" * 60)
+    print(f"parse_expense loop : {loop_seconds:8.3f}s  ({count / loop_seconds:10.0f} lines/s)")
+    print(f"parse_many         : {batch_seconds:8.3f}s  ({count / batch_seconds:10.0f} lines/s)")
+    print(f"speedup            : {speedup:8.2f}x (target >= {min_speedup}x)")
+    print(f"mismatched rows    : {mismatches}")
+
+    if mismatches:
+        print("[FAIL] parse_many results differ from parse_expense")
+        return 1
+    if speedup < min_speedup:
+        print("[FAIL] speedup below target")
+        return 1
+    print("[OK] parse_many benchmark passed")
+    return 0
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--lines", type=int, default=100000)
+    arg_parser.add_argument("--min-speedup", type=float, default=5.0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    sys.exit(run(args.lines, args.min_speedup, args.repeat))
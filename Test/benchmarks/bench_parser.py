@@ -0,0 +1,172 @@
+"""
+Parser hot-path benchmark with a stored baseline (regression gate).
+
+Times each parser entry point over the checked-in corpus (corpus.json),
+writes a JSON report and compares against parser_baseline.json. Timings are
+divided by a fixed calibration workload so baselines recorded on one
+machine stay comparable on another.
+
+Usage:
+  python Test/benchmarks/bench_parser.py
+  python Test/benchmarks/bench_parser.py --threshold 0.30 --report /tmp/report.json
+  python Test/benchmarks/bench_parser.py --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus_generator import load_corpus
+from nlp_processor import ExpenseParser
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "parser_baseline.json")
+REPORT_PATH = os.path.join(BENCH_DIR, "reports", "parser_report.json")
+
+
+def calibrate(repeat):
+    """Time a fixed regex + Python workload; used to normalize results."""
+    pattern = re.compile(r"(\d+(?:[.,]\d{2})?)\s*(rs|inr)?", re.IGNORECASE)
+    text = "Paid Rs 120.50 for coffee and 45 for tea at 10:30 " * 4
+
+    def workload():
+        total = 0
+        for _ in range(2000):
+            for match in pattern.finditer(text):
+                total += len(match.group(1))
+        return total
+
+    return best_of(repeat, workload)
+
+
+def best_of(repeat, func):
+    """Best wall time of func() over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def build_cases(corpus):
+    """Map hot-path name -> (callable, inputs)."""
+    import main
+
+    parser = ExpenseParser()
+    return {
+        "parse_expense.text": (parser.parse_expense, corpus["text_messages"]),
+        "parse_expense.voice": (parser.parse_expense, corpus["voice_transcripts"]),
+        "parse_multiple_expenses": (parser.parse_multiple_expenses, corpus["multi_messages"]),
+        "analyze_receipt": (parser.analyze_receipt, corpus["ocr_receipts"]),
+        "extract_bill_totals": (parser.extract_bill_totals, corpus["ocr_receipts"]),
+        "upi.extract_amount": (main._extract_upi_amount, corpus["upi_dumps"]),
+        "upi.extract_datetime": (main._extract_upi_datetime, corpus["upi_dumps"]),
+        "upi.extract_transaction_id": (main._extract_upi_transaction_id, corpus["upi_dumps"]),
+        "upi.extract_party": (lambda text: main._extract_upi_party(text, "to"), corpus["upi_dumps"]),
+        "upi.extract_details": (lambda text: main._extract_upi_details(text, None), corpus["upi_dumps"]),
+    }
+
+
+def run_benchmarks(repeat):
+    corpus = load_corpus()
+    calibration = calibrate(repeat)
+    results = {}
+    for name, (func, inputs) in build_cases(corpus).items():
+        seconds = best_of(repeat, lambda: [func(item) for item in inputs])
+        per_call = seconds / len(inputs)
+        results[name] = {
+            "calls": len(inputs),
+            "us_per_call": round(per_call * 1e6, 3),
+            "normalized": round(per_call / calibration, 6),
+        }
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "calibration_seconds": round(calibration, 6),
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Return the list of (name, baseline, current, ratio) over the threshold."""
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("normalized"):
+            continue
+        ratio = current["normalized"] / previous["normalized"]
+        current["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append((name, previous["normalized"], current["normalized"], ratio))
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--threshold", type=float, default=0.30,
+                            help="allowed slowdown vs baseline (0.30 = 30%%)")
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH)
+    arg_parser.add_argument("--report", default=REPORT_PATH)
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    args = arg_parser.parse_args(argv)
+
+    report = run_benchmarks(args.repeat)
+
+    print("=" * 60)
+    print("Parser hot-path benchmark")
+    print("=" * 60)
+    print(f"calibration: {report['calibration_seconds'] * 1000:.2f} ms")
+
+    if args.update_baseline:
+        write_json(args.baseline, report)
+        write_json(args.report, report)
+        for name, result in report["results"].items():
+            print(f"{name:28} {result['us_per_call']:10.1f} us/call")
+        print(f"[OK] Baseline written to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    else:
+        print(f"[WARN] No baseline at {args.baseline}; run with --update-baseline")
+
+    regressions = compare(report, baseline, args.threshold)
+    report["threshold"] = args.threshold
+    report["regressions"] = [name for name, *_ in regressions]
+    write_json(args.report, report)
+
+    for name, result in report["results"].items():
+        ratio = result.get("vs_baseline")
+        ratio_text = f"{ratio:6.2f}x baseline" if ratio is not None else "   (no baseline)"
+        print(f"{name:28} {result['us_per_call']:10.1f} us/call  {ratio_text}")
+    print(f"Report: {args.report}")
+
+    if regressions:
+        for name, previous, current, ratio in regressions:
+            print(f"[FAIL] {name}: {ratio:.2f}x slower than baseline ({previous} -> {current})")
+        return 1
+    print("[OK] No hot path regressed by more than {:.0%}".format(args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
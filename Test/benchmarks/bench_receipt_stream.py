@@ -0,0 +1,144 @@
+"""
+Streaming receipt analyzer benchmark: analyze_receipt_stream vs multi-pass.
+
+Builds long OCR-style receipts (default 500 lines), checks that the one-pass
+analyzer returns the same dict as the field-by-field multi-pass extraction
+(ExpenseParser._extract_* over the whole text), and reports time per line
+and peak memory for several sizes so linear scaling is visible.
+
+Usage:
+  python Test/benchmarks/bench_receipt_stream.py
+  python Test/benchmarks/bench_receipt_stream.py --lines 500 --receipts 10 --min-speedup 1.0
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus_generator import MENU, SHOPS, _noise
+from nlp_processor import ExpenseParser
+
+
+def long_receipt(rng, lines):
+    """Supermarket-style receipt: short header, item lines, totals at the bottom."""
+    out = [rng.choice(SHOPS), "Address: 12, MG Road, Bengaluru", f"Ph: 98{rng.randint(10000000, 99999999)}",
+           f"Bill No: {rng.randint(1000, 99999)}", "-" * 32]
+    subtotal = 0.0
+    while len(out) < lines - 8:
+        price = rng.randint(10, 450)
+        subtotal += price
+        if rng.random() < 0.7:
+            out.append(f"{rng.choice(MENU)}    {price:.2f}")
+        else:
+            qty = rng.randint(2, 4)
+            out.append(f"{qty} x {price / qty:.2f}")
+    cgst = round(subtotal * 0.025, 2)
+    out += [
+        "-" * 32,
+        f"Subtotal {subtotal:.2f}",
+        f"CGST 2.5% {cgst:.2f}",
+        f"SGST 2.5% {cgst:.2f}",
+        "Total",
+        f"Rs. {subtotal + 2 * cgst:.2f}",
+        rng.choice(["Paid by UPI", "Cash", "Card ****4821"]),
+        "Thank you! Visit again",
+    ]
+    return "\n".join(_noise(rng, line, rate=0.01) for line in out)
+
+
+def multi_pass(parser, text):
+    """Field-by-field analysis: one full-text pass per field."""
+    text = text.strip()
+    result = {
+        'restaurant': parser._extract_restaurant_details(text),
+        'items': parser._extract_receipt_items(text),
+        'subtotal': parser._extract_subtotal(text),
+        'tax': parser._extract_taxes(text),
+        'service_charge': parser._extract_service_charge(text),
+        'discount': parser._extract_discount(text),
+        'final_amount': parser._extract_final_amount(text),
+        'currency': parser._detect_currency(text),
+        'payment_method': parser._extract_payment_method(text),
+    }
+    if result['items'] and result['final_amount']:
+        result['confidence'] = 'high'
+    elif result['items'] or result['final_amount']:
+        result['confidence'] = 'medium'
+    else:
+        result['confidence'] = 'low'
+    return result
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--lines", type=int, default=500)
+    arg_parser.add_argument("--receipts", type=int, default=10)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=30)
+    arg_parser.add_argument("--min-speedup", type=float, default=1.0,
+                            help="fail if streaming is not this much faster at --lines")
+    args = arg_parser.parse_args(argv)
+
+    parser = ExpenseParser()
+    rng = random.Random(args.seed)
+
+    print("=" * 60)
+    print(f"Streaming receipt analyzer ({args.receipts} receipts per size)")
+    print("=" * 60)
+
+    mismatches = 0
+    speedup = None
+    for lines in sorted({max(20, args.lines // 5), args.lines // 2, args.lines, args.lines * 2}):
+        receipts = [long_receipt(rng, lines) for _ in range(args.receipts)]
+        for text in receipts:
+            if parser.analyze_receipt(text) != multi_pass(parser, text):
+                mismatches += 1
+
+        old = best_of(args.repeat, lambda: [multi_pass(parser, text) for text in receipts])
+        new = best_of(args.repeat, lambda: [parser.analyze_receipt_stream(io.StringIO(text)) for text in receipts])
+        per_line = 1e6 / (lines * args.receipts)
+        old_peak = peak_memory(lambda: multi_pass(parser, receipts[0]))
+        new_peak = peak_memory(lambda: parser.analyze_receipt_stream(io.StringIO(receipts[0])))
+        print(f"{lines:5} lines  multi-pass {old * per_line:6.2f} us/line {old_peak / 1024:7.1f} KiB"
+              f"  |  stream {new * per_line:6.2f} us/line {new_peak / 1024:7.1f} KiB  ({old / new:.2f}x)")
+        if lines == args.lines:
+            speedup = old / new
+
+    print(f"mismatched receipts: {mismatches}")
+    if mismatches:
+        print("[FAIL] streaming analyzer disagrees with multi-pass extraction")
+        return 1
+    if speedup < args.min_speedup:
+        print(f"[FAIL] speedup {speedup:.2f}x below {args.min_speedup}x at {args.lines} lines")
+        return 1
+    print("[OK] streaming receipt benchmark passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+UPI region-of-interest OCR benchmark.
+
+For image_generator UPI screenshots, compares reading the full screen with
+reading only the field lines upi_layout finds: layout detection time, pixels
+the OCR engine receives after preprocessing, and, for every installed OCR
+engine, OCR time and field accuracy (amount, to, from, transaction id).
+
+It then times the real handler path: main.handle_screenshot (Gemini off) per
+screenshot with UPI_ROI_OCR off and on, counting the OCR pool jobs each image
+costs (routing thumbnail, field lines or full screen, and the date-time pass)
+and scoring the saved expense.
+
+Usage:
+  python Test/benchmarks/bench_upi_layout.py
+  python Test/benchmarks/bench_upi_layout.py --count 5 --resolutions 1080x2400 --noise 0,10
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(BENCH_DIR)))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_ocr_engines import (
+    _Bot, _close, _Context, _Photo, _same_text, _Update, load_engines, score_text, write_json,
+)
+from image_generator import NOISE_LEVELS, RESOLUTIONS, build_cases, parse_numbers, parse_resolutions
+from image_preprocess import preprocess_image
+from metrics import percentile
+from nlp_processor import ExpenseParser
+from upi_layout import roi_image_bytes
+
+REPORT_PATH = os.path.join(BENCH_DIR, "reports", "upi_layout_report.json")
+
+
+def _ms(samples, fraction):
+    return percentile(samples, fraction) * 1000
+
+
+def bench_handler_modes(cases):
+    """
+    main.handle_screenshot per case with UPI_ROI_OCR off ("full") and on ("roi"):
+    mode -> [{"seconds", "jobs", "fields"}]. OCR pool jobs are counted per image.
+    """
+    import main as bot_main
+    from result_cache import ResultCache
+
+    service = bot_main.ocr_service
+    jobs = []
+    run, run_batch = service.run, service.run_batch
+
+    async def counted_run(method, image):
+        jobs.append(method)
+        return await run(method, image)
+
+    async def counted_batch(method, images):
+        jobs.extend([method] * len(images))
+        return await run_batch(method, images)
+
+    images = {_Photo(index).file_id: case["image"] for index, case in enumerate(cases)}
+    context = _Context(_Bot(images))
+    rows = {}
+    saved = (bot_main.db.db_path, bot_main.result_cache, bot_main.gemini, bot_main.UPI_ROI_OCR)
+
+    async def run_mode(mode, tmp):
+        db_path = os.path.join(tmp, f"{mode}.db")
+        bot_main.db.db_path = db_path
+        bot_main.db.init_db()
+        # A fresh cache per mode, so the second mode does not reuse the first one's OCR.
+        bot_main.result_cache = ResultCache(db_path=os.path.join(tmp, f"{mode}_cache.db"))
+        bot_main.ocr_orchestrator.cache = bot_main.result_cache
+        bot_main.UPI_ROI_OCR = mode == "roi"
+        for index, case in enumerate(cases):
+            del jobs[:]
+            start = time.perf_counter()
+            await bot_main.handle_screenshot(_Update(index), context)
+            seconds = time.perf_counter() - start
+            conn = sqlite3.connect(db_path)
+            row = conn.execute(
+                "SELECT amount, transaction_id, upi_to, upi_from FROM expenses ORDER BY id DESC LIMIT 1"
+            ).fetchone() or (None, None, None, None)
+            conn.close()
+            rows.setdefault(mode, []).append({
+                "seconds": seconds,
+                "jobs": len(jobs),
+                "fields": {
+                    "amount": _close(row[0], case["amount"]),
+                    "to": _same_text(row[2], case["to"]),
+                    "from": _same_text(row[3], case["from"]),
+                    "upi_transaction_id": row[1] == case["upi_transaction_id"],
+                },
+            })
+
+    async def run_all(tmp):
+        service.start_warmup(bot_main.ocr_orchestrator.engines)
+        await service.wait_ready(bot_main.ocr_orchestrator.engines, 600)
+        for mode in ("full", "roi"):
+            await run_mode(mode, tmp)
+
+    service.run, service.run_batch = counted_run, counted_batch
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(run_all(tmp))
+    finally:
+        service.run, service.run_batch = run, run_batch
+        bot_main.db.db_path, bot_main.result_cache, bot_main.gemini, bot_main.UPI_ROI_OCR = saved
+        bot_main.ocr_orchestrator.cache = bot_main.result_cache
+        service.shutdown()
+    return rows
+
+
+def main(argv=None):
+    from ocr_config import OCR_METHODS
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--seed", type=int, default=40)
+    arg_parser.add_argument("--count", type=int, default=3, help="screenshots per resolution x noise")
+    arg_parser.add_argument("--resolutions", type=parse_resolutions, default=RESOLUTIONS)
+    arg_parser.add_argument("--noise", type=parse_numbers, default=NOISE_LEVELS)
+    arg_parser.add_argument("--engines", default=",".join(OCR_METHODS))
+    arg_parser.add_argument("--no-handler", action="store_true", help="skip the main.handle_screenshot timing")
+    arg_parser.add_argument("--report", default=REPORT_PATH)
+    args = arg_parser.parse_args(argv)
+
+    import main as bot_main
+    from main import _extract_upi_details
+
+    bot_main.gemini = None
+
+    cases = build_cases(args.seed, args.count, args.resolutions, args.noise, kinds=("upi",))
+    parser = ExpenseParser()
+    engines, missing = load_engines([name.strip() for name in args.engines.split(",") if name.strip()])
+
+    rows = []
+    for case in cases:
+        start = time.perf_counter()
+        roi = roi_image_bytes(case["image"])
+        layout_seconds = time.perf_counter() - start
+        full_pixels = preprocess_image(case["image"]).size
+        roi_pixels = preprocess_image(roi).size if roi else (0, 0)
+        row = {
+            "resolution": case["resolution"],
+            "noise": case["noise"],
+            "layout_seconds": layout_seconds,
+            "full_pixels": full_pixels[0] * full_pixels[1],
+            "roi_pixels": roi_pixels[0] * roi_pixels[1],
+            "engines": {},
+        }
+        for name, processor in engines.items():
+            timings = {}
+            for mode, image in (("full", case["image"]), ("roi", roi)):
+                if image is None:
+                    continue
+                start = time.perf_counter()
+                text = processor.extract_text_from_image(image)
+                timings[mode] = {
+                    "seconds": time.perf_counter() - start,
+                    "fields": score_text(case, text, parser, _extract_upi_details),
+                }
+            row["engines"][name] = timings
+        rows.append(row)
+
+    print("=" * 80)
+    print(f"UPI ROI benchmark: {len(cases)} synthetic screenshots")
+    print("=" * 80)
+    print(f"{'resolution':>10} {'noise':5} {'layout ms':>9} {'full px':>9} {'roi px':>8} {'ratio':>6}")
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["resolution"], row["noise"]), []).append(row)
+    for (resolution, noise), group in sorted(groups.items()):
+        full = sum(row["full_pixels"] for row in group) / len(group)
+        roi = sum(row["roi_pixels"] for row in group) / len(group)
+        layout = [row["layout_seconds"] for row in group]
+        print(f"{resolution:>10} n{noise:<4} {_ms(layout, 0.5):9.1f} {full:9.0f} {roi:8.0f} {roi / full:6.0%}")
+
+    report = {"cases": len(cases), "missing": missing, "rows": rows, "engines": {}}
+    full_total = sum(row["full_pixels"] for row in rows)
+    roi_total = sum(row["roi_pixels"] for row in rows)
+    print("-" * 80)
+    print(f"OCR input pixels: ROI is {roi_total / full_total:.0%} of the full screen;"
+          f" layout p50 {_ms([r['layout_seconds'] for r in rows], 0.5):.1f} ms,"
+          f" p95 {_ms([r['layout_seconds'] for r in rows], 0.95):.1f} ms")
+    report["pixel_ratio"] = roi_total / full_total if full_total else 0.0
+
+    for name in engines:
+        summary = {}
+        for mode in ("full", "roi"):
+            timings = [row["engines"][name][mode] for row in rows if mode in row["engines"][name]]
+            seconds = [timing["seconds"] for timing in timings]
+            fields = {}
+            for timing in timings:
+                for field, ok in timing["fields"].items():
+                    fields.setdefault(field, []).append(ok)
+            summary[mode] = {
+                "p50_ms": _ms(seconds, 0.5),
+                "p95_ms": _ms(seconds, 0.95),
+                "accuracy": {field: sum(values) / len(values) for field, values in fields.items()},
+            }
+            accuracy = "  ".join(f"{field} {value:4.0%}" for field, value in summary[mode]["accuracy"].items())
+            print(f"{name:12} {mode:5} p50 {summary[mode]['p50_ms']:8.0f} ms  p95 {summary[mode]['p95_ms']:8.0f} ms  {accuracy}")
+        report["engines"][name] = summary
+
+    for name, reason in missing.items():
+        print(f"[SKIP] {name}: {reason}")
+
+    if not args.no_handler:
+        print("-" * 80)
+        print("main.handle_screenshot (Gemini off), all OCR passes included:")
+        report["handler"] = {}
+        for mode, timings in bench_handler_modes(cases).items():
+            seconds = [timing["seconds"] for timing in timings]
+            fields = {}
+            for timing in timings:
+                for field, ok in timing["fields"].items():
+                    fields.setdefault(field, []).append(ok)
+            summary = {
+                "p50_ms": _ms(seconds, 0.5),
+                "p95_ms": _ms(seconds, 0.95),
+                "ocr_jobs_per_image": sum(timing["jobs"] for timing in timings) / len(timings),
+                "accuracy": {field: sum(values) / len(values) for field, values in fields.items()},
+            }
+            report["handler"][mode] = summary
+            accuracy = "  ".join(f"{field} {value:4.0%}" for field, value in summary["accuracy"].items())
+            print(f"{'handler':12} {mode:5} p50 {summary['p50_ms']:8.0f} ms  p95 {summary['p95_ms']:8.0f} ms"
+                  f"  {summary['ocr_jobs_per_image']:.1f} OCR jobs/image  {accuracy}")
+    write_json(args.report, report)
+    print(f"report: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
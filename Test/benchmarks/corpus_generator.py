@@ -0,0 +1,193 @@
+"""
+Generate the checked-in parser benchmark corpus (corpus.json).
+
+The corpus is seeded, so regenerating it gives the same file unless the
+templates below change. Sections:
+  text_messages     single-expense chat messages      -> parse_expense
+  multi_messages    multi-line / "---" separated lists -> parse_multiple_expenses
+  voice_transcripts speech-to-text style sentences    -> parse_expense
+  ocr_receipts      noisy OCR dumps of printed bills  -> analyze_receipt, extract_bill_totals
+  upi_dumps         OCR dumps of UPI payment screens  -> main._extract_upi_*
+
+Usage:
+  python Test/benchmarks/corpus_generator.py
+  python Test/benchmarks/corpus_generator.py --seed 27 --output /tmp/corpus.json
+"""
+import argparse
+import json
+import os
+import random
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_PATH = os.path.join(BENCH_DIR, "corpus.json")
+
+ITEMS = [
+    "coffee", "tea", "biriyani", "petrol", "uber ride", "movie tickets", "apple",
+    "groceries", "electricity bill", "lunch with team", "metro card", "medicine",
+    "book", "pizza", "auto", "dinner", "chicken", "vegetables", "internet", "gym",
+    "shoes", "flight ticket", "doctor visit", "netflix", "water bill", "bus pass",
+]
+MESSAGE_TEMPLATES = [
+    "{item} {amt}",
+    "Spent {amt} for {item}",
+    "{amt} on {item}",
+    "{item} - {amt}",
+    "Paid {amt} for {item}",
+    "{item} {amt}.{paise:02d}",
+    "Rs {amt} {item}",
+    "Rs. {amt} for {item}",
+    "₹{amt} {item}",
+    "{item} total {amt}.{paise:02d}",
+    "amount: {amt} category: food {item}",
+    "{item} {amt} rupees",
+    "Bought {item} for ${amt}.{paise:02d}",
+]
+VOICE_TEMPLATES = [
+    "i spent {amt} rupees on {item}",
+    "paid {amt} for {item} today",
+    "{item} cost me {amt}",
+    "add {amt} rupees for {item}",
+    "yesterday i bought {item} for {amt} rupees",
+    "expense {item} {amt}",
+    "spent rupees {amt} on {item} with friends",
+]
+SHOPS = [
+    "Pizza Palace", "Hotel Saravana Bhavan", "Cafe Coffee Day", "Reliance Fresh",
+    "Apollo Pharmacy", "HP Petrol Pump", "Big Bazaar", "Burger Point", "Chai Sutta Bar",
+]
+MENU = [
+    "Margherita Pizza", "Garlic Bread", "Masala Dosa", "Idli Vada", "Filter Coffee",
+    "Cold Coffee", "Veg Biryani", "Paneer Tikka", "Butter Naan", "Lassi", "Paracetamol",
+    "Bread", "Milk 1L", "Rice 5kg", "Petrol", "Chicken Burger", "French Fries",
+]
+BANKS = ["State Bank of India", "HDFC Bank", "ICICI Bank", "Axis Bank", "Kotak Mahindra Bank"]
+NAMES = ["Ravi Kumar", "Priya Sharma", "Anil Traders", "Sri Balaji Stores", "Meena Iyer", "Zomato"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def _noise(rng, line, rate=0.04):
+    """Imitate common OCR confusions (O/0, l/1, S/5) and dropped characters."""
+    swaps = {"0": "O", "1": "l", "5": "S", "o": "0", "l": "1"}
+    out = []
+    for char in line:
+        roll = rng.random()
+        if roll < rate / 2 and char in swaps:
+            out.append(swaps[char])
+        elif roll < rate and char == " ":
+            continue
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def _message(rng):
+    template = rng.choice(MESSAGE_TEMPLATES)
+    return template.format(item=rng.choice(ITEMS), amt=rng.randint(5, 5000), paise=rng.randint(0, 99))
+
+
+def _multi_message(rng):
+    lines = [_message(rng) for _ in range(rng.randint(2, 8))]
+    if rng.random() < 0.3:
+        return "\n---\n".join(lines)
+    return "\n".join(lines)
+
+
+def _voice(rng):
+    template = rng.choice(VOICE_TEMPLATES)
+    return template.format(item=rng.choice(ITEMS), amt=rng.randint(10, 3000))
+
+
+def _receipt(rng):
+    lines = [rng.choice(SHOPS)]
+    lines.append(f"{rng.randint(1, 200)}, MG Road, Bengaluru - 5600{rng.randint(10, 99)}")
+    lines.append(f"Ph: +91 98{rng.randint(10000000, 99999999)}")
+    lines.append(f"Bill No: {rng.randint(1000, 99999)}   Date: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025")
+    lines.append("-" * 32)
+    subtotal = 0.0
+    for _ in range(rng.randint(2, 12)):
+        qty = rng.randint(1, 4)
+        price = rng.randint(20, 450)
+        subtotal += qty * price
+        name = rng.choice(MENU)
+        if rng.random() < 0.5:
+            lines.append(f"{name} {qty} x {price:.2f} {qty * price:.2f}")
+        else:
+            lines.append(f"{qty} {name}    {qty * price:.2f}")
+    lines.append("-" * 32)
+    lines.append(f"Subtotal {subtotal:.2f}")
+    cgst = round(subtotal * 0.025, 2)
+    lines.append(f"CGST 2.5% {cgst:.2f}")
+    lines.append(f"SGST 2.5% {cgst:.2f}")
+    total = subtotal + 2 * cgst
+    if rng.random() < 0.4:
+        service = round(subtotal * 0.05, 2)
+        lines.append(f"Service Charge {service:.2f}")
+        total += service
+    if rng.random() < 0.3:
+        discount = round(subtotal * 0.1, 2)
+        lines.append(f"Discount -{discount:.2f}")
+        total -= discount
+    label = rng.choice(["Total", "Grand Total", "Net Amount", "TOTAL"])
+    symbol = rng.choice(["", "Rs. ", "₹", "INR "])
+    lines.append(f"{label}: {symbol}{total:.2f}")
+    lines.append(rng.choice(["Paid by UPI", "Cash", "Card ****4821", "GPay"]))
+    lines.append("Thank you! Visit again")
+    return "\n".join(_noise(rng, line) for line in lines)
+
+
+def _upi_dump(rng):
+    amount = rng.randint(10, 25000)
+    paise = rng.choice(["", f".{rng.randint(0, 99):02d}"])
+    name = rng.choice(NAMES)
+    style = rng.randint(0, 2)
+    when = f"{rng.randint(1, 28)} {rng.choice(MONTHS)} 2025, {rng.randint(1, 12)}:{rng.randint(0, 59):02d} {rng.choice(['am', 'pm'])}"
+    txn = "".join(rng.choice("0123456789") for _ in range(12))
+    if style == 0:
+        lines = [
+            "Payment successful", f"₹{amount:,}{paise}", f"To: {name}",
+            f"From: {rng.choice(BANKS)} 1234", when, f"UPI transaction ID: {txn}",
+        ]
+    elif style == 1:
+        lines = [
+            "Paid to", name, f"{amount}{paise}", when,
+            f"Debited from {rng.choice(BANKS)}", f"UTR: {txn}",
+        ]
+    else:
+        lines = [
+            "Transaction Successful", f"Amount Rs. {amount}{paise}", f"to {name}",
+            f"from {rng.choice(BANKS)}", f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025 {rng.randint(0, 23)}:{rng.randint(0, 59):02d}",
+            f"Txn ID {txn}",
+        ]
+    return "\n".join(_noise(rng, line, rate=0.02) for line in lines)
+
+
+def build_corpus(seed=27):
+    """Build the corpus dict for a seed."""
+    rng = random.Random(seed)
+    return {
+        "seed": seed,
+        "text_messages": [_message(rng) for _ in range(300)],
+        "multi_messages": [_multi_message(rng) for _ in range(60)],
+        "voice_transcripts": [_voice(rng) for _ in range(150)],
+        "ocr_receipts": [_receipt(rng) for _ in range(60)],
+        "upi_dumps": [_upi_dump(rng) for _ in range(120)],
+    }
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Load the checked-in corpus."""
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate the parser benchmark corpus")
+    arg_parser.add_argument("--seed", type=int, default=27)
+    arg_parser.add_argument("--output", default=CORPUS_PATH)
+    args = arg_parser.parse_args()
+
+    corpus = build_corpus(args.seed)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(corpus, handle, ensure_ascii=False, indent=1)
+    sizes = ", ".join(f"{key}={len(value)}" for key, value in corpus.items() if isinstance(value, list))
+    print(f"Wrote {args.output} ({sizes})")
@@ -0,0 +1,283 @@
+"""
+Local stand-in for the Gemini model, for benchmarks that must not call the API.
+
+FakeGeminiModel.generate_content() takes what GeminiProcessor sends
+([prompt, {"mime_type", "data"}] or [prompt, PIL image]), records the upload
+size and approximate image tokens, and answers like Gemini would for the
+image_generator case it was told to expect (expect(case)), but only with what
+is still legible in the uploaded pixels:
+  - with an OCR `reader` (image -> text), the fields are parsed from the text
+    the engine reads in the upload, as the OCR fallback would;
+  - without one, every field is returned when the upload keeps text lines at
+    least MIN_TEXT_PX tall, and none otherwise (smaller text is where vision
+    models start to misread digits). Text height is measured once on the
+    original and scaled by the upload width, so this mode sees resizing but
+    not compression artefacts.
+Several images in one request (GeminiProcessor.analyze_receipts) are answered
+with a JSON array; register() ties each upload to its case, and uploads of no
+known case get CANNED_RECEIPT. `latency` (+ `latency_per_image`) seconds of
+sleep stand in for the network round-trip; `latency` may also be a sampler
+from parse_latency() ("0.8", "uniform:0.3,2", "lognormal:0.8,0.5", "exp:1").
+`rate_429` / `rate_503` inject quota and server errors into that share of
+requests, every request after the first `quota_after` answers 429 (quota used
+up, on every model), and models named in `missing_models` answer 404.
+
+Responses carry usage_metadata with estimated prompt / output token counts.
+
+FakeGenai stands in for the google.generativeai module (configure,
+list_models, GenerativeModel), so a real GeminiProcessor runs against it:
+    with install(FakeGenai(fake)): gemini = GeminiProcessor(...)
+"""
+import contextlib
+import hashlib
+import io
+import json
+import math
+import random
+import threading
+import time
+
+from PIL import Image, ImageFilter
+
+from image_encoder import image_tokens
+from image_preprocess import estimate_text_height, ink_mask, load_image
+
+MIN_TEXT_PX = 9
+
+# Answer for uploads that were never registered (e.g. load tests with arbitrary photos).
+CANNED_RECEIPT = {
+    "image_type": "receipt",
+    "merchant": "Fake Mart",
+    "date": "2024-01-15",
+    "subtotal": 240.0,
+    "final_amount": 252.0,
+    "items": [
+        {"name": "Veg Biryani", "quantity": 1, "unit_price": 180.0, "total_price": 180.0, "category": "food"},
+        {"name": "Masala Chai", "quantity": 2, "unit_price": 30.0, "total_price": 60.0, "category": "food"},
+    ],
+}
+
+
+def parse_latency(spec, seed=0):
+    """Sampler (no args -> seconds) for "S", "uniform:LO,HI", "lognormal:MEDIAN,SIGMA" or "exp:MEAN"."""
+    rng = random.Random(seed)
+    kind, _, params = str(spec).partition(":")
+    if not params:
+        seconds = float(kind)
+        return lambda: seconds
+    values = [float(value) for value in params.split(",")]
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exp":
+        return lambda: rng.expovariate(1.0 / values[0])
+    raise ValueError(f"unknown latency distribution: {spec}")
+
+
+def _part_size(part):
+    if isinstance(part, dict):
+        return Image.open(io.BytesIO(part["data"])).size
+    return part.size
+
+
+class FakeUsage:
+    """usage_metadata stand-in: ~4 characters per text token, image_encoder.image_tokens per image."""
+
+    def __init__(self, content, text):
+        text_chars = sum(len(part) for part in content if isinstance(part, str))
+        images = sum(image_tokens(*_part_size(part)) for part in content if not isinstance(part, str))
+        self.prompt_token_count = text_chars // 4 + images
+        self.candidates_token_count = len(text) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, content=()):
+        self.text = text
+        self.usage_metadata = FakeUsage(content, text)
+
+
+def truth_response(case):
+    """Gemini-style JSON fields for an image_generator case."""
+    if case["kind"] == "receipt":
+        return {
+            "image_type": "receipt",
+            "subtotal": case["subtotal"],
+            "final_amount": case["total"],
+            "items": [{"name": item["name"], "total_price": item["amount"]} for item in case["items"]],
+        }
+    return {
+        "image_type": "upi",
+        "amount": case["amount"],
+        "upi_to": case["to"],
+        "upi_from": case["from"],
+        "upi_transaction_id": case["upi_transaction_id"],
+    }
+
+
+def text_response(case, text, parser, upi_details):
+    """Gemini-style JSON fields parsed from OCR text of the upload."""
+    if case["kind"] == "receipt":
+        analysis = parser.analyze_receipt(text or "")
+        return {
+            "image_type": "receipt",
+            "subtotal": analysis.get("subtotal"),
+            "final_amount": analysis.get("final_amount"),
+            "items": [{"name": item.get("name") or item.get("description")} for item in analysis.get("items") or []],
+        }
+    details = upi_details(text or "", "")
+    return {
+        "image_type": "upi",
+        "amount": details.get("amount"),
+        "upi_to": details.get("to"),
+        "upi_from": details.get("from"),
+        "upi_transaction_id": details.get("upi_transaction_id"),
+    }
+
+
+class FakeGeminiModel:
+    """generate_content() double that scores legibility instead of calling the API."""
+
+    def __init__(self, reader=None, parser=None, upi_details=None, latency=0.0, latency_per_image=0.0,
+                 rate_429=0.0, rate_503=0.0, quota_after=None, missing_models=(), seed=0):
+        self.reader = reader
+        self.parser = parser
+        self.upi_details = upi_details
+        self.latency = latency
+        self.latency_per_image = latency_per_image
+        self.rate_429 = rate_429
+        self.rate_503 = rate_503
+        self.quota_after = quota_after
+        self.missing_models = set(missing_models)
+        self._rng = random.Random(seed)
+        self.case = None
+        self.uploads = []
+        self.requests = 0
+        self.errors = {}
+        self.by_model = {}
+        self._measured = {}
+        self._by_upload = {}
+        self._lock = threading.Lock()
+
+    def _measure(self, case):
+        if self.reader is None and id(case) not in self._measured:
+            original = load_image(case["image"], max_side=0)
+            # Median filter first: sensor noise would otherwise read as tiny text lines.
+            text_height = estimate_text_height(ink_mask(original.filter(ImageFilter.MedianFilter(3)))) or 0
+            self._measured[id(case)] = (text_height, original.width)
+
+    def expect(self, case):
+        """Answer for `case` in the next single-image request."""
+        self.case = case
+        self._measure(case)
+
+    def register(self, case, data):
+        """Answer for `case` whenever these upload bytes arrive, alone or in a batch."""
+        self._measure(case)
+        self._by_upload[hashlib.sha256(data).hexdigest()] = case
+
+    def _answer(self, part):
+        if isinstance(part, dict):
+            data = part["data"]
+            image = Image.open(io.BytesIO(data))
+        else:
+            buffer = io.BytesIO()
+            part.convert("RGB").save(buffer, format="JPEG", quality=95)
+            data = buffer.getvalue()
+            image = part
+        case = self._by_upload.get(hashlib.sha256(data).hexdigest(), self.case)
+        with self._lock:
+            self.uploads.append({"bytes": len(data), "size": image.size, "tokens": image_tokens(*image.size)})
+        if case is None:
+            return json.loads(json.dumps(CANNED_RECEIPT))
+
+        if self.reader is not None:
+            return text_response(case, self.reader(data), self.parser, self.upi_details)
+        text_height, width = self._measured[id(case)]
+        text_height = text_height * image.width / width
+        return truth_response(case) if text_height >= MIN_TEXT_PX else {"image_type": case["kind"]}
+
+    def _error(self, model_name):
+        """The injected error for this request, if any (404s are not counted as requests)."""
+        if model_name in self.missing_models:
+            return "404", RuntimeError(f"404 models/{model_name} is not found for API version v1beta")
+        with self._lock:
+            draw = self._rng.random()
+            exhausted = self.quota_after is not None and self.requests >= self.quota_after
+        if exhausted or draw < self.rate_429:
+            return "429", RuntimeError("429 Resource has been exhausted (e.g. check quota). Please retry in 20s.")
+        if draw < self.rate_429 + self.rate_503:
+            return "503", RuntimeError("503 The service is currently unavailable.")
+        return None, None
+
+    def generate_content(self, content, generation_config=None, model_name=None):
+        code, error = self._error(model_name)
+        with self._lock:
+            self.by_model[model_name] = self.by_model.get(model_name, 0) + 1
+            if code:
+                self.errors[code] = self.errors.get(code, 0) + 1
+        if code == "404":
+            raise error
+        latency = self.latency() if callable(self.latency) else self.latency
+        # Strings are the prompt and "Image n:" labels; everything else is an image.
+        images = [part for part in content if not isinstance(part, str)]
+        if latency or self.latency_per_image:
+            time.sleep(latency + self.latency_per_image * len(images))
+        if error:
+            raise error
+        answers = [self._answer(part) for part in images]
+        with self._lock:
+            self.requests += 1
+        if len(answers) == 1:
+            return FakeResponse(json.dumps(answers[0]), content)
+        for index, answer in enumerate(answers, 1):
+            answer["image_index"] = index
+        return FakeResponse(json.dumps(answers), content)
+
+
+class _FakeModelInfo:
+    def __init__(self, name):
+        self.name = f"models/{name}"
+        self.supported_generation_methods = ["generateContent"]
+
+
+class _FakeGenerativeModel:
+    def __init__(self, fake, name):
+        self.fake = fake
+        self.model_name = name
+
+    def generate_content(self, content, generation_config=None):
+        return self.fake.generate_content(content, generation_config, model_name=self.model_name)
+
+
+class FakeGenai:
+    """The google.generativeai surface GeminiProcessor uses, answered by a FakeGeminiModel."""
+
+    def __init__(self, fake, models=("gemini-2.5-flash", "gemini-2.0-flash", "gemini-1.5-flash")):
+        self.fake = fake
+        self.models = list(models)
+        self.list_calls = 0
+
+    def configure(self, api_key):
+        pass
+
+    def list_models(self):
+        self.list_calls += 1
+        return [_FakeModelInfo(name) for name in self.models]
+
+    def GenerativeModel(self, name):
+        return _FakeGenerativeModel(self.fake, name)
+
+
+@contextlib.contextmanager
+def install(fake_genai, api_key="fake-key"):
+    """Point gemini_processor at fake_genai (and a dummy API key) inside the block."""
+    import gemini_processor
+
+    saved = gemini_processor.genai, gemini_processor.GEMINI_API_KEY
+    gemini_processor.genai, gemini_processor.GEMINI_API_KEY = fake_genai, api_key
+    try:
+        yield fake_genai
+    finally:
+        gemini_processor.genai, gemini_processor.GEMINI_API_KEY = saved
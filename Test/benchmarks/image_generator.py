@@ -0,0 +1,174 @@
+"""
+Render synthetic receipt photos and UPI screenshots with known ground truth.
+
+Each case is a dict: kind ("receipt" | "upi"), the rendered text, the truth
+fields (items/subtotal/total for receipts; amount/to/from/upi_transaction_id
+for UPI), the resolution and noise level, and the JPEG bytes. Cases are
+seeded, so the same arguments always give the same images.
+
+Usage:
+  python Test/benchmarks/image_generator.py --output /tmp/ocr_fixtures
+  python Test/benchmarks/image_generator.py --count 3 --resolutions 720x1280,1080x2400 --noise 0,8
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus_generator import BANKS, MENU, MONTHS, NAMES, SHOPS
+
+RESOLUTIONS = [(720, 1280), (1080, 2400), (3000, 4000)]
+NOISE_LEVELS = [0, 6, 14]
+
+
+def receipt_truth(rng):
+    """Structured receipt plus the lines printed on it."""
+    items = []
+    for name in rng.sample(MENU, rng.randint(2, 6)):
+        qty = rng.randint(1, 3)
+        items.append({"name": name, "qty": qty, "amount": float(qty * rng.randint(20, 450))})
+    subtotal = sum(item["amount"] for item in items)
+    tax = round(subtotal * 0.025, 2)
+    total = round(subtotal + 2 * tax, 2)
+
+    lines = [rng.choice(SHOPS), f"{rng.randint(1, 200)}, MG Road, Bengaluru",
+             f"Bill No: {rng.randint(1000, 99999)}", "-" * 28]
+    lines += [f"{item['qty']} {item['name']}  {item['amount']:.2f}" for item in items]
+    lines += ["-" * 28, f"Subtotal {subtotal:.2f}", f"CGST 2.5% {tax:.2f}", f"SGST 2.5% {tax:.2f}",
+              f"Grand Total: Rs. {total:.2f}", rng.choice(["Paid by UPI", "Cash", "Card"]), "Thank you!"]
+    return {"kind": "receipt", "text": "\n".join(lines), "items": items, "subtotal": subtotal, "total": total}
+
+
+def upi_truth(rng):
+    """Structured UPI payment plus the lines shown on the screen."""
+    amount = float(rng.randint(10, 25000))
+    to_name = rng.choice(NAMES)
+    from_bank = rng.choice(BANKS)
+    txn = "".join(rng.choice("0123456789") for _ in range(12))
+    when = f"{rng.randint(1, 28)} {rng.choice(MONTHS)} 2025, {rng.randint(1, 12)}:{rng.randint(0, 59):02d} pm"
+    lines = ["Payment successful", f"Rs. {amount:,.2f}", f"To: {to_name}", f"From: {from_bank}",
+             when, f"UPI transaction ID: {txn}"]
+    return {"kind": "upi", "text": "\n".join(lines), "amount": amount, "to": to_name,
+            "from": from_bank, "upi_transaction_id": txn}
+
+
+def _add_noise(image, rng, noise):
+    if not noise:
+        return image
+    generator = np.random.default_rng(rng.randint(0, 2 ** 32 - 1))
+    pixels = np.asarray(image, dtype=np.float32) + generator.normal(0, noise, (image.height, image.width))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def render_receipt(rng, text, size, noise):
+    """Receipt paper photographed on a table: grey surround, slight rotation."""
+    width, height = size
+    lines = text.splitlines()
+    font = ImageFont.load_default(size=max(12, width // 32))
+    line_height = int(font.size * 1.4)
+    paper = Image.new("L", (int(font.size * 20), line_height * (len(lines) + 2)), 245)
+    draw = ImageDraw.Draw(paper)
+    for index, line in enumerate(lines):
+        draw.text((font.size, line_height * (index + 1)), line, fill=20, font=font)
+    paper = paper.rotate(rng.uniform(-3, 3), resample=Image.BILINEAR, expand=True, fillcolor=120)
+    paper.thumbnail((int(width * 0.92), int(height * 0.92)))
+
+    canvas = Image.new("L", size, 120)
+    canvas.paste(paper, ((width - paper.width) // 2, (height - paper.height) // 2))
+    return _add_noise(canvas, rng, noise)
+
+
+def render_upi(rng, text, size, noise):
+    """Phone screenshot: app chrome around a white screen with a large amount line and centred text."""
+    width, height = size
+    lines = text.splitlines()
+    canvas = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(canvas)
+    body = ImageFont.load_default(size=max(12, width // 24))
+    large = ImageFont.load_default(size=max(16, width // 12))
+    small = ImageFont.load_default(size=max(10, width // 40))
+
+    # Status bar, success tick and the action buttons at the bottom.
+    bar = max(12, height // 40)
+    draw.rectangle((0, 0, width, bar), fill=40)
+    draw.text((width // 20, bar // 5), f"{rng.randint(1, 12)}:{rng.randint(0, 59):02d}", fill=235, font=small)
+    radius = width // 14
+    centre = (width // 2, height // 6 - radius * 3 // 2)
+    draw.ellipse((centre[0] - radius, centre[1] - radius, centre[0] + radius, centre[1] + radius), fill=110)
+    button_top = height - height // 8
+    for index, label in enumerate(("Share", "Done")):
+        left = width // 12 + index * width // 2
+        draw.rounded_rectangle((left, button_top, left + width // 3, button_top + bar * 2), radius=bar // 2,
+                               outline=90, width=max(1, width // 360))
+        draw.text((left + width // 12, button_top + bar // 2), label, fill=60, font=small)
+
+    y = height // 6
+    for index, line in enumerate(lines):
+        font = large if index == 1 else body
+        text_width = draw.textlength(line, font=font)
+        draw.text(((width - text_width) / 2, y), line, fill=25, font=font)
+        y += int(font.size * 1.8)
+    return _add_noise(canvas, rng, noise)
+
+
+def to_jpeg(image, quality=88):
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def build_cases(seed=37, count=2, resolutions=RESOLUTIONS, noise_levels=NOISE_LEVELS, kinds=("receipt", "upi")):
+    """All combinations of kind x resolution x noise, count cases each."""
+    rng = random.Random(seed)
+    cases = []
+    for kind in kinds:
+        for size in resolutions:
+            for noise in noise_levels:
+                for _ in range(count):
+                    truth = receipt_truth(rng) if kind == "receipt" else upi_truth(rng)
+                    render = render_receipt if kind == "receipt" else render_upi
+                    truth.update({
+                        "resolution": f"{size[0]}x{size[1]}",
+                        "noise": noise,
+                        "image": to_jpeg(render(rng, truth["text"], size, noise)),
+                    })
+                    cases.append(truth)
+    return cases
+
+
+def parse_resolutions(value):
+    return [tuple(int(part) for part in item.lower().split("x")) for item in value.split(",") if item]
+
+
+def parse_numbers(value):
+    return [int(item) for item in value.split(",") if item != ""]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Render synthetic receipt / UPI images with ground truth")
+    arg_parser.add_argument("--output", required=True)
+    arg_parser.add_argument("--seed", type=int, default=37)
+    arg_parser.add_argument("--count", type=int, default=2)
+    arg_parser.add_argument("--resolutions", type=parse_resolutions, default=RESOLUTIONS)
+    arg_parser.add_argument("--noise", type=parse_numbers, default=NOISE_LEVELS)
+    args = arg_parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest = []
+    for index, case in enumerate(build_cases(args.seed, args.count, args.resolutions, args.noise)):
+        name = f"{index:03d}_{case['kind']}_{case['resolution']}_n{case['noise']}.jpg"
+        with open(os.path.join(args.output, name), "wb") as handle:
+            handle.write(case.pop("image"))
+        case["file"] = name
+        manifest.append(case)
+    with open(os.path.join(args.output, "truth.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, ensure_ascii=False, indent=1)
+    print(f"Wrote {len(manifest)} images and truth.json to {args.output}")
@@ -0,0 +1,23 @@
+"""
+pytest set-up: every file the bot writes (expense database, result cache,
+Gemini rate-limit / model / call logs) goes to a temporary directory, so a
+test run never touches the working copy. Set before any test imports config.
+"""
+import os
+import shutil
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="expense-bot-tests-")
+
+for _name, _file in (
+    ("DATABASE_PATH", "expenses.db"),
+    ("RESULT_CACHE_PATH", "result_cache.db"),
+    ("GEMINI_RATE_LIMIT_PATH", "gemini_rate_limit.db"),
+    ("GEMINI_MODEL_CACHE_PATH", "gemini_models.json"),
+    ("GEMINI_CALL_LOG_PATH", "gemini_calls.jsonl"),
+):
+    os.environ[_name] = os.path.join(_TMP, _file)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_TMP, ignore_errors=True)
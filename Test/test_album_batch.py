@@ -0,0 +1,228 @@
+"""
+Album test: photos sharing a media_group_id are collected, OCR'd as one batch
+per engine, saved in one transaction and answered with a single reply
+"""
+import asyncio
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+
+import main
+from album_collector import AlbumCollector
+from nlp_processor import EasyOCRProcessor, ExpenseParser, _pad_to_common_size
+from ocr_orchestrator import OCROrchestrator
+
+RECEIPT = "Cafe Coffee Day\n1 Cappuccino 180.00\nSubtotal 180.00\nGrand Total: Rs. 189.00"
+UPI = "Payment successful\nRs. 450.00\nTo: Ravi Kumar\nFrom: HDFC Bank\nUPI transaction ID: 512345678901"
+
+
+class BatchService:
+    """Stands in for OCRService.run_batch: engine -> {image: text}."""
+
+    def __init__(self, script):
+        self.script = script
+        self.batches = []
+
+    async def run_batch(self, method, images):
+        self.batches.append((method, list(images)))
+        texts = [self.script[method].get(image, "") for image in images]
+        return [({"amount": None, "raw_text": text}, text) for text in texts]
+
+
+class FakeReader:
+    """EasyOCR reader double recording the shapes of each batched call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def readtext_batched(self, images):
+        self.calls.append([image.shape for image in images])
+        return [[(None, f"text {image.shape[0]}x{image.shape[1]}", 0.9)] for image in images]
+
+
+def test_collector_groups_album_items():
+    """Items for one key arrive as one list after the quiet period; keys stay apart"""
+    albums = []
+
+    async def on_album(items):
+        albums.append(items)
+
+    async def scenario():
+        collector = AlbumCollector(on_album, wait=0.05, max_wait=1.0)
+        for index in range(3):
+            collector.add(("chat", "album-1"), index)
+            await asyncio.sleep(0.01)
+        collector.add(("chat", "album-2"), "other")
+        assert not albums
+        await asyncio.sleep(0.15)
+        return collector
+
+    collector = asyncio.run(scenario())
+    print("=" * 60)
+    print(f"albums: {albums}")
+    print("=" * 60)
+
+    assert sorted(albums, key=len) == [["other"], [0, 1, 2]]
+    assert collector.albums == 2 and collector.items == 4 and collector.pending() == 0
+
+
+def test_collector_flushes_full_album_at_once():
+    """A 10-photo album (Telegram's maximum) is processed without waiting"""
+    albums = []
+
+    async def on_album(items):
+        albums.append(items)
+
+    async def scenario():
+        collector = AlbumCollector(on_album, wait=5, max_wait=10)
+        for index in range(10):
+            collector.add("album", index)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert albums == [list(range(10))]
+
+
+def test_extract_batch_one_job_per_engine():
+    """Images the first engine reads confidently never reach the second one"""
+    service = BatchService({
+        "easyocr": {b"a": RECEIPT, b"b": "", b"c": UPI},
+        "tesseract": {b"b": "Grand Total: Rs. 99.00"},
+    })
+    orchestrator = OCROrchestrator(service, ExpenseParser(), policy="race", engines=["easyocr", "tesseract"])
+    readings = asyncio.run(orchestrator.extract_batch([b"a", b"b", b"c"]))
+
+    print("=" * 60)
+    print([(engine, text[:20]) for _, text, engine in readings])
+    print([(method, len(images)) for method, images in service.batches])
+    print("=" * 60)
+
+    assert service.batches == [("easyocr", [b"a", b"b", b"c"]), ("tesseract", [b"b"])]
+    assert [engine for _, _, engine in readings] == ["easyocr", "tesseract", "easyocr"]
+    assert orchestrator.stats()["extractions"] == 3
+
+
+def test_easyocr_batches_padded_images():
+    """EasyOCR reads batch_size images per call, padded to one shape"""
+    assert [a.shape for a in _pad_to_common_size([np.zeros((5, 9), np.uint8), np.zeros((7, 3), np.uint8)])] \
+        == [(7, 9), (7, 9)]
+
+    processor = EasyOCRProcessor()
+    processor.reader = FakeReader()
+    from PIL import Image
+    import io
+    images = []
+    for size in [(120, 80), (90, 140), (100, 100)]:
+        buffer = io.BytesIO()
+        Image.new("L", size, 255).save(buffer, format="PNG")
+        images.append(buffer.getvalue())
+
+    texts = processor.extract_texts_from_images(images, batch_size=2)
+    print(f"batched calls: {processor.reader.calls}")
+    assert len(processor.reader.calls) == 2 and len(processor.reader.calls[0]) == 2
+    assert len(set(processor.reader.calls[0])) == 1
+    assert all(text.startswith("text ") for text in texts)
+
+
+class _Photo:
+    def __init__(self, index):
+        self.file_id = f"album-{index}"
+        self.file_unique_id = f"album-unique-{index}"
+
+
+class _File:
+    def __init__(self, data):
+        self.data = data
+
+    async def download_as_bytearray(self):
+        return bytearray(self.data)
+
+
+class _Bot:
+    async def get_file(self, file_id):
+        return _File(file_id.encode())
+
+
+class _Message:
+    def __init__(self, index, caption=None):
+        self.photo = [_Photo(index)]
+        self.caption = caption
+        self.media_group_id = "group-1"
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class _User:
+    id = 515151
+    username = "album"
+    first_name = "Album"
+
+
+class _Chat:
+    id = 515151
+
+
+class _Update:
+    def __init__(self, index, caption=None):
+        self.message = _Message(index, caption)
+        self.effective_user = _User()
+        self.effective_chat = _Chat()
+
+
+class _Context:
+    bot = _Bot()
+
+
+def test_album_saves_in_one_reply():
+    """Two receipts and a UPI screenshot: one batch, one transaction, one reply"""
+    handle, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    saved = (main.db.db_path, main.ocr_orchestrator, main.gemini)
+    service = BatchService({"easyocr": {b"album-0": RECEIPT, b"album-1": UPI, b"album-2": RECEIPT}})
+    try:
+        main.db.db_path = db_path
+        main.db.init_db()
+        main.ocr_orchestrator = OCROrchestrator(service, main.parser, engines=["easyocr"])
+        main.gemini = None
+
+        updates = [_Update(index, "lunch" if index == 0 else None) for index in range(3)]
+
+        async def scenario():
+            for update in updates:
+                await main.handle_screenshot(update, _Context())
+            assert not service.batches
+            await main.album_collector.flush()
+
+        asyncio.run(scenario())
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT amount, description, source, transaction_id FROM expenses").fetchall()
+        conn.close()
+    finally:
+        main.db.db_path, main.ocr_orchestrator, main.gemini = saved
+        os.remove(db_path)
+
+    replies = [reply for update in updates for reply in update.message.replies]
+    print("=" * 60)
+    print("\n---\n".join(replies))
+    print(rows)
+    print("=" * 60)
+
+    assert len(service.batches) == 1 and len(service.batches[0][1]) == 3
+    assert len(replies) == 2 and "Image 2 (UPI payment)" in replies[1]
+    assert any(row[2] == "online_payment" and row[3] == "512345678901" for row in rows)
+    bill_refs = {row[3] for row in rows if row[2] == "image"}
+    assert len(bill_refs) == 2
+
+
+if __name__ == "__main__":
+    test_collector_groups_album_items()
+    test_collector_flushes_full_album_at_once()
+    test_extract_batch_one_job_per_engine()
+    test_easyocr_batches_padded_images()
+    test_album_saves_in_one_reply()
+    print("\n✅ All album tests passed!")
@@ -0,0 +1,23 @@
+"""
+Checks that the checked-in benchmark corpus matches its generator
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from corpus_generator import build_corpus, load_corpus
+
+
+def test_corpus_is_reproducible():
+    """corpus.json must be regenerated whenever the generator changes"""
+    stored = load_corpus()
+    rebuilt = build_corpus(stored["seed"])
+    for section, entries in rebuilt.items():
+        print(f"{section}: {len(entries) if isinstance(entries, list) else entries}")
+        assert stored[section] == entries, f"corpus.json is stale for {section}; rerun corpus_generator.py"
+
+
+if __name__ == "__main__":
+    test_corpus_is_reproducible()
+    print("\n[OK] Benchmark corpus is up to date")
@@ -0,0 +1,143 @@
+"""
+Learned category test: per-user memory overrides the keyword scan
+"""
+import asyncio
+import os
+import tempfile
+
+import bot_commands
+
+from category_memory import CategoryMemory, normalize_description
+from database import ExpenseDatabase
+from nlp_processor import ExpenseParser
+
+
+def make_db():
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    db = ExpenseDatabase.__new__(ExpenseDatabase)
+    db.db_path = path
+    db.init_db()
+    return db, path
+
+
+def test_normalize_description():
+    assert normalize_description("  Coffee @ CCD!! ") == "coffee ccd"
+    assert normalize_description(None) == ""
+
+
+def test_learned_category_short_circuits_keywords():
+    """History seeds the memory; /setcategory edits override it"""
+    db, path = make_db()
+    try:
+        db.add_user(1, "alice", "Alice")
+        db.add_user(2, "bob", "Bob")
+        for _ in range(3):
+            db.add_expense(1, 40, "Shopping", "Chai Sutta", source="text")
+        db.add_expense(1, 40, "Food", "Chai Sutta", source="text")
+
+        memory = CategoryMemory(db)
+        parser = ExpenseParser(category_memory=memory)
+
+        print("=" * 60)
+        print("Testing per-user category memory")
+        print("=" * 60)
+
+        # Seeded from history: majority category wins, other users unaffected.
+        assert parser.parse_expense("chai sutta 40", 1)[1] == "Shopping"
+        assert parser.parse_expense("chai sutta 40", 2)[1] == parser.parse_expense("chai sutta 40")[1]
+
+        # An edit teaches a new category, persisted for the next process.
+        assert memory.learn(1, "Pizza", "Entertainment")
+        assert parser.parse_expense("pizza 300", 1) == (300.0, "Entertainment", "pizza")
+        assert parser.parse_expense("pizza 300")[1] == "Food"
+        assert CategoryMemory(db).lookup(1, "PIZZA!") == "Entertainment"
+
+        # Batch path agrees with the single-line path.
+        lines = ["pizza 300", "Chai Sutta 40", "uber 120"]
+        batch = parser.parse_many(lines, user_id=1)
+        for idx, line in enumerate(lines):
+            expected = parser.parse_expense(line, 1)
+            got = (batch["amounts"][idx], batch["categories"][idx], batch["descriptions"][idx])
+            print(f"{line!r:20} -> {got}")
+            assert got == expected
+
+        # Explicit category fields still win over memory.
+        assert parser.parse_expense("amount: 300 category: food pizza", 1)[1] == "Food"
+
+        stats = memory.stats()
+        print(stats)
+        assert stats["hits"] > 0 and stats["misses"] > 0
+        assert 0 < stats["hit_rate"] < 1
+    finally:
+        os.remove(path)
+
+
+def test_history_is_seeded_once_per_user_even_after_edits():
+    """A user who edited before the first load still gets their history; edits win; no re-seed later"""
+    db, path = make_db()
+    try:
+        db.add_user(1, "alice", "Alice")
+        db.add_expense(1, 40, "Shopping", "Chai Sutta", source="text")
+        db.add_expense(1, 250, "Entertainment", "Pizza", source="text")
+        db.save_category_memory(1, [("pizza", "Food")], "edit")
+
+        memory = CategoryMemory(db)
+        assert memory.lookup(1, "chai sutta") == "Shopping"
+        assert memory.lookup(1, "pizza") == "Food"
+        assert db.is_category_memory_seeded(1)
+
+        db.add_expense(1, 60, "Travel", "Metro Card", source="text")
+        assert CategoryMemory(db).lookup(1, "metro card") is None
+    finally:
+        os.remove(path)
+
+
+class _Message:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class _User:
+    id = 1
+
+
+class _Update:
+    def __init__(self):
+        self.effective_user = _User()
+        self.message = _Message()
+
+
+class _Context:
+    args = ["Travel"]
+
+
+def test_setcategory_picks_the_last_logged_expense():
+    """Expenses logged in the same second: /setcategory changes the one added last"""
+    db, path = make_db()
+    saved = bot_commands.db, bot_commands.category_memory
+    try:
+        db.add_user(1, "alice", "Alice")
+        db.add_expense(1, 120, "Transport", "Uber", source="text")
+        db.add_expense(1, 40, "Food", "Metro Card", source="text")
+        bot_commands.db, bot_commands.category_memory = db, CategoryMemory(db)
+        asyncio.run(bot_commands.set_category(_Update(), _Context()))
+        categories = {description: category for _, _, category, description, _, _ in db.get_expenses(1)}
+        learned = bot_commands.category_memory.lookup(1, "metro card")
+    finally:
+        bot_commands.db, bot_commands.category_memory = saved
+        os.remove(path)
+
+    assert categories == {"Uber": "Transport", "Metro Card": "Travel"}
+    assert learned == "Travel"
+
+
+if __name__ == "__main__":
+    test_normalize_description()
+    test_learned_category_short_circuits_keywords()
+    test_history_is_seeded_once_per_user_even_after_edits()
+    test_setcategory_picks_the_last_logged_expense()
+    print("\n[OK] Category memory tests passed")
@@ -0,0 +1,206 @@
+"""
+Circuit breaker test: failing Gemini / Google Speech calls are skipped until a probe succeeds
+"""
+import io
+import os
+import tempfile
+import threading
+import wave
+
+from PIL import Image
+
+import nlp_processor
+from circuit_breaker import CircuitBreaker
+from gemini_processor import GeminiProcessor
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_on_failure_rate_and_probes_once():
+    """closed -> open at the failure rate -> one half-open probe -> closed or open again"""
+    clock = Clock()
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4, window=60, open_seconds=30, clock=clock)
+
+    breaker.record_success()
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    assert breaker.state == "closed"            # 3 calls: below min_calls
+    breaker.record_failure("timeout")
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.retry_after() == 30
+
+    clock.now += 30
+    assert breaker.allow()                      # the probe
+    assert not breaker.allow()                  # everyone else keeps waiting
+    breaker.record_failure("still down")
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    stats = breaker.stats()
+    print(stats)
+    assert stats["state"] == "closed" and stats["opened"] == 2 and stats["rejected"] == 3
+    assert breaker.allow() and breaker.allow()
+
+
+def test_old_failures_leave_the_window_and_lost_probes_expire():
+    """Failures older than the window do not count; a probe that never reports back frees its slot"""
+    clock = Clock()
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=2, window=60, open_seconds=30, clock=clock)
+    breaker.record_failure()
+    clock.now += 61
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 30
+    assert breaker.allow() and not breaker.allow()
+    breaker.release()                           # caller gave the probe back without calling
+    assert breaker.allow()
+    clock.now += 30                             # ...or never reported: slot expires
+    assert breaker.allow()
+
+
+def test_only_the_probe_closes_the_breaker():
+    """Late outcomes of calls started before the breaker opened neither close nor reopen it"""
+    clock = Clock()
+    breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=2, window=60, open_seconds=30, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    breaker.record_success()                    # a slow call from before the opening
+    assert breaker.state == "open"
+
+    clock.now += 30
+    probe = threading.Thread(target=lambda: breaker.allow())
+    probe.start()
+    probe.join()
+    breaker.record_success()                    # not the probe's thread: ignored
+    breaker.record_failure("late")
+    breaker.release()
+    assert breaker.state == "half_open" and not breaker.allow()
+
+    def probe_succeeds():
+        clock.now += 30                         # the first probe never reported; its slot expired
+        assert breaker.allow()
+        breaker.record_success()
+
+    probe = threading.Thread(target=probe_succeeds)
+    probe.start()
+    probe.join()
+    assert breaker.state == "closed"
+
+
+def _image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), (200, 200, 200)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_open_gemini_breaker_skips_the_request():
+    """Once Gemini keeps failing, analyze_receipt answers circuit_open without calling the API"""
+    clock = Clock()
+    calls = []
+
+    def generate(content, generation_config=None):
+        calls.append(1)
+        if len(calls) <= 2:
+            raise RuntimeError("503 Service Unavailable")
+        return Response('{"image_type": "receipt", "final_amount": 12}')
+
+    gemini = GeminiProcessor.__new__(GeminiProcessor)
+    gemini.model = object()
+    gemini.rate_limiter = None
+    gemini.breaker = CircuitBreaker("gemini", failure_rate=0.5, min_calls=2, window=60, open_seconds=30, clock=clock)
+    gemini._stats_lock = threading.Lock()
+    gemini.parse_counts = {"schema": 0, "fallback": 0, "failed": 0}
+    gemini._generate_content = generate
+
+    assert gemini.analyze_receipt(_image())["code"] == "unknown_error"
+    assert gemini.analyze_receipt(_image())["code"] == "unknown_error"
+    skipped = gemini.analyze_receipt(_image())
+    print(skipped)
+    assert skipped["code"] == "circuit_open" and skipped["retry_after_seconds"] == 30
+    assert len(calls) == 2
+
+    clock.now += 30
+    assert gemini.analyze_receipt(_image())["final_amount"] == 12.0
+    assert gemini.breaker.state == "closed" and len(calls) == 3
+
+
+def test_parse_error_is_recorded_once():
+    """A call whose answer cannot be parsed is one outcome in the window, not a success plus an error"""
+    gemini = GeminiProcessor.__new__(GeminiProcessor)
+    gemini.model = object()
+    gemini.rate_limiter = None
+    gemini.breaker = CircuitBreaker("gemini", failure_rate=0.5, min_calls=2, window=60, open_seconds=30, clock=Clock())
+    gemini._stats_lock = threading.Lock()
+    gemini.parse_counts = {"schema": 0, "fallback": 0, "failed": 0}
+    gemini._generate_content = lambda content, generation_config=None: Response("I cannot read this image.")
+
+    assert gemini.analyze_receipt(_image())["code"] == "response_parse_error"
+    assert gemini.breaker.stats()["calls_in_window"] == 1
+
+
+def _wav(path):
+    with wave.open(path, "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(16000)
+        handle.writeframes(b"\x00\x00" * 1600)
+
+
+def test_open_speech_breaker_goes_straight_to_sphinx():
+    """After repeated Google Speech request errors, voice notes skip Google and use Sphinx"""
+    import speech_recognition as sr
+
+    google_calls = []
+
+    def recognize_google(self, audio, *args, **kwargs):
+        google_calls.append(1)
+        raise sr.RequestError("recognition connection failed: timed out")
+
+    def recognize_sphinx(self, audio, *args, **kwargs):
+        return "tea10"
+
+    saved = nlp_processor.speech_breaker, sr.Recognizer.recognize_google, sr.Recognizer.recognize_sphinx
+    nlp_processor.speech_breaker = CircuitBreaker("google_speech", failure_rate=0.5, min_calls=2, open_seconds=60)
+    sr.Recognizer.recognize_google, sr.Recognizer.recognize_sphinx = recognize_google, recognize_sphinx
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "voice.wav")
+            _wav(path)
+            voice = nlp_processor.VoiceProcessor()
+            texts = [voice.transcribe_voice(path) for _ in range(4)]
+        stats = nlp_processor.speech_breaker.stats()
+    finally:
+        nlp_processor.speech_breaker, sr.Recognizer.recognize_google, sr.Recognizer.recognize_sphinx = saved
+
+    print(texts, stats)
+    assert texts == ["tea 10"] * 4
+    assert len(google_calls) == 2
+    assert stats["state"] == "open" and stats["rejected"] == 2
+
+
+if __name__ == "__main__":
+    test_opens_on_failure_rate_and_probes_once()
+    test_old_failures_leave_the_window_and_lost_probes_expire()
+    test_only_the_probe_closes_the_breaker()
+    test_open_gemini_breaker_skips_the_request()
+    test_parse_error_is_recorded_once()
+    test_open_speech_breaker_goes_straight_to_sphinx()
+    print("\n✅ All circuit breaker tests passed!")
@@ -0,0 +1,95 @@
+"""
+Fake Gemini test: a real GeminiProcessor runs offline against the local stand-in
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from fake_gemini import CANNED_RECEIPT, FakeGeminiModel, FakeGenai, install, parse_latency
+from gemini_processor import GeminiProcessor
+from image_generator import build_cases
+from rate_limiter import RateLimiter
+
+
+def _processor(tmp):
+    return GeminiProcessor(
+        rate_limiter=RateLimiter(rpm=0, rpd=0, db_path=os.path.join(tmp, "limits.db")),
+        model_cache_path=os.path.join(tmp, "models.json"),
+    )
+
+
+def test_canned_answer_and_missing_model():
+    """Unknown uploads get the canned receipt; a 404 model is blocked and the next one answers"""
+    fake = FakeGeminiModel(missing_models=["gemini-2.5-flash"])
+    case = build_cases(48, 1, [(720, 1280)], [0], kinds=("upi",))[0]
+    with tempfile.TemporaryDirectory() as tmp, install(FakeGenai(fake)):
+        gemini = _processor(tmp)
+        gemini._refresh_thread.join(5)
+        canned = gemini.analyze_receipt(case["image"])
+        assert "gemini-2.5-flash" in gemini._blocked_models
+
+        fake.expect(case)
+        upi = gemini.analyze_receipt(case["image"])
+
+    print(canned["final_amount"], upi, fake.by_model)
+    assert canned["final_amount"] == CANNED_RECEIPT["final_amount"]
+    assert upi["amount"] == case["amount"] and upi["upi_transaction_id"] == case["upi_transaction_id"]
+    assert fake.by_model == {"gemini-2.5-flash": 1, "gemini-2.0-flash": 2}
+    assert fake.errors == {"404": 1}
+
+
+def test_exhausted_quota_starts_the_shared_cooldown():
+    """A 429 starts the shared cooldown at once (no other model is asked) and later calls skip the API"""
+    fake = FakeGeminiModel(quota_after=1)
+    with tempfile.TemporaryDirectory() as tmp, install(FakeGenai(fake)):
+        gemini = _processor(tmp)
+        gemini._refresh_thread.join(5)
+        image = build_cases(48, 1, [(360, 640)], [0], kinds=("receipt",))[0]["image"]
+        results = [gemini.analyze_receipt(image) for _ in range(3)]
+        requests = sum(fake.by_model.values())
+
+    print([result.get("code") for result in results], fake.errors)
+    assert not results[0].get("error")
+    assert results[1]["code"] == "quota_exceeded" and results[1]["retry_after_seconds"] == 20
+    assert results[2]["code"] == "quota_cooldown"
+    assert requests == 1 + 1                # the 429 is not retried on the other candidate models
+
+
+def test_latency_distributions():
+    """parse_latency samplers are seeded and stay in range"""
+    assert parse_latency("0.25")() == 0.25
+    uniform = [parse_latency("uniform:0.2,0.4", seed=1)() for _ in range(3)]
+    assert all(0.2 <= value <= 0.4 for value in uniform)
+    lognormal = parse_latency("lognormal:1,0.5", seed=7)
+    samples = sorted(lognormal() for _ in range(201))
+    assert 0.8 < samples[100] < 1.25          # median close to 1s
+    assert parse_latency("exp:0.5", seed=3)() == parse_latency("exp:0.5", seed=3)()
+
+
+def test_load_generator_drives_the_handler():
+    """bench_gemini_load runs handle_screenshot end to end against the stand-in"""
+    import bench_gemini_load
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, "report.json")
+        bench_gemini_load.main([
+            "--images", "4", "--rate", "40", "--latency", "0.01",
+            "--scenarios", "healthy,outage", "--rate-503", "1.0", "--report", report_path,
+        ])
+        with open(report_path, encoding="utf-8") as handle:
+            report = json.load(handle)
+
+    healthy, outage = report["scenarios"]["healthy"], report["scenarios"]["outage"]
+    assert healthy["gemini_answered"] == 4 and healthy["expenses_saved"] > 0
+    assert outage["gemini_answered"] == 0 and outage["injected_errors"]["503"] > 0
+
+
+if __name__ == "__main__":
+    test_canned_answer_and_missing_model()
+    test_exhausted_quota_starts_the_shared_cooldown()
+    test_latency_distributions()
+    test_load_generator_drives_the_handler()
+    print("\n✅ All fake Gemini tests passed!")
@@ -0,0 +1,100 @@
+"""
+Gemini batch request test: several images in one call, split back per image
+"""
+import io
+import json
+import os
+import tempfile
+import threading
+
+from PIL import Image
+
+from gemini_processor import GeminiProcessor
+from rate_limiter import RateLimiter
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+def _image(shade):
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), (shade, shade, shade)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _processor(generate, tmp):
+    gemini = GeminiProcessor.__new__(GeminiProcessor)
+    gemini.model = object()
+    gemini._init_error = None
+    gemini.rate_limiter = RateLimiter(rpm=60, rpd=0, db_path=os.path.join(tmp, "limits.db"))
+    gemini.breaker = None
+    gemini._stats_lock = threading.Lock()
+    gemini.parse_counts = {"schema": 0, "fallback": 0, "failed": 0}
+    gemini._generate_content = generate
+    return gemini
+
+
+def test_batch_is_one_request_split_in_image_order():
+    """One call for three images; answers are matched by image_index and normalized"""
+    calls = []
+
+    def generate(content, generation_config=None):
+        calls.append((content, generation_config))
+        answers = [{"image_index": 3, "image_type": "upi", "amount": 30},
+                   {"image_index": 1, "image_type": "receipt", "final_amount": "10"},
+                   {"image_index": 2, "image_type": "bill", "total": 20}]
+        return Response(json.dumps(answers))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gemini = _processor(generate, tmp)
+        results = gemini.analyze_receipts([_image(250), _image(200), _image(150)])
+        budget = gemini.rate_limiter.stats()
+
+    content, config = calls[0]
+    print([result.get("amount") for result in results], budget)
+    assert len(calls) == 1 and budget["allowed"] == 1
+    assert content[1] == "Image 1:" and sum(isinstance(part, dict) for part in content) == 3
+    assert config["response_schema"]["type"] == "array"
+    assert [result["amount"] for result in results] == [10.0, 20.0, 30.0]
+    assert [result["image_type"] for result in results] == ["receipt", "receipt", "upi"]
+
+
+def test_unsplittable_answer_falls_back_to_single_calls():
+    """A batch answer with the wrong number of objects is retried image by image"""
+    calls = []
+
+    def generate(content, generation_config=None):
+        calls.append(len(content))
+        if generation_config["response_schema"]["type"] == "array":
+            return Response(json.dumps([{"image_index": 1, "image_type": "receipt"}]))
+        return Response('{"image_type": "receipt", "final_amount": 5}')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = _processor(generate, tmp).analyze_receipts([_image(250), _image(200)])
+
+    assert calls == [5, 2, 2]
+    assert [result["final_amount"] for result in results] == [5.0, 5.0]
+
+
+def test_quota_error_is_shared_by_the_batch():
+    """A 429 on the batch answers every image with the quota error, without retrying one by one"""
+    calls = []
+
+    def generate(content, generation_config=None):
+        calls.append(1)
+        raise RuntimeError("429 Resource exhausted. Please retry in 30s.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = _processor(generate, tmp).analyze_receipts([_image(250), _image(200)])
+
+    assert len(calls) == 1
+    assert [result["code"] for result in results] == ["quota_exceeded", "quota_exceeded"]
+
+
+if __name__ == "__main__":
+    test_batch_is_one_request_split_in_image_order()
+    test_unsplittable_answer_falls_back_to_single_calls()
+    test_quota_error_is_shared_by_the_batch()
+    print("\n✅ All Gemini batch tests passed!")
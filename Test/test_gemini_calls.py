@@ -0,0 +1,189 @@
+"""
+Gemini call accounting test: per-call records, JSONL dump, daily summary and /gemini_stats
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import gemini_processor
+from fake_gemini import FakeGeminiModel, FakeGenai, install
+from gemini_calls import GeminiCallLog, estimated_cost
+from gemini_processor import GeminiProcessor
+from rate_limiter import RateLimiter
+
+
+class Usage:
+    def __init__(self, prompt, output):
+        self.prompt_token_count = prompt
+        self.candidates_token_count = output
+        self.total_token_count = prompt + output
+
+
+class Response:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+def _image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), (210, 210, 210)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _processor(generate, rate_limiter=None):
+    gemini = GeminiProcessor.__new__(GeminiProcessor)
+    gemini.model = object()
+    gemini.rate_limiter = rate_limiter
+    gemini.breaker = None
+    gemini._stats_lock = threading.Lock()
+    gemini.parse_counts = {"schema": 0, "fallback": 0, "failed": 0}
+    gemini._generate_content = generate
+    return gemini
+
+
+class _Logged:
+    """Point gemini_processor at a temporary GeminiCallLog for the duration of a test."""
+
+    def __init__(self, tmp, flush_seconds=3600):
+        self.log = GeminiCallLog(path=os.path.join(tmp, "calls.jsonl"), flush_seconds=flush_seconds)
+
+    def __enter__(self):
+        self.saved, gemini_processor.gemini_calls = gemini_processor.gemini_calls, self.log
+        return self.log
+
+    def __exit__(self, *exc):
+        gemini_processor.gemini_calls = self.saved
+
+
+def test_analysis_is_recorded_with_usage():
+    """One record per analysis: bytes sent, tokens from usage_metadata, outcome; skipped calls too"""
+    def generate(content, generation_config=None):
+        return Response('{"image_type": "receipt", "final_amount": 42}', Usage(1200, 80))
+
+    with tempfile.TemporaryDirectory() as tmp, _Logged(tmp) as log:
+        image = _image()
+        assert _processor(generate).analyze_receipt(image)["final_amount"] == 42.0
+        limiter = RateLimiter(rpm=1, rpd=0, db_path=os.path.join(tmp, "limits.db"))
+        limited = _processor(generate, limiter)
+        limited.analyze_receipt(image)
+        assert limited.analyze_receipt(image)["code"] == "rate_limited"
+        records = log.records()
+
+    print(records)
+    ok, _, skipped = records
+    assert ok["outcome"] == "ok" and ok["images"] == 1 and ok["requests"] == 1
+    assert ok["request_bytes"] > len(image) // 2
+    assert (ok["prompt_tokens"], ok["output_tokens"], ok["total_tokens"]) == (1200, 80, 1280)
+    assert ok["cost_usd"] == round(estimated_cost(1200, 80), 8) and ok["cost_usd"] > 0
+    assert skipped["outcome"] == "rate_limited" and skipped["requests"] == 0 and skipped["total_tokens"] is None
+
+
+def test_fallback_model_and_attempts_are_traced():
+    """A 404 on the first model counts as an attempt; the answering model is recorded"""
+    fake = FakeGeminiModel(missing_models=["gemini-2.5-flash"])
+    with tempfile.TemporaryDirectory() as tmp, _Logged(tmp) as log, install(FakeGenai(fake)):
+        gemini = GeminiProcessor(
+            rate_limiter=RateLimiter(rpm=0, rpd=0, db_path=os.path.join(tmp, "limits.db")),
+            model_cache_path=os.path.join(tmp, "models.json"),
+        )
+        gemini._refresh_thread.join(5)
+        gemini.analyze_receipt(_image())
+        gemini.analyze_receipt(_image())
+        first, second = log.records()
+
+    print(first, second)
+    assert first["model"] == "gemini-2.0-flash" and first["requests"] == 2
+    assert second["model"] == "gemini-2.0-flash" and second["requests"] == 1
+    assert first["prompt_tokens"] > 258 and first["output_tokens"] > 0
+
+
+def test_jsonl_dump_and_daily_summary():
+    """Records reach the JSONL file once a flush is due; a new log reloads them for the summary"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "calls.jsonl")
+        log = GeminiCallLog(path=path, flush_seconds=3600)
+        for latency in (1.0, 2.0, 3.0, 4.0):
+            log.record(model="m", images=1, request_bytes=1000, requests=1, prompt_tokens=1000,
+                       output_tokens=100, total_tokens=1100, latency_s=latency, outcome="ok")
+        log.record(model=None, images=2, request_bytes=0, requests=0, prompt_tokens=None,
+                   output_tokens=None, total_tokens=None, latency_s=0.0, outcome="circuit_open")
+        assert not os.path.exists(path)         # nothing written until a flush is due
+        log.flush_seconds = 0
+        log.record(model="m", images=1, request_bytes=500, requests=2, prompt_tokens=None,
+                   output_tokens=None, total_tokens=None, latency_s=10.0, outcome="unknown_error")
+        with open(path, encoding="utf-8") as handle:
+            lines = [json.loads(line) for line in handle]
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write("not json\n")
+            handle.write(json.dumps({"ts": time.time() - 30 * 86400, "outcome": "ok", "total_tokens": 9}) + "\n")
+
+        summary = GeminiCallLog(path=path).summary()
+        daily = GeminiCallLog(path=path).daily_tokens(3)
+
+    print(summary, daily)
+    assert len(lines) == 6
+    assert summary["calls"] == 6 and summary["images"] == 7 and summary["requests"] == 6
+    assert summary["outcomes"] == {"ok": 4, "circuit_open": 2, "unknown_error": 1}
+    assert summary["p50_s"] == 3.0 and summary["p95_s"] == 10.0      # skipped calls leave latency out
+    assert summary["total_tokens"] == 4400 and summary["request_bytes"] == 4500
+    assert daily[-1][1] == 4400 and [tokens for _, tokens, _ in daily[:-1]] == [0, 0]
+
+
+class _Message:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class _User:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class _Update:
+    def __init__(self, user_id):
+        self.effective_user = _User(user_id)
+        self.message = _Message()
+
+
+def test_gemini_stats_command_is_admin_only():
+    """/gemini_stats answers admins with latency and token lines, everyone else with a refusal"""
+    import main as bot_main
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = GeminiCallLog(path=os.path.join(tmp, "calls.jsonl"), flush_seconds=3600)
+        log.record(model="gemini-2.5-flash", images=1, request_bytes=2048, requests=1, prompt_tokens=500,
+                   output_tokens=50, total_tokens=550, latency_s=1.5, outcome="ok")
+        saved = bot_main.gemini_calls, bot_main.ADMIN_USER_IDS
+        bot_main.gemini_calls, bot_main.ADMIN_USER_IDS = log, {7}
+        try:
+            admin, stranger = _Update(7), _Update(8)
+            asyncio.run(bot_main.gemini_stats(admin, None))
+            asyncio.run(bot_main.gemini_stats(stranger, None))
+        finally:
+            bot_main.gemini_calls, bot_main.ADMIN_USER_IDS = saved
+
+    print(admin.message.replies[0])
+    assert "p50 1.50s" in admin.message.replies[0] and "550" in admin.message.replies[0]
+    assert "gemini-2.5-flash 1" in admin.message.replies[0]
+    assert "only available to bot admins" in stranger.message.replies[0]
+
+
+if __name__ == "__main__":
+    test_analysis_is_recorded_with_usage()
+    test_fallback_model_and_attempts_are_traced()
+    test_jsonl_dump_and_daily_summary()
+    test_gemini_stats_command_is_admin_only()
+    print("\n✅ All Gemini call accounting tests passed!")
@@ -0,0 +1,206 @@
+"""
+Gemini client test: blocking Gemini calls run off the event loop, bounded and in order
+"""
+import asyncio
+import threading
+import time
+
+from gemini_client import AsyncGeminiClient
+
+
+class SlowGemini:
+    """Stands in for GeminiProcessor: analyze_receipt blocks like a network call."""
+
+    def __init__(self, seconds=0.1):
+        self.seconds = seconds
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def analyze_receipt(self, image):
+        with self._lock:
+            self.calls.append(image)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.seconds)
+        with self._lock:
+            self.active -= 1
+        if image == b"boom":
+            raise RuntimeError("connection reset")
+        if image == b"quota":
+            return {"error": "429 quota", "code": "quota_exceeded"}
+        return {"image_type": "receipt", "image": image.decode()}
+
+
+def test_concurrency_bound_and_fifo_order():
+    """Never more than `concurrency` calls at once; requests start in arrival order"""
+    gemini = SlowGemini(0.05)
+
+    async def run():
+        client = AsyncGeminiClient(gemini, concurrency=2, max_queue=10, timeout=5)
+        images = [f"img{i}".encode() for i in range(6)]
+        results = await asyncio.gather(*(client.analyze(image) for image in images))
+        stats = client.stats()
+        await client.close()
+        return images, results, stats
+
+    images, results, stats = asyncio.run(run())
+    print(f"calls {gemini.calls}, max active {gemini.max_active}")
+    assert [result["image"] for result in results] == [image.decode() for image in images]
+    assert gemini.calls == images
+    assert gemini.max_active == 2
+    assert stats["completed"] == 6 and stats["queue_depth"] == 0
+
+
+def test_event_loop_stays_responsive():
+    """Other coroutines keep running while a Gemini call blocks its thread"""
+    gemini = SlowGemini(0.3)
+
+    async def run():
+        client = AsyncGeminiClient(gemini, concurrency=1, timeout=5)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await client.analyze(b"slow")
+        task.cancel()
+        await client.close()
+        return ticks
+
+    ticks = asyncio.run(run())
+    print(f"ticks while Gemini was busy: {ticks}")
+    assert ticks >= 10
+
+
+def test_deadline_and_stale_requests():
+    """A caller past its deadline gets an error; queued requests nobody waits for are skipped"""
+    gemini = SlowGemini(0.3)
+
+    async def run():
+        client = AsyncGeminiClient(gemini, concurrency=1, timeout=5)
+        first = asyncio.create_task(client.analyze(b"first"))
+        await asyncio.sleep(0)
+        stale = await client.analyze(b"stale", deadline=time.time() + 0.05)
+        await first
+        stats = client.stats()
+        await client.close()
+        return stale, stats
+
+    stale, stats = asyncio.run(run())
+    print(f"stale result {stale}, stats {stats}")
+    assert stale["code"] == "deadline_exceeded"
+    assert gemini.calls == [b"first"]
+    assert stats["timeouts"] == 1 and stats["skipped"] == 1
+
+
+def test_cancelled_caller_is_dropped():
+    """Cancelling the handler's await cancels its queued request"""
+    gemini = SlowGemini(0.2)
+
+    async def run():
+        client = AsyncGeminiClient(gemini, concurrency=1, timeout=5)
+        first = asyncio.create_task(client.analyze(b"first"))
+        second = asyncio.create_task(client.analyze(b"second"))
+        await asyncio.sleep(0.05)
+        second.cancel()
+        await first
+        await asyncio.sleep(0.05)
+        stats = client.stats()
+        await client.close()
+        return second.cancelled(), stats
+
+    cancelled, stats = asyncio.run(run())
+    assert cancelled
+    assert gemini.calls == [b"first"]
+    assert stats["skipped"] == 1
+
+
+def test_queue_full_and_failures():
+    """A full queue answers at once; a raising call becomes an error dict"""
+    gemini = SlowGemini(0.1)
+
+    async def run():
+        client = AsyncGeminiClient(gemini, concurrency=1, max_queue=1, timeout=5)
+        running = asyncio.create_task(client.analyze(b"boom"))
+        await asyncio.sleep(0.02)
+        queued = asyncio.create_task(client.analyze(b"queued"))
+        await asyncio.sleep(0)
+        rejected = await client.analyze(b"rejected")
+        results = await asyncio.gather(running, queued)
+        stats = client.stats()
+        await client.close()
+        return rejected, results, stats
+
+    rejected, (failed, queued), stats = asyncio.run(run())
+    print(f"rejected {rejected}; failed {failed}; stats {stats}")
+    assert rejected["code"] == "queue_full"
+    assert failed["error"] == "connection reset"
+    assert queued["image"] == "queued"
+    assert stats["rejected"] == 1 and stats["failed"] == 1 and stats["completed"] == 1
+
+
+def test_error_results_count_as_failed():
+    """An error dict returned by the processor is a failure, not a completed image"""
+    gemini = SlowGemini(0.01)
+
+    async def run():
+        client = AsyncGeminiClient(gemini, concurrency=1, timeout=5)
+        results = [await client.analyze(image) for image in (b"quota", b"ok")]
+        stats = client.stats()
+        await client.close()
+        return results, stats
+
+    results, stats = asyncio.run(run())
+    print(f"stats {stats}")
+    assert results[0]["code"] == "quota_exceeded" and results[1]["image"] == "ok"
+    assert stats["completed"] == 1 and stats["failed"] == 1
+    assert stats["requests"] == 2 and stats["images_per_request"] == 1.0
+
+
+class BatchGemini(SlowGemini):
+    """SlowGemini that also answers several images in one call."""
+
+    def __init__(self, seconds=0.05):
+        super().__init__(seconds)
+        self.batches = []
+
+    def analyze_receipts(self, images):
+        self.batches.append(list(images))
+        time.sleep(self.seconds)
+        return [{"image_type": "receipt", "image": image.decode()} for image in images]
+
+
+def test_requests_in_window_share_one_call():
+    """With batching on, requests arriving together go out as one call and each caller gets its own answer"""
+    gemini = BatchGemini()
+
+    async def run():
+        client = AsyncGeminiClient(gemini, concurrency=2, timeout=5, batch_size=4, batch_window=0.1)
+        images = [f"img{i}".encode() for i in range(6)]
+        results = await asyncio.gather(*(client.analyze(image) for image in images))
+        stats = client.stats()
+        await client.close()
+        return images, results, stats
+
+    images, results, stats = asyncio.run(run())
+    print(f"batches {gemini.batches}, single calls {gemini.calls}, stats requests {stats['requests']}")
+    assert [result["image"] for result in results] == [image.decode() for image in images]
+    assert gemini.batches[0] == images[:4]
+    assert stats["requests"] == 2 and stats["completed"] == 6
+
+
+if __name__ == "__main__":
+    test_concurrency_bound_and_fifo_order()
+    test_event_loop_stays_responsive()
+    test_deadline_and_stale_requests()
+    test_cancelled_caller_is_dropped()
+    test_queue_full_and_failures()
+    test_error_results_count_as_failed()
+    test_requests_in_window_share_one_call()
+    print("\n✅ All Gemini client tests passed!")
@@ -0,0 +1,136 @@
+"""
+Gemini hedging test: a slow primary model is raced against the next candidate
+"""
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import gemini_processor
+from gemini_processor import GeminiProcessor
+from metrics import LatencyTracker
+from rate_limiter import RateLimiter
+
+
+class FakeModel:
+    def __init__(self, name, seconds, error=None):
+        self.name = name
+        self.seconds = seconds
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, content):
+        self.calls += 1
+        time.sleep(self.seconds)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.name
+
+
+def _processor(tmp, *models):
+    gemini = GeminiProcessor.__new__(GeminiProcessor)
+    gemini._model_cache = {model.name: model for model in models}
+    gemini._candidates = [model.name for model in models]
+    gemini._available_generation_models = set(gemini._candidates)
+    gemini._blocked_models = set()
+    gemini._blocked_at = {}
+    gemini._models_lock = threading.Lock()
+    gemini.model_cache_path = os.path.join(tmp, "models.json")
+    gemini.model_name = models[0].name
+    gemini.model = models[0]
+    gemini.rate_limiter = None
+    gemini.breaker = None
+    gemini.hedge = True
+    gemini._hedge_executor = ThreadPoolExecutor(max_workers=4)
+    gemini._stats_lock = threading.Lock()
+    gemini.hedges = 0
+    gemini.hedge_wins = 0
+    gemini.parse_counts = {"schema": 0, "fallback": 0, "failed": 0}
+    gemini.latency = LatencyTracker()
+    return gemini
+
+
+def test_slow_primary_is_hedged():
+    """Past the hedge delay the backup model is asked too, and its faster answer is used"""
+    saved = gemini_processor.GEMINI_HEDGE_DELAY_SECONDS
+    gemini_processor.GEMINI_HEDGE_DELAY_SECONDS = 0.1
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            slow, fast = FakeModel("primary", 0.6), FakeModel("backup", 0.05)
+            gemini = _processor(tmp, slow, fast)
+            start = time.perf_counter()
+            response = gemini._generate_content(["prompt", {"data": b""}])
+            elapsed = time.perf_counter() - start
+            stats = gemini.stats()
+    finally:
+        gemini_processor.GEMINI_HEDGE_DELAY_SECONDS = saved
+
+    print(f"answered by {response} in {elapsed:.2f}s, {stats['hedges']} hedge(s)")
+    assert response == "backup" and elapsed < 0.4
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+    assert gemini.model_name == "primary"       # a hedge win does not demote the primary
+
+
+def test_fast_primary_and_tuned_delay():
+    """A primary answering in time is not hedged; the delay follows its observed p90"""
+    with tempfile.TemporaryDirectory() as tmp:
+        primary, backup = FakeModel("primary", 0.01), FakeModel("backup", 0.01)
+        gemini = _processor(tmp, primary, backup)
+        assert gemini._generate_content(["prompt", {"data": b""}]) == "primary"
+        assert backup.calls == 0 and gemini.hedges == 0
+        assert gemini.hedge_delay("primary") == gemini_processor.GEMINI_HEDGE_DELAY_SECONDS
+
+        for seconds in [2.0] * 10 + [3.0] * 10:
+            gemini.latency.record("primary", seconds)
+        assert gemini.hedge_delay("primary") == 3.0
+        assert gemini.hedge_delay("primary", batch=True) == gemini_processor.GEMINI_HEDGE_DELAY_SECONDS
+
+
+def test_failing_primary_falls_through_to_next_model():
+    """A primary that fails fast is blocked and the next model answers, as without hedging"""
+    with tempfile.TemporaryDirectory() as tmp:
+        missing = FakeModel("primary", 0.0, error="404 model not found")
+        backup = FakeModel("backup", 0.01)
+        gemini = _processor(tmp, missing, backup)
+        assert gemini._generate_content(["prompt", {"data": b""}]) == "backup"
+        assert "primary" in gemini._blocked_models and gemini.model_name == "backup"
+        assert gemini.hedges == 0 and backup.calls == 1
+
+
+def test_fallbacks_spend_the_rate_budget_and_quota_stops():
+    """Each fallback model takes a limiter token and the walk stops when none is left; a 429 is
+    not retried on the other models"""
+    with tempfile.TemporaryDirectory() as tmp:
+        first = FakeModel("first", 0.0, error="404 model not found")
+        second = FakeModel("second", 0.0, error="404 model not found")
+        third = FakeModel("third", 0.0)
+        gemini = _processor(tmp, first, second, third)
+        gemini.hedge = False
+        gemini.rate_limiter = RateLimiter(rpm=1, rpd=0, db_path=os.path.join(tmp, "limits.db"))
+        try:
+            gemini._generate_content(["prompt", {"data": b""}])
+            raise AssertionError("expected the budget to stop the fallback")
+        except RuntimeError as e:
+            assert "404" in str(e)
+        assert (first.calls, second.calls, third.calls) == (1, 1, 0)
+        assert gemini.rate_limiter.stats()["limited"] == {"rpm": 1}
+
+        quota = FakeModel("quota", 0.0, error="429 Resource exhausted")
+        backup = FakeModel("backup", 0.0)
+        gemini = _processor(tmp, quota, backup)
+        gemini.hedge = False
+        try:
+            gemini._generate_content(["prompt", {"data": b""}])
+            raise AssertionError("expected the 429 to be raised")
+        except RuntimeError as e:
+            assert "429" in str(e)
+        assert backup.calls == 0
+
+
+if __name__ == "__main__":
+    test_slow_primary_is_hedged()
+    test_fast_primary_and_tuned_delay()
+    test_failing_primary_falls_through_to_next_model()
+    test_fallbacks_spend_the_rate_budget_and_quota_stops()
+    print("\n✅ All Gemini hedging tests passed!")
@@ -0,0 +1,125 @@
+"""
+Gemini model cache test: startup uses the persisted model list instead of list_models()
+"""
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import gemini_processor
+from gemini_processor import GeminiProcessor
+from rate_limiter import RateLimiter
+
+
+class _Model:
+    def __init__(self, name):
+        self.name = f"models/{name}"
+        self.supported_generation_methods = ["generateContent"]
+
+
+class _GenerativeModel:
+    def __init__(self, name, missing):
+        self.name = name
+        self.missing = missing
+
+    def generate_content(self, content):
+        if self.name in self.missing:
+            raise RuntimeError(f"404 models/{self.name} is not found")
+        return "ok"
+
+
+class FakeGenai:
+    """Counts the calls GeminiProcessor makes to the SDK."""
+
+    def __init__(self, names, missing=()):
+        self.names = names
+        self.missing = set(missing)
+        self.list_calls = 0
+        self.network = threading.Event()    # list_models() waits until the test lets it answer
+        self.network.set()
+
+    def configure(self, api_key):
+        pass
+
+    def list_models(self):
+        self.network.wait(5)
+        self.list_calls += 1
+        return [_Model(name) for name in self.names]
+
+    def GenerativeModel(self, name):
+        return _GenerativeModel(name, self.missing)
+
+
+@contextlib.contextmanager
+def fake_sdk(fake):
+    """Swap the SDK and API key in gemini_processor (background refreshes included)."""
+    saved = gemini_processor.genai, gemini_processor.GEMINI_API_KEY
+    gemini_processor.genai, gemini_processor.GEMINI_API_KEY = fake, "test-key"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            yield tmp
+    finally:
+        gemini_processor.genai, gemini_processor.GEMINI_API_KEY = saved
+
+
+def _processor(tmp):
+    return GeminiProcessor(
+        rate_limiter=RateLimiter(db_path=os.path.join(tmp, "limits.db")),
+        model_cache_path=os.path.join(tmp, "models.json"),
+    )
+
+
+def test_cold_start_discovers_in_background_then_cache_is_used():
+    """First start serves the static list and saves discovery; the next start makes no list_models call"""
+    fake = FakeGenai(["gemini-2.0-flash", "gemini-1.5-pro"])
+    fake.network.clear()
+    with fake_sdk(fake) as tmp:
+        first = _processor(tmp)
+        # Startup did not wait for list_models(): the static preference is in use.
+        assert first.model_name == "gemini-2.5-flash" and fake.list_calls == 0
+        fake.network.set()
+        first._refresh_thread.join(5)
+        assert fake.list_calls == 1
+        assert first.model_name == "gemini-2.0-flash"       # refreshed list swapped in
+
+        with open(os.path.join(tmp, "models.json"), encoding="utf-8") as handle:
+            saved = json.load(handle)
+        print(saved)
+        assert saved["available"] == ["gemini-1.5-pro", "gemini-2.0-flash"]
+
+        second = _processor(tmp)
+        assert fake.list_calls == 1 and second._refresh_thread is None
+        assert second.model_name == "gemini-2.0-flash"
+
+
+def test_blocked_models_persist_and_stale_cache_refreshes():
+    """A model answering 404 stays skipped after restart; an expired cache is refreshed off the startup path"""
+    fake = FakeGenai(["gemini-2.0-flash", "gemini-1.5-pro"], missing=["gemini-2.0-flash"])
+    with fake_sdk(fake) as tmp:
+        first = _processor(tmp)
+        first._refresh_thread.join(5)
+        assert first._generate_content(["prompt"]) == "ok"
+        assert first.model_name == "gemini-1.5-pro"
+
+        second = _processor(tmp)
+        assert second.model_name == "gemini-1.5-pro" and "gemini-2.0-flash" in second._blocked_models
+        assert fake.list_calls == 1
+
+        path = os.path.join(tmp, "models.json")
+        with open(path, encoding="utf-8") as handle:
+            saved = json.load(handle)
+        saved["saved_at"] = time.time() - 7 * 24 * 3600
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(saved, handle)
+        third = _processor(tmp)
+        assert third.model_name == "gemini-1.5-pro"         # served from the stale list right away
+        third._refresh_thread.join(5)
+        assert fake.list_calls == 2
+
+
+if __name__ == "__main__":
+    test_cold_start_discovers_in_background_then_cache_is_used()
+    test_blocked_models_persist_and_stale_cache_refreshes()
+    print("\n✅ All Gemini model cache tests passed!")
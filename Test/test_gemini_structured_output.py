@@ -0,0 +1,91 @@
+"""
+Gemini structured output test: schema-constrained JSON takes the one-pass path, prose falls back
+"""
+import io
+import threading
+
+from PIL import Image
+
+from gemini_processor import GeminiProcessor, GeminiReceipt
+
+SCHEMA_ANSWER = (
+    '{"image_type": "Bill", "merchant": " Cafe Coffee Day ", "date": "2024-03-02",'
+    ' "transaction_time": null, "subtotal": 240, "total": null, "grand_total": 252.0,'
+    ' "final_amount": null, "amount": null, "upi_to": null, "upi_from": null, "upi_transaction_id": null,'
+    ' "items": [{"name": "Cappuccino", "quantity": 2, "unit_price": 120, "total_price": null, "category": "food"},'
+    ' {"name": "", "quantity": null, "unit_price": null, "total_price": null, "category": null}]}'
+)
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+def _image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), (220, 220, 220)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _processor(answer, configs):
+    def generate(content, generation_config=None):
+        configs.append(generation_config)
+        return Response(answer)
+
+    gemini = GeminiProcessor.__new__(GeminiProcessor)
+    gemini.model = object()
+    gemini.rate_limiter = None
+    gemini.breaker = None
+    gemini._stats_lock = threading.Lock()
+    gemini.parse_counts = {"schema": 0, "fallback": 0, "failed": 0}
+    gemini._generate_content = generate
+    return gemini
+
+
+def test_schema_answer_is_parsed_in_one_pass():
+    """The request asks for schema JSON; the answer is typed and normalized without the heuristics"""
+    configs = []
+    gemini = _processor(SCHEMA_ANSWER, configs)
+    result = gemini.analyze_receipt(_image())
+
+    print(result)
+    assert configs[0]["response_mime_type"] == "application/json"
+    assert configs[0]["response_schema"]["properties"]["final_amount"]["type"] == "number"
+    assert gemini.parse_counts == {"schema": 1, "fallback": 0, "failed": 0}
+    assert result["image_type"] == "receipt" and result["merchant"] == "Cafe Coffee Day"
+    assert result["transaction_time"] == "2024-03-02"
+    assert result["amount"] == 252.0 and result["subtotal"] == 240.0 and result["final_amount"] is None
+    assert result["items"] == [
+        {"name": "Cappuccino", "quantity": 2, "unit_price": 120.0, "total_price": 240.0, "category": "food"},
+    ]
+
+
+def test_free_form_answers_use_counted_fallback():
+    """Fenced JSON and key: value text still parse, through the fallback; unparseable text fails"""
+    fenced = _processor("```json\n" + SCHEMA_ANSWER + "\n```", [])
+    assert fenced.analyze_receipt(_image()) == _processor(SCHEMA_ANSWER, []).analyze_receipt(_image())
+    assert fenced.parse_counts == {"schema": 0, "fallback": 1, "failed": 0}
+
+    key_value = _processor("merchant: Dosa Plaza\ntotal: 180.50\ndate: none", [])
+    result = key_value.analyze_receipt(_image())
+    assert result["merchant"] == "Dosa Plaza" and result["amount"] == 180.5 and result["date"] is None
+
+    garbage = _processor("I cannot read this image.", [])
+    assert garbage.analyze_receipt(_image())["code"] == "response_parse_error"
+    assert garbage.parse_counts == {"schema": 0, "fallback": 1, "failed": 1}
+
+
+def test_receipt_is_slotted():
+    """GeminiReceipt carries exactly the result fields, without a per-instance __dict__"""
+    receipt = GeminiReceipt({"image_type": "UPI payment", "amount": "1,5", "upi_to": 98765})
+    assert not hasattr(receipt, "__dict__")
+    assert receipt.image_type == "upi" and receipt.amount == 1.5 and receipt.upi_to == "98765"
+    assert set(receipt.as_dict()) == set(GeminiReceipt.__slots__)
+
+
+if __name__ == "__main__":
+    test_schema_answer_is_parsed_in_one_pass()
+    test_free_form_answers_use_counted_fallback()
+    test_receipt_is_slotted()
+    print("\n✅ All Gemini structured output tests passed!")
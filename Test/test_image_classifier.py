@@ -0,0 +1,75 @@
+"""
+Image routing test: receipt photos and UPI screenshots are told apart before OCR
+"""
+import asyncio
+import io
+import os
+import random
+import sys
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from image_classifier import classify_image, route_image, text_kind, thumbnail_bytes
+from image_generator import build_cases, receipt_truth, render_receipt, to_jpeg
+
+
+def test_text_kind_keywords():
+    """Keyword scoring decides only when the text says enough"""
+    assert text_kind("Paid via Google Pay") == "upi"
+    assert text_kind("To: Ravi\nFrom: HDFC Bank\nCompleted") == "upi"
+    assert text_kind("Invoice\nSubtotal 200\nGST 10") == "receipt"
+    assert text_kind("lunch") is None
+    assert text_kind("") is None
+
+
+def test_synthetic_images_route_correctly():
+    """Every generated receipt / UPI image goes down its own path"""
+    cases = build_cases(seed=3, count=1, resolutions=[(720, 1280), (1080, 2400)], noise_levels=[0, 10])
+    routes = [(case["kind"], classify_image(case["image"])) for case in cases]
+
+    print("=" * 60)
+    for kind, route in routes:
+        print(f"{kind:8} -> {route['kind']:8} score {route['score']:+d}  {'; '.join(route['reasons'])}")
+    print("=" * 60)
+
+    assert all(kind == route["kind"] for kind, route in routes)
+
+
+def test_caption_outweighs_looks():
+    """A caption naming the payment app routes a receipt-looking photo to UPI"""
+    rng = random.Random(8)
+    image = to_jpeg(render_receipt(rng, receipt_truth(rng)["text"], (720, 1280), 10))
+    assert classify_image(image)["kind"] == "receipt"
+    assert classify_image(image, "paid with phonepe")["kind"] == "upi"
+
+
+def test_thumbnail_ocr_only_when_unsure():
+    """route_image asks for thumbnail OCR only when the cheap checks are not conclusive"""
+    reads = []
+
+    async def read_text(image):
+        with Image.open(io.BytesIO(image)) as thumbnail:
+            reads.append(thumbnail.size)
+        return "Google Pay\nUPI transaction ID: 123456789012"
+
+    confident = to_jpeg(Image.new("L", (720, 1600), 255))
+    unsure = to_jpeg(Image.new("L", (3000, 4000), 255))
+    assert asyncio.run(route_image(confident, "", read_text))["kind"] == "upi"
+    assert not reads
+
+    route = asyncio.run(route_image(unsure, "", read_text))
+    print(f"unsure image: {route['reasons']}, thumbnail {reads}")
+    assert route["kind"] == "upi" and route["confident"] and "Google Pay" in route["text"]
+    assert reads and max(reads[0]) <= 640
+    with Image.open(io.BytesIO(thumbnail_bytes(unsure, 200))) as thumbnail:
+        assert thumbnail.size == (150, 200)
+
+
+if __name__ == "__main__":
+    test_text_kind_keywords()
+    test_synthetic_images_route_correctly()
+    test_caption_outweighs_looks()
+    test_thumbnail_ocr_only_when_unsure()
+    print("\n✅ All image routing tests passed!")
@@ -0,0 +1,72 @@
+"""
+Gemini upload encoding test: photos are shrunk and re-encoded before upload, and reused by OCR
+"""
+import io
+import os
+import random
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from image_encoder import EncodedImageCache, encode_image, image_tokens, is_grayscale_safe
+from image_generator import receipt_truth, render_receipt, to_jpeg
+
+
+def _photo(size=(3000, 4000)):
+    rng = random.Random(5)
+    return to_jpeg(render_receipt(rng, receipt_truth(rng)["text"], size, 6))
+
+
+def test_large_photo_is_resized_and_grayscale():
+    """A 12 MP receipt photo uploads at 1536 px, grayscale, a fraction of the bytes"""
+    original = _photo()
+    encoded = encode_image(original)
+    print(f"{len(original)} -> {len(encoded['data'])} bytes, {encoded['width']}x{encoded['height']}")
+    assert (encoded["width"], encoded["height"]) == (1152, 1536)
+    assert encoded["grayscale"] and encoded["mime_type"] == "image/jpeg"
+    assert len(encoded["data"]) < len(original) / 4
+    with Image.open(io.BytesIO(encoded["data"])) as uploaded:
+        assert uploaded.mode == "L"
+
+    webp = encode_image(original, image_format="webp", max_side=800)
+    assert webp["mime_type"] == "image/webp" and max(webp["width"], webp["height"]) == 800
+
+
+def test_colour_kept_and_small_originals_untouched():
+    """Colourful pictures stay RGB; an image already small and compact is sent as is"""
+    pixels = np.random.default_rng(1).integers(0, 255, (200, 300, 3), dtype=np.uint8)
+    colourful = Image.fromarray(pixels)
+    assert not is_grayscale_safe(colourful)
+    assert is_grayscale_safe(colourful.convert("L").convert("RGB"))
+
+    buffer = io.BytesIO()
+    Image.new("L", (300, 200), 255).save(buffer, format="JPEG", quality=30)
+    small = buffer.getvalue()
+    assert encode_image(small)["data"] == small
+
+    assert image_tokens(300, 200) == 258
+    assert image_tokens(1152, 1536) == 258 * 4
+
+
+def test_cache_reuses_encoding():
+    """The OCR fallback finds the bytes encoded for Gemini without encoding again"""
+    cache = EncodedImageCache(max_entries=1)
+    first, second = _photo((1080, 2400)), _photo((720, 1280))
+    assert cache.get(first) is None
+    encoded = cache.encode(first)
+    assert cache.encode(first) is encoded and cache.get(first) is encoded
+    cache.encode(second)
+    assert cache.get(first) is None
+    stats = cache.stats()
+    print(stats)
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 1
+
+
+if __name__ == "__main__":
+    test_large_photo_is_resized_and_grayscale()
+    test_colour_kept_and_small_originals_untouched()
+    test_cache_reuses_encoding()
+    print("\n✅ All image encoder tests passed!")
@@ -0,0 +1,59 @@
+"""
+OCR preprocessing test: big photos shrink to OCR size, get straightened, binarized and cropped
+"""
+import io
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from image_preprocess import estimate_skew, estimate_text_height, ink_mask, preprocess_image
+
+LINES = ["PIZZA PALACE", "Margherita Pizza 350.00", "Garlic Bread 120.00", "GST 5% 23.50", "TOTAL 493.50"]
+
+
+def make_photo(font_size=80, angle=0, size=(3000, 4000)):
+    """Receipt text on white paper, on a darker table, as JPEG bytes."""
+    font = ImageFont.load_default(size=font_size)
+    paper = Image.new("L", (font_size * 16, font_size * 2 * (len(LINES) + 1)), 250)
+    draw = ImageDraw.Draw(paper)
+    for index, line in enumerate(LINES):
+        draw.text((font_size, font_size * 2 * index + font_size), line, fill=10, font=font)
+    if angle:
+        paper = paper.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=110)
+    canvas = Image.new("L", size, 110)
+    canvas.paste(paper, ((size[0] - paper.width) // 2, (size[1] - paper.height) // 2))
+    buffer = io.BytesIO()
+    canvas.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def test_downscale_binarize_crop():
+    """Output text is near the target height, pure black/white, and the table is cropped away"""
+    photo = make_photo()
+    image = preprocess_image(photo, target_text_height=32, max_side=0, deskew=False)
+    print(f"3000x4000 -> {image.size}")
+
+    assert image.mode == "L"
+    assert set(np.unique(np.asarray(image))) <= {0, 255}
+    assert image.width * image.height < 3000 * 4000 / 10
+    height = estimate_text_height(ink_mask(image))
+    assert height and 24 <= height <= 40
+
+
+def test_small_text_is_not_upscaled():
+    image = preprocess_image(make_photo(font_size=20, size=(800, 600)), target_text_height=32, crop=False)
+    assert image.size == (800, 600)
+
+
+def test_deskew_straightens_rotation():
+    gray = Image.open(io.BytesIO(make_photo(angle=4, size=(2000, 2000)))).convert("L")
+    angle = estimate_skew(gray)
+    print(f"estimated correction: {angle} degrees")
+    assert angle == -4
+
+
+if __name__ == "__main__":
+    test_downscale_binarize_crop()
+    test_small_text_is_not_upscaled()
+    test_deskew_straightens_rotation()
+    print("\n[OK] Image preprocessing tests passed")
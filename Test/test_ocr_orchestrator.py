@@ -0,0 +1,173 @@
+"""
+OCR orchestrator test: sequential / race / ensemble policies over a scripted OCR pool
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from nlp_processor import ExpenseParser
+from ocr_orchestrator import OCROrchestrator
+from result_cache import ResultCache
+
+
+class ScriptedService:
+    """Stands in for OCRService: each engine answers after a fixed delay."""
+
+    def __init__(self, script):
+        self.script = script
+        self.started = []
+        self.cancelled = []
+
+    async def run(self, method, image):
+        delay, text = self.script[method]
+        self.started.append(method)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(method)
+            raise
+        return {"amount": None, "raw_text": text}, text
+
+
+SCRIPT = {
+    "easyocr": (0.3, "Cafe Coffee Day\nTotal: 250.00"),
+    "tesseract": (0.02, "Cafe Coffee Day\nThank you"),
+    "paddleocr": (0.05, "Cafe Coffee Day\nGrand Total Rs. 250.00"),
+}
+
+
+class WarmingService(ScriptedService):
+    """ScriptedService with warm-up state; engines become ready when ready_at passes."""
+
+    def __init__(self, script, ready_at):
+        super().__init__(script)
+        self.ready_at = ready_at
+        self.started_at = time.perf_counter()
+
+    def readiness(self):
+        now = time.perf_counter() - self.started_at
+        return {m: ("unavailable" if at is None else "ready" if now >= at else "loading")
+                for m, at in self.ready_at.items()}
+
+    def is_ready(self, method):
+        return self.readiness().get(method, "ready") == "ready"
+
+    async def wait_ready(self, methods, timeout):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if any(self.is_ready(m) for m in methods):
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+
+def test_race_takes_first_confident_and_cancels_rest():
+    """The fast unparseable reading is skipped; the slow engine is cancelled"""
+    service = ScriptedService(SCRIPT)
+    orchestrator = OCROrchestrator(service, ExpenseParser(), policy="race",
+                                   engines=["easyocr", "tesseract", "paddleocr"])
+    start = time.perf_counter()
+    result, text, engine = asyncio.run(orchestrator.extract(b"img"))
+    elapsed = time.perf_counter() - start
+    stats = orchestrator.stats()
+
+    print("=" * 60)
+    print(f"race -> {engine} in {elapsed * 1000:.0f} ms")
+    print(stats)
+    print("=" * 60)
+
+    assert engine == "paddleocr" and "250.00" in text
+    assert result["ocr_engine"] == "paddleocr"
+    assert elapsed < 0.25
+    assert service.cancelled == ["easyocr"]
+    assert stats["engines"]["easyocr"]["cancelled"] == 1
+    assert stats["engines"]["paddleocr"]["wins"] == 1
+    assert stats["engines"]["tesseract"]["count"] == 1
+
+
+def test_race_runs_sequentially_without_idle_workers():
+    """With fewer idle pool workers than engines, a race falls back to one engine at a time"""
+    service = ScriptedService(SCRIPT)
+    service.workers, service.in_flight = 2, 1
+    orchestrator = OCROrchestrator(service, ExpenseParser(), policy="race",
+                                   engines=["tesseract", "paddleocr", "easyocr"])
+    _, _, engine = asyncio.run(orchestrator.extract(b"img"))
+    assert engine == "paddleocr"
+    assert service.started == ["tesseract", "paddleocr"] and not service.cancelled
+    assert orchestrator.stats()["race_downgrades"] == 1
+
+
+def test_sequential_stops_at_first_confident():
+    service = ScriptedService(SCRIPT)
+    orchestrator = OCROrchestrator(service, ExpenseParser(), policy="sequential",
+                                   engines=["tesseract", "paddleocr", "easyocr"])
+    _, _, engine = asyncio.run(orchestrator.extract(b"img"))
+    assert engine == "paddleocr"
+    assert service.started == ["tesseract", "paddleocr"]
+
+
+def test_sequential_keeps_first_text_when_nothing_parses():
+    service = ScriptedService({"tesseract": (0, "Thank you"), "easyocr": (0, "")})
+    orchestrator = OCROrchestrator(service, ExpenseParser(), policy="sequential",
+                                   engines=["easyocr", "tesseract"])
+    _, text, engine = asyncio.run(orchestrator.extract(b"img"))
+    assert (engine, text) == ("tesseract", "Thank you")
+
+
+def test_ensemble_majority_amount():
+    script = {
+        "easyocr": (0.01, "Total: 120.00"),
+        "tesseract": (0.01, "Total: 720.00"),
+        "paddleocr": (0.01, "TOTAL 120.00"),
+    }
+    orchestrator = OCROrchestrator(ScriptedService(script), ExpenseParser(), policy="ensemble",
+                                   engines=["tesseract", "easyocr", "paddleocr"])
+    _, text, engine = asyncio.run(orchestrator.extract(b"img"))
+    assert engine == "easyocr" and "120.00" in text
+
+
+def test_confident_cache_hit_skips_ocr():
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    try:
+        cache = ResultCache(db_path=path)
+        cache.put("tesseract", [{"amount": 99.0}, "Total: 99.00"], b"img")
+        service = ScriptedService(SCRIPT)
+        orchestrator = OCROrchestrator(service, ExpenseParser(), policy="race",
+                                       engines=["easyocr", "tesseract"], cache=cache)
+        _, text, engine = asyncio.run(orchestrator.extract(b"img", "file-1"))
+        assert (engine, text) == ("tesseract", "Total: 99.00")
+        assert service.started == []
+    finally:
+        os.remove(path)
+
+
+def test_loading_engines_are_skipped_or_waited_for():
+    """A ready engine is used at once; with none ready, wait (bounded) for the first"""
+    service = WarmingService(SCRIPT, {"easyocr": 5.0, "tesseract": 0, "paddleocr": None})
+    orchestrator = OCROrchestrator(service, ExpenseParser(), policy="race",
+                                   engines=["easyocr", "tesseract", "paddleocr"], ready_timeout=1)
+    _, _, engine = asyncio.run(orchestrator.extract(b"img"))
+    assert engine == "tesseract"
+    assert service.started == ["tesseract"]
+    assert orchestrator.stats()["degraded"] == 1
+
+    service = WarmingService(SCRIPT, {"easyocr": 0.1, "tesseract": 5.0})
+    orchestrator = OCROrchestrator(service, ExpenseParser(), policy="race",
+                                   engines=["easyocr", "tesseract"], ready_timeout=1)
+    start = time.perf_counter()
+    _, _, engine = asyncio.run(orchestrator.extract(b"img"))
+    assert engine == "easyocr"
+    assert 0.1 <= time.perf_counter() - start < 1.0
+
+
+if __name__ == "__main__":
+    test_race_takes_first_confident_and_cancels_rest()
+    test_race_runs_sequentially_without_idle_workers()
+    test_sequential_stops_at_first_confident()
+    test_sequential_keeps_first_text_when_nothing_parses()
+    test_ensemble_majority_amount()
+    test_confident_cache_hit_skips_ocr()
+    test_loading_engines_are_skipped_or_waited_for()
+    print("\n[OK] OCR orchestrator tests passed")
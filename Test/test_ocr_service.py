@@ -0,0 +1,151 @@
+"""
+OCR worker pool test: jobs run in worker processes and are awaited
+"""
+import asyncio
+import io
+import time
+
+from PIL import Image
+
+from ocr_service import OCRService
+
+
+def _sleep_job(method, seconds):
+    """Worker side: stands in for an OCR job that takes `seconds`."""
+    time.sleep(seconds)
+    return None, f"slept {seconds}", seconds
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 32), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def _ticker(stop, ticks):
+    while not stop.is_set():
+        ticks.append(1)
+        await asyncio.sleep(0.005)
+
+
+def test_ocr_pool_runs_jobs_off_event_loop():
+    """In-memory images complete in workers; the event loop keeps running meanwhile"""
+    image_bytes = make_image()
+    service = OCRService(workers=1, timeout=60, preload=["tesseract"])
+
+    async def scenario():
+        stop = asyncio.Event()
+        ticks = []
+        ticker = asyncio.create_task(_ticker(stop, ticks))
+        results = await asyncio.gather(*(service.run("tesseract", image_bytes) for _ in range(4)))
+        stop.set()
+        await ticker
+        return results, ticks
+
+    try:
+        results, ticks = asyncio.run(scenario())
+        stats = service.stats()
+        print(stats)
+
+        for result, text in results:
+            assert isinstance(text, str)
+            assert result is None or isinstance(result, dict)
+        assert ticks, "event loop was blocked while OCR ran"
+        assert stats["submitted"] == 4 and stats["completed"] == 4
+        assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+        assert stats["max_queue_depth"] >= 1
+    finally:
+        service.shutdown()
+
+
+def test_ocr_pool_timeout():
+    """A job slower than the timeout returns an empty result instead of hanging"""
+    image_bytes = make_image()
+    service = OCRService(workers=1, timeout=0.0001, preload=[])
+    try:
+        result, text = asyncio.run(service.run("tesseract", image_bytes))
+        assert (result, text) == (None, "")
+        assert service.stats()["timeouts"] == 1
+    finally:
+        service.shutdown()
+
+
+def test_ocr_pool_warmup_readiness():
+    """Warm-up reports each engine as loading, then ready or unavailable"""
+    service = OCRService(workers=1, timeout=60, preload=["tesseract"])
+
+    async def scenario():
+        service.start_warmup(["tesseract", "no_such_engine"])
+        loading = service.readiness()
+        await service.wait_ready(["tesseract"], 30)
+        await service.wait_ready(["no_such_engine"], 30)
+        return loading
+
+    try:
+        loading = asyncio.run(scenario())
+        print(f"at startup: {loading}  after warm-up: {service.readiness()}")
+        assert loading == {"tesseract": "loading", "no_such_engine": "loading"}
+        assert service.readiness()["tesseract"] in ("ready", "unavailable")
+        assert service.readiness()["no_such_engine"] == "unavailable"
+        assert not service.is_ready("no_such_engine")
+        assert service.is_ready("never_warmed")
+    finally:
+        service.shutdown()
+
+
+def test_timed_out_job_recycles_the_pool():
+    """A stuck job does not hold its worker: the pool is replaced, a job running alongside is
+    resubmitted, later jobs run at once and engines report loading until the new workers warm up"""
+    service = OCRService(workers=2, timeout=60, preload=[])
+
+    async def scenario():
+        service._readiness["tesseract"] = "ready"
+        stuck = asyncio.create_task(service._run_job("tesseract", _sleep_job, 30, timeout=0.5))
+        alongside = asyncio.create_task(service._run_job("tesseract", _sleep_job, 1, timeout=10))
+        stuck_outcome = await stuck
+        readiness = service.readiness()["tesseract"]
+        start = time.perf_counter()
+        later = await service._run_job("tesseract", _sleep_job, 0, timeout=10)
+        return stuck_outcome, readiness, await alongside, later, time.perf_counter() - start
+
+    try:
+        stuck, readiness, alongside, later, later_seconds = asyncio.run(scenario())
+        stats = service.stats()
+        print(stats)
+        assert stuck is None and readiness == "loading"
+        assert alongside[1] == "slept 1" and later[1] == "slept 0"
+        assert later_seconds < 5
+        assert stats["timeouts"] == 1 and stats["recycles"] == 1 and stats["failed"] == 0
+    finally:
+        service.shutdown()
+
+
+def test_recycle_resubmits_queued_jobs():
+    """Jobs still queued behind a stuck one when the pool is recycled run on the new pool
+    instead of being cancelled"""
+    service = OCRService(workers=1, timeout=60, preload=[])
+
+    async def scenario():
+        stuck = asyncio.create_task(service._run_job("tesseract", _sleep_job, 30, timeout=0.5))
+        await asyncio.sleep(0.1)
+        queued = [service._run_job("tesseract", _sleep_job, 0, timeout=20) for _ in range(4)]
+        return await asyncio.gather(stuck, *queued, return_exceptions=True)
+
+    try:
+        outcomes = asyncio.run(scenario())
+        stats = service.stats()
+        print(outcomes, stats)
+        assert outcomes[0] is None
+        assert [outcome[1] for outcome in outcomes[1:]] == ["slept 0"] * 4
+        assert stats["timeouts"] == 1 and stats["completed"] == 4 and stats["failed"] == 0
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    test_ocr_pool_runs_jobs_off_event_loop()
+    test_ocr_pool_timeout()
+    test_timed_out_job_recycles_the_pool()
+    test_recycle_resubmits_queued_jobs()
+    test_ocr_pool_warmup_readiness()
+    print("\n[OK] OCR service tests passed")
@@ -0,0 +1,65 @@
+"""
+Batch parsing test: ExpenseParser.parse_many must agree with parse_expense
+"""
+
+from nlp_processor import ExpenseParser
+
+SAMPLE_LINES = [
+    "Coffee 30",
+    "Spent 150 for biriyani",
+    "Movie tickets 250",
+    "Rs 120 auto",
+    "₹45 tea",
+    "Paid $12.50 for lunch",
+    "Lunch total 12.50",
+    "Dinner grand total: 850.00",
+    "Groceries 12.3 45.67",
+    "Book 1.234",
+    "560001 Bangalore petrol 500",
+    "amount: 50 category: food",
+    "Uber ride\n230",
+    "Internet bill 1,50",
+    "Gym 2 items 1500",
+    "RS. 99 Chicken",
+    "Pizza ₹ 320",
+    "",
+    None,
+    "no numbers here",
+    "1000000 yacht",
+    "SHOPPING 2000 RUPEES",
+    "İstanbul kebab 300",
+    "50",
+]
+
+
+def test_parse_many_matches_parse_expense():
+    """Every column entry should equal the single-line parse"""
+    parser = ExpenseParser()
+    batch = parser.parse_many(SAMPLE_LINES)
+
+    print("=" * 60)
+    print("Testing parse_many against parse_expense")
+    print("=" * 60)
+
+    for idx, line in enumerate(SAMPLE_LINES):
+        expected = parser.parse_expense(line)
+        got = (batch["amounts"][idx], batch["categories"][idx], batch["descriptions"][idx])
+        print(f"{line!r:40} -> {got}")
+        assert got == expected, f"{line!r}: {got} != {expected}"
+
+        amount, category, _ = expected
+        valid = bool(amount) and parser.is_valid_expense(amount, category)
+        assert batch["valid"][idx] == valid, f"{line!r}: valid={batch['valid'][idx]}"
+
+
+def test_parse_many_empty():
+    """Empty input returns empty columns"""
+    parser = ExpenseParser()
+    batch = parser.parse_many([])
+    assert batch == {"amounts": [], "categories": [], "descriptions": [], "valid": []}
+
+
+if __name__ == "__main__":
+    test_parse_many_matches_parse_expense()
+    test_parse_many_empty()
+    print("\n[OK] parse_many tests passed")
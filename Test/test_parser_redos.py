@@ -0,0 +1,89 @@
+"""
+Worst-case timing test: adversarial inputs must not blow up parser regexes
+"""
+import random
+import time
+
+import main
+from config import MAX_MESSAGE_CHARS, MAX_OCR_TEXT_CHARS
+from nlp_processor import ExpenseParser
+
+# Generous bound per call so slow CI machines pass; catastrophic backtracking
+# on these inputs takes minutes, linear patterns take milliseconds.
+MAX_SECONDS = 1.0
+
+
+def adversarial_inputs(size):
+    """Inputs that target overlapping whitespace/optional groups, plus random noise."""
+    spaces = " " * size
+    rng = random.Random(28)
+    noise = "".join(rng.choice("aRs:.,-%()0123456789 \t\n$₹") for _ in range(size))
+    return {
+        "amount_spaces": "amount" + spaces + "x",
+        "total_spaces": "total" + spaces + "x",
+        "currency_spaces": "rs" + spaces + "x",
+        "gst_spaces": "gst" + spaces + "x",
+        "discount_spaces": "discount" + spaces + "-" + spaces + "x",
+        "service_spaces": "service charge" + spaces + "rs" + spaces + "x",
+        "item_spaces": "tea" + spaces + "rs" + spaces + "1x",
+        "letters_then_spaces": "a" + spaces + "b1",
+        "category_spaces": "category" + spaces + ",",
+        "paid_spaces": "paid" + spaces + "x",
+        "txn_spaces": "transaction id" + spaces + "!",
+        "newlines_to": "\n" * size + "x",
+        "digits": "1" * size,
+        "open_parens": "tea 1 " + "(" * size,
+        "repeated_keywords": ("total amount: rs " * size)[:size],
+        "noise": noise,
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def test_parser_methods_bounded_latency():
+    """Every ExpenseParser entry point stays fast on capped adversarial input"""
+    parser = ExpenseParser()
+    methods = [
+        parser.parse_expense,
+        parser.parse_multiple_expenses,
+        parser.analyze_receipt,
+        parser.extract_bill_totals,
+        parser.extract_simple_receipt,
+        parser.normalize_description_for_voice,
+        lambda text: parser.parse_many([text, text]),
+        lambda text: main._extract_upi_details(text, None),
+    ]
+
+    print("=" * 60)
+    print(f"Adversarial parser inputs ({MAX_OCR_TEXT_CHARS} chars, limit {MAX_SECONDS}s)")
+    print("=" * 60)
+
+    # Twice the cap also checks that truncation kicks in.
+    for name, text in adversarial_inputs(MAX_OCR_TEXT_CHARS * 2).items():
+        worst = max(timed(method, text) for method in methods)
+        print(f"{name:22} worst {worst * 1000:8.1f} ms")
+        assert worst < MAX_SECONDS, f"{name}: {worst:.2f}s exceeds {MAX_SECONDS}s"
+
+
+def test_input_caps_truncate():
+    """Oversized input is cut to the configured cap before parsing"""
+    parser = ExpenseParser()
+    tail = " pizza 999"
+    message = "coffee 30" + " " * MAX_MESSAGE_CHARS + tail
+    expenses = parser.parse_multiple_expenses(message)
+    assert expenses and expenses[0][0] == 30.0
+    assert all(999.0 != amount for amount, _, _ in expenses)
+
+    receipt = "Tea 40\n" + "x" * MAX_OCR_TEXT_CHARS + "\nTotal 99999.00"
+    totals = parser.extract_bill_totals(receipt)
+    assert totals["total"] is None
+
+
+if __name__ == "__main__":
+    test_parser_methods_bounded_latency()
+    test_input_caps_truncate()
+    print("\n[OK] Parser ReDoS tests passed")
@@ -0,0 +1,88 @@
+"""
+Rate limiter test: the Gemini request budget is enforced before the API is called
+"""
+import io
+import multiprocessing
+import os
+import tempfile
+
+from PIL import Image
+
+from gemini_processor import GeminiProcessor
+from rate_limiter import RateLimiter
+
+
+def _take(args):
+    db_path, count = args
+    limiter = RateLimiter(rpm=10, rpd=100, db_path=db_path)
+    return sum(limiter.acquire()["allowed"] for _ in range(count))
+
+
+def test_rpm_bucket_and_daily_cap():
+    """A full bucket allows RPM requests, then refuses with a retry time; RPD caps the day"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "limits.db")
+        limiter = RateLimiter(rpm=5, rpd=100, db_path=path)
+        results = [limiter.acquire() for _ in range(7)]
+        print([result["allowed"] for result in results], results[-1])
+        assert [result["allowed"] for result in results] == [True] * 5 + [False] * 2
+        assert results[-1]["reason"] == "rpm" and 0 < results[-1]["retry_after"] <= 12
+
+        daily = RateLimiter(name="daily", rpm=0, rpd=3, db_path=path)
+        assert [daily.acquire()["allowed"] for _ in range(4)] == [True, True, True, False]
+
+        stats = limiter.stats()
+        assert stats["allowed"] == 5 and stats["limited"] == {"rpm": 2} and stats["tokens"] < 1
+
+
+def test_cooldown_is_shared():
+    """block() after a 429 refuses requests from every limiter on the same file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "limits.db")
+        RateLimiter(rpm=60, db_path=path).block(30)
+        result = RateLimiter(rpm=60, db_path=path).acquire()
+        assert result["reason"] == "cooldown" and 29 <= result["retry_after"] <= 30
+
+
+def test_budget_shared_across_processes():
+    """Four processes drawing from one 10-request bucket get 10 requests in total"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "limits.db")
+        RateLimiter(rpm=10, rpd=100, db_path=path)
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            granted = pool.map(_take, [(path, 5)] * 4)
+        print(f"granted per process: {granted}")
+        assert sum(granted) == 10
+
+
+def test_processor_skips_api_when_limited():
+    """Over budget, analyze_receipt answers rate_limited without calling Gemini"""
+    calls = []
+
+    def generate(content):
+        calls.append(content)
+        raise RuntimeError("should not be called")
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), "white").save(buffer, format="JPEG")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gemini = GeminiProcessor.__new__(GeminiProcessor)
+        gemini.model = object()
+        gemini.rate_limiter = RateLimiter(rpm=1, rpd=0, db_path=os.path.join(tmp, "limits.db"))
+        gemini.breaker = None
+        gemini.rate_limiter.acquire()
+        gemini._generate_content = generate
+        result = gemini.analyze_receipt(buffer.getvalue())
+
+    print(result)
+    assert result["code"] == "rate_limited" and result["retry_after_seconds"] >= 1
+    assert not calls
+
+
+if __name__ == "__main__":
+    test_rpm_bucket_and_daily_cap()
+    test_cooldown_is_shared()
+    test_budget_shared_across_processes()
+    test_processor_skips_api_when_limited()
+    print("\n✅ All rate limiter tests passed!")
@@ -0,0 +1,92 @@
+"""
+Streaming receipt test: analyze_receipt_stream must match field-by-field extraction
+"""
+import io
+import json
+import os
+
+from nlp_processor import ExpenseParser
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "corpus.json")
+
+RECEIPT = """
+    Pizza Palace
+    Address: 123 Main St, Downtown
+    Phone: 9876543210
+
+    Margherita Pizza          350
+    Garlic Bread              120
+
+    Subtotal                  470
+    GST 5%                    23.50
+    Service Charge
+    :
+    50
+    Total: ₹ 543.50
+    Payment: Card
+"""
+
+
+def multi_pass(parser, text):
+    """Reference: one full-text pass per field."""
+    text = text.strip()
+    result = {
+        'restaurant': parser._extract_restaurant_details(text),
+        'items': parser._extract_receipt_items(text),
+        'subtotal': parser._extract_subtotal(text),
+        'tax': parser._extract_taxes(text),
+        'service_charge': parser._extract_service_charge(text),
+        'discount': parser._extract_discount(text),
+        'final_amount': parser._extract_final_amount(text),
+        'currency': parser._detect_currency(text),
+        'payment_method': parser._extract_payment_method(text),
+    }
+    if result['items'] and result['final_amount']:
+        result['confidence'] = 'high'
+    elif result['items'] or result['final_amount']:
+        result['confidence'] = 'medium'
+    else:
+        result['confidence'] = 'low'
+    return result
+
+
+def test_stream_matches_multi_pass():
+    """Corpus receipts give the same dict either way"""
+    parser = ExpenseParser()
+    with open(CORPUS_PATH, "r", encoding="utf-8") as handle:
+        receipts = json.load(handle)["ocr_receipts"]
+
+    print("=" * 60)
+    print(f"Testing analyze_receipt_stream on {len(receipts) + 1} receipts")
+    print("=" * 60)
+
+    for text in receipts + [RECEIPT]:
+        assert parser.analyze_receipt(text) == multi_pass(parser, text)
+
+
+def test_stream_accepts_line_iterables():
+    """Values on the line after their label (with separators between) are found"""
+    parser = ExpenseParser()
+    result = parser.analyze_receipt_stream(io.StringIO(RECEIPT))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    assert result == parser.analyze_receipt(RECEIPT)
+    assert result['restaurant']['phone'] == "9876543210"
+    assert result['subtotal'] == 470.0
+    assert result['tax']['gst'] == 23.5
+    assert result['service_charge'] == 50.0
+    assert result['final_amount'] == 543.5
+    assert result['payment_method'] == "Card"
+    assert result['confidence'] == "high"
+
+
+def test_stream_empty():
+    parser = ExpenseParser()
+    assert parser.analyze_receipt_stream(iter(["", "   "]))['error'] == 'Empty receipt text'
+
+
+if __name__ == "__main__":
+    test_stream_matches_multi_pass()
+    test_stream_accepts_line_iterables()
+    test_stream_empty()
+    print("\n[OK] Streaming receipt tests passed")
@@ -0,0 +1,76 @@
+"""
+Result cache test: repeated images are answered from cache, with TTL and LRU eviction
+"""
+import os
+import tempfile
+import time
+
+from result_cache import ResultCache, image_hash
+
+
+def make_cache(**kwargs):
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    return ResultCache(db_path=path, **kwargs), path
+
+
+def test_cache_hits_by_hash_and_file_id():
+    """Same bytes or same Telegram file id hit; other analyzers and images miss"""
+    cache, path = make_cache(ttl=3600, max_entries=100)
+    try:
+        image = b"\xff\xd8 receipt bytes"
+        result = {"image_type": "receipt", "final_amount": 543.5, "items": []}
+
+        print("=" * 60)
+        print("Testing content-addressed result cache")
+        print("=" * 60)
+
+        assert cache.get("gemini", image, "AQADfile1") is None
+        cache.put("gemini", result, image, "AQADfile1")
+
+        assert cache.get("gemini", image) == result                  # re-upload, new file id
+        assert cache.get("gemini", None, "AQADfile1") == result      # forward, same file id
+        assert cache.get("gemini", b"other image", "AQADfile2") is None
+        assert cache.get("easyocr", image, "AQADfile1") is None
+
+        cache.put("easyocr", [{"amount": 10.0}, "TOTAL 10"], image)
+        assert tuple(cache.get("easyocr", image)) == ({"amount": 10.0}, "TOTAL 10")
+        assert ResultCache(db_path=path).get("gemini", image) == result  # persisted
+
+        stats = cache.stats()
+        print(stats)
+        assert stats["hits"] == {"gemini": 2, "easyocr": 1}
+        assert stats["misses"] == {"gemini": 2, "easyocr": 1}
+        assert image_hash(image).startswith("sha256:")
+    finally:
+        os.remove(path)
+
+
+def test_cache_ttl_and_lru_eviction():
+    """Expired entries miss; the least recently used entries go first"""
+    cache, path = make_cache(ttl=0.05, max_entries=100)
+    try:
+        cache.put("gemini", {"amount": 1}, b"img")
+        time.sleep(0.1)
+        assert cache.get("gemini", b"img") is None
+    finally:
+        os.remove(path)
+
+    cache, path = make_cache(ttl=3600, max_entries=2)
+    try:
+        cache.put("gemini", {"amount": 1}, b"a")
+        cache.put("gemini", {"amount": 2}, b"b")
+        assert cache.get("gemini", b"a") == {"amount": 1}   # a is now more recent than b
+        cache.put("gemini", {"amount": 3}, b"c")
+        assert cache.get("gemini", b"b") is None
+        assert cache.get("gemini", b"a") == {"amount": 1}
+        assert cache.get("gemini", b"c") == {"amount": 3}
+        assert cache.stats()["evictions"] == 1
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    test_cache_hits_by_hash_and_file_id()
+    test_cache_ttl_and_lru_eviction()
+    print("\n[OK] Result cache tests passed")
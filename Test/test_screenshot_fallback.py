@@ -0,0 +1,164 @@
+"""
+Screenshot fallback test: a receipt Gemini failed on goes to OCR without a second Gemini request,
+and a UPI screenshot read from its field lines gets no extra full-size OCR pass
+"""
+import asyncio
+import os
+import sqlite3
+import tempfile
+
+import main
+
+RECEIPT = "Cafe Coffee Day\n1 Cappuccino 180.00\nSubtotal 180.00\nGrand Total: Rs. 189.00"
+UPI_FIELDS = "Payment successful\nRs. 450.00\nTo: Ravi Kumar\nFrom: HDFC Bank\nUPI transaction ID: 512345678901"
+
+
+class FakeOrchestrator:
+    """Stands in for OCROrchestrator.extract, counting full OCR passes."""
+
+    engines = ["easyocr"]
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    async def extract(self, image, file_unique_id=None):
+        self.calls += 1
+        return {"amount": None, "raw_text": self.text}, self.text, "easyocr"
+
+
+class _Photo:
+    file_id = "photo-1"
+    file_unique_id = "photo-unique-1"
+
+
+class _File:
+    async def download_as_bytearray(self):
+        return bytearray(b"not really a jpeg")
+
+
+class _Bot:
+    async def get_file(self, file_id):
+        return _File()
+
+
+class _Message:
+    def __init__(self):
+        self.photo = [_Photo()]
+        self.caption = ""
+        self.media_group_id = None
+        self.date = None
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class _User:
+    id = 515151
+    username = "fallback"
+    first_name = "Fallback"
+
+
+class _Update:
+    def __init__(self):
+        self.message = _Message()
+        self.effective_user = _User()
+
+
+class _Context:
+    bot = _Bot()
+
+
+def _run(thumbnail_text, full_text):
+    """handle_screenshot with Gemini answering quota_exceeded; returns (gemini calls, OCR passes, rows, replies)."""
+    gemini_calls = []
+
+    async def failing_gemini(image_bytes, file_unique_id=None, deadline=None):
+        gemini_calls.append(file_unique_id)
+        return {"error": "429 quota", "code": "quota_exceeded", "retry_after_seconds": 30}
+
+    async def route(image_bytes, caption):
+        return {"kind": "receipt", "score": -2, "confident": True, "reasons": [], "text": thumbnail_text}
+
+    orchestrator = FakeOrchestrator(full_text)
+    handle, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    saved = (main.db.db_path, main.ocr_orchestrator, main.gemini, main._analyze_with_gemini, main._route_image)
+    try:
+        main.db.db_path = db_path
+        main.db.init_db()
+        main.ocr_orchestrator, main.gemini = orchestrator, object()
+        main._analyze_with_gemini, main._route_image = failing_gemini, route
+        update = _Update()
+        asyncio.run(main.handle_screenshot(update, _Context()))
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT amount, description FROM expenses").fetchall()
+        conn.close()
+    finally:
+        main.db.db_path, main.ocr_orchestrator, main.gemini, main._analyze_with_gemini, main._route_image = saved
+        os.remove(db_path)
+    return gemini_calls, orchestrator.calls, rows, update.message.replies
+
+
+def test_failed_gemini_is_not_asked_again():
+    """The receipt hand-off reuses the Gemini error and the thumbnail text that already has a total"""
+    gemini_calls, ocr_passes, rows, replies = _run(RECEIPT, "")
+    print(replies)
+    assert len(gemini_calls) == 1
+    assert ocr_passes == 0
+    assert any(amount == 189.0 for amount, _ in rows)
+    assert len(replies) == 2                    # "Processing..." and the saved receipt
+
+
+def test_thumbnail_without_total_runs_full_ocr_once():
+    """Thumbnail text with no total is not enough: one full OCR pass reads the receipt"""
+    gemini_calls, ocr_passes, rows, _ = _run("Cafe Coffee", RECEIPT)
+    assert len(gemini_calls) == 1
+    assert ocr_passes == 1
+    assert any(amount == 189.0 for amount, _ in rows)
+
+
+def test_upi_field_lines_skip_the_date_time_pass():
+    """Field-line OCR without a clock time is used as is: no full-screen EasyOCR pass follows"""
+    full_passes = []
+
+    async def route(image_bytes, caption):
+        return {"kind": "upi", "score": 3, "confident": True, "reasons": [], "text": ""}
+
+    async def regions(image_bytes):
+        return {"amount": 450.0, "raw_text": UPI_FIELDS}, UPI_FIELDS
+
+    async def easyocr(image, file_unique_id=None):
+        full_passes.append(image)
+        return None, ""
+
+    orchestrator = FakeOrchestrator("")
+    handle, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    saved = (main.db.db_path, main.ocr_orchestrator, main.gemini, main._route_image,
+             main._ocr_upi_regions, main._run_easyocr_receipt, main.UPI_ROI_OCR)
+    try:
+        main.db.db_path = db_path
+        main.db.init_db()
+        main.ocr_orchestrator, main.gemini, main.UPI_ROI_OCR = orchestrator, None, True
+        main._route_image, main._ocr_upi_regions, main._run_easyocr_receipt = route, regions, easyocr
+        asyncio.run(main.handle_screenshot(_Update(), _Context()))
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT amount, transaction_id FROM expenses").fetchall()
+        conn.close()
+    finally:
+        (main.db.db_path, main.ocr_orchestrator, main.gemini, main._route_image,
+         main._ocr_upi_regions, main._run_easyocr_receipt, main.UPI_ROI_OCR) = saved
+        os.remove(db_path)
+
+    print(rows)
+    assert rows == [(450.0, "512345678901")]
+    assert orchestrator.calls == 0 and not full_passes
+
+
+if __name__ == "__main__":
+    test_failed_gemini_is_not_asked_again()
+    test_thumbnail_without_total_runs_full_ocr_once()
+    test_upi_field_lines_skip_the_date_time_pass()
+    print("\n✅ All screenshot fallback tests passed!")
@@ -0,0 +1,58 @@
+"""
+UPI layout test: the amount and field lines of a screenshot are found without OCR
+"""
+import io
+import os
+import random
+import sys
+
+from PIL import Image, ImageOps
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from image_generator import render_upi, to_jpeg, upi_truth
+from upi_layout import find_layout, roi_image, roi_image_bytes
+
+
+def _screenshot(seed, size=(720, 1280), noise=0):
+    rng = random.Random(seed)
+    truth = upi_truth(rng)
+    return truth, render_upi(rng, truth["text"], size, noise)
+
+
+def test_layout_finds_amount_and_fields():
+    """Six text lines around the large amount; status bar, tick and buttons are left out"""
+    for seed, noise in ((1, 0), (2, 14)):
+        truth, image = _screenshot(seed, noise=noise)
+        layout = find_layout(image)
+        heights = [bottom - top for _, top, _, bottom in layout["fields"]]
+
+        print(f"seed {seed} noise {noise}: {len(layout['fields'])} field lines, heights {heights}")
+        assert len(layout["fields"]) == len(truth["text"].splitlines())
+        assert layout["fields"][1] == layout["amount"]
+        assert max(heights) == heights[1]
+
+
+def test_roi_strip_is_small():
+    """The strip OCR reads is a fraction of the screen"""
+    _, image = _screenshot(3, size=(1080, 2400), noise=6)
+    strip = roi_image(to_jpeg(image))
+    print(f"screen {image.size} -> strip {strip.size}")
+    assert strip.width * strip.height < image.width * image.height * 0.1
+
+
+def test_dark_mode_and_blank_screens():
+    """Dark-mode screenshots are inverted before line detection; blank screens have no layout"""
+    truth, image = _screenshot(4)
+    dark = ImageOps.invert(image)
+    assert len(find_layout(dark)["fields"]) == len(truth["text"].splitlines())
+    assert roi_image_bytes(to_jpeg(Image.new("L", (720, 1280), 255))) is None
+    with Image.open(io.BytesIO(roi_image_bytes(to_jpeg(image)))) as strip:
+        assert strip.mode == "L"
+
+
+if __name__ == "__main__":
+    test_layout_finds_amount_and_fields()
+    test_roi_strip_is_small()
+    test_dark_mode_and_blank_screens()
+    print("\n✅ All UPI layout tests passed!")
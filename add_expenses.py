@@ -23,13 +23,14 @@ expenses = [
 # Add user first
 db.add_user(user_id, "testuser", "Test")
 
-# Process each expense
+# Process all expenses in one batch
 print("Adding expenses...")
-for desc in expenses:
-    amount, category, description = parser.parse_expense(desc)
-    
+parsed = parser.parse_many(expenses)
+for desc, amount, category, description, is_valid in zip(
+    expenses, parsed["amounts"], parsed["categories"], parsed["descriptions"], parsed["valid"]
+):
+    description = description or desc
     if amount and category:
-        is_valid = parser.is_valid_expense(amount, category)
         if is_valid:
             db.add_expense(user_id, amount, category, description, source="bulk")
             print(f"✅ Added: {description} | Amount: ₹{amount:.2f} | Category: {category}")
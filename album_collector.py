@@ -0,0 +1,79 @@
+"""
+Collects Telegram photo albums.
+Telegram delivers an album as separate messages sharing a media_group_id.
+AlbumCollector keeps them per album key and hands the whole list to a callback
+once no new photo has arrived for `wait` seconds (or `max_wait` seconds after
+the first one), so the handler itself returns at once and the update queue is
+not held up while the album is still arriving.
+"""
+import asyncio
+import logging
+
+from config import ALBUM_COLLECT_SECONDS, ALBUM_MAX_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Telegram albums hold at most 10 items.
+MAX_ALBUM_ITEMS = 10
+
+
+class AlbumCollector:
+    """Debounces album items per key and calls `await on_album(items)` once per album."""
+
+    def __init__(self, on_album, wait=ALBUM_COLLECT_SECONDS, max_wait=ALBUM_MAX_WAIT_SECONDS,
+                 max_items=MAX_ALBUM_ITEMS):
+        self.on_album = on_album
+        self.wait = wait
+        self.max_wait = max_wait
+        self.max_items = max_items
+        self._albums = {}
+        self._running = set()
+        self.albums = 0
+        self.items = 0
+
+    def add(self, key, item):
+        """Queue item under key (call from the running loop)."""
+        loop = asyncio.get_running_loop()
+        album = self._albums.get(key)
+        if album is None:
+            album = self._albums[key] = {"items": [], "started": loop.time(), "task": None}
+        album["items"].append(item)
+        self.items += 1
+
+        if album["task"] is not None:
+            album["task"].cancel()
+        delay = min(self.wait, max(0.0, album["started"] + self.max_wait - loop.time()))
+        if len(album["items"]) >= self.max_items:
+            delay = 0
+        album["task"] = loop.create_task(self._flush_later(key, delay))
+
+    def pending(self):
+        """Number of albums still being collected."""
+        return len(self._albums)
+
+    async def _flush_later(self, key, delay):
+        await asyncio.sleep(delay)
+        album = self._albums.pop(key, None)
+        if album is None:
+            return
+        # From here on the flush is not cancelled by later items for the same key:
+        # they start a new album.
+        task = asyncio.current_task()
+        self._running.add(task)
+        try:
+            self.albums += 1
+            await self.on_album(album["items"])
+        except Exception as e:
+            logger.error("Album processing failed: %s", e)
+        finally:
+            self._running.discard(task)
+
+    async def flush(self):
+        """Process every album still being collected now, and wait for running ones."""
+        for key in list(self._albums):
+            album = self._albums[key]
+            album["task"].cancel()
+            album["task"] = asyncio.get_running_loop().create_task(self._flush_later(key, 0))
+        tasks = [album["task"] for album in self._albums.values()] + list(self._running)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
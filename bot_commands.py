@@ -9,9 +9,11 @@ from database import ExpenseDatabase
 from config import CURRENCY, EXPENSE_CATEGORIES
 from datetime import datetime
 from excel_exporter import ExcelExporter
+from category_memory import CategoryMemory
 
 db = ExpenseDatabase()
 exporter = ExcelExporter()
+category_memory = CategoryMemory(db)
 
 
 def _parse_positive_amount(raw_value):
@@ -74,6 +76,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 /today - Today's total
 /list - Show last 10 expenses
 /stats - Detailed statistics
+/diagnostics - OCR, Gemini and speech service status
+/gemini_stats - Gemini latency, tokens and cost (admins)
 
 *BUDGET MANAGEMENT:*
 /setdaily or /set_daily <amount> - Set daily budget limit
@@ -98,6 +102,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 *MANAGE DATA:*
 /categories - Show all categories
 /delete - Delete last expense
+/setcategory <category> - Fix last expense's category (remembered next time)
 /list - Show last 10 expenses
 
 *HOW TO ADD EXPENSES:*
@@ -200,6 +205,37 @@ async def delete_expense(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     await update.message.reply_text("✅ Last expense deleted!")
 
+async def set_category(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Recategorize last expense and remember the choice for that description"""
+    user_id = update.effective_user.id
+    if not context.args:
+        await update.message.reply_text(
+            "Usage: /setcategory <category>\n"
+            f"Categories: {', '.join(EXPENSE_CATEGORIES)}"
+        )
+        return
+
+    wanted = " ".join(context.args).strip().lower()
+    category = next((name for name in EXPENSE_CATEGORIES if name.lower() == wanted), None)
+    if not category:
+        await update.message.reply_text(
+            f"❌ Unknown category. Choose one of: {', '.join(EXPENSE_CATEGORIES)}"
+        )
+        return
+
+    expense = db.get_last_expense(user_id)
+    if not expense:
+        await update.message.reply_text("No expenses to update.")
+        return
+
+    exp_id, _, _, description, _, _ = expense
+    db.update_expense_category(exp_id, user_id, category)
+    category_memory.learn(user_id, description, category)
+
+    await update.message.reply_text(
+        f"✅ Last expense moved to {category}. I'll use it for \"{description}\" from now on."
+    )
+
 async def statistics(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show detailed statistics"""
     user_id = update.effective_user.id
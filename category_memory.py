@@ -0,0 +1,138 @@
+"""
+Per-user learned description -> category mapping.
+Seeded once per user from their expense history (category_memory_seeded
+records who has been seeded) and updated when they recategorize an expense;
+edits win over history. ExpenseParser consults it before the EXPENSE_PATTERNS scan.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from config import EXPENSE_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+_MAX_KEY_CHARS = 100
+
+
+def normalize_description(description):
+    """Reduce a description to a lookup key: 'Coffee @ CCD!' -> 'coffee ccd'."""
+    text = (description or "").lower()
+    text = re.sub(r"[^a-z\s]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text[:_MAX_KEY_CHARS]
+
+
+class CategoryMemory:
+    """In-memory per-user cache backed by the category_memory table."""
+
+    def __init__(self, db=None):
+        self.db = db
+        self._users = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self.scan_seconds = 0.0
+        self.scans = 0
+
+    def _load_user(self, user_id):
+        """Load a user's mapping, seeding it from expense history the first time."""
+        mapping = self._users.get(user_id)
+        if mapping is not None:
+            return mapping
+
+        mapping = {}
+        if self.db is not None:
+            try:
+                mapping = self.db.get_category_memory(user_id)
+                if not self.db.is_category_memory_seeded(user_id):
+                    mapping.update(self._seed_from_history(user_id, mapping))
+            except Exception as e:
+                logger.warning("Category memory load failed for user %s: %s", user_id, e)
+                mapping = {}
+
+        with self._lock:
+            self._users.setdefault(user_id, mapping)
+            return self._users[user_id]
+
+    def _seed_from_history(self, user_id, known):
+        """
+        Import past expenses (most frequent category per description) for
+        descriptions not already in `known`; returns the new entries.
+        """
+        allowed = {name.lower(): name for name in EXPENSE_CATEGORIES}
+        votes = {}
+        for description, category, count in self.db.get_category_history(user_id):
+            key = normalize_description(description)
+            name = allowed.get(str(category or "").strip().lower())
+            if not key or not name or name == "Other":
+                continue
+            votes.setdefault(key, Counter())[name] += count
+
+        mapping = {key: counter.most_common(1)[0][0] for key, counter in votes.items() if key not in known}
+        if mapping:
+            self.db.save_category_memory(user_id, mapping.items(), "history")
+            logger.info("Seeded category memory for user %s with %s descriptions", user_id, len(mapping))
+        self.db.mark_category_memory_seeded(user_id)
+        return mapping
+
+    def lookup(self, user_id, description):
+        """Return the learned category for description, or None."""
+        if user_id is None:
+            return None
+        mapping = self._load_user(user_id)
+        # Time only the steady-state lookup; the one-off load is not per-message cost.
+        start = time.perf_counter()
+        key = normalize_description(description)
+        category = mapping.get(key) if key else None
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.lookup_seconds += elapsed
+            if category:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return category
+
+    def learn(self, user_id, description, category, source="edit"):
+        """Remember that description belongs to category for this user."""
+        key = normalize_description(description)
+        if user_id is None or not key or not category:
+            return False
+
+        mapping = self._load_user(user_id)
+        with self._lock:
+            mapping[key] = category
+        if self.db is not None:
+            try:
+                self.db.save_category_memory(user_id, [(key, category)], source)
+            except Exception as e:
+                logger.warning("Category memory save failed for user %s: %s", user_id, e)
+                return False
+        return True
+
+    def record_scan(self, seconds):
+        """Record how long a keyword scan took (used to estimate time saved on hits)."""
+        with self._lock:
+            self.scan_seconds += seconds
+            self.scans += 1
+
+    def stats(self):
+        """Hit rate and estimated latency saved versus always scanning keywords."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_scan = self.scan_seconds / self.scans if self.scans else 0.0
+            avg_lookup = self.lookup_seconds / lookups if lookups else 0.0
+            return {
+                "users": len(self._users),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "avg_scan_ms": avg_scan * 1000,
+                "avg_lookup_ms": avg_lookup * 1000,
+                "saved_ms": max(0.0, self.hits * (avg_scan - avg_lookup)) * 1000,
+            }
@@ -0,0 +1,142 @@
+"""
+Circuit breaker for external APIs (Gemini, Google Speech).
+Closed: calls go through and their outcomes are kept for BREAKER_WINDOW_SECONDS.
+Once at least BREAKER_MIN_CALLS outcomes are in the window and the failure rate
+reaches BREAKER_FAILURE_RATE, the breaker opens: allow() refuses at once, so a
+failing dependency costs no timeout and callers go straight to their fallback.
+After BREAKER_OPEN_SECONDS it is half-open: exactly one caller is let through as
+a probe; its success closes the breaker, its failure opens it again. The probe
+is the thread allow() admitted (callers report from the thread that asked):
+late outcomes of calls that started before the breaker opened are ignored.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from config import BREAKER_FAILURE_RATE, BREAKER_MIN_CALLS, BREAKER_OPEN_SECONDS, BREAKER_WINDOW_SECONDS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a sliding window of call outcomes."""
+
+    def __init__(self, name, failure_rate=BREAKER_FAILURE_RATE, min_calls=BREAKER_MIN_CALLS,
+                 window=BREAKER_WINDOW_SECONDS, open_seconds=BREAKER_OPEN_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, int(min_calls))
+        self.window = window
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque()        # (timestamp, ok)
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._probe_thread = None
+        self.opened = 0
+        self.rejected = 0
+        self.last_error = None
+
+    def _prune(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def allow(self):
+        """True if a call may be made now (in half-open state, only for the single probe)."""
+        with self._lock:
+            now = self._clock()
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probe_started = None
+            if self.state == HALF_OPEN:
+                # A probe that never reported back (caller gave up) frees the slot after open_seconds.
+                if self._probe_started is None or now - self._probe_started >= self.open_seconds:
+                    self._probe_started = now
+                    self._probe_thread = threading.get_ident()
+                    logger.info("Circuit %s half-open, sending a probe call", self.name)
+                    return True
+            self.rejected += 1
+            return False
+
+    def _is_probe(self):
+        return self._probe_started is not None and self._probe_thread == threading.get_ident()
+
+    def release(self):
+        """Give back a probe slot taken by allow() when no call was made after all."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._is_probe():
+                self._probe_started = None
+                self._probe_thread = None
+
+    def record_success(self):
+        with self._lock:
+            now = self._clock()
+            if self.state != CLOSED:
+                if self.state == OPEN or not self._is_probe():
+                    # A call that started before the breaker opened: only the probe decides.
+                    return
+                logger.info("Circuit %s closed: probe call succeeded", self.name)
+                self.state = CLOSED
+                self._probe_started = None
+                self._probe_thread = None
+                self._outcomes.clear()
+            self._outcomes.append((now, True))
+            self._prune(now)
+
+    def record_failure(self, error=None):
+        with self._lock:
+            now = self._clock()
+            if error is not None:
+                self.last_error = str(error)[:200]
+            if self.state == HALF_OPEN:
+                if self._is_probe():
+                    self._open(now, "probe call failed")
+                return
+            if self.state == OPEN:
+                return
+            self._outcomes.append((now, False))
+            self._prune(now)
+            failures = sum(not ok for _, ok in self._outcomes)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now, f"{failures}/{len(self._outcomes)} calls failed")
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self._probe_thread = None
+        self._outcomes.clear()
+        self.opened += 1
+        logger.warning("Circuit %s open for %ss: %s", self.name, self.open_seconds, reason)
+
+    def retry_after(self):
+        """Seconds until the next probe may go out (0 when calls are allowed)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (self._clock() - self._opened_at))
+
+    def stats(self):
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            calls = len(self._outcomes)
+            failures = sum(not ok for _, ok in self._outcomes)
+            return {
+                "state": self.state,
+                "calls_in_window": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "retry_after": max(0.0, self.open_seconds - (now - self._opened_at)) if self.state == OPEN else 0.0,
+                "last_error": self.last_error,
+            }
@@ -11,7 +11,7 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_TOKEN")
 
 # Database
-DATABASE_PATH = "expenses.db"
+DATABASE_PATH = os.getenv("DATABASE_PATH", "expenses.db")
 
 # Supported categories
 EXPENSE_CATEGORIES = [
@@ -34,6 +34,133 @@ EXPENSE_CATEGORIES = [
 # Currency
 CURRENCY = "₹"
 
+# Parser input caps (characters). Longer input is truncated before parsing.
+# Chat messages are at most 4096 chars on Telegram; OCR dumps can be larger.
+MAX_MESSAGE_CHARS = int(os.getenv("MAX_MESSAGE_CHARS", "4096"))
+MAX_OCR_TEXT_CHARS = int(os.getenv("MAX_OCR_TEXT_CHARS", "20000"))
+
+# OCR worker pool (ocr_service.py). Each worker process keeps its own OCR
+# models loaded; a job running longer than OCR_JOB_TIMEOUT seconds is abandoned
+# and the pool is recycled, since the stuck worker cannot be interrupted.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_JOB_TIMEOUT = float(os.getenv("OCR_JOB_TIMEOUT", "60"))
+OCR_PRELOAD_METHODS = [
+    name.strip().lower() for name in os.getenv("OCR_PRELOAD_METHODS", "easyocr,tesseract").split(",") if name.strip()
+]
+
+# OCR engine orchestration (ocr_orchestrator.py). OCR_POLICY is one of
+# sequential | race | ensemble; OCR_ENGINES lists engines in priority order.
+# race costs one pool worker per engine, so it only races while enough workers are idle.
+OCR_POLICY = os.getenv("OCR_POLICY", "sequential").strip().lower()
+OCR_ENGINES = [
+    name.strip().lower() for name in os.getenv("OCR_ENGINES", "easyocr,tesseract").split(",") if name.strip()
+]
+# While OCR models are still loading after startup, a photo uses any engine that
+# is already ready, or waits up to OCR_READY_TIMEOUT seconds for one to finish.
+OCR_READY_TIMEOUT = float(os.getenv("OCR_READY_TIMEOUT", "15"))
+
+# OCR image preprocessing (image_preprocess.py): images are downscaled so text
+# lines are about OCR_TARGET_TEXT_HEIGHT px tall and no side exceeds OCR_MAX_IMAGE_SIDE.
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "1").strip().lower() not in ("0", "false", "no", "off")
+OCR_TARGET_TEXT_HEIGHT = int(os.getenv("OCR_TARGET_TEXT_HEIGHT", "32"))
+OCR_MAX_IMAGE_SIDE = int(os.getenv("OCR_MAX_IMAGE_SIDE", "2000"))
+
+# Image analysis result cache (result_cache.py), keyed by image SHA-256 and
+# Telegram file_unique_id. Entries expire after RESULT_CACHE_TTL_SECONDS.
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "result_cache.db")
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "5000"))
+
+# Telegram albums (album_collector.py): photos sharing a media_group_id are
+# collected until none arrives for ALBUM_COLLECT_SECONDS (at most
+# ALBUM_MAX_WAIT_SECONDS after the first) and processed as one batch.
+# Batched OCR sends at most OCR_BATCH_SIZE images through an engine at once.
+ALBUM_COLLECT_SECONDS = float(os.getenv("ALBUM_COLLECT_SECONDS", "1.5"))
+ALBUM_MAX_WAIT_SECONDS = float(os.getenv("ALBUM_MAX_WAIT_SECONDS", "5"))
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "4"))
+
+# Receipt vs UPI routing before OCR (image_classifier.py). Images the cheap
+# checks cannot place are read once at IMAGE_ROUTE_OCR_SIDE px to decide.
+IMAGE_ROUTE_OCR_SIDE = int(os.getenv("IMAGE_ROUTE_OCR_SIDE", "640"))
+
+# UPI screenshots are OCR'd on their field lines only (upi_layout.py); the full
+# screen is read when that finds no payment. Set to 0 to always read the full screen.
+UPI_ROI_OCR = os.getenv("UPI_ROI_OCR", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Gemini calls (gemini_client.py) wait in a FIFO queue of at most GEMINI_MAX_QUEUE
+# requests and run GEMINI_CONCURRENCY at a time. A request is given up after
+# GEMINI_TIMEOUT_SECONDS, or once its photo is GEMINI_STALE_AFTER_SECONDS old.
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "32"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "45"))
+GEMINI_STALE_AFTER_SECONDS = float(os.getenv("GEMINI_STALE_AFTER_SECONDS", "120"))
+# Batching mode: with GEMINI_BATCH_SIZE > 1, requests arriving within
+# GEMINI_BATCH_WINDOW_SECONDS of each other share one Gemini call (and one unit of rate budget).
+GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "1"))
+GEMINI_BATCH_WINDOW_SECONDS = float(os.getenv("GEMINI_BATCH_WINDOW_SECONDS", "0.5"))
+
+# Gemini request budget (rate_limiter.py), shared by all bot processes through
+# GEMINI_RATE_LIMIT_PATH. Requests over GEMINI_RPM per minute or GEMINI_RPD per
+# day (UTC) go straight to OCR. 0 disables a limit.
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "10"))
+GEMINI_RPD = int(os.getenv("GEMINI_RPD", "250"))
+GEMINI_RATE_LIMIT_PATH = os.getenv("GEMINI_RATE_LIMIT_PATH", "gemini_rate_limit.db")
+
+# Circuit breakers (circuit_breaker.py) in front of Gemini and Google Speech.
+# When at least BREAKER_MIN_CALLS calls in the last BREAKER_WINDOW_SECONDS failed
+# at BREAKER_FAILURE_RATE or more, calls are skipped (OCR / Sphinx answer instead)
+# for BREAKER_OPEN_SECONDS; then one probe call decides whether to resume.
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "4"))
+BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "120"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "60"))
+
+# Images are re-encoded before Gemini upload (image_encoder.py): longest side
+# capped at GEMINI_IMAGE_MAX_SIDE (Gemini bills per 768 px tile), grayscale when
+# the 90th-percentile saturation (0-255) is at most GEMINI_GRAYSCALE_MAX_SATURATION,
+# saved as GEMINI_IMAGE_FORMAT (jpeg | webp). The OCR fallback reuses the last
+# GEMINI_ENCODE_CACHE_ENTRIES encodings.
+GEMINI_IMAGE_MAX_SIDE = int(os.getenv("GEMINI_IMAGE_MAX_SIDE", "1536"))
+GEMINI_IMAGE_FORMAT = os.getenv("GEMINI_IMAGE_FORMAT", "jpeg").strip().lower()
+GEMINI_IMAGE_QUALITY = int(os.getenv("GEMINI_IMAGE_QUALITY", "80"))
+GEMINI_GRAYSCALE_MAX_SATURATION = int(os.getenv("GEMINI_GRAYSCALE_MAX_SATURATION", "40"))
+GEMINI_ENCODE_CACHE_ENTRIES = int(os.getenv("GEMINI_ENCODE_CACHE_ENTRIES", "32"))
+
+# Gemini models found by list_models() and models that answered "not found" are
+# kept in GEMINI_MODEL_CACHE_PATH, so startup makes no network call; the list is
+# rediscovered in the background once older than GEMINI_MODEL_CACHE_TTL_SECONDS.
+GEMINI_MODEL_CACHE_PATH = os.getenv("GEMINI_MODEL_CACHE_PATH", "gemini_models.json")
+GEMINI_MODEL_CACHE_TTL_SECONDS = float(os.getenv("GEMINI_MODEL_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# Hedged requests (GeminiProcessor._generate_hedged): with GEMINI_HEDGE on, a
+# call the first model has not answered within its recent GEMINI_HEDGE_PERCENTILE
+# latency (GEMINI_HEDGE_DELAY_SECONDS until GEMINI_HEDGE_MIN_SAMPLES calls are
+# known, never under GEMINI_HEDGE_MIN_DELAY_SECONDS) is also sent to the next model.
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "0").strip().lower() not in ("0", "false", "no", "off")
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0.9"))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+GEMINI_HEDGE_DELAY_SECONDS = float(os.getenv("GEMINI_HEDGE_DELAY_SECONDS", "10"))
+GEMINI_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("GEMINI_HEDGE_MIN_DELAY_SECONDS", "1"))
+
+# Gemini call accounting (gemini_calls.py): one JSON line per analysis (model,
+# bytes sent, tokens, latency, attempts, outcome) is appended to
+# GEMINI_CALL_LOG_PATH every GEMINI_CALL_LOG_FLUSH_SECONDS and at shutdown; the
+# last GEMINI_CALL_LOG_DAYS days are reloaded on restart. Costs are estimated
+# from the GEMINI_PRICE_*_PER_MTOK prices (USD per million tokens).
+GEMINI_CALL_LOG_PATH = os.getenv("GEMINI_CALL_LOG_PATH", "gemini_calls.jsonl")
+GEMINI_CALL_LOG_FLUSH_SECONDS = float(os.getenv("GEMINI_CALL_LOG_FLUSH_SECONDS", "60"))
+GEMINI_CALL_LOG_DAYS = int(os.getenv("GEMINI_CALL_LOG_DAYS", "7"))
+GEMINI_PRICE_INPUT_PER_MTOK = float(os.getenv("GEMINI_PRICE_INPUT_PER_MTOK", "0.30"))
+GEMINI_PRICE_OUTPUT_PER_MTOK = float(os.getenv("GEMINI_PRICE_OUTPUT_PER_MTOK", "2.50"))
+
+# Telegram user ids (comma-separated) allowed to use admin commands such as /gemini_stats.
+ADMIN_USER_IDS = {
+    int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").replace(" ", "").split(",") if user_id.isdigit()
+}
+
+# Telegram updates handled at the same time, so one slow photo does not hold up other chats.
+BOT_CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", "8"))
+
 # Text patterns for expense detection
 EXPENSE_PATTERNS = {
     "food": [
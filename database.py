@@ -79,6 +79,28 @@ class ExpenseDatabase:
             )
         ''')
         
+        # Learned description -> category mapping per user
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS category_memory (
+                user_id INTEGER NOT NULL,
+                description_key TEXT NOT NULL,
+                category TEXT NOT NULL,
+                source TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, description_key),
+                FOREIGN KEY (user_id) REFERENCES users(user_id)
+            )
+        ''')
+
+        # Users whose expense history has been imported into category_memory
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS category_memory_seeded (
+                user_id INTEGER PRIMARY KEY,
+                seeded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(user_id)
+            )
+        ''')
+
         # Budget limits table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS budget_limits (
@@ -149,7 +171,27 @@ class ExpenseDatabase:
         
         conn.commit()
         conn.close()
-    
+
+    def add_expenses(self, rows):
+        """Add several expenses (dicts of add_expense arguments) in one transaction"""
+        columns = (
+            "user_id", "amount", "category", "description", "source", "transaction_id",
+            "account_name", "payment_method", "upi_to", "upi_from", "transaction_time",
+        )
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.executemany(f'''
+            INSERT INTO expenses ({", ".join(columns)})
+            VALUES ({", ".join("?" for _ in columns)})
+        ''', [
+            tuple(row.get(column, "text" if column == "source" else None) for column in columns)
+            for row in rows
+        ])
+
+        conn.commit()
+        conn.close()
+
     def get_expenses(self, user_id, days=None):
         """Get expenses for a user"""
         conn = sqlite3.connect(self.db_path)
@@ -180,6 +222,25 @@ class ExpenseDatabase:
         conn.close()
         return expenses
 
+    def get_last_expense(self, user_id):
+        """Get the most recently logged expense (highest id; rows logged in the same second keep their order)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        excluded = self.BILL_META_DESCRIPTIONS
+
+        query = '''
+            SELECT id, amount, category, description, date, source
+            FROM expenses
+            WHERE user_id = ?
+              AND lower(COALESCE(description, '')) NOT IN (?, ?, ?, ?)
+            ORDER BY id DESC
+            LIMIT 1
+        '''
+        cursor.execute(query, (user_id, *excluded))
+        expense = cursor.fetchone()
+        conn.close()
+        return expense
+
     def get_expenses_date_range(self, user_id, start_date, end_date):
         """Get expenses for a user within an inclusive date range (YYYY-MM-DD)."""
         conn = sqlite3.connect(self.db_path)
@@ -248,6 +309,84 @@ class ExpenseDatabase:
         conn.commit()
         conn.close()
     
+    def update_expense_category(self, expense_id, user_id, category):
+        """Change the category of one expense"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(
+            'UPDATE expenses SET category = ? WHERE id = ? AND user_id = ?',
+            (category, expense_id, user_id),
+        )
+        updated = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return updated > 0
+
+    def get_category_history(self, user_id):
+        """Get (description, category, count) rows from a user's past expenses"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        excluded = self.BILL_META_DESCRIPTIONS
+
+        query = '''
+            SELECT description, category, COUNT(*) as count
+            FROM expenses
+            WHERE user_id = ?
+              AND description IS NOT NULL
+              AND lower(COALESCE(description, '')) NOT IN (?, ?, ?, ?)
+            GROUP BY description, category
+        '''
+        cursor.execute(query, (user_id, *excluded))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def get_category_memory(self, user_id):
+        """Get the learned description_key -> category mapping for a user"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(
+            'SELECT description_key, category FROM category_memory WHERE user_id = ?',
+            (user_id,),
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        return dict(rows)
+
+    def save_category_memory(self, user_id, entries, source):
+        """Insert or replace learned (description_key, category) pairs for a user"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO category_memory (user_id, description_key, category, source, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', [(user_id, key, category, source) for key, category in entries])
+
+        conn.commit()
+        conn.close()
+
+    def is_category_memory_seeded(self, user_id):
+        """True once a user's expense history has been imported into category_memory"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT 1 FROM category_memory_seeded WHERE user_id = ?', (user_id,))
+        seeded = cursor.fetchone() is not None
+        conn.close()
+        return seeded
+
+    def mark_category_memory_seeded(self, user_id):
+        """Record that a user's expense history has been imported"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('INSERT OR IGNORE INTO category_memory_seeded (user_id) VALUES (?)', (user_id,))
+        conn.commit()
+        conn.close()
+
     def get_total_today(self, user_id):
         """Get total expenses for today"""
         conn = sqlite3.connect(self.db_path)
@@ -0,0 +1,173 @@
+"""
+Per-request accounting for Gemini analyses.
+GeminiProcessor records one entry per analyze_receipt / analyze_receipts call:
+model, images, request bytes, token usage from the response's usage_metadata,
+end-to-end latency, API attempts (model fallbacks and hedges included) and the
+outcome ("ok", or the error code that sent the image to OCR). Entries stay in
+memory for summaries and are appended to GEMINI_CALL_LOG_PATH (JSONL) at most
+every GEMINI_CALL_LOG_FLUSH_SECONDS, and on flush() at shutdown. The last
+GEMINI_CALL_LOG_DAYS days of the file are loaded back on first use, so daily
+token counts survive restarts.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from config import (
+    GEMINI_CALL_LOG_DAYS,
+    GEMINI_CALL_LOG_FLUSH_SECONDS,
+    GEMINI_CALL_LOG_PATH,
+    GEMINI_PRICE_INPUT_PER_MTOK,
+    GEMINI_PRICE_OUTPUT_PER_MTOK,
+)
+from metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+_MAX_RECORDS = 20000
+
+
+def _day(ts):
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+
+def usage_tokens(response):
+    """(prompt, output, total) token counts from response.usage_metadata, None when absent."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None, None, None
+    prompt = getattr(usage, "prompt_token_count", None)
+    output = getattr(usage, "candidates_token_count", None)
+    total = getattr(usage, "total_token_count", None)
+    if total is None and (prompt is not None or output is not None):
+        total = (prompt or 0) + (output or 0)
+    return prompt, output, total
+
+
+def estimated_cost(prompt_tokens, output_tokens):
+    """USD estimate from the configured per-million-token prices."""
+    return ((prompt_tokens or 0) * GEMINI_PRICE_INPUT_PER_MTOK
+            + (output_tokens or 0) * GEMINI_PRICE_OUTPUT_PER_MTOK) / 1_000_000
+
+
+class GeminiCallLog:
+    """In-process registry of Gemini call records with a periodic JSONL dump."""
+
+    def __init__(self, path=GEMINI_CALL_LOG_PATH, flush_seconds=GEMINI_CALL_LOG_FLUSH_SECONDS,
+                 history_days=GEMINI_CALL_LOG_DAYS):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.history_days = history_days
+        self._records = deque(maxlen=_MAX_RECORDS)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_flush = time.time()
+        self.write_errors = 0
+
+    def _load_history(self):
+        """Records of the last history_days days from the JSONL file (called with the lock held)."""
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        since = time.time() - self.history_days * 86400
+        history = []
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("ts", 0) >= since:
+                        history.append(record)
+        except OSError as e:
+            logger.warning("Could not read Gemini call log %s: %s", self.path, e)
+            return
+        self._records.extendleft(reversed(history[-_MAX_RECORDS:]))
+
+    def record(self, **fields):
+        """Add one call record (ts and cost are filled in); flushes when a dump is due."""
+        record = {"ts": round(time.time(), 3), **fields}
+        record["cost_usd"] = round(estimated_cost(record.get("prompt_tokens"), record.get("output_tokens")), 8)
+        with self._lock:
+            if not self._loaded:
+                self._load_history()
+            self._records.append(record)
+            self._pending.append(record)
+            due = time.time() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+        return record
+
+    def flush(self):
+        """Append pending records to the JSONL file."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.time()
+        if not pending or not self.path:
+            return 0
+        try:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                for record in pending:
+                    handle.write(json.dumps(record, sort_keys=True) + "\n")
+        except OSError as e:
+            self.write_errors += 1
+            logger.warning("Could not write Gemini call log %s: %s", self.path, e)
+            with self._lock:
+                self._pending = pending + self._pending
+            return 0
+        return len(pending)
+
+    def records(self, day=None):
+        with self._lock:
+            if not self._loaded:
+                self._load_history()
+            records = list(self._records)
+        if day is None:
+            return records
+        return [record for record in records if _day(record["ts"]) == day]
+
+    def summary(self, day=None):
+        """Calls, outcomes, latency percentiles, tokens and cost for one UTC day (default today)."""
+        day = day or _day(time.time())
+        records = self.records(day)
+        latencies = [record["latency_s"] for record in records if record.get("requests")]
+        outcomes, models = {}, {}
+        for record in records:
+            outcomes[record["outcome"]] = outcomes.get(record["outcome"], 0) + record.get("images", 1)
+            if record.get("model"):
+                models[record["model"]] = models.get(record["model"], 0) + 1
+        return {
+            "day": day,
+            "calls": len(records),
+            "images": sum(record.get("images", 1) for record in records),
+            "requests": sum(record.get("requests", 0) for record in records),
+            "outcomes": outcomes,
+            "models": models,
+            "p50_s": percentile(latencies, 0.5),
+            "p95_s": percentile(latencies, 0.95),
+            "request_bytes": sum(record.get("request_bytes", 0) for record in records),
+            "prompt_tokens": sum(record.get("prompt_tokens") or 0 for record in records),
+            "output_tokens": sum(record.get("output_tokens") or 0 for record in records),
+            "total_tokens": sum(record.get("total_tokens") or 0 for record in records),
+            "cost_usd": sum(record.get("cost_usd") or 0.0 for record in records),
+        }
+
+    def daily_tokens(self, days=7):
+        """[(day, total_tokens, cost_usd)] for the last `days` UTC days, oldest first."""
+        totals = {}
+        for record in self.records():
+            day = _day(record["ts"])
+            tokens, cost = totals.get(day, (0, 0.0))
+            totals[day] = (tokens + (record.get("total_tokens") or 0), cost + (record.get("cost_usd") or 0.0))
+        today = time.time()
+        wanted = [_day(today - offset * 86400) for offset in range(days - 1, -1, -1)]
+        return [(day, *totals.get(day, (0, 0.0))) for day in wanted]
+
+
+# Shared by every GeminiProcessor in the process (like image_encoder.encoded_images).
+gemini_calls = GeminiCallLog()
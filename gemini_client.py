@@ -0,0 +1,235 @@
+"""
+Async front end for GeminiProcessor.
+GeminiProcessor.analyze_receipt blocks on the network, so handlers do not call
+it directly: AsyncGeminiClient.analyze() puts the request on a FIFO queue and
+GEMINI_CONCURRENCY worker tasks run it in a thread pool of the same size, so
+the event loop keeps serving other updates while Gemini works.
+
+Every request has a deadline (GEMINI_TIMEOUT_SECONDS from now, or earlier,
+e.g. when the user's message is about to go stale). A request whose caller
+stopped waiting (deadline passed or handler cancelled) is skipped when it
+reaches the head of the queue; one already running finishes in its thread and
+its result is dropped.
+
+With GEMINI_BATCH_SIZE > 1, a worker that picks up a request waits up to
+GEMINI_BATCH_WINDOW_SECONDS for more and sends up to that many images in one
+GeminiProcessor.analyze_receipts() call: one prompt, one request against the
+rate budget, and each waiting handler gets its own image's answer.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    GEMINI_BATCH_SIZE,
+    GEMINI_BATCH_WINDOW_SECONDS,
+    GEMINI_CONCURRENCY,
+    GEMINI_MAX_QUEUE,
+    GEMINI_TIMEOUT_SECONDS,
+)
+from metrics import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+def _error(message, code, hint):
+    return {"error": message, "code": code, "hint": hint}
+
+
+class AsyncGeminiClient:
+    """Bounded-concurrency, FIFO-queued async wrapper around a GeminiProcessor."""
+
+    def __init__(self, processor, concurrency=GEMINI_CONCURRENCY, max_queue=GEMINI_MAX_QUEUE,
+                 timeout=GEMINI_TIMEOUT_SECONDS, batch_size=GEMINI_BATCH_SIZE, batch_window=GEMINI_BATCH_WINDOW_SECONDS):
+        self.processor = processor
+        self.concurrency = max(1, int(concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout = timeout
+        self.batch_size = max(1, int(batch_size))
+        self.batch_window = batch_window
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="gemini")
+        self._queue = None
+        self._take_lock = None
+        self._workers = []
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.images = 0
+        self.batches = 0
+        self.latency = LatencyTracker()
+
+    def _start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._take_lock = asyncio.Lock()
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def analyze(self, image, deadline=None):
+        """
+        analyze_receipt(image) without blocking the event loop.
+        deadline is an optional time.time() after which the answer is no longer
+        wanted. Returns the analysis dict, or an error dict (code
+        deadline_exceeded / queue_full) the handlers treat like any Gemini failure.
+        """
+        self._start()
+        deadline = min(deadline or float("inf"), time.time() + self.timeout)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((image, deadline, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.warning("Gemini queue full (%s waiting); using OCR", self._queue.qsize())
+            return _error("Gemini queue is full", "queue_full", "Too many images waiting for Gemini. OCR fallback used.")
+        self.submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+        try:
+            # On timeout or cancellation wait_for cancels the future, which tells
+            # the worker to skip (or drop) this request.
+            return await asyncio.wait_for(future, max(0.0, deadline - time.time()))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning("Gemini request passed its deadline; using OCR")
+            return _error("Gemini request timed out", "deadline_exceeded",
+                          "Gemini did not answer in time. OCR fallback used.")
+
+    async def _next_job(self, timeout):
+        """Next queued job within timeout seconds, or None."""
+        getter = asyncio.ensure_future(self._queue.get())
+        done, _ = await asyncio.wait({getter}, timeout=timeout)
+        if not done:
+            getter.cancel()
+            try:
+                # The item may have arrived while cancelling; then it is ours.
+                return await getter
+            except asyncio.CancelledError:
+                return None
+        return getter.result()
+
+    async def _collect(self, first):
+        """The first job plus any that arrive within the batch window, up to batch_size."""
+        jobs = [first]
+        window_ends = time.monotonic() + self.batch_window
+        while len(jobs) < self.batch_size:
+            remaining = window_ends - time.monotonic()
+            job = self._queue.get_nowait() if not self._queue.empty() else None
+            if job is None:
+                if remaining <= 0:
+                    break
+                job = await self._next_job(remaining)
+                if job is None:
+                    break
+            jobs.append(job)
+        return jobs
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # One worker takes from the queue at a time, so the one filling a batch
+            # is not raced for the next request by idle workers.
+            async with self._take_lock:
+                jobs = [await self._queue.get()]
+                if self.batch_size > 1:
+                    jobs = await self._collect(jobs[0])
+            try:
+                live = []
+                for image, deadline, future, queued_at in jobs:
+                    if future.done() or time.time() >= deadline:
+                        # Nobody is waiting for this one any more: do not spend a request on it.
+                        self.skipped += 1
+                        continue
+                    self.latency.record("queue_wait", time.perf_counter() - queued_at)
+                    live.append((image, future))
+                if not live:
+                    continue
+                await self._run(loop, live)
+            except Exception as e:
+                logger.error("Gemini worker error: %s", e)
+                for _, _, future, _ in jobs:
+                    if not future.done():
+                        future.set_result(_error(str(e), "unknown_error", "Gemini request failed. OCR fallback will be used."))
+            finally:
+                for _ in jobs:
+                    self._queue.task_done()
+
+    async def _run(self, loop, live):
+        """One Gemini request for the live (image, future) pairs; answers each future."""
+        images = [image for image, _ in live]
+        futures = [future for _, future in live]
+        started = time.perf_counter()
+        self.running += 1
+        self.requests += 1
+        self.images += len(images)
+        if len(images) == 1:
+            work = loop.run_in_executor(self._executor, self.processor.analyze_receipt, images[0])
+        else:
+            self.batches += 1
+            work = loop.run_in_executor(self._executor, self.processor.analyze_receipts, images)
+        try:
+            # Stop waiting once every caller has given up.
+            while not work.done() and not all(future.done() for future in futures):
+                await asyncio.wait({work, *[f for f in futures if not f.done()]}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.running -= 1
+        if not work.done():
+            # The callers gave up; the thread finishes on its own and the result is dropped.
+            work.add_done_callback(lambda done: done.cancelled() or done.exception())
+            return
+
+        self.latency.record("request" if len(images) == 1 else "batch_request", time.perf_counter() - started)
+        try:
+            results = work.result()
+            if len(images) == 1:
+                results = [results]
+        except Exception as e:
+            logger.error("Gemini request failed: %s", e)
+            results = [_error(str(e), "unknown_error", "Gemini request failed. OCR fallback will be used.")] * len(images)
+        # Error dicts from the processor (quota, rate limit, parse errors) count as failed too.
+        errors = sum(1 for result in results if not isinstance(result, dict) or result.get("error"))
+        self.failed += errors
+        self.completed += len(results) - errors
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def close(self):
+        """Stop the workers and the thread pool (requests still waiting get no answer)."""
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Queue and request counters plus queue-wait / request latency."""
+        return {
+            "concurrency": self.concurrency,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "rejected": self.rejected,
+            "running": self.running,
+            "requests": self.requests,
+            "batches": self.batches,
+            "images_per_request": self.images / self.requests if self.requests else 0.0,
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "queue_wait": self.latency.summary("queue_wait"),
+            "request": self.latency.summary("request"),
+            "batch_request": self.latency.summary("batch_request"),
+        }
@@ -1,15 +1,33 @@
 """
 Gemini AI processor for receipt analysis.
 """
+import hashlib
 import json
 import logging
+import os
 import re
+import threading
 import time
 import warnings
-
-import PIL.Image
-
-from config import GEMINI_API_KEY
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from circuit_breaker import CircuitBreaker
+from config import (
+    GEMINI_API_KEY,
+    GEMINI_CONCURRENCY,
+    GEMINI_HEDGE,
+    GEMINI_HEDGE_DELAY_SECONDS,
+    GEMINI_HEDGE_MIN_DELAY_SECONDS,
+    GEMINI_HEDGE_MIN_SAMPLES,
+    GEMINI_HEDGE_PERCENTILE,
+    GEMINI_MODEL_CACHE_PATH,
+    GEMINI_MODEL_CACHE_TTL_SECONDS,
+)
+from gemini_calls import gemini_calls, usage_tokens
+from image_encoder import encode_image, encoded_images
+from metrics import LatencyTracker
+from rate_limiter import RateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +40,191 @@ except ImportError as import_error:
     genai = None
 
 
+# Fields asked for in every analysis prompt (one image or a batch).
+_FIELDS_PROMPT = (
+    "\"image_type\" (one of: receipt, upi, unknown), "
+    "\"merchant\" (string or null), "
+    "\"date\" (string or null), "
+    "\"transaction_time\" (string with date + time if visible, else null), "
+    "\"subtotal\" (number or null), "
+    "\"total\" (number or null), "
+    "\"grand_total\" (number or null), "
+    "\"final_amount\" (number or null), "
+    "\"amount\" (number or null), "
+    "\"upi_to\" (string or null), "
+    "\"upi_from\" (string or null), "
+    "\"upi_transaction_id\" (string or null), "
+    "\"items\" (array of objects with keys: name, quantity, unit_price, total_price, category). "
+    "If this is a UPI screenshot, prioritize amount/to/from/transaction_time/upi_transaction_id. "
+    "For transaction_time, include clock time (HH:MM with am/pm if present in image)."
+)
+
+# Error codes that count against the circuit breaker: the API is down or refusing
+# every call. Quota errors are the rate limiter's business; parse errors and
+# missing models mean the API itself answered.
+_BREAKER_FAILURE_CODES = ("unknown_error", "auth_or_permission_error")
+
+# Models tried / answering for the analysis running in this thread (read into gemini_calls).
+_call_trace = threading.local()
+
+_NULLABLE_STRING = {"type": "string", "nullable": True}
+_NULLABLE_NUMBER = {"type": "number", "nullable": True}
+_RECEIPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "image_type": {"type": "string", "enum": ["receipt", "upi", "unknown"]},
+        "merchant": _NULLABLE_STRING,
+        "date": _NULLABLE_STRING,
+        "transaction_time": _NULLABLE_STRING,
+        "subtotal": _NULLABLE_NUMBER,
+        "total": _NULLABLE_NUMBER,
+        "grand_total": _NULLABLE_NUMBER,
+        "final_amount": _NULLABLE_NUMBER,
+        "amount": _NULLABLE_NUMBER,
+        "upi_to": _NULLABLE_STRING,
+        "upi_from": _NULLABLE_STRING,
+        "upi_transaction_id": _NULLABLE_STRING,
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "quantity": _NULLABLE_NUMBER,
+                    "unit_price": _NULLABLE_NUMBER,
+                    "total_price": _NULLABLE_NUMBER,
+                    "category": _NULLABLE_STRING,
+                },
+            },
+        },
+    },
+    "required": ["image_type"],
+}
+_RECEIPT_CONFIG = {"response_mime_type": "application/json", "response_schema": _RECEIPT_SCHEMA}
+# Batch answers: one object per image, tagged with the image's 1-based position.
+_BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"image_index": {"type": "integer"}, **_RECEIPT_SCHEMA["properties"]},
+        "required": ["image_index", "image_type"],
+    },
+}
+_BATCH_CONFIG = {"response_mime_type": "application/json", "response_schema": _BATCH_SCHEMA}
+
+_TEXT_FIELDS = ("merchant", "date", "transaction_time", "upi_to", "upi_from", "upi_transaction_id")
+_AMOUNT_FIELDS = ("subtotal", "total", "grand_total", "final_amount", "amount")
+
+
+def _text(value):
+    if value is None:
+        return None
+    if type(value) is not str:
+        value = str(value)
+    return value.strip() or None
+
+
+def _amount(value):
+    """Positive float or None (numbers as schema output sends them, or numeric strings)."""
+    kind = type(value)
+    if kind is not float and kind is not int:
+        if value is None or kind is bool:
+            return None
+        try:
+            value = float(str(value).replace(",", ".").strip())
+        except ValueError:
+            return None
+    return float(value) if value > 0 else None
+
+
+def _image_type(value):
+    image_type = (_text(value) or "").lower()
+    if not image_type:
+        return None
+    if "upi" in image_type or "payment" in image_type:
+        return "upi"
+    if image_type in {"receipt", "bill", "invoice"}:
+        return "receipt"
+    return "unknown"
+
+
+def _item(item):
+    """Normalized line item dict, or None for an entry with neither name nor price."""
+    if not isinstance(item, dict):
+        return None
+    name = _text(item.get("name"))
+    quantity = _amount(item.get("quantity"))
+    unit_price = _amount(item.get("unit_price") or item.get("price"))
+    total_price = _amount(item.get("total_price") or item.get("amount"))
+    if total_price is None and unit_price and quantity:
+        total_price = round(unit_price * quantity, 2)
+    if quantity is not None:
+        quantity = int(quantity) if quantity.is_integer() else quantity
+    elif total_price is not None:
+        quantity = 1
+    if not name and total_price is None:
+        return None
+    return {
+        "name": name or "Receipt Item",
+        "quantity": quantity,
+        "unit_price": unit_price,
+        "total_price": total_price,
+        "category": _text(item.get("category")),
+    }
+
+
+class GeminiReceipt:
+    """
+    Receipt / UPI fields of one Gemini answer, typed and normalized in a single
+    pass over the parsed JSON. as_dict() is the result dict handlers use.
+    """
+
+    __slots__ = ("image_type",) + _TEXT_FIELDS + _AMOUNT_FIELDS + ("items",)
+
+    def __init__(self, data):
+        get = data.get
+        self.image_type = _image_type(get("image_type"))
+        self.merchant = _text(get("merchant"))
+        self.date = _text(get("date"))
+        self.transaction_time = _text(get("transaction_time")) or self.date
+        self.upi_to = _text(get("upi_to"))
+        self.upi_from = _text(get("upi_from"))
+        self.upi_transaction_id = _text(get("upi_transaction_id"))
+        self.subtotal = _amount(get("subtotal"))
+        self.total = _amount(get("total"))
+        self.grand_total = _amount(get("grand_total"))
+        self.final_amount = _amount(get("final_amount"))
+        self.amount = _amount(get("amount")) or self.final_amount or self.grand_total or self.total or self.subtotal
+        items = get("items")
+        self.items = [item for item in map(_item, items) if item is not None] if items else []
+
+    def as_dict(self):
+        return {
+            "image_type": self.image_type,
+            "merchant": self.merchant,
+            "date": self.date,
+            "transaction_time": self.transaction_time,
+            "upi_to": self.upi_to,
+            "upi_from": self.upi_from,
+            "upi_transaction_id": self.upi_transaction_id,
+            "subtotal": self.subtotal,
+            "total": self.total,
+            "grand_total": self.grand_total,
+            "final_amount": self.final_amount,
+            "amount": self.amount,
+            "items": self.items,
+        }
+
+
+def _key_fingerprint():
+    """Short hash of the API key: the model list cached for one key is not reused for another."""
+    return hashlib.sha256((GEMINI_API_KEY or "").encode()).hexdigest()[:16]
+
+
 class GeminiProcessor:
     """Wrapper around Gemini image analysis with safe fallbacks."""
 
-    def __init__(self):
+    def __init__(self, rate_limiter=None, model_cache_path=GEMINI_MODEL_CACHE_PATH):
         self.model = None
         self.model_name = None
         self._init_error = None
@@ -33,7 +232,20 @@ class GeminiProcessor:
         self._available_generation_models = set()
         self._candidates = []
         self._blocked_models = set()
-        self._cooldown_until = 0.0
+        self._blocked_at = {}
+        self._models_lock = threading.Lock()
+        self._refresh_thread = None
+        self.model_cache_path = model_cache_path
+        self.rate_limiter = None
+        self.hedge = GEMINI_HEDGE
+        # Threads start on first submit, so an unused executor costs nothing.
+        self._hedge_executor = ThreadPoolExecutor(max_workers=2 * GEMINI_CONCURRENCY, thread_name_prefix="gemini-hedge")
+        self._stats_lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker("gemini")
+        self.parse_counts = {"schema": 0, "fallback": 0, "failed": 0}
 
         if not GEMINI_API_KEY:
             logger.warning("GEMINI_API_KEY is not set")
@@ -45,15 +257,31 @@ class GeminiProcessor:
             self._init_error = "Gemini SDK import failed"
             return
 
+        self.rate_limiter = rate_limiter or RateLimiter()
         try:
             genai.configure(api_key=GEMINI_API_KEY)
-            self._available_generation_models = self._discover_generate_content_models()
+            # Start from the persisted model list so startup makes no network call;
+            # list_models() runs in the background when the list is missing or stale.
+            cached = self._load_model_cache()
+            if cached:
+                self._available_generation_models = set(cached["available"])
+                self._blocked_at = {
+                    name: blocked_at for name, blocked_at in cached["blocked"].items()
+                    if time.time() - blocked_at < GEMINI_MODEL_CACHE_TTL_SECONDS
+                }
+                self._blocked_models = set(self._blocked_at)
             self._candidates = self._build_candidate_models()
             if not self._candidates:
                 raise RuntimeError("No Gemini models available for generateContent")
-            self.model_name = self._candidates[0]
+            self.model_name = next((m for m in self._candidates if m not in self._blocked_models), self._candidates[0])
             self.model = self._get_model(self.model_name)
-            logger.info("Gemini initialized with model: %s", self.model_name)
+            logger.info(
+                "Gemini initialized with model: %s (%s model list)",
+                self.model_name,
+                "cached" if cached else "static",
+            )
+            if not cached or time.time() - cached["saved_at"] > GEMINI_MODEL_CACHE_TTL_SECONDS:
+                self.refresh_models_in_background()
         except Exception as init_error:
             logger.error("Gemini initialization failed: %s", init_error)
             self._init_error = str(init_error)
@@ -83,6 +311,60 @@ class GeminiProcessor:
 
         return available
 
+    def _load_model_cache(self):
+        """Persisted {"saved_at", "available", "blocked"} for this API key, or None."""
+        try:
+            with open(self.model_cache_path, encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("key") != _key_fingerprint() or not data.get("available"):
+            return None
+        data.setdefault("blocked", {})
+        data.setdefault("saved_at", 0)
+        return data
+
+    def _save_model_cache(self):
+        """Write the discovered and blocked models atomically (temp file + rename)."""
+        with self._models_lock:
+            data = {
+                "key": _key_fingerprint(),
+                "saved_at": time.time(),
+                "available": sorted(self._available_generation_models),
+                "blocked": dict(self._blocked_at),
+            }
+        if not data["available"]:
+            return
+        temp_path = f"{self.model_cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, indent=2)
+            os.replace(temp_path, self.model_cache_path)
+        except OSError as save_error:
+            logger.warning("Could not save Gemini model cache: %s", save_error)
+
+    def _refresh_models(self):
+        """Re-run model discovery and swap in the new candidate list."""
+        available = self._discover_generate_content_models()
+        if not available:
+            return
+        with self._models_lock:
+            self._available_generation_models = available
+            self._candidates = self._build_candidate_models()
+            usable = [m for m in self._candidates if m not in self._blocked_models]
+            if usable and self.model_name not in usable:
+                self.model_name = usable[0]
+                self.model = self._get_model(self.model_name)
+        logger.info("Gemini model list refreshed: %s candidates", len(self._candidates))
+        self._save_model_cache()
+
+    def refresh_models_in_background(self):
+        """Start model discovery on a daemon thread; requests keep using the current list."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(target=self._refresh_models, name="gemini-models", daemon=True)
+        self._refresh_thread.start()
+
     def _build_candidate_models(self):
         """Build prioritized candidates, preferring known stable model names."""
         preferred = [
@@ -129,17 +411,8 @@ class GeminiProcessor:
         ]
         return not any(token in lowered for token in blocked_tokens)
 
-    def analyze_receipt(self, image_path):
-        """
-        Analyze a receipt image and return structured receipt fields.
-        Expected keys:
-        - merchant
-        - date
-        - subtotal
-        - total
-        - grand_total
-        - final_amount
-        """
+    def _unavailable_payload(self):
+        """Error payload when no request may be sent (no model, or over the rate budget); else None."""
         if not self.model:
             payload = {
                 "error": "Gemini model not initialized",
@@ -150,82 +423,236 @@ class GeminiProcessor:
                 payload["details"] = self._compact_error(self._init_error)
             return payload
 
-        now = time.time()
-        if now < self._cooldown_until:
-            retry_after = int(self._cooldown_until - now)
+        # While Gemini keeps failing, answer at once instead of paying a timeout per image.
+        if self.breaker and not self.breaker.allow():
             return {
-                "error": "Gemini temporarily in cooldown due to quota/rate limits",
-                "code": "quota_cooldown",
-                "hint": "Gemini quota/rate limit reached. OCR fallback is active until cooldown expires.",
-                "retry_after_seconds": retry_after,
+                "error": "Gemini failing repeatedly, calls paused",
+                "code": "circuit_open",
+                "hint": "Gemini requests keep failing. OCR fallback is active until a probe request succeeds.",
+                "retry_after_seconds": max(1, int(self.breaker.retry_after())),
             }
 
+        # Spend from the shared RPM/RPD budget first; over it, skip the API round-trip.
+        if self.rate_limiter:
+            budget = self.rate_limiter.acquire()
+            if not budget["allowed"]:
+                if self.breaker:
+                    self.breaker.release()
+                if budget["reason"] == "cooldown":
+                    return {
+                        "error": "Gemini temporarily in cooldown due to quota/rate limits",
+                        "code": "quota_cooldown",
+                        "hint": "Gemini quota/rate limit reached. OCR fallback is active until cooldown expires.",
+                        "retry_after_seconds": max(1, int(budget["retry_after"])),
+                    }
+                return {
+                    "error": f"Gemini request budget exhausted ({budget['reason']})",
+                    "code": "rate_limited",
+                    "hint": "Gemini requests per minute/day used up. OCR fallback is active meanwhile.",
+                    "retry_after_seconds": max(1, int(budget["retry_after"])),
+                }
+        return None
+
+    def _image_part(self, image):
+        """Upload a resized, re-encoded copy (image_encoder) rather than the original photo."""
+        if isinstance(image, (bytes, bytearray)):
+            encoded = encoded_images.encode(bytes(image))
+        else:
+            encoded = encode_image(image)
+        return {"mime_type": encoded["mime_type"], "data": encoded["data"]}
+
+    def analyze_receipt(self, image):
+        """
+        Analyze a receipt image (raw bytes or a file path) and return structured receipt fields.
+        Expected keys:
+        - merchant
+        - date
+        - subtotal
+        - total
+        - grand_total
+        - final_amount
+        """
+        started = time.perf_counter()
+        unavailable = self._unavailable_payload()
+        if unavailable:
+            self._account(started, 1, unavailable["code"])
+            return unavailable
+
         prompt = (
             "Analyze this image (receipt OR UPI payment screenshot) and extract structured data. "
             "Return JSON only with keys: "
-            "\"image_type\" (one of: receipt, upi, unknown), "
-            "\"merchant\" (string or null), "
-            "\"date\" (string or null), "
-            "\"transaction_time\" (string with date + time if visible, else null), "
-            "\"subtotal\" (number or null), "
-            "\"total\" (number or null), "
-            "\"grand_total\" (number or null), "
-            "\"final_amount\" (number or null), "
-            "\"amount\" (number or null), "
-            "\"upi_to\" (string or null), "
-            "\"upi_from\" (string or null), "
-            "\"upi_transaction_id\" (string or null), "
-            "\"items\" (array of objects with keys: name, quantity, unit_price, total_price, category). "
-            "If this is a UPI screenshot, prioritize amount/to/from/transaction_time/upi_transaction_id. "
-            "For transaction_time, include clock time (HH:MM with am/pm if present in image)."
+            + _FIELDS_PROMPT
         )
 
         try:
-            with PIL.Image.open(image_path) as image:
-                image.load()
-                response = self._generate_content([prompt, image])
+            content = [prompt, self._image_part(image)]
+        except Exception as encode_error:
+            self._record_outcome(None)
+            payload = self._error_payload(encode_error)
+            self._account(started, 1, payload["code"])
+            return payload
 
-            data = self._parse_response_json(response)
-            self._normalize_receipt(data)
-            return data
+        response = None
+        _call_trace.attempts, _call_trace.model = 0, None
+        try:
+            response = self._generate_content(content, generation_config=_RECEIPT_CONFIG)
+            data = self._load_json(response)
+            if not isinstance(data, dict):
+                raise ValueError("Could not locate JSON object in Gemini response")
+            self._record_outcome("ok")
+            self._account(started, 1, "ok", content, response)
+            return GeminiReceipt(data).as_dict()
         except Exception as analyze_error:
-            retry_after = None
-            error_code = "unknown_error"
-            hint = "Gemini request failed. OCR fallback will be used."
-            if self._is_quota_or_rate_limit_error(analyze_error):
-                error_code = "quota_exceeded"
-                hint = "Gemini quota exceeded. Enable billing/increase quota for this API key."
-                retry_after = self._extract_retry_delay_seconds(str(analyze_error))
-                cooldown_seconds = max(retry_after, 60)
-                # If daily quota was hit, back off longer to avoid repeated failures.
-                error_text = str(analyze_error).lower()
-                if "perday" in error_text or "per day" in error_text:
-                    cooldown_seconds = max(cooldown_seconds, 3600)
-                self._cooldown_until = time.time() + cooldown_seconds
-                logger.warning(
-                    "Gemini quota/rate-limit detected. Cooldown for %ss.",
-                    cooldown_seconds,
-                )
-            elif self._is_auth_or_permission_error(analyze_error):
-                error_code = "auth_or_permission_error"
-                hint = "Gemini API key is invalid or lacks project permissions/billing."
-            elif self._is_model_not_available_error(analyze_error):
-                error_code = "model_not_available"
-                hint = "Configured Gemini model is not available for this API version/key."
-            elif self._is_json_parse_error(analyze_error):
-                error_code = "response_parse_error"
-                hint = "Gemini returned an unstructured response. OCR fallback will be used."
-
-            logger.error("Gemini receipt analysis failed: %s", analyze_error)
-            payload = {
-                "error": str(analyze_error),
-                "code": error_code,
-                "hint": hint,
-            }
-            if retry_after:
-                payload["retry_after_seconds"] = retry_after
+            payload = self._error_payload(analyze_error)
+            self._record_outcome(payload["code"], analyze_error)
+            self._account(started, 1, payload["code"], content, response)
             return payload
 
+    def analyze_receipts(self, images):
+        """
+        analyze_receipt() for several images in one request: the images are sent
+        together and Gemini answers with a JSON array, one object per image in
+        order. Returns one result dict per image. If the array cannot be matched
+        to the images, each image is retried on its own.
+        """
+        if len(images) == 1:
+            return [self.analyze_receipt(images[0])]
+        started = time.perf_counter()
+        unavailable = self._unavailable_payload()
+        if unavailable:
+            self._account(started, len(images), unavailable["code"])
+            return [dict(unavailable) for _ in images]
+
+        prompt = (
+            f"Analyze each of these {len(images)} images (each a receipt OR a UPI payment screenshot) "
+            "and extract structured data. Return JSON only: an array with exactly one object per image, "
+            "in the order the images are given, each with keys: "
+            "\"image_index\" (1-based position of the image), "
+            + _FIELDS_PROMPT
+        )
+        content = [prompt]
+        try:
+            for index, image in enumerate(images, 1):
+                content += [f"Image {index}:", self._image_part(image)]
+        except Exception as encode_error:
+            # One unreadable image: let each image succeed or fail on its own.
+            logger.warning("Gemini batch image could not be encoded (%s); analyzing one by one", encode_error)
+            self._record_outcome(None)
+            return [self.analyze_receipt(image) for image in images]
+
+        response = None
+        _call_trace.attempts, _call_trace.model = 0, None
+        try:
+            response = self._generate_content(content, generation_config=_BATCH_CONFIG)
+            results = self._split_batch_response(self._load_json(response), len(images))
+            self._record_outcome("ok")
+        except Exception as batch_error:
+            payload = self._error_payload(batch_error)
+            self._record_outcome(payload["code"], batch_error)
+            self._account(started, len(images), payload["code"], content, response)
+            if payload["code"] in ("quota_exceeded", "auth_or_permission_error"):
+                return [dict(payload) for _ in images]
+            results = None
+        else:
+            self._account(started, len(images), "ok" if results is not None else "batch_split_error",
+                          content, response)
+
+        if results is None:
+            logger.warning("Gemini batch of %s images could not be split; analyzing one by one", len(images))
+            return [self.analyze_receipt(image) for image in images]
+        return [GeminiReceipt(data).as_dict() for data in results]
+
+    def _record_outcome(self, code, error=None):
+        """
+        Report a request to the circuit breaker: "ok" or an error code. None, or a
+        code saying nothing about API health (quota), just frees a half-open probe slot.
+        """
+        if not self.breaker:
+            return
+        if code in _BREAKER_FAILURE_CODES:
+            self.breaker.record_failure(error)
+        elif code is None or code == "quota_exceeded":
+            self.breaker.release()
+        else:
+            self.breaker.record_success()
+
+    def _account(self, started, images, outcome, content=None, response=None):
+        """
+        Record one analysis in gemini_calls: latency since `started`, request size,
+        API attempts and answering model (from _call_trace) and the response's token usage.
+        """
+        request_bytes = 0
+        for part in content or ():
+            request_bytes += len(part.encode("utf-8")) if isinstance(part, str) else len(part["data"])
+        attempts = getattr(_call_trace, "attempts", 0) if content else 0
+        prompt_tokens, output_tokens, total_tokens = usage_tokens(response)
+        try:
+            gemini_calls.record(
+                model=getattr(_call_trace, "model", None) if content else None,
+                images=images,
+                request_bytes=request_bytes,
+                requests=max(attempts, 1) if content else 0,
+                prompt_tokens=prompt_tokens,
+                output_tokens=output_tokens,
+                total_tokens=total_tokens,
+                latency_s=round(time.perf_counter() - started, 4),
+                outcome=outcome,
+            )
+        except Exception as record_error:
+            logger.warning("Gemini call accounting failed: %s", record_error)
+
+    def _split_batch_response(self, data, count):
+        """Per-image dicts from a batch answer, in image order, or None if they do not line up."""
+        if isinstance(data, dict):
+            data = data.get("results") or data.get("images")
+        if not isinstance(data, list) or len(data) != count or not all(isinstance(d, dict) for d in data):
+            return None
+        indexes = [d.pop("image_index", None) for d in data]
+        if all(isinstance(i, int) for i in indexes) and sorted(indexes) == list(range(1, count + 1)):
+            data = [d for _, d in sorted(zip(indexes, data), key=lambda pair: pair[0])]
+        return data
+
+    def _error_payload(self, analyze_error):
+        """Classify a failed request into the error dict handlers show (and back off on quota errors)."""
+        retry_after = None
+        error_code = "unknown_error"
+        hint = "Gemini request failed. OCR fallback will be used."
+        if self._is_quota_or_rate_limit_error(analyze_error):
+            error_code = "quota_exceeded"
+            hint = "Gemini quota exceeded. Enable billing/increase quota for this API key."
+            retry_after = self._extract_retry_delay_seconds(str(analyze_error))
+            cooldown_seconds = max(retry_after, 60)
+            # If daily quota was hit, back off longer to avoid repeated failures.
+            error_text = str(analyze_error).lower()
+            if "perday" in error_text or "per day" in error_text:
+                cooldown_seconds = max(cooldown_seconds, 3600)
+            if self.rate_limiter:
+                # Shared cooldown: other bot processes stop calling too.
+                self.rate_limiter.block(cooldown_seconds)
+            logger.warning(
+                "Gemini quota/rate-limit detected. Cooldown for %ss.",
+                cooldown_seconds,
+            )
+        elif self._is_auth_or_permission_error(analyze_error):
+            error_code = "auth_or_permission_error"
+            hint = "Gemini API key is invalid or lacks project permissions/billing."
+        elif self._is_model_not_available_error(analyze_error):
+            error_code = "model_not_available"
+            hint = "Configured Gemini model is not available for this API version/key."
+        elif self._is_json_parse_error(analyze_error):
+            error_code = "response_parse_error"
+            hint = "Gemini returned an unstructured response. OCR fallback will be used."
+
+        logger.error("Gemini receipt analysis failed: %s", analyze_error)
+        payload = {
+            "error": str(analyze_error),
+            "code": error_code,
+            "hint": hint,
+        }
+        if retry_after:
+            payload["retry_after_seconds"] = retry_after
+        return payload
+
     def _get_model(self, model_name):
         cached = self._model_cache.get(model_name)
         if cached is None:
@@ -233,8 +660,80 @@ class GeminiProcessor:
             self._model_cache[model_name] = cached
         return cached
 
-    def _generate_content(self, content):
-        """Try model candidates in order."""
+    def _call_model(self, model_name, content, generation_config=None):
+        """One generate_content call on model_name; successful calls feed its latency window."""
+        model = self._get_model(model_name)
+        started = time.perf_counter()
+        if generation_config:
+            response = model.generate_content(content, generation_config=generation_config)
+        else:
+            response = model.generate_content(content)
+        images = sum(not isinstance(part, str) for part in content)
+        self.latency.record(model_name if images <= 1 else f"{model_name}/batch", time.perf_counter() - started)
+        return response
+
+    def _block_model(self, model_name):
+        """Stop trying a model that answered "not found" (persisted with the model list)."""
+        with self._models_lock:
+            self._blocked_models.add(model_name)
+            self._blocked_at[model_name] = time.time()
+        self._save_model_cache()
+
+    def hedge_delay(self, model_name, batch=False):
+        """
+        Seconds to wait for model_name before hedging: its recent GEMINI_HEDGE_PERCENTILE
+        latency once GEMINI_HEDGE_MIN_SAMPLES calls are known, else GEMINI_HEDGE_DELAY_SECONDS.
+        """
+        key = f"{model_name}/batch" if batch else model_name
+        observed = self.latency.quantile(key, GEMINI_HEDGE_PERCENTILE, GEMINI_HEDGE_MIN_SAMPLES)
+        if observed is None:
+            return GEMINI_HEDGE_DELAY_SECONDS
+        return max(GEMINI_HEDGE_MIN_DELAY_SECONDS, observed)
+
+    def _generate_hedged(self, primary, backup, content, generation_config=None):
+        """
+        Call primary; if it has not answered within hedge_delay(primary), send the same
+        request to backup and return whichever answers first. The slower call cannot be
+        interrupted mid-request, so its thread finishes and its answer is dropped.
+        Returns (response, primary_error, models_tried); response is None when all failed.
+        """
+        batch = sum(not isinstance(part, str) for part in content) > 1
+        first = self._hedge_executor.submit(self._call_model, primary, content, generation_config)
+        _call_trace.model = primary
+        try:
+            return first.result(timeout=self.hedge_delay(primary, batch)), None, 1
+        except FutureTimeoutError:
+            pass
+        except Exception as primary_error:
+            return None, primary_error, 1
+
+        # The hedge is a real request: it has to fit in the shared rate budget.
+        if self.rate_limiter and not self.rate_limiter.acquire()["allowed"]:
+            try:
+                return first.result(), None, 1
+            except Exception as primary_error:
+                return None, primary_error, 1
+
+        with self._stats_lock:
+            self.hedges += 1
+        logger.info("Gemini model '%s' slower than its hedge delay, also asking '%s'", primary, backup)
+        second = self._hedge_executor.submit(self._call_model, backup, content, generation_config)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is second:
+                        _call_trace.model = backup
+                        with self._stats_lock:
+                            self.hedge_wins += 1
+                    return future.result(), None, 2
+        return None, first.exception(), 2
+
+    def _generate_content(self, content, generation_config=None):
+        """Try model candidates in order (hedging the first with the second when GEMINI_HEDGE is on)."""
         ordered_candidates = [m for m in self._candidates if m not in self._blocked_models]
         if self.model_name in ordered_candidates:
             ordered_candidates = [self.model_name] + [m for m in ordered_candidates if m != self.model_name]
@@ -242,17 +741,41 @@ class GeminiProcessor:
             raise RuntimeError("No Gemini models left to try after filtering blocked models")
 
         last_error = None
-        for idx, model_name in enumerate(ordered_candidates):
+        start = 0
+        if self.hedge and len(ordered_candidates) > 1:
+            response, last_error, start = self._generate_hedged(
+                ordered_candidates[0], ordered_candidates[1], content, generation_config
+            )
+            _call_trace.attempts = getattr(_call_trace, "attempts", 0) + start
+            if response is not None:
+                return response
+            if self._is_model_not_available_error(last_error):
+                self._block_model(ordered_candidates[0])
+            if not self._should_retry(last_error):
+                raise last_error
+            logger.warning(
+                "Gemini model '%s' failed (%s), trying next model",
+                ordered_candidates[0],
+                self._compact_error(last_error),
+            )
+
+        for idx, model_name in enumerate(ordered_candidates[start:], start):
+            # The first request was paid for in _unavailable_payload; every fallback is
+            # another real request and has to fit in the shared rate budget too.
+            if idx and self.rate_limiter and not self.rate_limiter.acquire()["allowed"]:
+                logger.info("Gemini rate budget used up, not trying model '%s'", model_name)
+                raise last_error
+            _call_trace.attempts = getattr(_call_trace, "attempts", 0) + 1
+            _call_trace.model = model_name
             try:
-                model = self._get_model(model_name)
-                response = model.generate_content(content)
-                self.model = model
+                response = self._call_model(model_name, content, generation_config)
+                self.model = self._get_model(model_name)
                 self.model_name = model_name
                 return response
             except Exception as model_error:
                 last_error = model_error
                 if self._is_model_not_available_error(model_error):
-                    self._blocked_models.add(model_name)
+                    self._block_model(model_name)
                 if not self._should_retry(model_error):
                     raise
                 if idx < len(ordered_candidates) - 1:
@@ -263,7 +786,25 @@ class GeminiProcessor:
                     )
         raise last_error
 
+    def stats(self):
+        """Current model, per-model request latency and hedging counters."""
+        with self._stats_lock:
+            hedges, hedge_wins = self.hedges, self.hedge_wins
+        return {
+            "model": self.model_name,
+            "candidates": list(self._candidates),
+            "blocked": sorted(self._blocked_models),
+            "hedging": self.hedge,
+            "hedges": hedges,
+            "hedge_wins": hedge_wins,
+            "latency": self.latency.summaries(),
+            "breaker": self.breaker.stats() if self.breaker else None,
+            "parse": dict(self.parse_counts),
+        }
+
     def _should_retry(self, error):
+        # Quota errors are not retried on other models: the quota is per key, so
+        # _error_payload blocks the shared limiter instead.
         error_text = str(error).lower()
         retry_signals = [
             "404",
@@ -271,10 +812,6 @@ class GeminiProcessor:
             "unsupported",
             "not supported",
             "unknown model",
-            "429",
-            "quota exceeded",
-            "rate limit",
-            "resource exhausted",
         ]
         return any(signal in error_text for signal in retry_signals)
 
@@ -345,17 +882,45 @@ class GeminiProcessor:
         # Conservative fallback
         return 60
 
-    def _parse_response_json(self, response):
-        raw = ""
+    def _response_text(self, response):
         try:
-            raw = (response.text or "").strip()
+            return (response.text or "").strip()
         except Exception:
-            raw = ""
+            return ""
+
+    def _load_json(self, response):
+        """
+        Parsed JSON of a response. Schema-constrained output is plain JSON and takes
+        one json.loads; anything else goes through the _parse_response_json
+        heuristics, counted in parse_counts so their use stays visible.
+        """
+        raw = self._response_text(response)
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            data = None
+        if isinstance(data, (dict, list)):
+            with self._stats_lock:
+                self.parse_counts["schema"] += 1
+            return data
+
+        with self._stats_lock:
+            self.parse_counts["fallback"] += 1
+        logger.info("Gemini answer is not plain JSON, using fallback parsing")
+        try:
+            return self._parse_response_json(response)
+        except Exception:
+            with self._stats_lock:
+                self.parse_counts["failed"] += 1
+            raise
+
+    def _parse_response_json(self, response):
+        """Legacy heuristics for free-form answers: code fences, JSON inside prose, key: value lines."""
+        raw = self._response_text(response)
 
         if not raw:
             raise ValueError("Gemini response did not contain text")
 
-        # Fast path: raw response is JSON.
         try:
             return json.loads(raw)
         except json.JSONDecodeError:
@@ -404,77 +969,3 @@ class GeminiProcessor:
                 result[key] = value
 
         return result if result else None
-
-    def _normalize_receipt(self, data):
-        normalized_items = []
-        for item in (data.get("items") or []):
-            if not isinstance(item, dict):
-                continue
-            name = (item.get("name") or "").strip()
-            quantity_val = self._to_float(item.get("quantity"))
-            unit_price = self._to_float(item.get("unit_price") or item.get("price"))
-            total_price = self._to_float(item.get("total_price") or item.get("amount"))
-            if total_price is None and unit_price and quantity_val:
-                total_price = round(unit_price * quantity_val, 2)
-
-            quantity = None
-            if quantity_val is not None and quantity_val > 0:
-                quantity = int(quantity_val) if float(quantity_val).is_integer() else quantity_val
-            elif total_price is not None:
-                quantity = 1
-
-            category = (item.get("category") or "").strip() or None
-            if not name and total_price is None:
-                continue
-            if not name:
-                name = "Receipt Item"
-
-            normalized_items.append({
-                "name": name,
-                "quantity": quantity,
-                "unit_price": unit_price,
-                "total_price": total_price,
-                "category": category,
-            })
-
-        data["items"] = normalized_items
-        image_type = (data.get("image_type") or "").strip().lower()
-        if image_type:
-            if "upi" in image_type or "payment" in image_type:
-                image_type = "upi"
-            elif image_type in {"receipt", "bill", "invoice"}:
-                image_type = "receipt"
-            else:
-                image_type = "unknown"
-        data["image_type"] = image_type or None
-
-        data["merchant"] = (data.get("merchant") or "").strip() or None
-        data["date"] = (data.get("date") or "").strip() or None
-        data["transaction_time"] = (data.get("transaction_time") or "").strip() or data["date"]
-        data["upi_to"] = (data.get("upi_to") or "").strip() or None
-        data["upi_from"] = (data.get("upi_from") or "").strip() or None
-        data["upi_transaction_id"] = (data.get("upi_transaction_id") or "").strip() or None
-        data["subtotal"] = self._to_float(data.get("subtotal"))
-        data["total"] = self._to_float(data.get("total"))
-        data["grand_total"] = self._to_float(data.get("grand_total"))
-        data["final_amount"] = self._to_float(data.get("final_amount"))
-        data["amount"] = (
-            self._to_float(data.get("amount"))
-            or data["final_amount"]
-            or data["grand_total"]
-            or data["total"]
-            or data["subtotal"]
-        )
-
-    def _to_float(self, value):
-        if value is None:
-            return None
-        try:
-            if isinstance(value, str):
-                value = value.replace(",", ".").strip()
-            number = float(value)
-            if number <= 0:
-                return None
-            return number
-        except (ValueError, TypeError):
-            return None
\ No newline at end of file
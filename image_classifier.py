@@ -0,0 +1,196 @@
+"""
+Cheap receipt-vs-UPI routing before full OCR.
+A UPI screenshot needs only a few fields while a receipt needs every item, so
+handle_screenshot decides which path an image takes before running the full
+OCR. classify_image() scores the caption keywords, the aspect ratio and a small
+thumbnail's histogram (screenshots are mostly one flat background colour,
+receipt photos show paper on a table). When that is not conclusive,
+route_image() reads a low-resolution copy with OCR and scores its keywords.
+Only PIL and numpy are used.
+"""
+import io
+import logging
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from config import IMAGE_ROUTE_OCR_SIDE
+
+logger = logging.getLogger(__name__)
+
+UPI_KEYWORDS = (
+    "upi",
+    "transaction id",
+    "upi transaction id",
+    "utr",
+    "google pay",
+    "gpay",
+    "phonepe",
+    "paytm",
+    "completed",
+    "paid to",
+    "sent to",
+    "from:",
+    "to:",
+)
+RECEIPT_KEYWORDS = (
+    "invoice",
+    "receipt",
+    "subtotal",
+    "grand total",
+    "tax",
+    "gst",
+    "qty",
+    "quantity",
+    "item",
+    "bill no",
+)
+STRONG_UPI_TOKENS = ("upi", "transaction id", "google pay", "gpay", "phonepe", "paytm", "utr")
+
+_THUMBNAIL_SIDE = 96        # histogram and border statistics run on a copy this size
+_HISTOGRAM_BINS = 32
+_FLAT_SCREEN = 0.75         # share of pixels in the modal bin above which an image looks rendered
+_FLAT_PHOTO = 0.55          # ... and below which it looks photographed
+_SCREEN_WHITE = 232         # modal grey level of a light-mode screen is at least this
+_SCREEN_BLACK = 24          # ... and of a dark-mode screen at most this
+_TALL_SCREEN = 1.9          # height / width of current phone screens (19.5:9, 20:9)
+_CONFIDENT_SCORE = 2
+
+
+def text_kind(text):
+    """'upi' or 'receipt' from keywords in caption/OCR text, or None when they do not decide."""
+    combined = (text or "").lower()
+    if not combined.strip():
+        return None
+    if any(token in combined for token in STRONG_UPI_TOKENS):
+        return "upi"
+
+    upi_score = sum(1 for token in UPI_KEYWORDS if token in combined)
+    receipt_score = sum(1 for token in RECEIPT_KEYWORDS if token in combined)
+    if upi_score >= 2 and upi_score >= receipt_score:
+        return "upi"
+    if receipt_score >= 2 and receipt_score > upi_score:
+        return "receipt"
+    return None
+
+
+def image_features(image):
+    """Aspect ratio, histogram flatness, background level, border texture and saturation of an image."""
+    if isinstance(image, (bytes, bytearray)):
+        image = io.BytesIO(image)
+    pil_image = image if isinstance(image, Image.Image) else Image.open(image)
+    if pil_image.format == "JPEG":
+        pil_image.draft("RGB", (_THUMBNAIL_SIDE * 2, _THUMBNAIL_SIDE * 2))
+    pil_image = ImageOps.exif_transpose(pil_image)
+    width, height = pil_image.size
+
+    thumbnail = pil_image.convert("RGB")
+    thumbnail.thumbnail((_THUMBNAIL_SIDE, _THUMBNAIL_SIDE), Image.BOX)
+    gray = np.asarray(thumbnail.convert("L"), dtype=np.uint8)
+    saturation = np.asarray(thumbnail.convert("HSV"), dtype=np.uint8)[:, :, 1]
+
+    histogram = np.bincount(gray.ravel() // (256 // _HISTOGRAM_BINS), minlength=_HISTOGRAM_BINS)
+    mode_bin = int(histogram.argmax())
+    edge = max(1, min(gray.shape) // 12)
+    border = np.concatenate([gray[:edge].ravel(), gray[-edge:].ravel(), gray[:, :edge].ravel(), gray[:, -edge:].ravel()])
+    return {
+        "width": width,
+        "height": height,
+        "aspect": max(width, height) / max(1, min(width, height)),
+        "portrait": height >= width,
+        "flat": float(histogram[mode_bin] / gray.size),
+        "background": (mode_bin + 0.5) * 256 / _HISTOGRAM_BINS,
+        "border_std": float(border.std()),
+        "border_level": float(border.mean()),
+        "saturation": float(saturation.mean() / 255),
+    }
+
+
+def classify_image(image, caption=""):
+    """
+    Route an image without OCR. Returns a dict: kind ('upi' | 'receipt'),
+    confident, score (> 0 leans UPI), reasons and the image features.
+    """
+    score = 0
+    reasons = []
+
+    caption_kind = text_kind(caption)
+    if caption_kind == "upi":
+        score += 3
+        reasons.append("caption mentions a payment")
+    elif caption_kind == "receipt":
+        score -= 3
+        reasons.append("caption mentions a bill")
+
+    try:
+        features = image_features(image)
+    except Exception as e:
+        logger.warning("Image features unavailable: %s", e)
+        features = {}
+
+    if features:
+        # Apps draw on pure white (or black in dark mode); paper and tables under room light are mid-tones.
+        screen_background = features["background"] >= _SCREEN_WHITE or features["background"] <= _SCREEN_BLACK
+        if features["flat"] >= _FLAT_SCREEN and screen_background:
+            score += 2
+            reasons.append(f"flat screen background ({features['flat']:.0%})")
+        elif features["flat"] < _FLAT_PHOTO:
+            score -= 2
+            reasons.append(f"photo-like histogram ({features['flat']:.0%})")
+        elif not screen_background:
+            score -= 1
+            reasons.append(f"mid-tone background ({features['background']:.0f})")
+        if features["portrait"] and features["aspect"] >= _TALL_SCREEN:
+            score += 1
+            reasons.append(f"phone screen shape ({features['aspect']:.2f})")
+        elif not features["portrait"] or features["aspect"] < 1.5:
+            score -= 1
+            reasons.append(f"camera shape ({features['aspect']:.2f})")
+        # A screenshot's edge is the app background; a photo's edge is whatever the paper lay on.
+        if abs(features["border_level"] - features["background"]) > 40:
+            score -= 1
+            reasons.append("border differs from background")
+
+    return {
+        "kind": "upi" if score > 0 else "receipt",
+        "confident": abs(score) >= _CONFIDENT_SCORE,
+        "score": score,
+        "reasons": reasons,
+        "features": features,
+    }
+
+
+def thumbnail_bytes(image, max_side=IMAGE_ROUTE_OCR_SIDE):
+    """Low-resolution grayscale PNG of an image, for a quick OCR pass."""
+    if isinstance(image, (bytes, bytearray)):
+        image = io.BytesIO(image)
+    pil_image = image if isinstance(image, Image.Image) else Image.open(image)
+    if pil_image.format == "JPEG":
+        pil_image.draft("L", (max_side, max_side))
+    pil_image = ImageOps.exif_transpose(pil_image).convert("L")
+    pil_image.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = io.BytesIO()
+    pil_image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def route_image(image, caption="", read_text=None):
+    """
+    classify_image(), then, when it is not confident and read_text (an async
+    callable taking image bytes and returning text) is given, keywords from OCR
+    on a low-resolution thumbnail. That OCR text is returned under "text".
+    """
+    route = classify_image(image, caption)
+    if route["confident"] or read_text is None:
+        return route
+
+    try:
+        text = await read_text(thumbnail_bytes(image))
+    except Exception as e:
+        logger.warning("Thumbnail OCR failed: %s", e)
+        return route
+    route = dict(route, text=text)
+    kind = text_kind(text)
+    if kind:
+        route.update(kind=kind, confident=True, reasons=route["reasons"] + [f"thumbnail OCR says {kind}"])
+    return route
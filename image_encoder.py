@@ -0,0 +1,154 @@
+"""
+Image encoding ahead of Gemini upload.
+Telegram photos arrive at up to 2560 px and phone originals at 12 MP, but
+Gemini bills images by 768 px tile and reads receipt text well below that
+size. encode_image() applies EXIF rotation, caps the longest side at
+GEMINI_IMAGE_MAX_SIDE, drops colour when the picture is close to grey anyway
+(receipts, most payment screens) and re-encodes as JPEG or WebP at
+GEMINI_IMAGE_QUALITY. Encodings are kept in a small in-process LRU keyed by
+image hash, so the OCR fallback after a failed Gemini call reads the same,
+already decoded and shrunk, bytes instead of the original.
+"""
+import io
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from config import (
+    GEMINI_ENCODE_CACHE_ENTRIES,
+    GEMINI_GRAYSCALE_MAX_SATURATION,
+    GEMINI_IMAGE_FORMAT,
+    GEMINI_IMAGE_MAX_SIDE,
+    GEMINI_IMAGE_QUALITY,
+)
+from result_cache import image_hash
+
+logger = logging.getLogger(__name__)
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+_SATURATION_SIDE = 64       # colour check runs on a thumbnail this size
+_TILE_TOKENS = 258
+
+
+def is_grayscale_safe(pil_image, max_saturation=GEMINI_GRAYSCALE_MAX_SATURATION):
+    """True when the image carries so little colour that grayscale loses nothing readable."""
+    if pil_image.mode in ("L", "LA", "1", "I", "I;16", "F"):
+        return True
+    small = pil_image.convert("RGB")
+    small.thumbnail((_SATURATION_SIDE, _SATURATION_SIDE))
+    saturation = np.asarray(small.convert("HSV"))[:, :, 1]
+    # A coloured logo or payment-app banner is fine; colour across the picture is not.
+    return float(np.percentile(saturation, 90)) <= max_saturation
+
+
+def image_tokens(width, height):
+    """Approximate Gemini input tokens for an image: 258 per 768 px tile, one tile when small."""
+    if width <= 384 and height <= 384:
+        return _TILE_TOKENS
+    tile = min(768, max(256, int(min(width, height) / 1.5)))
+    return _TILE_TOKENS * -(-width // tile) * -(-height // tile)
+
+
+def encode_image(image, max_side=GEMINI_IMAGE_MAX_SIDE, image_format=GEMINI_IMAGE_FORMAT,
+                 quality=GEMINI_IMAGE_QUALITY, grayscale=True):
+    """
+    Encode raw bytes, a path or a PIL image for upload.
+    Returns {"data", "mime_type", "width", "height", "grayscale", "original_bytes"}.
+    An original that is already small enough and smaller than the re-encoding is kept as is.
+    """
+    original = image if isinstance(image, (bytes, bytearray)) else None
+    if isinstance(image, Image.Image):
+        pil_image = image
+    else:
+        pil_image = Image.open(io.BytesIO(image) if original is not None else image)
+    source_format = pil_image.format
+    if source_format == "JPEG" and max_side:
+        pil_image.draft(pil_image.mode, (max_side, max_side))
+    pil_image = ImageOps.exif_transpose(pil_image)
+
+    to_gray = grayscale and is_grayscale_safe(pil_image)
+    pil_image = pil_image.convert("L" if to_gray else "RGB")
+    resized = False
+    if max_side and max(pil_image.size) > max_side:
+        pil_image.thumbnail((max_side, max_side), Image.LANCZOS)
+        resized = True
+
+    image_format = (image_format or "jpeg").upper()
+    if image_format not in ("JPEG", "WEBP"):
+        image_format = "JPEG"
+    buffer = io.BytesIO()
+    pil_image.save(buffer, format=image_format, quality=quality)
+    data = buffer.getvalue()
+    mime_type = _MIME_TYPES[image_format]
+
+    if original is not None and not resized and source_format in _MIME_TYPES and len(original) <= len(data):
+        data = bytes(original)
+        mime_type = _MIME_TYPES[source_format]
+
+    return {
+        "data": data,
+        "mime_type": mime_type,
+        "width": pil_image.width,
+        "height": pil_image.height,
+        "grayscale": to_gray,
+        "original_bytes": len(original) if original is not None else None,
+    }
+
+
+class EncodedImageCache:
+    """Small thread-safe LRU of encode_image() results keyed by image hash."""
+
+    def __init__(self, max_entries=GEMINI_ENCODE_CACHE_ENTRIES):
+        self.max_entries = max(0, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def get(self, image_bytes):
+        """Cached encoding for these bytes, or None."""
+        key = image_hash(image_bytes)
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+            return encoded
+
+    def encode(self, image_bytes):
+        """encode_image(image_bytes), reusing an earlier encoding of the same bytes."""
+        key = image_hash(image_bytes)
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return encoded
+        encoded = encode_image(image_bytes)
+        with self._lock:
+            self.misses += 1
+            self.bytes_in += len(image_bytes)
+            self.bytes_out += len(encoded["data"])
+            if self.max_entries:
+                self._entries[key] = encoded
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return encoded
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 0.0,
+            }
+
+
+encoded_images = EncodedImageCache()
@@ -0,0 +1,139 @@
+"""
+Image preprocessing ahead of OCR.
+Telegram's largest photo size is usually far more pixels than OCR needs, and
+OCR time grows with pixel count. preprocess_image() converts to grayscale,
+caps the longest side, straightens small rotations, downscales so text lines
+are about OCR_TARGET_TEXT_HEIGHT pixels tall, binarizes (local adaptive threshold) and crops the
+blank margins. Only PIL and numpy are used.
+"""
+import io
+
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+from config import OCR_MAX_IMAGE_SIDE, OCR_TARGET_TEXT_HEIGHT
+
+_DESKEW_SIDE = 600          # deskew search runs on a copy this size
+_DESKEW_ANGLES = range(-6, 7)
+_CROP_MARGIN = 12
+_INK_RADIUS = 15            # box-blur radius for the local mean in ink_mask
+_INK_OFFSET = 15            # how much darker than the local mean ink must be
+_MIN_LINE_PX = 4
+_STRIP_WIDTH = 100          # column strip width for the text height profile
+
+
+def load_image(image, max_side=OCR_MAX_IMAGE_SIDE):
+    """Open raw bytes, a path or a PIL image as an 8-bit grayscale PIL image."""
+    if isinstance(image, Image.Image):
+        pil_image = image
+    else:
+        if isinstance(image, (bytes, bytearray)):
+            image = io.BytesIO(image)
+        pil_image = Image.open(image)
+        if pil_image.format == "JPEG" and max_side:
+            # Let the JPEG decoder skip detail we would throw away anyway.
+            pil_image.draft("L", (max_side, max_side))
+    pil_image = ImageOps.exif_transpose(pil_image)
+    return pil_image.convert("L")
+
+
+def ink_mask(gray, radius=_INK_RADIUS, offset=_INK_OFFSET):
+    """
+    Boolean array marking text pixels: pixels clearly darker than their
+    neighbourhood. Unlike one global threshold this ignores a dark table or
+    shadow around the receipt and copes with uneven lighting.
+    """
+    pixels = np.asarray(gray, dtype=np.int16)
+    local_mean = np.asarray(gray.filter(ImageFilter.BoxBlur(radius)), dtype=np.int16)
+    return pixels < local_mean - offset
+
+
+def estimate_text_height(ink):
+    """
+    Median height in pixels of text lines, or None.
+    Rows are profiled in narrow vertical strips so a slightly rotated photo
+    does not merge neighbouring lines into one run.
+    """
+    height, width = ink.shape
+    strips = max(1, width // _STRIP_WIDTH)
+    strip_width = width // strips
+    profile = ink[:, :strips * strip_width].reshape(height, strips, strip_width).mean(axis=2) > 0.02
+    padded = np.zeros((height + 2, strips), dtype=np.int8)
+    padded[1:-1] = profile
+    starts = np.argwhere(np.diff(padded, axis=0) == 1)
+    ends = np.argwhere(np.diff(padded, axis=0) == -1)
+    # argwhere is row-major, so sort both by strip to pair each start with its end.
+    starts = starts[np.lexsort((starts[:, 0], starts[:, 1]))]
+    ends = ends[np.lexsort((ends[:, 0], ends[:, 1]))]
+    heights = ends[:, 0] - starts[:, 0]
+    # Runs taller than 1/8 of the image are photo background, not text lines.
+    heights = heights[(heights >= _MIN_LINE_PX) & (heights <= height / 8)]
+    if not len(heights):
+        return None
+    return float(np.median(heights))
+
+
+def estimate_skew(gray):
+    """Angle (degrees) that best straightens text lines, by projection profile."""
+    small = gray.copy()
+    small.thumbnail((_DESKEW_SIDE, _DESKEW_SIDE))
+    ink = Image.fromarray(ink_mask(small, radius=4, offset=_INK_OFFSET).astype(np.uint8) * 255)
+    best_angle, best_score = 0, None
+    for angle in _DESKEW_ANGLES:
+        rotated = np.asarray(ink.rotate(angle, expand=True), dtype=np.float32)
+        score = rotated.sum(axis=1).var()
+        if best_score is None or score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def _resize(gray, scale):
+    size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+    return gray.resize(size, Image.BILINEAR, reducing_gap=2.0)
+
+
+def preprocess_image(image, target_text_height=OCR_TARGET_TEXT_HEIGHT, max_side=OCR_MAX_IMAGE_SIDE,
+                     binarize=True, crop=True, deskew=True):
+    """
+    Prepare an image (bytes, path or PIL image) for OCR.
+    Returns a grayscale PIL image; each step can be switched off for benchmarking.
+    """
+    gray = load_image(image, max_side)
+
+    if max_side and max(gray.size) > max_side:
+        gray = _resize(gray, max_side / max(gray.size))
+
+    if deskew:
+        angle = estimate_skew(gray)
+        if angle:
+            # Fill the new corners with the border colour so they do not read as ink.
+            edges = np.concatenate([np.asarray(gray)[[0, -1], :].ravel(), np.asarray(gray)[:, [0, -1]].ravel()])
+            gray = gray.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=int(np.median(edges)))
+
+    ink = None
+    if target_text_height:
+        ink = ink_mask(gray)
+        text_height = estimate_text_height(ink)
+        if text_height and text_height > target_text_height:
+            gray = _resize(gray, target_text_height / text_height)
+            ink = None
+
+    if binarize or crop:
+        if ink is None:
+            ink = ink_mask(gray)
+
+    if binarize:
+        gray = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+
+    if crop:
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if len(rows) and len(cols):
+            gray = gray.crop((
+                max(0, cols[0] - _CROP_MARGIN),
+                max(0, rows[0] - _CROP_MARGIN),
+                min(gray.width, cols[-1] + 1 + _CROP_MARGIN),
+                min(gray.height, rows[-1] + 1 + _CROP_MARGIN),
+            ))
+
+    return gray
@@ -1,6 +1,7 @@
 """
 Main Telegram Bot Handler for Expense Tracker
 """
+import asyncio
 import logging
 import re
 import time
@@ -14,9 +15,28 @@ from telegram.ext import (
 )
 from telegram.error import TelegramError
 
-from config import BOT_TOKEN, CURRENCY, GEMINI_API_KEY
+from album_collector import AlbumCollector
+from config import (
+    ADMIN_USER_IDS,
+    BOT_CONCURRENT_UPDATES,
+    BOT_TOKEN,
+    CURRENCY,
+    GEMINI_API_KEY,
+    GEMINI_STALE_AFTER_SECONDS,
+    MAX_OCR_TEXT_CHARS,
+    OCR_ENGINES,
+    UPI_ROI_OCR,
+)
 from database import ExpenseDatabase
-from nlp_processor import ExpenseParser
+from gemini_calls import gemini_calls
+from gemini_client import AsyncGeminiClient
+from image_classifier import route_image, text_kind
+from image_encoder import encoded_images
+from nlp_processor import ExpenseParser, speech_breaker
+from ocr_orchestrator import OCROrchestrator
+from ocr_service import OCRService
+from result_cache import ResultCache
+from upi_layout import roi_image_bytes
 from bot_commands import (
     start,
     help_command,
@@ -27,6 +47,8 @@ from bot_commands import (
     show_categories,
     list_expenses,
     delete_expense,
+    set_category,
+    category_memory,
     statistics,
     export_all,
     export_monthly,
@@ -53,12 +75,17 @@ logger = logging.getLogger(__name__)
 
 # Initialize database and parser
 db = ExpenseDatabase()
-parser = ExpenseParser()
+parser = ExpenseParser(category_memory=category_memory)
+ocr_service = OCRService()
+result_cache = ResultCache()
+ocr_orchestrator = OCROrchestrator(ocr_service, parser, cache=result_cache)
 gemini = None
+gemini_client = None
 if GEMINI_API_KEY:
     try:
         from gemini_processor import GeminiProcessor
         gemini = GeminiProcessor()
+        gemini_client = AsyncGeminiClient(gemini)
     except Exception as gemini_error:
         logger.warning("Gemini disabled due to initialization error: %s", gemini_error)
 
@@ -81,7 +108,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Check if it's multiple expenses (contains newlines)
     if '\n' in text:
         # Parse multiple expenses
-        expenses = parser.parse_multiple_expenses(text)
+        expenses = parser.parse_multiple_expenses(text, user.id)
         
         if not expenses:
             await update.message.reply_text(
@@ -116,7 +143,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
     
     # Single expense parsing
-    amount, category, description = parser.parse_expense(text)
+    amount, category, description = parser.parse_expense(text, user.id)
     
     if not amount:
         await update.message.reply_text(
@@ -197,8 +224,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await update.message.reply_text(warning_text, parse_mode='Markdown')
 
 
-async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle photo uploads for receipt processing."""
+async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE, image_bytes=None,
+                       gemini_result=None, ocr_text=None) -> None:
+    """
+    Handle photo uploads for receipt processing.
+    handle_screenshot passes on its Gemini answer or error (gemini_result), so a
+    failed image is not sent to Gemini twice, and any text it already read from
+    the image (ocr_text), which is used when it parses to a total.
+    """
 
     if not update.message.photo:
         return
@@ -207,13 +240,15 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     db.add_user(user.id, user.username, user.first_name)
 
     photo = update.message.photo[-1]
-    file = await context.bot.get_file(photo.file_id)
+    file_unique_id = photo.file_unique_id
 
     try:
-        await file.download_to_drive("temp_receipt.jpg")
+        # Keep the image in memory: no shared temp file between concurrent uploads.
+        if image_bytes is None:
+            file = await context.bot.get_file(photo.file_id)
+            image_bytes = bytes(await file.download_as_bytearray())
 
         analysis = None
-        ocr_text = None
         gemini_issue = None
 
         def _gemini_issue_note(issue):
@@ -223,10 +258,12 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             code = issue.get("code")
             retry_after = issue.get("retry_after_seconds")
 
-            if code in ("quota_exceeded", "quota_cooldown"):
+            if code in ("quota_exceeded", "quota_cooldown", "rate_limited"):
                 if retry_after:
                     return f"Note: Gemini unavailable (quota/rate limit). OCR fallback used. Retry in ~{int(retry_after)}s."
                 return "Note: Gemini unavailable (quota/rate limit). OCR fallback used."
+            if code == "circuit_open":
+                return "Note: Gemini is failing repeatedly and is paused. OCR fallback used."
             if code == "auth_or_permission_error":
                 return "Note: Gemini API key/permission issue detected. OCR fallback used."
             if code == "not_initialized":
@@ -235,31 +272,37 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                 return "Note: Gemini request failed. OCR fallback used."
             return None
 
-        # Primary path: Gemini image analysis
-        if gemini:
-            gemini_result = gemini.analyze_receipt("temp_receipt.jpg")
-            if gemini_result and not gemini_result.get("error"):
+        # Primary path: Gemini image analysis (unless the caller already asked Gemini)
+        if gemini and gemini_result is None:
+            gemini_result = await _analyze_with_gemini(image_bytes, file_unique_id, _stale_deadline(update.message))
+            if not isinstance(gemini_result, dict):
+                gemini_result = {"error": "Empty Gemini response", "code": "unknown_error"}
+        if gemini_result is not None:
+            if not gemini_result.get("error"):
                 analysis = gemini_result
                 logger.info("Gemini receipt analysis successful")
             else:
-                gemini_issue = gemini_result if isinstance(gemini_result, dict) else {"error": str(gemini_result)}
-                retry_after = gemini_issue.get("retry_after_seconds") if isinstance(gemini_issue, dict) else None
+                gemini_issue = gemini_result
+                retry_after = gemini_issue.get("retry_after_seconds")
                 if retry_after:
                     logger.warning(
-                        "Gemini unavailable (quota/rate limit). OCR fallback active for %ss.",
+                        "Gemini unavailable (%s). OCR fallback active for %ss.",
+                        gemini_issue.get("code"),
                         retry_after,
                     )
                 else:
                     logger.warning("Gemini failed, switching to OCR fallback.")
                 analysis = None
 
-        # Fallback path: OCR + parser analysis (priority: EasyOCR -> Tesseract)
+        # Fallback path: OCR + parser analysis (engines and policy from OCR_ENGINES / OCR_POLICY)
         if not analysis:
+            if ocr_text:
+                # Text already read by the caller (e.g. the routing thumbnail): enough if it has a total.
+                analysis = parser.analyze_receipt(ocr_text)
+                if not analysis.get("final_amount"):
+                    analysis, ocr_text = None, None
             if not ocr_text:
-                _, ocr_text = _run_easyocr_receipt("temp_receipt.jpg")
-
-            if not ocr_text:
-                _, ocr_text = _run_tesseract_receipt("temp_receipt.jpg")
+                _, ocr_text, _ = await ocr_orchestrator.extract(_ocr_input(image_bytes), file_unique_id)
 
             if ocr_text:
                 analysis = parser.analyze_receipt(ocr_text)
@@ -279,173 +322,167 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             )
             return
 
-        if not analysis:
-            analysis = {}
+        rows, reply_lines = _receipt_expenses(
+            user.id, analysis, ocr_text, f"BILL-{user.id}-{int(time.time() * 1000)}"
+        )
+        if rows:
+            db.add_expenses(rows)
+        await update.message.reply_text("\n".join(reply_lines))
 
-        def _safe_float(value):
-            try:
-                if value is None:
-                    return None
-                amount = float(value)
-                return amount if amount > 0 else None
-            except (TypeError, ValueError):
-                return None
+    except Exception as e:
+        logger.error("Error processing receipt: %s", str(e))
+        await update.message.reply_text(
+            f"Error processing receipt: {str(e)}\n"
+            f"Please try again or manually enter the amount."
+        )
 
-        bill_totals = parser.extract_bill_totals(ocr_text) if ocr_text else {
-            "subtotal": None,
-            "total": None,
-            "grand_total": None,
-        }
 
-        subtotal = bill_totals.get("subtotal") or _safe_float(analysis.get("subtotal"))
-        total = bill_totals.get("total") or _safe_float(analysis.get("total"))
-        grand_total = bill_totals.get("grand_total") or _safe_float(analysis.get("grand_total"))
-
-        amount_value = _safe_float(analysis.get("amount"))
-        if not amount_value and ocr_text:
-            parsed_amount, _, _ = parser.parse_expense(ocr_text)
-            amount_value = _safe_float(parsed_amount)
-
-        chosen_amount = None
-        chosen_label = None
-
-        if grand_total:
-            chosen_amount = grand_total
-            chosen_label = "Bill Grand Total"
-        elif total:
-            chosen_amount = total
-            chosen_label = "Bill Total"
-        elif subtotal:
-            chosen_amount = subtotal
-            chosen_label = "Bill Subtotal"
-        elif amount_value:
-            chosen_amount = amount_value
-            chosen_label = "Bill Amount"
-
-        if not chosen_amount:
-            await update.message.reply_text(
-                "Could not find total amount in receipt.\n\n"
-                "Please manually enter: 'Spent [amount] for [category]'\n"
-                "Example: 'Spent 500 for food'"
-            )
-            return
+def _receipt_row(user_id, amount, category, description, bill_ref):
+    return {
+        "user_id": user_id,
+        "amount": amount,
+        "category": category,
+        "description": description,
+        "source": "image",
+        "transaction_id": bill_ref,
+        "payment_method": "receipt",
+    }
 
-        parsed_items = []
-        category_values = []
-        for item in (analysis.get("items") or []):
-            if not isinstance(item, dict):
-                continue
 
-            item_name = (item.get("name") or "").strip() or "Receipt Item"
-            item_category = (item.get("category") or "").strip()
-            if not item_category or item_category == "Other":
-                inferred_item_category = parser._extract_category(item_name.lower())
-                item_category = inferred_item_category if inferred_item_category else "Other"
+def _receipt_expenses(user_id, analysis, ocr_text, bill_ref):
+    """
+    Turn a receipt analysis into expense rows (add_expense kwargs) and reply lines.
+    Returns (None, [message]) when no bill amount could be found.
+    """
+    if not analysis:
+        analysis = {}
 
-            quantity_value = _safe_float(item.get("quantity"))
-            unit_price = _safe_float(item.get("unit_price") or item.get("price"))
-            item_amount = _safe_float(item.get("total_price") or item.get("amount"))
+    def _safe_float(value):
+        try:
+            if value is None:
+                return None
+            amount = float(value)
+            return amount if amount > 0 else None
+        except (TypeError, ValueError):
+            return None
 
-            if item_amount is None and quantity_value and unit_price:
-                item_amount = round(quantity_value * unit_price, 2)
-            if item_amount is None and unit_price:
-                item_amount = unit_price
+    bill_totals = parser.extract_bill_totals(ocr_text) if ocr_text else {
+        "subtotal": None,
+        "total": None,
+        "grand_total": None,
+    }
 
-            if item_amount is None:
-                continue
+    subtotal = bill_totals.get("subtotal") or _safe_float(analysis.get("subtotal"))
+    total = bill_totals.get("total") or _safe_float(analysis.get("total"))
+    grand_total = bill_totals.get("grand_total") or _safe_float(analysis.get("grand_total"))
+
+    amount_value = _safe_float(analysis.get("amount"))
+    if not amount_value and ocr_text:
+        parsed_amount, _, _ = parser.parse_expense(ocr_text)
+        amount_value = _safe_float(parsed_amount)
+
+    chosen_amount = None
+    chosen_label = None
+
+    if grand_total:
+        chosen_amount = grand_total
+        chosen_label = "Bill Grand Total"
+    elif total:
+        chosen_amount = total
+        chosen_label = "Bill Total"
+    elif subtotal:
+        chosen_amount = subtotal
+        chosen_label = "Bill Subtotal"
+    elif amount_value:
+        chosen_amount = amount_value
+        chosen_label = "Bill Amount"
+
+    if not chosen_amount:
+        return None, [
+            "Could not find total amount in receipt.\n\n"
+            "Please manually enter: 'Spent [amount] for [category]'\n"
+            "Example: 'Spent 500 for food'"
+        ]
 
-            if item_category != "Other" and item_category not in category_values:
-                category_values.append(item_category)
+    parsed_items = []
+    category_values = []
+    for item in (analysis.get("items") or []):
+        if not isinstance(item, dict):
+            continue
 
-            parsed_items.append({
-                "amount": item_amount,
-                "category": item_category,
-                "description": item_name,
-            })
+        item_name = (item.get("name") or "").strip() or "Receipt Item"
+        item_category = (item.get("category") or "").strip()
+        if not item_category or item_category == "Other":
+            inferred_item_category = parser._extract_category(item_name.lower())
+            item_category = inferred_item_category if inferred_item_category else "Other"
 
-        if not category_values and ocr_text:
-            inferred_category = parser._extract_category(ocr_text.lower())
-            if inferred_category and inferred_category != "Other":
-                category_values.append(inferred_category)
-        bill_category = ", ".join(category_values) if category_values else "Other"
+        quantity_value = _safe_float(item.get("quantity"))
+        unit_price = _safe_float(item.get("unit_price") or item.get("price"))
+        item_amount = _safe_float(item.get("total_price") or item.get("amount"))
 
-        bill_ref = f"BILL-{user.id}-{int(time.time() * 1000)}"
-        saved_item_count = 0
-
-        for item_entry in parsed_items:
-            db.add_expense(
-                user.id,
-                item_entry["amount"],
-                item_entry["category"],
-                item_entry["description"],
-                source="image",
-                transaction_id=bill_ref,
-                payment_method="receipt",
-            )
-            saved_item_count += 1
-
-        if saved_item_count == 0:
-            fallback_label = chosen_label if chosen_label else "Amount"
-            db.add_expense(
-                user.id,
-                chosen_amount,
-                bill_category,
-                f"Receipt Total ({fallback_label})",
-                source="image",
-                transaction_id=bill_ref,
-                payment_method="receipt",
-            )
-            saved_item_count = 1
-
-        bill_entries = []
-        if subtotal:
-            bill_entries.append(("Bill Subtotal", subtotal))
-        if total:
-            bill_entries.append(("Bill Total", total))
-        if grand_total:
-            bill_entries.append(("Bill Grand Total", grand_total))
-        bill_entries.append(("Bill Amount", chosen_amount))
-
-        unique_entries = []
-        seen = set()
-        for label, value in bill_entries:
-            key = (label, round(float(value), 2))
-            if key in seen:
-                continue
-            seen.add(key)
-            unique_entries.append((label, value))
-
-        for label, value in unique_entries:
-            db.add_expense(
-                user.id,
-                value,
-                bill_category,
-                label,
-                source="image",
-                transaction_id=bill_ref,
-                payment_method="receipt",
-            )
+        if item_amount is None and quantity_value and unit_price:
+            item_amount = round(quantity_value * unit_price, 2)
+        if item_amount is None and unit_price:
+            item_amount = unit_price
 
-        lines = [
-            "Bill analysis:",
-            f"Category: {bill_category}",
-            f"Total: {CURRENCY}{total:.2f}" if total else "Total: N/A",
-            f"Items Saved: {saved_item_count}",
-        ]
-        await update.message.reply_text("\n".join(lines))
+        if item_amount is None:
+            continue
 
-    except Exception as e:
-        logger.error("Error processing receipt: %s", str(e))
-        await update.message.reply_text(
-            f"Error processing receipt: {str(e)}\n"
-            f"Please try again or manually enter the amount."
-        )
-    finally:
-        # Clean up temp file even on early returns.
-        import os
-        if os.path.exists("temp_receipt.jpg"):
-            os.remove("temp_receipt.jpg")
+        if item_category != "Other" and item_category not in category_values:
+            category_values.append(item_category)
+
+        parsed_items.append({
+            "amount": item_amount,
+            "category": item_category,
+            "description": item_name,
+        })
+
+    if not category_values and ocr_text:
+        inferred_category = parser._extract_category(ocr_text.lower())
+        if inferred_category and inferred_category != "Other":
+            category_values.append(inferred_category)
+    bill_category = ", ".join(category_values) if category_values else "Other"
+
+    rows = []
+    saved_item_count = 0
+
+    for item_entry in parsed_items:
+        rows.append(_receipt_row(user_id, item_entry["amount"], item_entry["category"], item_entry["description"], bill_ref))
+        saved_item_count += 1
+
+    if saved_item_count == 0:
+        fallback_label = chosen_label if chosen_label else "Amount"
+        rows.append(_receipt_row(user_id, chosen_amount, bill_category, f"Receipt Total ({fallback_label})", bill_ref))
+        saved_item_count = 1
+
+    bill_entries = []
+    if subtotal:
+        bill_entries.append(("Bill Subtotal", subtotal))
+    if total:
+        bill_entries.append(("Bill Total", total))
+    if grand_total:
+        bill_entries.append(("Bill Grand Total", grand_total))
+    bill_entries.append(("Bill Amount", chosen_amount))
+
+    unique_entries = []
+    seen = set()
+    for label, value in bill_entries:
+        key = (label, round(float(value), 2))
+        if key in seen:
+            continue
+        seen.add(key)
+        unique_entries.append((label, value))
+
+    for label, value in unique_entries:
+        rows.append(_receipt_row(user_id, value, bill_category, label, bill_ref))
 
+    lines = [
+        "Bill analysis:",
+        f"Category: {bill_category}",
+        f"Total: {CURRENCY}{total:.2f}" if total else "Total: N/A",
+        f"Items Saved: {saved_item_count}",
+    ]
+    return rows, lines
 
 async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle voice messages for bill tracking"""
@@ -463,13 +500,13 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         voice = update.message.voice
         file = await context.bot.get_file(voice.file_id)
         
-        # Download voice file
-        await file.download_to_drive("temp_voice.ogg")
+        # Download voice note into memory (Telegram voice notes are OGG/Opus)
+        voice_bytes = bytes(await file.download_as_bytearray())
         
         # Convert to text using speech recognition
         from nlp_processor import VoiceProcessor
         voice_processor = VoiceProcessor()
-        text = voice_processor.transcribe_voice("temp_voice.ogg")
+        text = voice_processor.transcribe_voice(voice_bytes)
         
         if not text:
             await update.message.reply_text(
@@ -482,7 +519,7 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             return
         
         # Parse the transcribed text
-        amount, category, description = parser.parse_expense(text)
+        amount, category, description = parser.parse_expense(text, user.id)
         description = parser.normalize_description_for_voice(description, category)
         
         if not amount:
@@ -515,23 +552,6 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             f"❌ Error processing voice: {str(e)}\n"
             f"Please try again or manually enter the amount."
         )
-    finally:
-        # Clean up temp file even on early returns.
-        import os
-        if os.path.exists("temp_voice.ogg"):
-            os.remove("temp_voice.ogg")
-
-
-def _extract_ocr_text(result):
-    """Extract best available OCR text from parser output."""
-    if not isinstance(result, dict):
-        return ""
-
-    for key in ("raw_text", "text", "description"):
-        value = result.get(key)
-        if isinstance(value, str) and value.strip():
-            return value.strip()
-    return ""
 
 
 def _gemini_result_to_text(gemini_result):
@@ -584,46 +604,41 @@ def _gemini_result_to_text(gemini_result):
     return "\n".join(text_parts).strip()
 
 
-def _run_easyocr_receipt(image_path):
-    """Run EasyOCR receipt parser and return (result, text)."""
-    try:
-        from nlp_processor import EasyOCRProcessor
-        ocr = EasyOCRProcessor()
-        result = ocr.parse_receipt(image_path)
-        text = _extract_ocr_text(result)
-        if text:
-            logger.info("EasyOCR successful")
-        return result, text
-    except Exception as easyocr_error:
-        logger.warning("EasyOCR failed: %s", easyocr_error)
-        return None, ""
+def _stale_deadline(message):
+    """Time after which a Gemini answer for this message is no longer worth waiting for."""
+    sent = getattr(message, "date", None)
+    if sent is None:
+        return None
+    return sent.timestamp() + GEMINI_STALE_AFTER_SECONDS
 
 
-def _run_tesseract_receipt(image_path):
-    """Run Tesseract OCR fallback and return (result, text)."""
-    try:
-        import pytesseract
-        from PIL import Image
+async def _analyze_with_gemini(image_bytes, file_unique_id=None, deadline=None):
+    """
+    Gemini receipt/UPI analysis through the gemini_client queue, answered from
+    the result cache for repeated images. Other updates are served meanwhile.
+    """
+    cached = result_cache.get("gemini", image_bytes, file_unique_id)
+    if cached is not None:
+        return cached
 
-        with Image.open(image_path) as image:
-            text = (pytesseract.image_to_string(image) or "").strip()
+    result = await gemini_client.analyze(image_bytes, deadline)
+    if result and not result.get("error"):
+        result_cache.put("gemini", result, image_bytes, file_unique_id)
+    return result
 
-        if not text:
-            return None, ""
-
-        amount, category, description = parser.parse_expense(text)
-        result = {
-            "amount": amount,
-            "category": category,
-            "description": description or text[:120],
-            "raw_text": text,
-            "source": "tesseract",
-        }
-        logger.info("Tesseract successful")
-        return result, text
-    except Exception as tesseract_error:
-        logger.warning("Tesseract failed: %s", tesseract_error)
-        return None, ""
+
+def _ocr_input(image_bytes):
+    """
+    Bytes to OCR: the smaller copy encoded for the Gemini upload when there is
+    one (Gemini was tried and failed), else the original.
+    """
+    encoded = encoded_images.get(image_bytes)
+    return encoded["data"] if encoded else image_bytes
+
+
+async def _run_easyocr_receipt(image, file_unique_id=None):
+    """Run EasyOCR receipt parser in the OCR pool and return (result, text)."""
+    return await ocr_orchestrator.run_engine("easyocr", image, file_unique_id)
 
 
 def _classify_image_kind(caption, ocr_text):
@@ -632,48 +647,46 @@ def _classify_image_kind(caption, ocr_text):
     - 'upi' for payment screenshots
     - 'receipt' for bill receipts (default fallback)
     """
-    combined = f"{caption or ''}\n{ocr_text or ''}".lower()
-
-    upi_keywords = [
-        "upi",
-        "transaction id",
-        "upi transaction id",
-        "utr",
-        "google pay",
-        "gpay",
-        "phonepe",
-        "paytm",
-        "completed",
-        "paid to",
-        "sent to",
-        "from:",
-        "to:",
-    ]
-    receipt_keywords = [
-        "invoice",
-        "receipt",
-        "subtotal",
-        "grand total",
-        "tax",
-        "gst",
-        "qty",
-        "quantity",
-        "item",
-        "bill no",
-    ]
+    return text_kind(f"{caption or ''}\n{ocr_text or ''}") or "receipt"
 
-    upi_score = sum(1 for token in upi_keywords if token in combined)
-    receipt_score = sum(1 for token in receipt_keywords if token in combined)
 
-    strong_upi_tokens = ("upi", "transaction id", "google pay", "gpay", "phonepe", "paytm", "utr")
-    if any(token in combined for token in strong_upi_tokens):
-        return "upi"
+async def _route_image(image_bytes, caption):
+    """
+    Pick the UPI or receipt path for an image Gemini did not classify, before
+    full OCR: image_classifier checks, then a thumbnail OCR pass when unsure.
+    """
+    readiness = ocr_service.readiness()
+    engine = next(
+        (e for e in ocr_orchestrator.engines if readiness.get(e) != "unavailable" and ocr_service.is_ready(e)),
+        None,
+    )
 
-    if upi_score >= 2 and upi_score >= receipt_score:
-        return "upi"
-    if receipt_score >= 2 and receipt_score > upi_score:
-        return "receipt"
-    return "receipt"
+    async def _read_thumbnail(thumbnail):
+        _, text = await ocr_service.run(engine, thumbnail)
+        return text
+
+    route = await route_image(image_bytes, caption, _read_thumbnail if engine else None)
+    logger.info(
+        "Image routed to %s path (score %s%s): %s",
+        route["kind"],
+        route["score"],
+        "" if route["confident"] else ", unsure",
+        "; ".join(route["reasons"]) or "no signals",
+    )
+    return route
+
+
+async def _ocr_upi_regions(image_bytes):
+    """OCR only the field lines upi_layout finds in a screenshot. Returns (result, text)."""
+    try:
+        roi = await asyncio.to_thread(roi_image_bytes, image_bytes)
+    except Exception as e:
+        logger.warning("UPI layout detection failed: %s", e)
+        return None, ""
+    if roi is None:
+        return None, ""
+    result, text, _ = await ocr_orchestrator.extract(roi)
+    return result, text
 
 
 def _clean_upi_party(value):
@@ -693,7 +706,9 @@ def _extract_upi_amount(text):
     normalized = text.replace(",", "")
 
     label_patterns = [
-        r"(?:amount|paid|sent|debited|received)\s*[:\-]?\s*[^0-9]{0,6}\s*([0-9]+(?:\.[0-9]{1,2})?)",
+        # Up to 6 non-digit chars (e.g. "Rs.") may sit between label and number; they
+        # must start and end on a non-space so the whitespace runs cannot overlap.
+        r"(?:amount|paid|sent|debited|received)\s*(?:[:\-]\s*)?(?:[^0-9\s](?:[^0-9]{0,4}[^0-9\s])?\s*)?([0-9]+(?:\.[0-9]{1,2})?)",
         r"(?:\u20B9|rs\.?|inr)\s*([0-9]+(?:\.[0-9]{1,2})?)",
     ]
     for pattern in label_patterns:
@@ -758,7 +773,7 @@ def _extract_upi_transaction_id(text):
         return None
 
     patterns = [
-        r"(?:upi\s*transaction\s*id|transaction\s*id|txn\s*id|utr(?:\s*number)?)\s*[:#-]?\s*([A-Za-z0-9\-]{8,40})",
+        r"(?:upi\s*transaction\s*id|transaction\s*id|txn\s*id|utr(?:\s*number)?)\s*(?:[:#-]\s*)?([A-Za-z0-9\-]{8,40})",
     ]
     for pattern in patterns:
         match = re.search(pattern, text, flags=re.IGNORECASE)
@@ -780,12 +795,12 @@ def _extract_upi_party(text, field_name):
             return _clean_upi_party(match.group(1))
 
     if key == "to":
-        match = re.search(r"(?:^|\n)\s*to\s+([A-Za-z][A-Za-z0-9 .]{2,80})", text, flags=re.IGNORECASE)
+        match = re.search(r"(?:^|\n)[^\S\n]*to\s+([A-Za-z][A-Za-z0-9 .]{2,80})", text, flags=re.IGNORECASE)
         if match:
             return _clean_upi_party(match.group(1))
 
     if key == "from":
-        match = re.search(r"(?:^|\n)\s*from\s+([A-Za-z][A-Za-z0-9 .]{2,80})", text, flags=re.IGNORECASE)
+        match = re.search(r"(?:^|\n)[^\S\n]*from\s+([A-Za-z][A-Za-z0-9 .]{2,80})", text, flags=re.IGNORECASE)
         if match:
             return _clean_upi_party(match.group(1))
 
@@ -795,6 +810,9 @@ def _extract_upi_party(text, field_name):
 def _extract_upi_details(ocr_text, caption):
     """Extract structured UPI screenshot fields."""
     text = f"{ocr_text or ''}\n{caption or ''}".strip()
+    if len(text) > MAX_OCR_TEXT_CHARS:
+        logger.warning("UPI text truncated from %s to %s chars", len(text), MAX_OCR_TEXT_CHARS)
+        text = text[:MAX_OCR_TEXT_CHARS]
     return {
         "to": _extract_upi_party(text, "to"),
         "from": _extract_upi_party(text, "from"),
@@ -841,23 +859,107 @@ def _extract_upi_details_from_gemini(gemini_result):
     }
 
 
+def _has_upi_signals(upi_details, caption, text):
+    """True when extracted fields/text clearly describe a UPI payment."""
+    combined = f"{caption or ''}\n{text or ''}".lower()
+    amount = upi_details.get("amount")
+    return bool(
+        upi_details.get("upi_transaction_id")
+        or (upi_details.get("to") and upi_details.get("from"))
+        or ("upi" in combined and amount)
+        or ("transaction id" in combined and amount)
+        or ("google pay" in combined and amount)
+        or ("gpay" in combined and amount)
+    )
+
+
+def _upi_expense(user_id, upi_details, result, ocr_text):
+    """
+    Turn UPI details into an expense row (add_expense kwargs) and reply lines.
+    Returns (None, [message]) when no amount could be found.
+    """
+    amount = upi_details.get("amount")
+
+    if not amount and isinstance(result, dict):
+        result_amount = result.get("amount")
+        try:
+            amount = float(result_amount) if result_amount else None
+        except (TypeError, ValueError):
+            amount = None
+
+    if not amount and ocr_text:
+        parsed_amount, _, _ = parser.parse_expense(ocr_text)
+        amount = parsed_amount
+
+    if not amount:
+        return None, [
+            "Could not extract UPI amount from screenshot.",
+            "Please upload a clearer screenshot or type amount manually.",
+        ]
+
+    to_value = upi_details.get("to")
+    from_value = upi_details.get("from")
+    txn_time = upi_details.get("date_time")
+    upi_txn_id = upi_details.get("upi_transaction_id")
+
+    description = "UPI payment"
+    if to_value:
+        description = f"UPI payment to {to_value}"
+
+    row = {
+        "user_id": user_id,
+        "amount": float(amount),
+        "category": "Other",
+        "description": description,
+        "source": "online_payment",
+        "transaction_id": upi_txn_id,
+        "account_name": from_value,
+        "payment_method": "upi",
+        "upi_to": to_value,
+        "upi_from": from_value,
+        "transaction_time": txn_time,
+    }
+
+    lines = [f"💰 Amount: {CURRENCY}{float(amount):.2f}"]
+    if to_value:
+        lines.append(f"👤 To: {to_value}")
+    if from_value:
+        lines.append(f"👤 From: {from_value}")
+    if txn_time:
+        lines.append(f"🕒 Date/Time: {txn_time}")
+    if upi_txn_id:
+        lines.append(f"🔑 UPI Transaction ID: `{upi_txn_id}`")
+    return row, lines
+
+
 async def handle_screenshot(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle screenshots by auto-classifying receipt vs UPI payment image."""
     if not update.message.photo:
         return
 
+    if update.message.media_group_id:
+        # Part of an album: answered once, after all of its photos have arrived.
+        album_collector.add((update.effective_chat.id, update.message.media_group_id), (update, context))
+        return
+
     user = update.effective_user
     db.add_user(user.id, user.username, user.first_name)
     await update.message.reply_text("Image received. Processing...")
 
     caption = update.message.caption or ""
     photo = update.message.photo[-1]
+    file_unique_id = photo.file_unique_id
     file = await context.bot.get_file(photo.file_id)
 
     try:
-        await file.download_to_drive("temp_payment.jpg")
+        image_bytes = bytes(await file.download_as_bytearray())
 
         result = None
+        gemini_result = None
+        route_text = None
+        # Set when the thumbnail or the UPI field lines gave the result: those reads
+        # already cover the screen's time line, so no extra full-size OCR pass runs.
+        region_read = False
         ocr_text = ""
         image_kind = "receipt"
         gemini_upi_details = {
@@ -871,7 +973,7 @@ async def handle_screenshot(update: Update, context: ContextTypes.DEFAULT_TYPE)
         # Analyzer priority: Gemini -> EasyOCR -> Tesseract
         if gemini:
             try:
-                gemini_result = gemini.analyze_receipt("temp_payment.jpg")
+                gemini_result = await _analyze_with_gemini(image_bytes, file_unique_id, _stale_deadline(update.message))
                 if gemini_result and not gemini_result.get("error"):
                     result = gemini_result
                     gemini_upi_details = _extract_upi_details_from_gemini(gemini_result)
@@ -888,37 +990,47 @@ async def handle_screenshot(update: Update, context: ContextTypes.DEFAULT_TYPE)
                     logger.warning("Gemini screenshot analysis failed, falling back to OCR")
             except Exception as gemini_error:
                 logger.warning("Gemini screenshot analysis exception: %s", gemini_error)
+                gemini_result = {"error": str(gemini_error), "code": "unknown_error"}
+            if not isinstance(gemini_result, dict):
+                gemini_result = {"error": "Empty Gemini response", "code": "unknown_error"}
+
+        ocr_image = _ocr_input(image_bytes)
+
+        # Without a Gemini answer, cheap checks pick the path before any full OCR runs.
+        if result is None:
+            route = await _route_image(ocr_image, caption)
+            image_kind = route["kind"]
+            route_text = route.get("text")
+            if image_kind == "upi" and route.get("text"):
+                thumbnail_details = _extract_upi_details(route["text"], caption)
+                if thumbnail_details.get("amount") and thumbnail_details.get("upi_transaction_id"):
+                    # The thumbnail already shows what a UPI entry needs: skip the full-size OCR.
+                    result = {"amount": thumbnail_details["amount"], "raw_text": route["text"]}
+                    ocr_text = route["text"]
+                    region_read = True
 
         # If Gemini already identifies this as a receipt, use receipt flow directly.
         # This keeps Gemini as the primary analyzer for bill receipts.
         if image_kind == "receipt":
             gemini_upi_probe = _extract_upi_details(ocr_text, caption)
-            combined_probe = f"{caption or ''}\n{ocr_text or ''}".lower()
-            gemini_has_upi_signals = bool(
-                gemini_upi_probe.get("upi_transaction_id")
-                or (gemini_upi_probe.get("to") and gemini_upi_probe.get("from"))
-                or ("upi" in combined_probe and gemini_upi_probe.get("amount"))
-                or ("transaction id" in combined_probe and gemini_upi_probe.get("amount"))
-                or ("google pay" in combined_probe and gemini_upi_probe.get("amount"))
-                or ("gpay" in combined_probe and gemini_upi_probe.get("amount"))
-            )
-            if not gemini_has_upi_signals:
-                await handle_photo(update, context)
+            if not _has_upi_signals(gemini_upi_probe, caption, ocr_text):
+                await handle_photo(update, context, image_bytes, gemini_result, route_text)
                 return
 
-        # OCR fallback only when Gemini did not produce a clear UPI/receipt decision.
-        if image_kind != "upi":
-            easy_result, easy_text = _run_easyocr_receipt("temp_payment.jpg")
-            if easy_text:
-                result = easy_result
-                ocr_text = easy_text
-                image_kind = _classify_image_kind(caption, ocr_text)
+        # Screenshots routed to the UPI path: read just the amount/party/id lines first.
+        if result is None and image_kind == "upi" and UPI_ROI_OCR:
+            roi_result, roi_text = await _ocr_upi_regions(ocr_image)
+            if roi_text and _has_upi_signals(_extract_upi_details(roi_text, caption), caption, roi_text):
+                result = roi_result
+                ocr_text = roi_text
+                region_read = True
 
-        if image_kind != "upi":
-            tess_result, tess_text = _run_tesseract_receipt("temp_payment.jpg")
-            if tess_text:
-                result = tess_result
-                ocr_text = tess_text
+        # OCR fallback only when Gemini did not produce a clear UPI/receipt decision.
+        if result is None or image_kind != "upi":
+            ocr_result, found_text, _ = await ocr_orchestrator.extract(ocr_image, file_unique_id)
+            if found_text:
+                result = ocr_result
+                ocr_text = found_text
                 image_kind = _classify_image_kind(caption, ocr_text)
 
         upi_details = _extract_upi_details(ocr_text, caption)
@@ -930,8 +1042,8 @@ async def handle_screenshot(update: Update, context: ContextTypes.DEFAULT_TYPE)
             upi_details["amount"] = gemini_upi_details["amount"]
 
         # If date exists without time, try one OCR pass to enrich transaction time.
-        if not _has_time_component(upi_details.get("date_time")):
-            easy_result_dt, easy_text_dt = _run_easyocr_receipt("temp_payment.jpg")
+        if not region_read and not _has_time_component(upi_details.get("date_time")):
+            easy_result_dt, easy_text_dt = await _run_easyocr_receipt(ocr_image, file_unique_id)
             if easy_text_dt:
                 maybe_dt = _extract_upi_datetime(easy_text_dt)
                 if _has_time_component(maybe_dt):
@@ -951,76 +1063,17 @@ async def handle_screenshot(update: Update, context: ContextTypes.DEFAULT_TYPE)
                         pass
 
         # Guard against false "receipt" classification for real UPI screenshots.
-        combined_for_signal = f"{caption or ''}\n{ocr_text or ''}".lower()
-        has_upi_signals = bool(
-            upi_details.get("upi_transaction_id")
-            or (upi_details.get("to") and upi_details.get("from"))
-            or ("upi" in combined_for_signal and upi_details.get("amount"))
-            or ("transaction id" in combined_for_signal and upi_details.get("amount"))
-            or ("google pay" in combined_for_signal and upi_details.get("amount"))
-            or ("gpay" in combined_for_signal and upi_details.get("amount"))
-        )
-
-        if image_kind == "receipt" and not has_upi_signals:
-            await handle_photo(update, context)
+        if image_kind == "receipt" and not _has_upi_signals(upi_details, caption, ocr_text):
+            await handle_photo(update, context, image_bytes, gemini_result, ocr_text or route_text)
             return
 
-        amount = upi_details.get("amount")
-
-        if not amount and isinstance(result, dict):
-            result_amount = result.get("amount")
-            try:
-                amount = float(result_amount) if result_amount else None
-            except (TypeError, ValueError):
-                amount = None
-
-        if not amount and ocr_text:
-            parsed_amount, _, _ = parser.parse_expense(ocr_text)
-            amount = parsed_amount
-
-        if not amount:
-            await update.message.reply_text(
-                "Could not extract UPI amount from screenshot.\n"
-                "Please upload a clearer screenshot or type amount manually."
-            )
+        row, response_lines = _upi_expense(user.id, upi_details, result, ocr_text)
+        if not row:
+            await update.message.reply_text("\n".join(response_lines))
             return
 
-        to_value = upi_details.get("to")
-        from_value = upi_details.get("from")
-        txn_time = upi_details.get("date_time")
-        upi_txn_id = upi_details.get("upi_transaction_id")
-
-        description = "UPI payment"
-        if to_value:
-            description = f"UPI payment to {to_value}"
-
-        db.add_expense(
-            user.id,
-            float(amount),
-            "Other",
-            description,
-            source="online_payment",
-            transaction_id=upi_txn_id,
-            account_name=from_value,
-            payment_method="upi",
-            upi_to=to_value,
-            upi_from=from_value,
-            transaction_time=txn_time,
-        )
-
-        response_lines = [
-            "✅ **UPI Screenshot Processed!**",
-            "",
-            f"💰 Amount: {CURRENCY}{float(amount):.2f}",
-        ]
-        if to_value:
-            response_lines.append(f"👤 To: {to_value}")
-        if from_value:
-            response_lines.append(f"👤 From: {from_value}")
-        if txn_time:
-            response_lines.append(f"🕒 Date/Time: {txn_time}")
-        if upi_txn_id:
-            response_lines.append(f"🔑 UPI Transaction ID: `{upi_txn_id}`")
+        db.add_expense(**row)
+        response_lines = ["✅ **UPI Screenshot Processed!**", ""] + response_lines
         response_lines.append("")
         response_lines.append("Saved to database and will appear in Excel UPI Details sheet.")
 
@@ -1033,11 +1086,222 @@ async def handle_screenshot(update: Update, context: ContextTypes.DEFAULT_TYPE)
             "Please try again with a clearer image or manually enter the details."
         )
 
-    finally:
-        # Clean up temp file regardless of branch/return.
-        import os
-        if os.path.exists("temp_payment.jpg"):
-            os.remove("temp_payment.jpg")
+
+def _gemini_reading(gemini_result, caption):
+    """Album reading from a successful Gemini analysis."""
+    text = _gemini_result_to_text(gemini_result)
+    image_type = str(gemini_result.get("image_type") or "").strip().lower()
+    if "upi" in image_type or "payment" in image_type:
+        kind = "upi"
+    elif image_type in {"receipt", "bill", "invoice"}:
+        kind = "receipt"
+    else:
+        kind = _classify_image_kind(caption, text)
+    return {
+        "result": gemini_result,
+        "text": text,
+        "kind": kind,
+        "gemini": True,
+        "upi": _extract_upi_details_from_gemini(gemini_result),
+    }
+
+
+def _album_expenses(user_id, caption, reading, bill_ref):
+    """Expense rows and reply lines for one album image. Returns (rows, lines, kind)."""
+    text = reading["text"]
+    upi_details = _extract_upi_details(text, caption)
+    gemini_upi_details = reading.get("upi") or {}
+    for key in ("to", "from", "date_time", "upi_transaction_id"):
+        if not upi_details.get(key) and gemini_upi_details.get(key):
+            upi_details[key] = gemini_upi_details[key]
+    if gemini_upi_details.get("amount"):
+        upi_details["amount"] = gemini_upi_details["amount"]
+
+    if reading["kind"] != "upi" and not _has_upi_signals(upi_details, caption, text):
+        if reading.get("gemini"):
+            rows, lines = _receipt_expenses(user_id, reading["result"], None, bill_ref)
+        else:
+            rows, lines = _receipt_expenses(user_id, parser.analyze_receipt(text), text, bill_ref)
+        return rows or [], lines, "receipt"
+
+    row, lines = _upi_expense(user_id, upi_details, reading["result"], text)
+    return ([row] if row else []), lines, "upi"
+
+
+async def handle_album(items):
+    """
+    Process the photos of one Telegram album (list of (update, context)) together:
+    Gemini per image where available, batched OCR for the rest, all rows saved
+    in one transaction and a single reply.
+    """
+    update, context = items[0]
+    user = update.effective_user
+    db.add_user(user.id, user.username, user.first_name)
+    await update.message.reply_text(f"Album of {len(items)} images received. Processing...")
+
+    # Telegram puts an album's caption on one of its messages.
+    caption = next((item_update.message.caption for item_update, _ in items if item_update.message.caption), "")
+
+    try:
+        images = []
+        file_unique_ids = []
+        for item_update, item_context in items:
+            photo = item_update.message.photo[-1]
+            file = await item_context.bot.get_file(photo.file_id)
+            images.append(bytes(await file.download_as_bytearray()))
+            file_unique_ids.append(photo.file_unique_id)
+
+        readings = [None] * len(images)
+        if gemini:
+            # All album images are queued at once; gemini_client bounds how many run.
+            deadline = _stale_deadline(update.message)
+            gemini_results = await asyncio.gather(
+                *(_analyze_with_gemini(image_bytes, file_unique_ids[index], deadline)
+                  for index, image_bytes in enumerate(images)),
+                return_exceptions=True,
+            )
+            for index, gemini_result in enumerate(gemini_results):
+                if isinstance(gemini_result, Exception):
+                    logger.warning("Gemini album analysis exception: %s", gemini_result)
+                    continue
+                if gemini_result and not gemini_result.get("error"):
+                    readings[index] = _gemini_reading(gemini_result, caption)
+
+        pending = [index for index, reading in enumerate(readings) if reading is None]
+        if pending:
+            ocr_readings = await ocr_orchestrator.extract_batch(
+                [_ocr_input(images[index]) for index in pending],
+                [file_unique_ids[index] for index in pending],
+            )
+            for index, (ocr_result, ocr_text, _) in zip(pending, ocr_readings):
+                if ocr_text:
+                    readings[index] = {
+                        "result": ocr_result,
+                        "text": ocr_text,
+                        "kind": _classify_image_kind(caption, ocr_text),
+                    }
+
+        bill_ref = f"BILL-{user.id}-{int(time.time() * 1000)}"
+        all_rows = []
+        response_lines = [f"✅ **Album Processed!** ({len(images)} images)"]
+        for index, reading in enumerate(readings):
+            response_lines.append("")
+            if reading is None:
+                response_lines.append(f"🖼 Image {index + 1}: could not extract text.")
+                continue
+            rows, lines, kind = _album_expenses(user.id, caption, reading, f"{bill_ref}-{index + 1}")
+            label = "UPI payment" if kind == "upi" else "receipt"
+            response_lines.append(f"🖼 Image {index + 1} ({label}):")
+            response_lines.extend(lines)
+            all_rows.extend(rows)
+
+        if all_rows:
+            db.add_expenses(all_rows)
+        saved_count = sum(
+            1 for row in all_rows if row["description"].lower() not in db.BILL_META_DESCRIPTIONS
+        )
+        response_lines.append("")
+        response_lines.append(f"Saved {saved_count} expenses to database.")
+        await update.message.reply_text("\n".join(response_lines), parse_mode='Markdown')
+
+    except Exception as e:
+        logger.error("Error processing album: %s", str(e))
+        await update.message.reply_text(
+            f"❌ Error processing album: {str(e)}\n"
+            "Please try again or send the images one by one."
+        )
+
+
+album_collector = AlbumCollector(handle_album)
+
+
+def _breaker_line(label, breaker_stats):
+    """One line of /diagnostics for a circuit breaker."""
+    line = (
+        f"{label}: circuit {breaker_stats['state']}"
+        f" ({breaker_stats['calls_in_window']} recent calls, {breaker_stats['failure_rate']:.0%} failed)"
+    )
+    if breaker_stats["state"] == "open":
+        line += f", probe in {breaker_stats['retry_after']:.0f}s"
+    if breaker_stats["last_error"] and breaker_stats["state"] != "closed":
+        line += f"\n  last error: {breaker_stats['last_error'][:120]}"
+    return line
+
+
+async def diagnostics(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show the state of OCR engines and external APIs (Gemini, Google Speech)."""
+    lines = ["🩺 Diagnostics", ""]
+
+    readiness = ocr_service.readiness()
+    engines = ", ".join(f"{engine} {readiness.get(engine, 'not loaded')}" for engine in ocr_orchestrator.engines)
+    pool = ocr_service.stats()
+    lines.append(f"OCR engines: {engines or 'none'}")
+    lines.append(f"OCR pool: {pool['in_flight']} running, {pool['queue_depth']} queued")
+    cache = result_cache.stats()
+    lines.append(f"Result cache: {cache['hit_rate']:.0%} hit rate")
+    memory = category_memory.stats()
+    lines.append(
+        f"Category memory: {memory['hit_rate']:.0%} hit rate over {memory['hits'] + memory['misses']} lookups,"
+        f" ~{memory['saved_ms']:.1f} ms of keyword scans saved"
+    )
+
+    if gemini:
+        gemini_stats = gemini.stats()
+        lines.append("")
+        lines.append(f"Gemini model: {gemini_stats['model'] or 'not initialized'}")
+        if gemini_stats["breaker"]:
+            lines.append(_breaker_line("Gemini", gemini_stats["breaker"]))
+        if gemini.rate_limiter:
+            budget = gemini.rate_limiter.stats()
+            lines.append(
+                f"Gemini budget: {budget.get('tokens', '?')}/{budget['rpm']} per minute,"
+                f" {budget.get('day_count', '?')}/{budget['rpd']} today"
+            )
+            if budget.get("cooldown_seconds"):
+                lines.append(f"Gemini cooldown: {budget['cooldown_seconds']:.0f}s left")
+        if gemini_client:
+            client = gemini_client.stats()
+            lines.append(
+                f"Gemini queue: {client['running']} running, {client['queue_depth']} queued,"
+                f" {client['completed']} done, {client['failed']} failed"
+            )
+    else:
+        lines.append("")
+        lines.append("Gemini: disabled (no GEMINI_API_KEY)")
+
+    lines.append("")
+    lines.append(_breaker_line("Google Speech", speech_breaker.stats()))
+    await update.message.reply_text("\n".join(lines))
+
+
+async def gemini_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Admin only: today's Gemini calls, latency percentiles, tokens and estimated cost."""
+    user = update.effective_user
+    if not user or user.id not in ADMIN_USER_IDS:
+        await update.message.reply_text("⛔ /gemini_stats is only available to bot admins (ADMIN_USER_IDS).")
+        return
+
+    today = gemini_calls.summary()
+    lines = [f"📈 Gemini usage {today['day']} (UTC)", ""]
+    lines.append(
+        f"Analyses: {today['calls']} ({today['images']} images), API requests: {today['requests']}"
+    )
+    if today["outcomes"]:
+        outcomes = ", ".join(f"{code} {count}" for code, count in sorted(today["outcomes"].items()))
+        lines.append(f"Outcomes (images): {outcomes}")
+    if today["models"]:
+        lines.append("Models: " + ", ".join(f"{name} {count}" for name, count in sorted(today["models"].items())))
+    lines.append(f"Latency: p50 {today['p50_s']:.2f}s, p95 {today['p95_s']:.2f}s")
+    lines.append(f"Sent: {today['request_bytes'] / 1024:.0f} KB")
+    lines.append(
+        f"Tokens: {today['prompt_tokens']:,} in + {today['output_tokens']:,} out = {today['total_tokens']:,}"
+        f" (≈ ${today['cost_usd']:.4f})"
+    )
+    lines.append("")
+    lines.append("Tokens per day:")
+    for day, tokens, cost in gemini_calls.daily_tokens(7):
+        lines.append(f"  {day}: {tokens:,} (≈ ${cost:.4f})")
+    await update.message.reply_text("\n".join(lines))
 
 
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1045,11 +1309,37 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     logger.error(msg="Exception while handling an update:", exc_info=context.error)
 
 
+async def post_init(application: Application) -> None:
+    """Load OCR models in the background once the bot is up; text is served meanwhile."""
+    ocr_service.start_warmup(OCR_ENGINES)
+
+
+async def post_shutdown(application: Application) -> None:
+    """Stop the Gemini workers while the event loop is still running."""
+    if gemini_client:
+        logger.info("Gemini client stats: %s", gemini_client.stats())
+        if gemini.rate_limiter:
+            logger.info("Gemini rate limiter stats: %s", gemini.rate_limiter.stats())
+        logger.info("Gemini image encoding stats: %s", encoded_images.stats())
+        logger.info("Gemini processor stats: %s", gemini.stats())
+        logger.info("Gemini calls today: %s", gemini_calls.summary())
+        await gemini_client.close()
+    gemini_calls.flush()
+
+
 def main():
     """Start the bot"""
     
     # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+    # Concurrent updates: a photo waiting on Gemini or OCR does not hold up other chats.
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(BOT_CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Add handlers
     application.add_handler(CommandHandler("start", start))
@@ -1061,7 +1351,10 @@ def main():
     application.add_handler(CommandHandler("categories", show_categories))
     application.add_handler(CommandHandler("list", list_expenses))
     application.add_handler(CommandHandler("delete", delete_expense))
+    application.add_handler(CommandHandler(["setcategory", "set_category"], set_category))
     application.add_handler(CommandHandler("stats", statistics))
+    application.add_handler(CommandHandler("diagnostics", diagnostics))
+    application.add_handler(CommandHandler("gemini_stats", gemini_stats))
     
     # Export commands
     application.add_handler(CommandHandler("export", export_all))
@@ -1097,7 +1390,13 @@ def main():
     print("[*] Press Ctrl+C to stop.")
     
     # Run the bot
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    try:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        ocr_service.shutdown()
+        logger.info("Result cache stats: %s", result_cache.stats())
+        logger.info("Category memory stats: %s", category_memory.stats())
+        logger.info("OCR engine stats: %s", ocr_orchestrator.stats())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,64 @@
+"""
+Small in-process latency metrics.
+LatencyTracker keeps a bounded window of recent samples per name and reports
+count, mean and percentiles, e.g. per OCR engine.
+"""
+import threading
+from collections import deque
+
+_DEFAULT_WINDOW = 500
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers (fraction in 0..1)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class LatencyTracker:
+    """Recent latency samples (seconds) per name, summarized in milliseconds."""
+
+    def __init__(self, window=_DEFAULT_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+                self._counts[name] = 0
+            self._samples[name].append(seconds)
+            self._counts[name] += 1
+
+    def summary(self, name):
+        """count (all time) plus avg/p50/p95/max over the recent window, in ms."""
+        with self._lock:
+            samples = list(self._samples.get(name, ()))
+            count = self._counts.get(name, 0)
+        return {
+            "count": count,
+            "avg_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+            "p50_ms": percentile(samples, 0.5) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+            "max_ms": max(samples) * 1000 if samples else 0.0,
+        }
+
+    def quantile(self, name, fraction, min_samples=1):
+        """Percentile (seconds) of the recent window, or None with fewer than min_samples samples."""
+        with self._lock:
+            samples = list(self._samples.get(name, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return percentile(samples, fraction)
+
+    def names(self):
+        with self._lock:
+            return list(self._samples)
+
+    def summaries(self):
+        return {name: self.summary(name) for name in self.names()}
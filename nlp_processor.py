@@ -5,23 +5,397 @@ Uses Google Speech API (already working)
 """
 import re
 import logging
-from config import EXPENSE_PATTERNS, EXPENSE_CATEGORIES
+import time
+from bisect import bisect_right
+from itertools import accumulate
+from circuit_breaker import CircuitBreaker
+from config import EXPENSE_PATTERNS, EXPENSE_CATEGORIES, MAX_MESSAGE_CHARS, MAX_OCR_TEXT_CHARS, OCR_BATCH_SIZE, OCR_PREPROCESS
 
 logger = logging.getLogger(__name__)
 
+# Shared by every VoiceProcessor: while Google Speech keeps failing, voice notes
+# go straight to Sphinx instead of waiting for each request to time out.
+speech_breaker = CircuitBreaker("google_speech")
+
+def _cap_input(text, limit, source):
+    """Truncate oversized parser input so regex work stays bounded."""
+    if len(text) > limit:
+        logger.warning("%s input truncated from %s to %s chars", source, len(text), limit)
+        return text[:limit]
+    return text
+
+
+def _rest_of_line(pattern, flags=0):
+    """Compile pattern so a match swallows the rest of its line (at most one match per line)."""
+    return re.compile(rf'(?:{pattern})[^\n]*', flags)
+
+
+# Batch parsing patterns (parse_many). They run case-sensitively over the
+# lowercased batch joined with "\n", so whitespace classes exclude newlines to
+# keep every match on a single line.
+_BATCH_SLOW_PATH_RE = _rest_of_line(r'category|amount')
+_BATCH_TOTAL_RES = [
+    _rest_of_line(rf'{keyword}[^\S\n]*(?::[^\S\n]*)?(?:[₹$€£][^\S\n]*)?(\d+[.,]\d{{2}})')
+    for keyword in ('total', 'grand total', 'total cost')
+]
+_BATCH_CURRENCY_LINE_RE = _rest_of_line(r'[₹$€£]|rs\.|rs |rupee|dollar')
+_BATCH_ITEM_LINE_RE = _rest_of_line(r'item|product|qty|quantity|x\d|each|piece')
+_BATCH_SYMBOL_AMOUNT_RE = _rest_of_line(r'[₹$€£][^\S\n]*(\d+(?:[.,]\d{2})?)')
+_BATCH_WORD_AMOUNT_RE = _rest_of_line(r'(?:rs\.|rs|rupees?|dollars?)[^\S\n]*(?::[^\S\n]*)?(\d+(?:[.,]\d{2})?)')
+_BATCH_NUMBER_RE = re.compile(r'\d+(?:[.,]\d{2})?')
+_BATCH_AMOUNT_TOKEN_RE = re.compile(
+    r"(?:(?:[$€£₹]|rs\.?|rupees?|inr|usd|dollars?)\s*|(?<![^\S\n])\s+)?\d+(?:[.,]\d{1,2})?\s*(?:[$€£₹]|rs\.?|rupees?|inr|usd|dollars?)?"
+)
+# Non-ASCII characters that IGNORECASE matching folds onto ASCII letters.
+_BATCH_CASEFOLD_CHARS = ('\u017f', '\u212a', '\u0131')
+
+
+def _first_match_by_line(pattern, joined, line_starts):
+    """Run one _rest_of_line() regex over the joined batch, keyed by line index."""
+    return {bisect_right(line_starts, match.start()) - 1: match for match in pattern.finditer(joined)}
+
+
+def _lines_matching(pattern, joined, line_starts):
+    """Run one _rest_of_line() regex over the joined batch and return the matching line indices."""
+    return {bisect_right(line_starts, match.start()) - 1 for match in pattern.finditer(joined)}
+
+
+# Receipt field patterns (analyze_receipt). Each list is tried in order and
+# the first pattern that matches anywhere in the receipt wins.
+_RECEIPT_ITEM_RE = re.compile(
+    r'^([a-zA-Z\s]*?[a-zA-Z])\s+(?:(?:[\-\.]|x)\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)\s*(?:\(.*?\))?$',
+    re.IGNORECASE,
+)
+_RECEIPT_PHONE_RE = re.compile(r'\b\d{10}\b')
+_RECEIPT_SUBTOTAL_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'subtotal\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'sub[\s-]?total\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'items\s*total\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+)]
+_RECEIPT_GST_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:sgst|cgst|gst)\s*(?:\d+%?\s*)?(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'gst\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+)]
+_RECEIPT_OTHER_TAX_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'tax\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'vat\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+)]
+_RECEIPT_SERVICE_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'service\s*charge\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'service\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'tip\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+)]
+_RECEIPT_DISCOUNT_RES = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'discount\s*(?::\s*)?(?:-\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'offer\s*(?::\s*)?(?:-\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'promotion\s*(?::\s*)?(?:-\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+)]
+# Final amount patterns run over the receipt with its lines reversed, so the
+# bottom-most total wins.
+_RECEIPT_FINAL_RES = [re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in (
+    r'(?:total|final|payable|amount|due|bill)\s*(?:amount\s*)?(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)[^\S\n]*$',
+    r'(?:total|final|payable)\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+    r'(?:grand\s+total|total\s+due)\s*(?::\s*)?(?:(₹|Rs|rs|\$|€|£)\s*)?(\d+(?:[.,]\d{1,2})?)',
+)]
+_RECEIPT_PAYMENT_RES = [(method, re.compile(pattern, re.IGNORECASE)) for method, pattern in (
+    ('Cash', r'\bcash\b'),
+    ('Credit Card', r'credit\s*card'),
+    ('Debit Card', r'debit\s*card'),
+    ('Card', r'\bcard\b'),
+    ('UPI', r'\bupi\b'),
+    ('Digital Wallet', r'wallet|paytm|googlepay|phonepay'),
+    ('Cheque', r'cheque|check'),
+    ('Net Banking', r'net\s*banking|online'),
+)]
+# Every field/payment match starts with one of these words, so a line only
+# needs the patterns of the groups whose words it contains.
+_RECEIPT_KEYWORD_GROUPS = (
+    ('subtotal', ('sub', 'items')),
+    ('gst', ('gst',)),
+    ('other_tax', ('tax', 'vat')),
+    ('service_charge', ('service', 'tip')),
+    ('discount', ('discount', 'offer', 'promotion')),
+    ('final', ('total', 'final', 'payable', 'amount', 'due', 'bill', 'grand')),
+    ('payment', ('cash', 'credit', 'debit', 'card', 'upi', 'wallet', 'paytm', 'googlepay',
+                 'phonepay', 'cheque', 'check', 'net', 'online')),
+)
+_RECEIPT_KEYWORD_GROUP_BY_WORD = {word: group for group, words in _RECEIPT_KEYWORD_GROUPS for word in words}
+_RECEIPT_KEYWORD_RE = re.compile('|'.join(_RECEIPT_KEYWORD_GROUP_BY_WORD))
+# Characters that IGNORECASE matches to ASCII letters but str.lower() does not.
+_RECEIPT_CASEFOLD_CHARS = ('\u0130', '\u0131', '\u017f')
+_RECEIPT_ALL_GROUPS = frozenset(group for group, _ in _RECEIPT_KEYWORD_GROUPS)
+# Lines holding only separators/currency symbols (":", "Rs", "-----") can sit
+# between a label and its value; they never start a field match themselves.
+_RECEIPT_SEPARATOR_RE = re.compile(r'[\s:\-]*(?:(?:₹|Rs|\$|€|£)[\s:\-]*)*', re.IGNORECASE)
+_RECEIPT_FORWARD_FIELDS = (
+    ('subtotal', _RECEIPT_SUBTOTAL_RES),
+    ('gst', _RECEIPT_GST_RES),
+    ('other_tax', _RECEIPT_OTHER_TAX_RES),
+    ('service_charge', _RECEIPT_SERVICE_RES),
+    ('discount', _RECEIPT_DISCOUNT_RES),
+)
+_RECEIPT_HEADER_LINES = 5
+
+
+def _first_amount(patterns, text):
+    """Amount from the first pattern in the list that matches text, else None."""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            try:
+                return float(match.group(2).replace(',', '.'))
+            except (ValueError, IndexError):
+                pass
+    return None
+
+
+def _iter_lines(text):
+    """Yield the lines of text without building a list of them."""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+class _ReceiptScan:
+    """
+    One-pass state machine behind ExpenseParser.analyze_receipt_stream().
+
+    States: "start" (skipping leading blank lines), "header" (first five lines:
+    restaurant name/address) and "body" (items, taxes, totals, payment). Field
+    patterns see the neighbouring line plus any separator-only lines in
+    between, so "Total" / ":" / "655" still matches; values further away from
+    their label are not picked up.
+    """
+
+    _UNSET = object()
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.state = "start"
+        self.header_seen = 0
+        self.restaurant = {'name': None, 'address': None, 'phone': None}
+        self.items = []
+        self.item_categories = {}
+        self.currency_marks = set()
+        self.first = {field: [self._UNSET] * len(patterns) for field, patterns in _RECEIPT_FORWARD_FIELDS}
+        self.last_final = [None] * len(_RECEIPT_FINAL_RES)
+        self.payment_seen = [False] * len(_RECEIPT_PAYMENT_RES)
+        # Previous non-separator line: its forward matches wait for one line of
+        # lookahead. bridge holds the (joiner, separator line) pairs after it.
+        self.prev = None
+        self.prev_groups = ()
+        self.bridge = []
+        self.gap = ""
+
+    def feed(self, line):
+        """Consume one line of receipt text."""
+        clean = line.strip()
+        if self.state == "start":
+            if not clean:
+                return
+            self.state = "header"
+        if self.state == "header":
+            self._header(clean)
+
+        if not clean:
+            # Blank lines only matter as whitespace between a label and its value.
+            self.gap = "\n\n"
+            return
+
+        if 'INR' not in self.currency_marks:
+            self._currency(line)
+        joiner = self.gap or "\n"
+        self.gap = ""
+        if _RECEIPT_SEPARATOR_RE.fullmatch(line):
+            self.bridge.append((joiner, line))
+            return
+
+        if self.restaurant['phone'] is None:
+            phone_match = _RECEIPT_PHONE_RE.search(line)
+            if phone_match:
+                self.restaurant['phone'] = phone_match.group()
+        self._item(clean)
+
+        if self.prev_groups:
+            self._forward(self.prev, self.prev + self._bridged() + joiner + line, self.prev_groups)
+        groups = self._keyword_groups(line)
+        if 'final' in groups:
+            # Final amounts are searched bottom-up, so look upwards from this line.
+            parts = [line, joiner]
+            for bridge_joiner, separator in reversed(self.bridge):
+                parts += [separator, bridge_joiner]
+            if self.prev is not None:
+                parts.append(self.prev)
+            else:
+                parts.pop()
+            self._final(line, "".join(parts))
+
+        self.prev = line
+        self.prev_groups = groups
+        self.bridge = []
+
+    def _bridged(self):
+        return "".join(joiner + separator for joiner, separator in self.bridge)
+
+    def _flush(self):
+        """Run the forward patterns for the last line, which has no lookahead."""
+        if self.prev_groups:
+            self._forward(self.prev, self.prev + self._bridged(), self.prev_groups)
+        self.prev_groups = ()
+
+    @staticmethod
+    def _keyword_groups(line):
+        """Names of the keyword groups whose words appear in line."""
+        if not line.isascii() and any(char in line for char in _RECEIPT_CASEFOLD_CHARS):
+            return _RECEIPT_ALL_GROUPS
+        lowered = line.lower()
+        if not _RECEIPT_KEYWORD_RE.search(lowered):
+            return ()
+        # Substring checks rather than findall so overlapping words ("subill") all count.
+        return {group for word, group in _RECEIPT_KEYWORD_GROUP_BY_WORD.items() if word in lowered}
+
+    def _header(self, clean):
+        """Restaurant name and address come from the first five lines."""
+        self.header_seen += 1
+        if self.header_seen >= _RECEIPT_HEADER_LINES:
+            self.state = "body"
+        if self.restaurant['name'] is None and clean and 3 < len(clean) < 50:
+            if not any(char.isdigit() for char in clean[:5]):
+                self.restaurant['name'] = clean
+        lowered = clean.lower()
+        if 'address' in lowered or 'location' in lowered:
+            self.restaurant['address'] = re.sub(r'address|location', '', clean, flags=re.IGNORECASE).strip()
+
+    def _currency(self, line):
+        if '₹' in line:
+            self.currency_marks.add('INR')
+        upper = line.upper()
+        for code, symbol in (('INR', None), ('USD', '$'), ('EUR', '€'), ('GBP', '£')):
+            if code in upper or (symbol and symbol in line):
+                self.currency_marks.add(code)
+
+    def _item(self, clean):
+        match = _RECEIPT_ITEM_RE.match(clean)
+        if not match:
+            return
+        item_name = match.group(1).strip()
+        try:
+            price = float(match.group(3).replace(',', '.'))
+        except ValueError:
+            return
+        self.items.append({
+            'name': item_name,
+            'quantity': None,  # Not explicitly provided in simple format
+            'unit_price': None,
+            'total_price': price,
+            'category': self._item_category(item_name.lower()),
+        })
+
+    def _item_category(self, name_lower):
+        """Long receipts repeat item names; categorize each distinct name once."""
+        category = self.item_categories.get(name_lower)
+        if category is None:
+            category = self.item_categories[name_lower] = self.parser._extract_category(name_lower)
+        return category
+
+    def _forward(self, line, window, groups):
+        """Field and payment matches starting on line (window = line + next line)."""
+        if 'payment' in groups:
+            for idx, (_, pattern) in enumerate(_RECEIPT_PAYMENT_RES):
+                if self.payment_seen[idx]:
+                    # Methods are in priority order; later ones can't win any more.
+                    break
+                if pattern.search(window):
+                    self.payment_seen[idx] = True
+                    break
+
+        for field, patterns in _RECEIPT_FORWARD_FIELDS:
+            found = self.first[field]
+            if field not in groups or found[0] not in (self._UNSET, None):
+                continue
+            for idx, pattern in enumerate(patterns):
+                if found[idx] is not self._UNSET:
+                    continue
+                match = pattern.search(window)
+                if match and match.start() < len(line):
+                    try:
+                        found[idx] = float(match.group(2).replace(',', '.'))
+                    except (ValueError, IndexError):
+                        found[idx] = None
+
+    def _final(self, line, window):
+        """Final amount matches starting on the latest line win (reversed-text search)."""
+        for idx, pattern in enumerate(_RECEIPT_FINAL_RES):
+            match = pattern.search(window)
+            if match and match.start() < len(line):
+                try:
+                    self.last_final[idx] = float(match.group(2).replace(',', '.'))
+                except (ValueError, IndexError):
+                    self.last_final[idx] = None
+
+    def _pick(self, field):
+        for value in self.first[field]:
+            if value is not self._UNSET and value is not None:
+                return value
+        return None
+
+    def result(self):
+        """Build the analyze_receipt() dict from what has been fed so far."""
+        if self.state == "start":
+            return None
+        self._flush()
+
+        currency = 'INR'
+        for code in ('INR', 'USD', 'EUR', 'GBP'):
+            if code in self.currency_marks:
+                currency = code
+                break
+
+        final_amount = next((value for value in self.last_final if value is not None), None)
+        payment_method = next(
+            (method for (method, _), seen in zip(_RECEIPT_PAYMENT_RES, self.payment_seen) if seen), None
+        )
+        result = {
+            'restaurant': self.restaurant,
+            'items': self.items,
+            'subtotal': self._pick('subtotal'),
+            'tax': {'gst': self._pick('gst'), 'other': self._pick('other_tax')},
+            'service_charge': self._pick('service_charge'),
+            'discount': self._pick('discount'),
+            'final_amount': final_amount,
+            'currency': currency,
+            'payment_method': payment_method,
+            'confidence': 'medium'
+        }
+        if result['items'] and result['final_amount']:
+            result['confidence'] = 'high'
+        elif result['items'] or result['final_amount']:
+            result['confidence'] = 'medium'
+        else:
+            result['confidence'] = 'low'
+        return result
+
+
 class ExpenseParser:
     """Reuse existing parser (same as original)"""
-    def __init__(self):
+    def __init__(self, category_memory=None):
         self.amount_pattern = r'(\d+(?:[.,]\d{2})?)'
         self.currency_symbols = ['₹', '$', '€', '£', 'rs', 'rupees', 'dollars']
+        # Optional CategoryMemory: per-user learned description -> category
+        self.category_memory = category_memory
     
-    def parse_expense(self, text):
+    def parse_expense(self, text, user_id=None):
         """
         Parse expense from receipt or text
-        Priority: Explicit fields (amount:, category:) → Money symbols → Keywords
+        Priority: Explicit fields (amount:, category:) → Learned user category → Keywords
         Returns: (amount, category, description)
         """
-        text_str = text or ""
+        text_str = _cap_input(text or "", MAX_OCR_TEXT_CHARS, "parse_expense")
         
         # STEP 1: Extract explicit "category:" field from receipt
         category = self._extract_explicit_category(text_str)
@@ -32,29 +406,48 @@ class ExpenseParser:
             return None, None, None
 
         # STEP 3: Build description - clean full text
-        description = text_str
         # Remove amount tokens with optional currency words/symbols around them
-        amt_pattern = r"(?:[$€£₹]|rs\.?|rupees?|inr|usd|dollars?)?\s*\d+(?:[.,]\d{1,2})?\s*(?:[$€£₹]|rs\.?|rupees?|inr|usd|dollars?)?"
-        description = re.sub(amt_pattern, "", description, flags=re.IGNORECASE, count=1)
-        # Remove explicit field labels (amount: 100, category: food, etc)
-        description = re.sub(r'(?:amount|category|total|cost|price)\s*:?\s*[^\n]*', '', description, flags=re.IGNORECASE)
-        # Remove leftover standalone currency words/symbols
-        description = re.sub(r'[$€£₹]', ' ', description)
-        description = re.sub(r'\b(?:rs\.?|rupees?|inr|usd|dollars?)\b', ' ', description, flags=re.IGNORECASE)
-        # Collapse whitespace and strip
-        description = re.sub(r"\s{2,}", " ", description).strip()
-        description = description.strip(" -:;,.\n\t")
+        amt_pattern = r"(?:(?:[$€£₹]|rs\.?|rupees?|inr|usd|dollars?)\s*|(?<!\s)\s+)?\d+(?:[.,]\d{1,2})?\s*(?:[$€£₹]|rs\.?|rupees?|inr|usd|dollars?)?"
+        description = re.sub(amt_pattern, "", text_str, flags=re.IGNORECASE, count=1)
+        description = self._clean_description(description)
 
         # Fallback: if description is empty or too short, use original text
         if not description or len(description) < 3:
             description = text_str.strip()
 
-        # If still no category from explicit field, extract from description/keywords
+        # If still no category from explicit field, use what this user taught us,
+        # then fall back to description/keywords
         if not category or category == "Other":
-            category = self._extract_category(description.lower())
+            category = self._learned_category(user_id, description) or self._scan_category(description.lower())
 
         return amount, category, description
 
+    def _learned_category(self, user_id, description):
+        """Category learned for this user's description, if a CategoryMemory is attached."""
+        if self.category_memory is None or user_id is None:
+            return None
+        return self.category_memory.lookup(user_id, description)
+
+    def _scan_category(self, text_lower):
+        """_extract_category(), timed for CategoryMemory stats when one is attached."""
+        if self.category_memory is None:
+            return self._extract_category(text_lower)
+        start = time.perf_counter()
+        category = self._extract_category(text_lower)
+        self.category_memory.record_scan(time.perf_counter() - start)
+        return category
+
+    def _clean_description(self, description):
+        """Strip field labels, currency words and extra whitespace left after removing the amount."""
+        # Remove explicit field labels (amount: 100, category: food, etc)
+        description = re.sub(r'(?:amount|category|total|cost|price)\s*(?::\s*)?[^\n]*', '', description, flags=re.IGNORECASE)
+        # Remove leftover standalone currency words/symbols
+        description = re.sub(r'[$€£₹]', ' ', description)
+        description = re.sub(r'\b(?:rs\.?|rupees?|inr|usd|dollars?)\b', ' ', description, flags=re.IGNORECASE)
+        # Collapse whitespace and strip
+        description = re.sub(r"\s{2,}", " ", description).strip()
+        return description.strip(" -:;,.\n\t")
+
     def is_valid_expense(self, amount, category):
         """Validate parsed expense fields."""
         try:
@@ -72,12 +465,12 @@ class ExpenseParser:
         allowed = {name.lower() for name in EXPENSE_CATEGORIES}
         return category_lower in allowed
 
-    def parse_multiple_expenses(self, text):
+    def parse_multiple_expenses(self, text, user_id=None):
         """
         Parse multiple expense items from multiline input.
         Returns a list of tuples: (amount, category, description)
         """
-        text = (text or "").strip()
+        text = _cap_input((text or "").strip(), MAX_MESSAGE_CHARS, "parse_multiple_expenses")
         if not text:
             return []
 
@@ -98,8 +491,10 @@ class ExpenseParser:
             else:
                 item_blocks = [text]
 
-        for block in item_blocks:
-            amount, category, description = self.parse_expense(block)
+        parsed = self.parse_many(item_blocks, user_id=user_id)
+        for block, amount, category, description in zip(
+            item_blocks, parsed["amounts"], parsed["categories"], parsed["descriptions"]
+        ):
             if not category:
                 category = "Other"
             if self.is_valid_expense(amount, category):
@@ -107,12 +502,163 @@ class ExpenseParser:
 
         return expenses
 
+    def parse_many(self, lines, user_id=None):
+        """
+        Parse many single-expense lines in one batch (bulk imports, backfills).
+        Results match calling parse_expense(line, user_id) on each line, in input order.
+        Returns columns: {"amounts": [...], "categories": [...],
+        "descriptions": [...], "valid": [...]}
+        """
+        import numpy as np
+
+        texts = [line or "" for line in lines]
+        if texts and max(map(len, texts)) > MAX_OCR_TEXT_CHARS:
+            texts = [_cap_input(text, MAX_OCR_TEXT_CHARS, "parse_many") for text in texts]
+        count = len(texts)
+        amounts = [None] * count
+        categories = [None] * count
+        descriptions = [None] * count
+        if not count:
+            return {"amounts": amounts, "categories": categories, "descriptions": descriptions, "valid": []}
+
+        # One joined buffer lets every regex below make a single pass over the batch.
+        # Entries with embedded newlines, whose lowercase form changes length, or
+        # that IGNORECASE would match differently from lower() go through
+        # parse_expense() instead.
+        pieces = texts
+        slow = [False] * count
+        raw = "\n".join(texts)
+        joined = raw.lower()
+        if (raw.count("\n") != count - 1 or len(joined) != len(raw)
+                or any(char in raw for char in _BATCH_CASEFOLD_CHARS)):
+            slow = [("\n" in text or len(text.lower()) != len(text)
+                     or any(char in text for char in _BATCH_CASEFOLD_CHARS)) for text in texts]
+            pieces = ["" if is_slow else text for text, is_slow in zip(texts, slow)]
+            joined = "\n".join(pieces).lower()
+        line_starts = list(accumulate((len(piece) + 1 for piece in pieces), initial=0))
+        line_starts.pop()
+
+        # Explicit "amount:"/"category:" fields need the full parse_expense() chain.
+        for line_idx in _lines_matching(_BATCH_SLOW_PATH_RE, joined, line_starts):
+            slow[line_idx] = True
+
+        parse_amount = self._parse_amount_string
+
+        # _extract_amount() priority 2: "total" keywords, tried in keyword order per line.
+        known = {}
+        for pattern in _BATCH_TOTAL_RES:
+            for line_idx, match in _first_match_by_line(pattern, joined, line_starts).items():
+                if line_idx not in known:
+                    value = parse_amount(match.group(1))
+                    if value:
+                        known[line_idx] = value
+
+        # Priority 3: currency lines that are not item rows; keep the largest amount.
+        item_lines = _lines_matching(_BATCH_ITEM_LINE_RE, joined, line_starts)
+        symbol_amounts = _first_match_by_line(_BATCH_SYMBOL_AMOUNT_RE, joined, line_starts)
+        word_amounts = _first_match_by_line(_BATCH_WORD_AMOUNT_RE, joined, line_starts)
+        for line_idx in _lines_matching(_BATCH_CURRENCY_LINE_RE, joined, line_starts):
+            if line_idx in known or line_idx in item_lines:
+                continue
+            found = []
+            for matches in (symbol_amounts, word_amounts):
+                if line_idx in matches:
+                    value = parse_amount(matches[line_idx].group(1))
+                    if value:
+                        found.append(value)
+            if found:
+                known[line_idx] = max(found)
+
+        find_numbers = _BATCH_NUMBER_RE.findall
+        find_amount_token = _BATCH_AMOUNT_TOKEN_RE.search
+        cleaned = {}
+        category_memo = {}
+        learned = self._learned_category if user_id is not None and self.category_memory is not None else None
+
+        for idx, (text, is_slow, line_start) in enumerate(zip(texts, slow, line_starts)):
+            if is_slow:
+                amounts[idx], categories[idx], descriptions[idx] = self.parse_expense(text, user_id)
+                continue
+
+            amount = known.get(idx)
+            if not amount:
+                # Priorities 4-5 work on every number token of the line.
+                numbers = find_numbers(text)
+                # "\d+[.,]\d{2}" matches are exactly the separator-bearing number tokens.
+                decimals = [token for token in numbers if '.' in token or ',' in token]
+                if len(decimals) > 1:
+                    decimals.sort(key=lambda x: float(x.replace(',', '.')), reverse=True)
+                if decimals:
+                    for candidate in decimals:
+                        amount = parse_amount(candidate)
+                        if amount:
+                            break
+                if not amount:
+                    for position, candidate in enumerate(numbers):
+                        value = parse_amount(candidate)
+                        if not value:
+                            continue
+                        is_pincode = (len(candidate) in [5, 6] and '.' not in candidate
+                                      and ',' not in candidate and position == 0)
+                        if not is_pincode:
+                            amount = value
+                            break
+                if not amount:
+                    continue
+
+            # Description cleanup, mirroring parse_expense() STEP 3. Bulk input repeats
+            # the same text around different amounts, so clean each remainder once.
+            token = find_amount_token(joined, line_start, line_start + len(text))
+            if token:
+                start, end = token.span()
+                rest = text[:start - line_start] + text[end - line_start:]
+            else:
+                rest = text
+            description = cleaned.get(rest)
+            if description is None:
+                description = self._clean_description(rest)
+                if len(description) < 3:
+                    description = ""
+                cleaned[rest] = description
+            if not description:
+                description = text.strip()
+
+            # Learned user categories first, then categorize each distinct description once.
+            category = learned(user_id, description) if learned else None
+            if not category:
+                category = category_memo.get(description)
+            if category is None:
+                category = self._scan_category(description.lower())
+                category_memo[description] = category
+
+            amounts[idx] = amount
+            categories[idx] = category
+            descriptions[idx] = description
+
+        # Vectorized equivalent of is_valid_expense() over the amount/category columns.
+        amount_array = np.array([np.nan if a is None else a for a in amounts], dtype=float)
+        with np.errstate(invalid="ignore"):
+            amount_ok = (amount_array > 0) & (amount_array < 1000000)
+        allowed = {name.lower() for name in EXPENSE_CATEGORIES}
+        labels, label_codes = np.unique(
+            np.array([str(c) if c else "" for c in categories]), return_inverse=True
+        )
+        label_ok = np.array([bool(label) and label.strip().lower() in allowed for label in labels.tolist()])
+        valid = (amount_ok & label_ok[label_codes]).tolist()
+
+        return {
+            "amounts": amounts,
+            "categories": categories,
+            "descriptions": descriptions,
+            "valid": valid,
+        }
+
     def extract_bill_totals(self, text):
         """
         Extract subtotal/total/grand_total values from receipt text.
         Returns dict: {"subtotal": float|None, "total": float|None, "grand_total": float|None}
         """
-        text = text or ""
+        text = _cap_input(text or "", MAX_OCR_TEXT_CHARS, "extract_bill_totals")
         totals = {
             "subtotal": None,
             "total": None,
@@ -153,7 +699,7 @@ class ExpenseParser:
         Lightweight receipt extraction used by helper scripts.
         Returns: dict with final_amount/category + key totals.
         """
-        text = (receipt_text or "").strip()
+        text = _cap_input((receipt_text or "").strip(), MAX_OCR_TEXT_CHARS, "extract_simple_receipt")
         result = {
             "category": "Other",
             "final_amount": None,
@@ -319,7 +865,7 @@ class ExpenseParser:
 
     def normalize_description_for_voice(self, description, category=None):
         """Normalize voice descriptions for storage/export. Example: 'coffee rs' -> 'coffee'."""
-        text = (description or "").lower()
+        text = _cap_input((description or "").lower(), MAX_MESSAGE_CHARS, "normalize_description_for_voice")
         text = re.sub(r'[$€£₹]', ' ', text)
         text = re.sub(r'\b(?:rs\.?|rupees?|inr|usd|dollars?)\b', ' ', text, flags=re.IGNORECASE)
         text = re.sub(r"\b(?:spent|spend|paid|pay|for|on|at|expense|bill|cost|price|amount)\b", " ", text, flags=re.IGNORECASE)
@@ -341,7 +887,7 @@ class ExpenseParser:
     def _extract_explicit_category(self, text):
         """Extract category from explicit 'category:' field in receipt"""
         # Pattern: "category: biryani" or "category : biryani" or "category:biryani"
-        pattern = r'category\s*:?\s*([^\n:,]+)'
+        pattern = r'category\s*(?::\s*)?([^\n:,]+)'
         match = re.search(pattern, text, re.IGNORECASE)
         if match:
             category_text = match.group(1).lower().strip()
@@ -368,7 +914,7 @@ class ExpenseParser:
         
         # HIGHEST PRIORITY: Look for explicit "amount:" field in receipt
         # Pattern: "amount : 100" or "amount: 100" or "amount 100"
-        amount_pattern = r'amount\s*:?\s*([₹\$\€\£])?\s*(\d+(?:[.,]\d{2})?)'
+        amount_pattern = r'amount\s*(?::\s*)?(?:([₹\$\€\£])\s*)?(\d+(?:[.,]\d{2})?)'
         match = re.search(amount_pattern, text, re.IGNORECASE)
         if match:
             amount_str = match.group(2) if match.group(2) else match.group(1)
@@ -379,7 +925,7 @@ class ExpenseParser:
         # PRIORITY 2: Look for "total" or "grand total" fields (common in receipts)
         total_keywords = ['total', 'grand total', 'final amount', 'amount due', 'total amount', 'total cost']
         for keyword in total_keywords:
-            pattern = rf'{keyword}\s*:?\s*([₹\$\€\£])?\s*(\d+(?:[.,]\d{{2}}))'
+            pattern = rf'{keyword}\s*(?::\s*)?(?:([₹\$\€\£])\s*)?(\d+(?:[.,]\d{{2}}))'
             match = re.search(pattern, text, re.IGNORECASE)
             if match:
                 amount_str = match.group(2) if match.group(2) else match.group(1)
@@ -413,7 +959,7 @@ class ExpenseParser:
                         amounts_found.append(amount)
                 
                 # Pattern 2: Rs/rupees/dollars followed by number
-                match = re.search(r'(?:Rs\.|Rs|rupees?|dollars?)\s*:?\s*(\d+(?:[.,]\d{2})?)', line, re.IGNORECASE)
+                match = re.search(r'(?:Rs\.|Rs|rupees?|dollars?)\s*(?::\s*)?(\d+(?:[.,]\d{2})?)', line, re.IGNORECASE)
                 if match:
                     amount = self._parse_amount_string(match.group(1))
                     if amount:
@@ -424,9 +970,10 @@ class ExpenseParser:
                 return max(amounts_found)
         
         # PRIORITY 4: TEXT MODE (simple text input like "Spent 500 for biryani")
-        # Look for numbers with 2 decimal places first
-        decimal_pattern = r'(\d+[.,]\d{2})'
-        matches = re.findall(decimal_pattern, text)
+        # Look for numbers with 2 decimal places first. These are the separator-bearing
+        # number tokens; a separate r'\d+[.,]\d{2}' scan backtracks quadratically on long digit runs.
+        all_matches = re.findall(r'(\d+(?:[.,]\d{2})?)', text)
+        matches = [match for match in all_matches if '.' in match or ',' in match]
         if matches:
             for match in sorted(matches, key=lambda x: float(x.replace(',', '.')), reverse=True):
                 amount = self._parse_amount_string(match)
@@ -434,7 +981,6 @@ class ExpenseParser:
                     return amount
         
         # PRIORITY 5: Look for any number (but skip obvious pincodes at start)
-        all_matches = re.findall(r'(\d+(?:[.,]\d{2})?)', text)
         for idx, match in enumerate(all_matches):
             amount = self._parse_amount_string(match)
             if amount:
@@ -734,9 +1280,34 @@ class ExpenseParser:
             'confidence': str  # 'high', 'medium', 'low'
         }
         """
-        text = (receipt_text or "").strip()
-        
-        if not text:
+        text = _cap_input((receipt_text or "").strip(), MAX_OCR_TEXT_CHARS, "analyze_receipt")
+        return self.analyze_receipt_stream(_iter_lines(text))
+
+    def analyze_receipt_stream(self, lines):
+        """
+        Single-pass analyze_receipt() over an iterable of lines (e.g. OCR output
+        read line by line, or an open file). Returns the same dict.
+        """
+        scan = _ReceiptScan(self)
+        consumed = 0
+        for line in lines:
+            line = line.rstrip('\n')
+            if scan.state == "start":
+                # Leading blank lines don't count towards the size cap.
+                line = line.lstrip()
+                if not line:
+                    continue
+            remaining = MAX_OCR_TEXT_CHARS - consumed
+            if len(line) > remaining:
+                logger.warning("analyze_receipt_stream input truncated at %s chars", MAX_OCR_TEXT_CHARS)
+                if remaining >= 0:
+                    scan.feed(line[:remaining])
+                break
+            scan.feed(line)
+            consumed += len(line) + 1
+
+        result = scan.result()
+        if result is None:
             return {
                 'restaurant': {'name': None, 'address': None, 'phone': None},
                 'items': [],
@@ -750,39 +1321,6 @@ class ExpenseParser:
                 'confidence': 'low',
                 'error': 'Empty receipt text'
             }
-        
-        result = {
-            'restaurant': self._extract_restaurant_details(text),
-            'items': [],
-            'subtotal': None,
-            'tax': {'gst': None, 'other': None},
-            'service_charge': None,
-            'discount': None,
-            'final_amount': None,
-            'currency': self._detect_currency(text),
-            'payment_method': None,
-            'confidence': 'medium'
-        }
-        
-        # Extract items
-        result['items'] = self._extract_receipt_items(text)
-        
-        # Extract financial details
-        result['subtotal'] = self._extract_subtotal(text)
-        result['tax'] = self._extract_taxes(text)
-        result['service_charge'] = self._extract_service_charge(text)
-        result['discount'] = self._extract_discount(text)
-        result['final_amount'] = self._extract_final_amount(text)
-        result['payment_method'] = self._extract_payment_method(text)
-        
-        # Determine confidence level
-        if result['items'] and result['final_amount']:
-            result['confidence'] = 'high'
-        elif result['items'] or result['final_amount']:
-            result['confidence'] = 'medium'
-        else:
-            result['confidence'] = 'low'
-        
         return result
     
     def _extract_restaurant_details(self, text):
@@ -819,12 +1357,9 @@ class ExpenseParser:
         # Split into lines
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
-        # Pattern for item lines (name + price pattern)
-        # Looks for: "Item Name    Price" or "Item Name - Price"
-        item_pattern = r'^([a-zA-Z\s]+?)\s+(?:[\-\.]|x\s*)?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)\s*(?:\(.*?\))?$'
-        
+        # Item lines look like "Item Name    Price" or "Item Name - Price"
         for line in lines:
-            match = re.match(item_pattern, line, re.IGNORECASE)
+            match = _RECEIPT_ITEM_RE.match(line)
             if match:
                 item_name = match.group(1).strip()
                 price_str = match.group(3)
@@ -850,131 +1385,34 @@ class ExpenseParser:
     
     def _extract_subtotal(self, text):
         """Extract subtotal amount"""
-        patterns = [
-            r'subtotal\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'sub[\s-]?total\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'items\s*total\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(2).replace(',', '.'))
-                except (ValueError, IndexError):
-                    pass
-        
-        return None
+        return _first_amount(_RECEIPT_SUBTOTAL_RES, text)
     
     def _extract_taxes(self, text):
         """Extract GST and other taxes"""
-        taxes = {'gst': None, 'other': None}
-        
-        # GST/SGST/CGST patterns
-        gst_patterns = [
-            r'(?:sgst|cgst|gst)\s*(?:\d+%?)?\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'gst\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-        ]
-        
-        for pattern in gst_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    taxes['gst'] = float(match.group(2).replace(',', '.'))
-                    break
-                except (ValueError, IndexError):
-                    pass
-        
-        # Other tax patterns
-        other_patterns = [
-            r'tax\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'vat\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-        ]
-        
-        for pattern in other_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    taxes['other'] = float(match.group(2).replace(',', '.'))
-                    break
-                except (ValueError, IndexError):
-                    pass
-        
-        return taxes
+        return {
+            'gst': _first_amount(_RECEIPT_GST_RES, text),
+            'other': _first_amount(_RECEIPT_OTHER_TAX_RES, text),
+        }
     
     def _extract_service_charge(self, text):
         """Extract service charge/tip"""
-        patterns = [
-            r'service\s*charge\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'service\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'tip\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(2).replace(',', '.'))
-                except (ValueError, IndexError):
-                    pass
-        
-        return None
+        return _first_amount(_RECEIPT_SERVICE_RES, text)
     
     def _extract_discount(self, text):
         """Extract discount amount"""
-        patterns = [
-            r'discount\s*:?\s*[-]?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'offer\s*:?\s*[-]?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'promotion\s*:?\s*[-]?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(2).replace(',', '.'))
-                except (ValueError, IndexError):
-                    pass
-        
-        return None
+        return _first_amount(_RECEIPT_DISCOUNT_RES, text)
     
     def _extract_final_amount(self, text):
         """Extract final payable amount"""
-        patterns = [
-            r'(?:total|final|payable|amount|due|bill)\s*(?:amount)?\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)\s*$',
-            r'(?:total|final|payable)\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-            r'(?:grand\s+total|total\s+due)\s*:?\s*(₹|Rs|rs|\$|€|£)?\s*(\d+(?:[.,]\d{1,2})?)',
-        ]
-        
         # Look for patterns from the end (likely at bottom of receipt)
         text_lines = text.split('\n')
         text_reversed = '\n'.join(reversed(text_lines))
-        
-        for pattern in patterns:
-            match = re.search(pattern, text_reversed, re.IGNORECASE | re.MULTILINE)
-            if match:
-                try:
-                    return float(match.group(2).replace(',', '.'))
-                except (ValueError, IndexError):
-                    pass
-        
-        return None
+        return _first_amount(_RECEIPT_FINAL_RES, text_reversed)
     
     def _extract_payment_method(self, text):
         """Extract payment method (Cash, Card, UPI, etc)"""
-        patterns = {
-            'Cash': r'\bcash\b',
-            'Credit Card': r'credit\s*card',
-            'Debit Card': r'debit\s*card',
-            'Card': r'\bcard\b',
-            'UPI': r'\bupi\b',
-            'Digital Wallet': r'wallet|paytm|googlepay|phonepay',
-            'Cheque': r'cheque|check',
-            'Net Banking': r'net\s*banking|online',
-        }
-        
-        for method, pattern in patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
+        for method, pattern in _RECEIPT_PAYMENT_RES:
+            if pattern.search(text):
                 return method
         
         return None
@@ -997,6 +1435,46 @@ class ExpenseParser:
 # ORIGINAL METHOD: Tesseract OCR
 # ============================================================================
 
+def _media_label(image):
+    """Log-friendly name for an image or voice note given as raw bytes or a file path."""
+    if isinstance(image, (bytes, bytearray)):
+        return f"<{len(image)} bytes>"
+    return image
+
+
+def _media_missing(image):
+    """True when a file path does not exist or the bytes are empty."""
+    import os
+    if isinstance(image, (bytes, bytearray)):
+        return not image
+    return not os.path.exists(image)
+
+
+def _prepare_for_ocr(image):
+    """Run image_preprocess on an image; returns the original image if that fails."""
+    if not OCR_PREPROCESS:
+        return image
+    try:
+        from image_preprocess import preprocess_image
+        return preprocess_image(image)
+    except Exception as e:
+        logger.warning("Image preprocessing failed, using original image: %s", e)
+        return image
+
+
+def _pad_to_common_size(images, fill=255):
+    """Grayscale arrays padded (bottom/right, with white) to the largest height and width."""
+    import numpy as np
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    padded = []
+    for image in images:
+        canvas = np.full((height, width), fill, dtype=np.uint8)
+        canvas[:image.shape[0], :image.shape[1]] = image
+        padded.append(canvas)
+    return padded
+
+
 class OCRProcessor:
     """Extract text from images using Tesseract OCR."""
 
@@ -1017,26 +1495,41 @@ class OCRProcessor:
             # Keep default pytesseract resolution if explicit path setup fails.
             pass
 
-    def extract_text_from_image(self, image_path):
-        """Extract OCR text from image path."""
+    def is_ready(self):
+        """True when pytesseract can reach a Tesseract binary."""
         try:
-            import os
+            import pytesseract
+            pytesseract.get_tesseract_version()
+            return True
+        except Exception:
+            return False
+
+    def extract_text_from_image(self, image):
+        """Extract OCR text from image bytes or an image path."""
+        try:
+            from io import BytesIO
             from PIL import Image
             import pytesseract
 
-            if not os.path.exists(image_path):
-                logger.error("Image file not found: %s", image_path)
+            if _media_missing(image):
+                logger.error("Image file not found: %s", _media_label(image))
                 return ""
 
-            with Image.open(image_path) as image:
+            image = _prepare_for_ocr(image)
+            if isinstance(image, Image.Image):
                 return (pytesseract.image_to_string(image) or "").strip()
+
+            if isinstance(image, (bytes, bytearray)):
+                image = BytesIO(image)
+            with Image.open(image) as pil_image:
+                return (pytesseract.image_to_string(pil_image) or "").strip()
         except Exception as ocr_error:
             logger.error("Tesseract OCR failed: %s", ocr_error)
             return ""
 
-    def parse_receipt(self, image_path):
+    def parse_receipt(self, image):
         """Parse OCR output and return normalized receipt fields."""
-        text = self.extract_text_from_image(image_path)
+        text = self.extract_text_from_image(image)
 
         if not text:
             return {
@@ -1059,6 +1552,10 @@ class OCRProcessor:
             "raw_text": text,
         }
 
+    def parse_receipts(self, images):
+        """parse_receipt for several images, in order (Tesseract reads one page per call)."""
+        return [self.parse_receipt(image) for image in images]
+
 
 # ============================================================================
 # ALTERNATIVE METHOD 1: EasyOCR (No system software needed!)
@@ -1094,18 +1591,20 @@ class EasyOCRProcessor:
         except Exception as e:
             logger.error(f"❌ Failed to initialize EasyOCR: {e}")
             self.reader = None
+
+    def is_ready(self):
+        """True when the EasyOCR reader loaded"""
+        return self.reader is not None
     
-    def extract_text_from_image(self, image_path):
+    def extract_text_from_image(self, image):
         """
-        Extract text from image using EasyOCR
+        Extract text from image bytes or an image path using EasyOCR
         Returns: extracted text string
         """
         try:
-            import os
-            
-            # Validate image file
-            if not os.path.exists(image_path):
-                logger.error(f"❌ Image file not found: {image_path}")
+            # Validate image
+            if _media_missing(image):
+                logger.error(f"❌ Image file not found: {_media_label(image)}")
                 return ""
             
             # Check if reader initialized
@@ -1113,10 +1612,16 @@ class EasyOCRProcessor:
                 logger.error("❌ EasyOCR not initialized")
                 return ""
             
-            logger.info(f"🔍 EasyOCR extracting text from: {image_path}")
+            logger.info(f"🔍 EasyOCR extracting text from: {_media_label(image)}")
             
-            # Extract text
-            results = self.reader.readtext(image_path)
+            # Extract text (readtext decodes encoded bytes itself, but not bytearray)
+            image = _prepare_for_ocr(image)
+            if isinstance(image, bytearray):
+                image = bytes(image)
+            elif not isinstance(image, (bytes, str)):
+                import numpy as np
+                image = np.asarray(image)
+            results = self.reader.readtext(image)
             
             # Combine all text results
             extracted_text = "\n".join([text[1] for text in results])
@@ -1128,13 +1633,63 @@ class EasyOCRProcessor:
             logger.error(f"❌ EasyOCR extraction failed: {e}")
             return ""
     
-    def parse_receipt(self, image_path):
+    def extract_texts_from_images(self, images, batch_size=OCR_BATCH_SIZE):
+        """
+        Extract text from several images (bytes or paths) with batched EasyOCR
+        inference: images are preprocessed, padded with white to one size and
+        read batch_size at a time by readtext_batched.
+        Returns: extracted text strings, in input order
         """
-        Parse receipt image and extract amount + category
+        if self.reader is None:
+            logger.error("❌ EasyOCR not initialized")
+            return ["" for _ in images]
+
+        try:
+            import numpy as np
+            from image_preprocess import load_image
+
+            arrays = []
+            for image in images:
+                if _media_missing(image):
+                    logger.error(f"❌ Image file not found: {_media_label(image)}")
+                    arrays.append(None)
+                    continue
+                prepared = _prepare_for_ocr(image)
+                arrays.append(np.asarray(load_image(prepared)))
+        except Exception as e:
+            logger.error(f"❌ EasyOCR batch decoding failed: {e}")
+            return [self.extract_text_from_image(image) for image in images]
+
+        texts = ["" for _ in images]
+        readable = [index for index, array in enumerate(arrays) if array is not None]
+        for offset in range(0, len(readable), max(1, batch_size)):
+            chunk = readable[offset:offset + max(1, batch_size)]
+            logger.info(f"🔍 EasyOCR extracting text from {len(chunk)} images in one batch")
+            try:
+                batch = self.reader.readtext_batched(_pad_to_common_size([arrays[i] for i in chunk]))
+            except Exception as e:
+                logger.warning(f"EasyOCR batched inference failed, reading images one by one: {e}")
+                batch = [self.reader.readtext(arrays[i]) for i in chunk]
+            for index, results in zip(chunk, batch):
+                texts[index] = "\n".join([text[1] for text in results])
+        return texts
+
+    def parse_receipts(self, images):
+        """
+        parse_receipt for several images, read in batches
+        Returns: list of dicts, in input order
+        """
+        return [self._receipt_result(text) for text in self.extract_texts_from_images(images)]
+
+    def parse_receipt(self, image):
+        """
+        Parse receipt image (bytes or path) and extract amount + category
         Returns: dict with amount, category, description, source
         """
-        text = self.extract_text_from_image(image_path)
-        
+        return self._receipt_result(self.extract_text_from_image(image))
+
+    def _receipt_result(self, text):
+        """Receipt fields parsed from OCR text"""
         if not text:
             return {
                 'amount': None,
@@ -1191,18 +1746,20 @@ class PaddleOCRProcessor:
         except Exception as e:
             logger.error(f"❌ Failed to initialize PaddleOCR: {e}")
             self.ocr = None
+
+    def is_ready(self):
+        """True when the PaddleOCR model loaded"""
+        return self.ocr is not None
     
-    def extract_text_from_image(self, image_path):
+    def extract_text_from_image(self, image):
         """
-        Extract text from image using PaddleOCR
+        Extract text from image bytes or an image path using PaddleOCR
         Returns: extracted text string
         """
         try:
-            import os
-            
-            # Validate image file
-            if not os.path.exists(image_path):
-                logger.error(f"❌ Image file not found: {image_path}")
+            # Validate image
+            if _media_missing(image):
+                logger.error(f"❌ Image file not found: {_media_label(image)}")
                 return ""
             
             # Check if OCR initialized
@@ -1210,10 +1767,18 @@ class PaddleOCRProcessor:
                 logger.error("❌ PaddleOCR not initialized")
                 return ""
             
-            logger.info(f"🔍 PaddleOCR extracting text from: {image_path}")
+            logger.info(f"🔍 PaddleOCR extracting text from: {_media_label(image)}")
+            
+            # PaddleOCR takes a path or a BGR ndarray, so decode bytes in memory
+            if isinstance(image, (bytes, bytearray)):
+                from io import BytesIO
+                import numpy as np
+                from PIL import Image
+                with Image.open(BytesIO(image)) as pil_image:
+                    image = np.asarray(pil_image.convert("RGB"))[:, :, ::-1]
             
             # Extract text
-            result = self.ocr.ocr(image_path, cls=True)
+            result = self.ocr.ocr(image, cls=True)
             
             # Combine all text results
             extracted_text = "\n".join(
@@ -1227,12 +1792,12 @@ class PaddleOCRProcessor:
             logger.error(f"❌ PaddleOCR extraction failed: {e}")
             return ""
     
-    def parse_receipt(self, image_path):
+    def parse_receipt(self, image):
         """
-        Parse receipt image and extract amount + category
+        Parse receipt image (bytes or path) and extract amount + category
         Returns: dict with amount, category, description, source
         """
-        text = self.extract_text_from_image(image_path)
+        text = self.extract_text_from_image(image)
         
         if not text:
             return {
@@ -1254,6 +1819,13 @@ class PaddleOCRProcessor:
             'raw_text': text
         }
 
+    def parse_receipts(self, images):
+        """
+        parse_receipt for several images, in order
+        (PaddleOCR reads one page per call; it already batches the text lines within it)
+        """
+        return [self.parse_receipt(image) for image in images]
+
 
 # ============================================================================
 # VOICE METHOD: Google Speech API (Already working)
@@ -1290,78 +1862,86 @@ class VoiceProcessor:
         )
         return normalized
     
-    def _prepare_audio_file(self, voice_path):
+    def _prepare_audio_file(self, voice):
         """
-        Convert unsupported audio formats (like Telegram .ogg/.opus) to WAV.
-        Returns: (audio_path_to_read, temp_file_to_cleanup_or_none)
+        Convert unsupported audio formats (like Telegram .ogg/.opus) to WAV in memory.
+        voice is raw bytes (assumed OGG, as Telegram sends) or a file path.
+        Returns: path or file-like object readable by sr.AudioFile, or None
         """
         import os
-        ext = os.path.splitext(voice_path)[1].lower()
-        if ext in (".wav", ".aiff", ".aif", ".flac"):
-            return voice_path, None
+        from io import BytesIO
+        if isinstance(voice, (bytes, bytearray)):
+            ext = ".ogg"
+            source = BytesIO(voice)
+        else:
+            ext = os.path.splitext(voice)[1].lower()
+            source = voice
+            if ext in (".wav", ".aiff", ".aif", ".flac"):
+                return voice
         try:
             from pydub import AudioSegment
         except ImportError:
             logger.error("? pydub not installed. Run: pip install pydub")
-            return None, None
+            return None
         try:
-            import tempfile
             # Telegram voice notes are usually OGG/OPUS containers.
             fmt = "ogg" if ext in (".ogg", ".oga", ".opus") else ext.lstrip(".")
-            audio = AudioSegment.from_file(voice_path, format=fmt)
+            audio = AudioSegment.from_file(source, format=fmt)
             audio = audio.set_channels(1).set_frame_rate(16000)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                temp_wav = tmp.name
-            audio.export(temp_wav, format="wav")
-            logger.info("Audio converted for transcription: %s -> %s", voice_path, temp_wav)
-            return temp_wav, temp_wav
+            wav = BytesIO()
+            audio.export(wav, format="wav")
+            wav.seek(0)
+            logger.info("Audio converted for transcription: %s -> %s", _media_label(voice), f"<{len(wav.getvalue())} bytes wav>")
+            return wav
         except Exception as e:
             logger.error("? Audio conversion failed (install ffmpeg and add it to PATH): %s", e)
-            return None, None
-    def transcribe_voice(self, voice_path):
+            return None
+    def transcribe_voice(self, voice):
         """
-        Transcribe voice file to text using Google Speech API
+        Transcribe voice (raw bytes or file path) to text using Google Speech API
         Fallback to Sphinx if Google API fails
         Returns: transcribed text or None if failed
         """
         try:
             import speech_recognition as sr
-            import os
             # File validation
-            if not os.path.exists(voice_path):
-                logger.error(f"? Voice file not found: {voice_path}")
+            if _media_missing(voice):
+                logger.error(f"? Voice file not found: {_media_label(voice)}")
                 return None
-            logger.info(f"?? Loading voice file: {voice_path}")
+            logger.info(f"?? Loading voice file: {_media_label(voice)}")
             recognizer = sr.Recognizer()
-            temp_audio = None
             try:
-                audio_path, temp_audio = self._prepare_audio_file(voice_path)
-                if not audio_path:
+                audio_source = self._prepare_audio_file(voice)
+                if not audio_source:
                     return None
-                with sr.AudioFile(audio_path) as source:
+                with sr.AudioFile(audio_source) as source:
                     audio = recognizer.record(source)
             except Exception as e:
                 logger.error("? Failed to read audio for transcription: %s", e)
                 return None
-            finally:
-                if temp_audio and os.path.exists(temp_audio):
-                    try:
-                        os.remove(temp_audio)
-                    except OSError:
-                        pass
-            # Try Google Speech API first
-            try:
-                logger.info("?? Trying Google Speech API...")
-                text = recognizer.recognize_google(audio)
-                logger.info("? Google Speech API successful")
-                normalized_text = self._normalize_transcribed_text(text)
-                if normalized_text != text:
-                    logger.info("Voice text normalized: '%s' -> '%s'", text, normalized_text)
-                return normalized_text
-            except sr.UnknownValueError:
-                logger.warning("?? Google Speech API could not understand audio")
-            except sr.RequestError as e:
-                logger.warning(f"?? Google Speech API request failed: {e}")
+            # Try Google Speech API first (unless its circuit breaker is open)
+            if not speech_breaker.allow():
+                logger.info("Google Speech API circuit open, skipping to Sphinx")
+            else:
+                try:
+                    logger.info("?? Trying Google Speech API...")
+                    text = recognizer.recognize_google(audio)
+                    speech_breaker.record_success()
+                    logger.info("? Google Speech API successful")
+                    normalized_text = self._normalize_transcribed_text(text)
+                    if normalized_text != text:
+                        logger.info("Voice text normalized: '%s' -> '%s'", text, normalized_text)
+                    return normalized_text
+                except sr.UnknownValueError:
+                    # The API answered; the audio was the problem.
+                    speech_breaker.record_success()
+                    logger.warning("?? Google Speech API could not understand audio")
+                except sr.RequestError as e:
+                    speech_breaker.record_failure(e)
+                    logger.warning(f"?? Google Speech API request failed: {e}")
+                except Exception as e:
+                    speech_breaker.record_failure(e)
+                    raise
             # Fallback to Sphinx
             try:
                 logger.info("??? Trying Sphinx fallback...")
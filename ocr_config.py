@@ -73,12 +73,17 @@ def _load_processor(method_name):
     return processor_class()
 
 
-def get_ocr_processor():
+def get_ocr_processor(method=None):
     """
     Dynamically load OCR processor with caching and fallbacks.
+    Pass method (e.g. "easyocr") to load only that method, without fallbacks.
     Usage: processor = get_ocr_processor()
     """
-    for method_name in _build_method_order():
+    if method and method not in OCR_METHODS:
+        logger.warning("Unknown OCR method '%s'", method)
+        return None
+
+    for method_name in [method] if method else _build_method_order():
         if method_name in _PROCESSOR_CACHE:
             return _PROCESSOR_CACHE[method_name]
 
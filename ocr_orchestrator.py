@@ -0,0 +1,273 @@
+"""
+OCR engine orchestration on top of the OCR worker pool.
+Policies:
+  sequential  try engines one after another, stop at the first confident parse
+  race        run all engines at once, take the first confident parse and
+              cancel the rest; with fewer idle pool workers than engines it
+              runs sequentially instead, so one photo does not take the
+              whole pool while other uploads queue
+  ensemble    run all engines, pick the amount most engines agree on
+A parse is confident when ExpenseParser finds a positive amount in the text.
+Cancelling a queued job frees its slot; a job already running in a worker
+finishes there and its result is dropped.
+
+While the pool is still warming up, engines that are not ready yet are skipped
+if another engine is ready; otherwise extract() waits up to OCR_READY_TIMEOUT.
+
+extract_batch() reads an album: one OCR service batch job per engine.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from config import OCR_ENGINES, OCR_POLICY, OCR_READY_TIMEOUT
+from metrics import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("sequential", "race", "ensemble")
+
+
+class OCROrchestrator:
+    """Runs OCR engines through an OCRService according to a policy."""
+
+    def __init__(self, service, parser, policy=OCR_POLICY, engines=OCR_ENGINES, cache=None,
+                 ready_timeout=OCR_READY_TIMEOUT):
+        if policy not in POLICIES:
+            logger.warning("Unknown OCR policy '%s'. Falling back to 'sequential'.", policy)
+            policy = "sequential"
+        self.service = service
+        self.parser = parser
+        self.policy = policy
+        self.engines = list(engines)
+        self.cache = cache
+        self.ready_timeout = ready_timeout
+        self.degraded = 0
+        self.race_downgrades = 0
+        self.latency = LatencyTracker()
+        self.counters = {engine: Counter() for engine in self.engines}
+        self.extractions = 0
+
+    def confident_amount(self, text):
+        """Amount ExpenseParser reads from OCR text, or None."""
+        if not text:
+            return None
+        try:
+            amount = self.parser.analyze_receipt(text).get("final_amount")
+            if not amount:
+                amount, _, _ = self.parser.parse_expense(text)
+        except Exception as e:
+            logger.warning("Parsing OCR text failed: %s", e)
+            return None
+        return amount if amount and amount > 0 else None
+
+    def _cached(self, engine, image, file_unique_id):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(engine, image, file_unique_id)
+        if cached is None:
+            return None
+        self.counters[engine]["cache_hits"] += 1
+        return tuple(cached)
+
+    async def run_engine(self, engine, image, file_unique_id=None):
+        """Run one engine (cache first). Returns (result, text)."""
+        cached = self._cached(engine, image, file_unique_id)
+        if cached is not None:
+            return cached
+
+        self.counters.setdefault(engine, Counter())["runs"] += 1
+        start = time.perf_counter()
+        result, text = await self.service.run(engine, image)
+        self.latency.record(engine, time.perf_counter() - start)
+        return self._reading(engine, image, file_unique_id, result, text)
+
+    def _reading(self, engine, image, file_unique_id, result, text):
+        """Tag and cache one engine's output. Returns (result, text)."""
+        if not text:
+            self.counters[engine]["empty"] += 1
+            return None, ""
+
+        result["ocr_engine"] = engine
+        logger.info("%s OCR successful", engine)
+        if self.cache is not None:
+            self.cache.put(engine, [result, text], image, file_unique_id)
+        return result, text
+
+    async def extract(self, image, file_unique_id=None):
+        """Best OCR reading of image under the configured policy. Returns (result, text, engine)."""
+        self.extractions += 1
+        start = time.perf_counter()
+
+        # A confident cached reading from any engine answers without new OCR work.
+        outcomes = {}
+        if self.cache is not None:
+            for engine in self.engines:
+                cached = self._cached(engine, image, file_unique_id)
+                if cached is not None:
+                    outcomes[engine] = cached
+                    if self.confident_amount(cached[1]):
+                        return self._finish(engine, cached, start)
+
+        usable = await self._usable_engines()
+        pending = [engine for engine in usable if engine not in outcomes]
+        if self.policy == "race" and self._idle_workers() >= len(pending):
+            winner = await self._race(pending, image, file_unique_id, outcomes)
+        elif self.policy == "ensemble":
+            winner = await self._ensemble(pending, image, file_unique_id, outcomes)
+        else:
+            if self.policy == "race" and len(pending) > 1:
+                self.race_downgrades += 1
+            winner = await self._sequential(pending, image, file_unique_id, outcomes)
+
+        if winner is None:
+            # Nothing parsed to an amount: keep the first engine that read any text.
+            winner = next((engine for engine in self.engines if outcomes.get(engine, (None, ""))[1]), None)
+        if winner is None:
+            self.latency.record("extract", time.perf_counter() - start)
+            return None, "", None
+        return self._finish(winner, outcomes[winner], start)
+
+    async def extract_batch(self, images, file_unique_ids=None):
+        """
+        extract() for several images (an album) with one batched OCR job per engine.
+        Engines run in priority order whatever the policy: only images the earlier
+        engines did not read confidently go to the next one.
+        Returns [(result, text, engine)] in input order.
+        """
+        images = list(images)
+        file_unique_ids = list(file_unique_ids or [None] * len(images))
+        self.extractions += len(images)
+        start = time.perf_counter()
+
+        readings = [None] * len(images)
+        outcomes = [{} for _ in images]
+        for index, image in enumerate(images):
+            if self.cache is None:
+                continue
+            for engine in self.engines:
+                cached = self._cached(engine, image, file_unique_ids[index])
+                if cached is not None:
+                    outcomes[index][engine] = cached
+                    if self.confident_amount(cached[1]):
+                        readings[index] = self._finish(engine, cached, start)
+                        break
+
+        for engine in await self._usable_engines():
+            pending = [i for i, reading in enumerate(readings) if reading is None and engine not in outcomes[i]]
+            if not pending:
+                continue
+            self.counters.setdefault(engine, Counter())["runs"] += len(pending)
+            batch_start = time.perf_counter()
+            results = await self.service.run_batch(engine, [images[i] for i in pending])
+            self.latency.record(f"{engine}_batch", time.perf_counter() - batch_start)
+            for index, (result, text) in zip(pending, results):
+                outcomes[index][engine] = self._reading(engine, images[index], file_unique_ids[index], result, text)
+                if self._confident(engine, outcomes[index][engine]):
+                    readings[index] = self._finish(engine, outcomes[index][engine], start)
+
+        for index, reading in enumerate(readings):
+            if reading is not None:
+                continue
+            winner = next((engine for engine in self.engines if outcomes[index].get(engine, (None, ""))[1]), None)
+            if winner is None:
+                self.latency.record("extract", time.perf_counter() - start)
+                readings[index] = (None, "", None)
+            else:
+                readings[index] = self._finish(winner, outcomes[index][winner], start)
+        return readings
+
+    def _idle_workers(self):
+        """Pool workers not running a job (unbounded for services that do not say)."""
+        workers = getattr(self.service, "workers", None)
+        if workers is None:
+            return float("inf")
+        return workers - getattr(self.service, "in_flight", 0)
+
+    async def _usable_engines(self):
+        """Engines to run now, given the pool's warm-up state."""
+        if not hasattr(self.service, "readiness"):
+            return self.engines
+
+        engines = [e for e in self.engines if self.service.readiness().get(e) != "unavailable"]
+        ready = [e for e in engines if self.service.is_ready(e)]
+        if not ready and engines:
+            logger.info("Waiting up to %ss for OCR models to load", self.ready_timeout)
+            await self.service.wait_ready(engines, self.ready_timeout)
+            ready = [e for e in engines if self.service.is_ready(e)]
+            if not ready:
+                # Still loading: queue behind the load rather than give up.
+                return engines
+        if len(ready) < len(engines):
+            self.degraded += 1
+            logger.info("OCR models still loading; using %s", ", ".join(ready))
+        return ready
+
+    def _finish(self, engine, outcome, start):
+        self.counters[engine]["wins"] += 1
+        self.latency.record("extract", time.perf_counter() - start)
+        return outcome[0], outcome[1], engine
+
+    def _confident(self, engine, outcome):
+        if self.confident_amount(outcome[1]):
+            self.counters[engine]["confident"] += 1
+            return True
+        return False
+
+    async def _sequential(self, engines, image, file_unique_id, outcomes):
+        for engine in engines:
+            outcomes[engine] = await self.run_engine(engine, image, file_unique_id)
+            if self._confident(engine, outcomes[engine]):
+                return engine
+        return None
+
+    async def _race(self, engines, image, file_unique_id, outcomes):
+        tasks = {asyncio.create_task(self.run_engine(engine, image, file_unique_id)): engine for engine in engines}
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    engine = tasks.pop(task)
+                    outcomes[engine] = task.result()
+                    if self._confident(engine, outcomes[engine]):
+                        return engine
+            return None
+        finally:
+            for task, engine in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    self.counters[engine]["cancelled"] += 1
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _ensemble(self, engines, image, file_unique_id, outcomes):
+        results = await asyncio.gather(*(self.run_engine(engine, image, file_unique_id) for engine in engines))
+        outcomes.update(zip(engines, results))
+
+        amounts = {}
+        for engine in self.engines:
+            if engine in outcomes and self._confident(engine, outcomes[engine]):
+                amounts[engine] = round(self.confident_amount(outcomes[engine][1]), 2)
+        if not amounts:
+            return None
+        votes = Counter(amounts.values())
+        best = max(votes.values())
+        # Ties go to the engine listed first.
+        return next(engine for engine, amount in amounts.items() if votes[amount] == best)
+
+    def stats(self):
+        """Per-engine counters and latency, plus overall extraction latency."""
+        engines = {}
+        for engine, counter in self.counters.items():
+            entry = dict(counter)
+            entry.update(self.latency.summary(engine))
+            engines[engine] = entry
+        return {
+            "policy": self.policy,
+            "extractions": self.extractions,
+            "degraded": self.degraded,
+            "race_downgrades": self.race_downgrades,
+            "extract": self.latency.summary("extract"),
+            "engines": engines,
+        }
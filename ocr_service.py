@@ -0,0 +1,314 @@
+"""
+OCR worker pool.
+Runs OCR in separate processes so a slow image never blocks the bot's event
+loop. Each worker loads its OCR processors once (ocr_config.get_ocr_processor)
+and reuses them for every job it runs.
+
+start_warmup() starts the pool at bot startup so models load in the background
+while text messages are already served; readiness() / wait_ready() report
+which engines can take jobs yet. run_batch() sends several images to one
+worker job so engines with batched inference (EasyOCR) read them together.
+
+A job that times out cannot be interrupted inside its worker, so the pool is
+recycled: its workers are terminated, jobs that were running alongside or
+still queued are resubmitted once to the new pool, and the engines report
+"loading" again until the new workers have loaded their models.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import OCR_JOB_TIMEOUT, OCR_PRELOAD_METHODS, OCR_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def extract_ocr_text(result):
+    """Extract best available OCR text from parser output."""
+    if not isinstance(result, dict):
+        return ""
+
+    for key in ("raw_text", "text", "description"):
+        value = result.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return ""
+
+
+def _init_worker(methods):
+    """Worker start-up: load OCR models before the first job arrives."""
+    from ocr_config import get_ocr_processor
+
+    for method in methods:
+        try:
+            get_ocr_processor(method)
+        except Exception as e:
+            logger.warning("OCR worker could not preload %s: %s", method, e)
+
+
+def _warm_job(method):
+    """Worker side: load one OCR method and report whether it can run."""
+    from ocr_config import get_ocr_processor
+
+    processor = get_ocr_processor(method)
+    return processor is not None and processor.is_ready()
+
+
+def _ocr_job(method, image):
+    """Worker side: run one OCR method on image bytes (or a path). Returns (result, text, seconds)."""
+    from ocr_config import get_ocr_processor
+
+    start = time.perf_counter()
+    processor = get_ocr_processor(method)
+    if processor is None:
+        return None, "", time.perf_counter() - start
+    result = processor.parse_receipt(image)
+    return result, extract_ocr_text(result), time.perf_counter() - start
+
+
+def _ocr_batch_job(method, images):
+    """Worker side: run one OCR method on several images at once. Returns ([(result, text)], seconds)."""
+    from ocr_config import get_ocr_processor
+
+    start = time.perf_counter()
+    processor = get_ocr_processor(method)
+    if processor is None:
+        return [(None, "") for _ in images], time.perf_counter() - start
+    results = processor.parse_receipts(images)
+    return [(result, extract_ocr_text(result)) for result in results], time.perf_counter() - start
+
+
+class OCRService:
+    """Process pool for OCR jobs, awaited from async handlers."""
+
+    def __init__(self, workers=OCR_WORKERS, timeout=OCR_JOB_TIMEOUT, preload=OCR_PRELOAD_METHODS):
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.preload = list(preload)
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.recycles = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+        # method -> "loading" | "ready" | "unavailable"; methods never warmed are not listed.
+        self._readiness = {}
+        self._ready_events = {}
+        self.warmup_seconds = {}
+        # Bumped on every pool restart; warm-up answers from an older pool are ignored.
+        self._generation = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                logger.info("Starting OCR pool with %s workers", self.workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.preload,),
+                )
+            return self._executor
+
+    def _job_done(self, _future):
+        # Runs when the worker really finishes, including jobs we stopped
+        # waiting for after a timeout (they still occupy a worker until then).
+        with self._lock:
+            self.in_flight -= 1
+
+    def queue_depth(self):
+        """Jobs submitted but not yet picked up by a worker."""
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, method, image):
+        """Run one OCR method on image bytes (or a path) in a worker. Returns (result, text)."""
+        outcome = await self._run_job(method, _ocr_job, image)
+        if outcome is None:
+            return None, ""
+        result, text, _ = outcome
+        return result, text
+
+    async def run_batch(self, method, images):
+        """
+        Run one OCR method on several images as a single worker job, so engines
+        with batched inference read them together. Returns [(result, text)] in order.
+        """
+        images = list(images)
+        if not images:
+            return []
+        outcome = await self._run_job(method, _ocr_batch_job, images, timeout=self.timeout * len(images))
+        if outcome is None:
+            return [(None, "") for _ in images]
+        return outcome[0]
+
+    async def _run_job(self, method, job, image, timeout=None, resubmit=True):
+        """Submit job(method, image) to the pool and await it; None when it failed or timed out."""
+        timeout = self.timeout if timeout is None else timeout
+        executor = self._get_executor()
+        submitted_at = time.perf_counter()
+        try:
+            future = executor.submit(job, method, image)
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.warning("OCR pool unavailable (%s); restarting it", e)
+            self._restart(executor)
+            executor = self._get_executor()
+            future = executor.submit(job, method, image)
+
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth())
+        future.add_done_callback(self._job_done)
+
+        try:
+            outcome = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+                self.recycles += 1
+            logger.warning("OCR %s timed out after %ss; recycling the OCR pool", method, timeout)
+            # The job keeps its worker busy until it ends: replace the workers instead of waiting.
+            self._restart(executor)
+            return None
+        except asyncio.CancelledError:
+            if not (resubmit and future.cancelled() and self._executor is not executor
+                    and not asyncio.current_task().cancelling()):
+                raise
+            # Still queued when the pool was recycled: run it on the new pool.
+            logger.info("OCR pool recycled before %s started; resubmitting the job", method)
+            return await self._run_job(method, job, image, timeout, resubmit=False)
+        except BrokenProcessPool as e:
+            if resubmit and self._executor is not executor:
+                # The pool was recycled under this job (another job timed out): run it again.
+                logger.info("OCR pool recycled during %s; resubmitting the job", method)
+                return await self._run_job(method, job, image, timeout, resubmit=False)
+            with self._lock:
+                self.failed += 1
+            logger.warning("OCR worker crashed during %s: %s", method, e)
+            self._restart(executor)
+            return None
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.warning("OCR %s failed: %s", method, e)
+            return None
+
+        run_seconds = outcome[-1]
+        total = time.perf_counter() - submitted_at
+        with self._lock:
+            self.completed += 1
+            self.run_seconds += run_seconds
+            self.wait_seconds += max(0.0, total - run_seconds)
+        return outcome
+
+    def start_warmup(self, methods):
+        """Start the pool and load methods in the background (call from the running loop)."""
+        self._warm([method for method in methods if method not in self._readiness])
+        logger.info("OCR warm-up started for %s", ", ".join(methods))
+
+    def _warm(self, methods):
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        generation = self._generation
+        started = time.perf_counter()
+        for method in methods:
+            self._readiness[method] = "loading"
+            previous = self._ready_events.get(method)
+            if previous is not None:
+                # Wake anyone waiting on the old pool's warm-up; they see "loading" and re-check.
+                previous.set()
+            self._ready_events[method] = asyncio.Event()
+            future = asyncio.wrap_future(executor.submit(_warm_job, method), loop=loop)
+            future.add_done_callback(
+                lambda done, method=method: self._warmed(method, done, started, generation)
+            )
+
+    def _warmed(self, method, future, started, generation):
+        if generation != self._generation:
+            return
+        try:
+            usable = not future.cancelled() and future.result()
+        except Exception as e:
+            logger.warning("OCR warm-up for %s failed: %s", method, e)
+            usable = False
+        self._readiness[method] = "ready" if usable else "unavailable"
+        self.warmup_seconds[method] = time.perf_counter() - started
+        self._ready_events[method].set()
+        logger.info("OCR %s %s after %.1fs", method, self._readiness[method], self.warmup_seconds[method])
+
+    def readiness(self):
+        """Warm-up state per method: loading, ready or unavailable."""
+        return dict(self._readiness)
+
+    def is_ready(self, method):
+        """True when method finished warming up; methods never warmed count as ready."""
+        return self._readiness.get(method, "ready") == "ready"
+
+    async def wait_ready(self, methods, timeout):
+        """Wait up to timeout seconds until one of methods has finished loading."""
+        events = [self._ready_events[m] for m in methods if self._readiness.get(m) == "loading"]
+        if not events:
+            return any(self.is_ready(m) for m in methods)
+        waiters = [asyncio.create_task(event.wait()) for event in events]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        return any(self.is_ready(m) for m in methods)
+
+    def _restart(self, executor=None):
+        """
+        Replace the pool (unless `executor` was already replaced) and warm the
+        engines again: until the new workers have loaded, they report "loading".
+        """
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return
+            executor, self._executor = self._executor, None
+            self._generation += 1
+        if executor is not None:
+            # Stop workers still busy with abandoned jobs. Their futures, and those of jobs
+            # still queued, fail with BrokenProcessPool and _run_job resubmits them.
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.terminate()
+            executor.shutdown(wait=False)
+        warmed = [method for method, state in self._readiness.items() if state != "unavailable"]
+        if warmed:
+            self._warm(warmed)
+            logger.info("OCR warm-up restarted for %s", ", ".join(warmed))
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self):
+        """Pool counters plus average queue wait and run time per job."""
+        with self._lock:
+            done = self.completed
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": done,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "recycles": self.recycles,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth(),
+                "max_queue_depth": self.max_queue_depth,
+                "avg_wait_ms": self.wait_seconds / done * 1000 if done else 0.0,
+                "avg_run_ms": self.run_seconds / done * 1000 if done else 0.0,
+                "readiness": dict(self._readiness),
+            }
@@ -0,0 +1,171 @@
+"""
+Token-bucket rate limiter for the Gemini API, shared by every bot process.
+The bucket lives in a SQLite file: each acquire() refills it for the time
+passed (GEMINI_RPM tokens per minute, at most GEMINI_RPM stored), takes one
+token and counts the request against GEMINI_RPD for the day, all inside one
+BEGIN IMMEDIATE transaction so concurrent processes never overspend. A 429
+from the API still backs everyone off: block() stores a shared cooldown.
+Requests that are refused never reach the API; callers fall back to OCR.
+"""
+import logging
+import sqlite3
+import threading
+import time
+
+from config import GEMINI_RATE_LIMIT_PATH, GEMINI_RPD, GEMINI_RPM
+
+logger = logging.getLogger(__name__)
+
+
+def _day(now):
+    """Quota day key; daily counts reset at midnight UTC."""
+    return time.strftime("%Y-%m-%d", time.gmtime(now))
+
+
+class RateLimiter:
+    """Requests-per-minute token bucket plus requests-per-day counter in SQLite."""
+
+    def __init__(self, name="gemini", rpm=GEMINI_RPM, rpd=GEMINI_RPD, db_path=GEMINI_RATE_LIMIT_PATH):
+        self.name = name
+        self.rpm = max(0, int(rpm))
+        self.rpd = max(0, int(rpd))
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = {}
+        self.errors = 0
+        self.init_db()
+
+    def init_db(self):
+        """Create the bucket table"""
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                day_count INTEGER NOT NULL DEFAULT 0,
+                blocked_until REAL NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _load(self, cursor, now):
+        cursor.execute(
+            'SELECT tokens, updated_at, day, day_count, blocked_until FROM rate_limits WHERE name = ?',
+            (self.name,),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return {"tokens": float(self.rpm), "updated_at": now, "day": _day(now), "day_count": 0, "blocked_until": 0.0}
+        state = dict(zip(("tokens", "updated_at", "day", "day_count", "blocked_until"), row))
+        if self.rpm:
+            elapsed = max(0.0, now - state["updated_at"])
+            state["tokens"] = min(float(self.rpm), state["tokens"] + elapsed * self.rpm / 60.0)
+        if state["day"] != _day(now):
+            state["day"] = _day(now)
+            state["day_count"] = 0
+        state["updated_at"] = now
+        return state
+
+    def _save(self, cursor, state):
+        cursor.execute('''
+            INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at, day, day_count, blocked_until)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (self.name, state["tokens"], state["updated_at"], state["day"], state["day_count"], state["blocked_until"]))
+
+    def acquire(self):
+        """
+        Take one request from the shared budget.
+        Returns {"allowed": bool, "reason": None | "cooldown" | "rpm" | "rpd", "retry_after": seconds}.
+        If the state file cannot be used the request is allowed (the API's own
+        429 handling still applies).
+        """
+        now = time.time()
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            try:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                state = self._load(cursor, now)
+                reason = None
+                retry_after = 0.0
+                if state["blocked_until"] > now:
+                    reason, retry_after = "cooldown", state["blocked_until"] - now
+                elif self.rpd and state["day_count"] >= self.rpd:
+                    reason = "rpd"
+                    retry_after = 86400 - now % 86400
+                elif self.rpm and state["tokens"] < 1:
+                    reason = "rpm"
+                    retry_after = (1 - state["tokens"]) * 60.0 / self.rpm
+                else:
+                    if self.rpm:
+                        state["tokens"] -= 1
+                    state["day_count"] += 1
+                self._save(cursor, state)
+                cursor.execute('COMMIT')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Rate limiter state unavailable, allowing request: %s", e)
+            with self._lock:
+                self.errors += 1
+            return {"allowed": True, "reason": None, "retry_after": 0.0}
+
+        with self._lock:
+            if reason:
+                self.limited[reason] = self.limited.get(reason, 0) + 1
+            else:
+                self.allowed += 1
+        if reason:
+            logger.info("Gemini request refused by rate limiter (%s); retry in %.0fs", reason, retry_after)
+        return {"allowed": reason is None, "reason": reason, "retry_after": retry_after}
+
+    def block(self, seconds):
+        """Refuse every request, in every process, for the next `seconds` (e.g. after a 429)."""
+        now = time.time()
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            try:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                state = self._load(cursor, now)
+                state["blocked_until"] = max(state["blocked_until"], now + seconds)
+                self._save(cursor, state)
+                cursor.execute('COMMIT')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Could not store rate limiter cooldown: %s", e)
+            with self._lock:
+                self.errors += 1
+
+    def stats(self):
+        """Local allowed/limited counters plus the shared bucket state."""
+        now = time.time()
+        shared = {}
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            try:
+                state = self._load(conn.cursor(), now)
+            finally:
+                conn.close()
+            shared = {
+                "tokens": round(state["tokens"], 2),
+                "day_count": state["day_count"],
+                "cooldown_seconds": max(0.0, state["blocked_until"] - now),
+            }
+        except sqlite3.Error as e:
+            logger.warning("Could not read rate limiter state: %s", e)
+        with self._lock:
+            return {
+                "rpm": self.rpm,
+                "rpd": self.rpd,
+                "allowed": self.allowed,
+                "limited": dict(self.limited),
+                "errors": self.errors,
+                **shared,
+            }
@@ -0,0 +1,150 @@
+"""
+Content-addressed cache for image analysis results.
+Gemini and OCR results are stored per analyzer under the image's SHA-256 and
+Telegram file_unique_id, so a re-sent or forwarded receipt/UPI screenshot is
+answered without another OCR pass or Gemini call. Entries expire after a TTL
+and the least recently used ones are evicted above a size limit.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from config import RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_PATH, RESULT_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def image_hash(image_bytes):
+    """SHA-256 key for raw image bytes."""
+    return "sha256:" + hashlib.sha256(image_bytes).hexdigest()
+
+
+def _cache_keys(image_bytes=None, file_unique_id=None):
+    keys = []
+    if file_unique_id:
+        keys.append("tg:" + str(file_unique_id))
+    if image_bytes:
+        keys.append(image_hash(image_bytes))
+    return keys
+
+
+class ResultCache:
+    """SQLite-backed analyzer -> result cache keyed by image content."""
+
+    def __init__(self, db_path=RESULT_CACHE_PATH, ttl=RESULT_CACHE_TTL_SECONDS, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.stores = 0
+        self.evictions = 0
+        self.init_db()
+
+    def init_db(self):
+        """Create the cache table"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                analyzer TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (analyzer, cache_key)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_last_used ON result_cache(last_used_at)')
+        conn.commit()
+        conn.close()
+
+    def get(self, analyzer, image_bytes=None, file_unique_id=None):
+        """Return the cached result for this image, or None on a miss."""
+        keys = _cache_keys(image_bytes, file_unique_id)
+        row = None
+        if keys:
+            now = time.time()
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            placeholders = ",".join("?" for _ in keys)
+            cursor.execute(
+                f'''SELECT cache_key, result FROM result_cache
+                    WHERE analyzer = ? AND cache_key IN ({placeholders}) AND created_at >= ?
+                    ORDER BY last_used_at DESC LIMIT 1''',
+                (analyzer, *keys, now - self.ttl),
+            )
+            row = cursor.fetchone()
+            if row:
+                cursor.execute(
+                    'UPDATE result_cache SET last_used_at = ? WHERE analyzer = ? AND cache_key = ?',
+                    (now, analyzer, row[0]),
+                )
+                conn.commit()
+            conn.close()
+
+        counter = self.hits if row else self.misses
+        with self._lock:
+            counter[analyzer] = counter.get(analyzer, 0) + 1
+        if not row:
+            return None
+        logger.info("Result cache hit for %s (%s)", analyzer, row[0])
+        return json.loads(row[1])
+
+    def put(self, analyzer, result, image_bytes=None, file_unique_id=None):
+        """Store result under every key known for this image."""
+        keys = _cache_keys(image_bytes, file_unique_id)
+        if not keys:
+            return
+        try:
+            payload = json.dumps(result, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning("Result for %s is not cacheable: %s", analyzer, e)
+            return
+
+        now = time.time()
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO result_cache (analyzer, cache_key, result, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(analyzer, key, payload, now, now) for key in keys])
+        evicted = self._evict(cursor, now)
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            self.stores += 1
+            self.evictions += evicted
+
+    def _evict(self, cursor, now):
+        """Drop expired rows, then the least recently used rows above max_entries."""
+        cursor.execute('DELETE FROM result_cache WHERE created_at < ?', (now - self.ttl,))
+        evicted = cursor.rowcount
+        cursor.execute('SELECT COUNT(*) FROM result_cache')
+        excess = cursor.fetchone()[0] - self.max_entries
+        if excess > 0:
+            cursor.execute('''
+                DELETE FROM result_cache WHERE rowid IN (
+                    SELECT rowid FROM result_cache ORDER BY last_used_at ASC LIMIT ?
+                )
+            ''', (excess,))
+            evicted += cursor.rowcount
+        return evicted
+
+    def stats(self):
+        """Hit/miss counters per analyzer plus overall hit rate."""
+        with self._lock:
+            hits = sum(self.hits.values())
+            lookups = hits + sum(self.misses.values())
+            return {
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
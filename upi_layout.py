@@ -0,0 +1,150 @@
+"""
+Region-of-interest OCR for UPI screenshots.
+Payment apps draw a handful of short text lines on a mostly blank screen: the
+amount in the largest font, then payee, payer, time and transaction id below
+it. find_layout() finds those lines once per screenshot from an ink profile of
+a small copy (no OCR): the amount is the tallest line, the fields are the lines
+around and below it, and app chrome far above it is dropped. roi_image() cuts
+those lines out of the full-resolution image and stacks them into one compact
+strip, so the OCR engine reads a fraction of the pixels in the same line order
+the main._extract_upi_* regexes expect. Only PIL and numpy are used.
+"""
+import io
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from config import OCR_MAX_IMAGE_SIDE, OCR_TARGET_TEXT_HEIGHT
+from image_preprocess import ink_mask, load_image
+
+_LAYOUT_WIDTH = 540         # line detection runs on a copy this wide
+_MIN_LINE_PX = 4
+_MIN_ROW_INK = 0.005        # share of a row that must be ink for it to belong to a text line
+_MIN_LINE_ASPECT = 2.5      # width / height of anything read as a text line
+_LINE_GAP_PX = 2            # ink rows this close belong to one line
+_LINES_ABOVE_AMOUNT = 2     # "Paid to" / status lines some apps put above the amount
+_LINES_BELOW_AMOUNT = 10
+_BLOCK_GAP = 4              # blank space, in body line heights, that ends the field block
+_PAD = 0.15                 # padding around each crop, as a fraction of its height
+
+
+def text_lines(gray):
+    """Text line boxes (left, top, right, bottom) in a grayscale PIL image, top to bottom."""
+    pixels = np.asarray(gray)
+    if np.median(pixels) < 128:
+        # Dark mode: light text on a dark screen.
+        gray = Image.fromarray(255 - pixels)
+    # The median filter keeps sensor/JPEG noise from reading as ink on every row.
+    ink = ink_mask(gray.filter(ImageFilter.MedianFilter(3)), radius=8)
+    rows = ink.sum(axis=1) > max(2, ink.shape[1] * _MIN_ROW_INK)
+
+    lines = []
+    top = None
+    gap = 0
+    for y, has_ink in enumerate(np.append(rows, False)):
+        if has_ink:
+            if top is None:
+                top = y
+            gap = 0
+            continue
+        if top is None:
+            continue
+        gap += 1
+        if gap > _LINE_GAP_PX or y == len(rows):
+            bottom = y - gap + 1
+            if bottom - top >= _MIN_LINE_PX:
+                # Columns need a few ink pixels, so leftover noise does not stretch the line.
+                cols = np.flatnonzero(ink[top:bottom].sum(axis=0) >= max(2, (bottom - top) // 8))
+                if len(cols):
+                    lines.append((int(cols[0]), top, int(cols[-1]) + 1, bottom))
+            top = None
+    return lines
+
+
+def find_layout(gray):
+    """
+    Amount line and field lines of a UPI screenshot (boxes in gray's pixels).
+    Returns None when the image does not look like a few lines of text.
+    """
+    # Text lines are wide and short, with a margin on both sides; round icons,
+    # avatars, edge-to-edge bars and anything cut off at the screen border are not.
+    lines = [
+        (left, top, right, bottom) for left, top, right, bottom in text_lines(gray)
+        if right - left >= (bottom - top) * _MIN_LINE_ASPECT
+        and left > 1 and right < gray.width - 1 and top > 1 and bottom < gray.height - 1
+    ]
+    if not lines:
+        return None
+
+    heights = [bottom - top for _, top, _, bottom in lines]
+    # The amount is drawn largest; it sits in the upper part of the screen.
+    upper = [i for i, (_, top, _, _) in enumerate(lines) if top < gray.height * 0.6] or list(range(len(lines)))
+    amount = max(upper, key=lambda i: heights[i])
+    body = float(np.median(heights))
+
+    # The field block ends at the first wide empty gap (buttons and banners sit apart from it).
+    first = amount
+    while first > max(0, amount - _LINES_ABOVE_AMOUNT) and lines[first][1] - lines[first - 1][3] <= body * _BLOCK_GAP:
+        first -= 1
+    last = amount
+    while last < min(len(lines) - 1, amount + _LINES_BELOW_AMOUNT) and lines[last + 1][1] - lines[last][3] <= body * _BLOCK_GAP:
+        last += 1
+
+    fields = []
+    for i in range(first, last + 1):
+        # Skip blocks much taller than body text (logos, QR codes, banners), except the amount.
+        if i != amount and heights[i] > body * 2.5:
+            continue
+        fields.append(lines[i])
+    return {"amount": lines[amount], "fields": fields, "lines": lines, "body_height": body}
+
+
+def roi_image(image, max_side=OCR_MAX_IMAGE_SIDE, target_text_height=OCR_TARGET_TEXT_HEIGHT):
+    """
+    Grayscale PIL image holding only the UPI field lines of a screenshot
+    (bytes, path or PIL image), stacked top to bottom. None when no layout is found.
+    """
+    gray = load_image(image, max_side)
+    small = gray
+    if gray.width > _LAYOUT_WIDTH:
+        small = gray.resize((_LAYOUT_WIDTH, max(1, round(gray.height * _LAYOUT_WIDTH / gray.width))), Image.BOX)
+    layout = find_layout(small)
+    if layout is None:
+        return None
+
+    scale = gray.width / small.width
+    # Body text height is known from the layout, so the crops can be brought to
+    # the OCR text height here (preprocess_image's estimate struggles on noisy strips).
+    resize = min(1.0, target_text_height / (layout["body_height"] * scale)) if target_text_height else 1.0
+    crops = []
+    for left, top, right, bottom in layout["fields"]:
+        pad = max(2, (bottom - top) * _PAD)
+        crop = gray.crop((
+            max(0, int((left - pad) * scale)),
+            max(0, int((top - pad) * scale)),
+            min(gray.width, int((right + pad) * scale) + 1),
+            min(gray.height, int((bottom + pad) * scale) + 1),
+        ))
+        if resize < 1.0:
+            crop = crop.resize((max(1, round(crop.width * resize)), max(1, round(crop.height * resize))), Image.BOX)
+        crops.append(crop)
+
+    background = int(np.median(np.asarray(small)))
+    gap = max(4, min(crop.height for crop in crops) // 4)
+    strip = Image.new("L", (max(crop.width for crop in crops), sum(c.height for c in crops) + gap * (len(crops) + 1)),
+                      background)
+    y = gap
+    for crop in crops:
+        strip.paste(crop, (0, y))
+        y += crop.height + gap
+    return strip
+
+
+def roi_image_bytes(image):
+    """roi_image() as PNG bytes for the OCR pool, or None."""
+    strip = roi_image(image)
+    if strip is None:
+        return None
+    buffer = io.BytesIO()
+    strip.save(buffer, format="PNG")
+    return buffer.getvalue()